@@ -3,13 +3,19 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import argparse
+import itertools
+import os
 import re
 import sys
 from datetime import datetime, timezone
-from typing import IO, Dict, List, Optional, Tuple, Union
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
 
+from cloudinit import performance
 from cloudinit.analyze import dump, show
 from cloudinit.atomic_helper import json_dumps
+from cloudinit.cmd.devel import read_cfg_paths
+
+DEFAULT_LOG_FILE = "/var/log/cloud-init.log"
 
 
 def get_parser(
@@ -31,8 +37,12 @@ def get_parser(
         "--infile",
         action="store",
         dest="infile",
-        default="/var/log/cloud-init.log",
-        help="specify where to read input.",
+        default=None,
+        help=(
+            "specify where to read input. Defaults to the boot trace of the"
+            " current boot when present, unless --boot is given, else to"
+            f" {DEFAULT_LOG_FILE}."
+        ),
     )
     parser_blame.add_argument(
         "-o",
@@ -42,6 +52,18 @@ def get_parser(
         default="-",
         help="specify where to write output. ",
     )
+    parser_blame.add_argument(
+        "-b",
+        "--boot",
+        action="store",
+        dest="boot",
+        type=int,
+        default=None,
+        help=(
+            "only analyze boot record BOOT, counting from 1. Negative values"
+            " count from the most recent boot."
+        ),
+    )
     parser_blame.set_defaults(action=("blame", analyze_blame))
 
     parser_show = subparsers.add_parser(
@@ -60,8 +82,12 @@ def get_parser(
         "--infile",
         action="store",
         dest="infile",
-        default="/var/log/cloud-init.log",
-        help="specify where to read input.",
+        default=None,
+        help=(
+            "specify where to read input. Defaults to the boot trace of the"
+            " current boot when present, unless --boot is given, else to"
+            f" {DEFAULT_LOG_FILE}."
+        ),
     )
     parser_show.add_argument(
         "-o",
@@ -71,6 +97,18 @@ def get_parser(
         default="-",
         help="specify where to write output.",
     )
+    parser_show.add_argument(
+        "-b",
+        "--boot",
+        action="store",
+        dest="boot",
+        type=int,
+        default=None,
+        help=(
+            "only analyze boot record BOOT, counting from 1. Negative values"
+            " count from the most recent boot."
+        ),
+    )
     parser_show.set_defaults(action=("show", analyze_show))
     parser_dump = subparsers.add_parser(
         "dump", help="Dump cloud-init events in JSON format"
@@ -80,8 +118,12 @@ def get_parser(
         "--infile",
         action="store",
         dest="infile",
-        default="/var/log/cloud-init.log",
-        help="specify where to read input. ",
+        default=None,
+        help=(
+            "specify where to read input. Defaults to the boot trace of the"
+            " current boot when present, unless --boot is given, else to"
+            f" {DEFAULT_LOG_FILE}."
+        ),
     )
     parser_dump.add_argument(
         "-o",
@@ -100,7 +142,7 @@ def get_parser(
         "--infile",
         action="store",
         dest="infile",
-        default="/var/log/cloud-init.log",
+        default=DEFAULT_LOG_FILE,
         help="specify where to read input. ",
     )
     parser_boot.add_argument(
@@ -217,15 +259,15 @@ def analyze_blame(name, args: argparse.Namespace) -> None:
     infh, outfh = configure_io(args)
     blame_format = "     %ds (%n)"
     r = re.compile(r"(^\s+\d+\.\d+)", re.MULTILINE)
-    idx = 0
-    for idx, record in enumerate(
-        show.show_events(_get_events(infh), blame_format)
+    count = 0
+    for count, (idx, record) in enumerate(
+        _get_boot_records(infh, args, blame_format), 1
     ):
         srecs = sorted(filter(r.match, record), reverse=True)
-        outfh.write("-- Boot Record %02d --\n" % (idx + 1))
+        outfh.write("-- Boot Record %02d --\n" % idx)
         outfh.write("\n".join(srecs) + "\n")
         outfh.write("\n")
-    outfh.write("%d boot records analyzed\n" % (idx + 1))
+    outfh.write("%d boot records analyzed\n" % count)
     clean_io(infh, outfh)
 
 
@@ -250,10 +292,9 @@ def analyze_show(name, args: argparse.Namespace) -> None:
         Finished stage: (modules-final) 0.NNN seconds
     """
     infh, outfh = configure_io(args)
-    for idx, record in enumerate(
-        show.show_events(_get_events(infh), args.print_format)
-    ):
-        outfh.write("-- Boot Record %02d --\n" % (idx + 1))
+    count = 0
+    for count, (idx, record) in enumerate(_get_boot_records(infh, args), 1):
+        outfh.write("-- Boot Record %02d --\n" % idx)
         outfh.write(
             "The total time elapsed since completing an event is"
             ' printed after the "@" character.\n'
@@ -262,7 +303,7 @@ def analyze_show(name, args: argparse.Namespace) -> None:
             'The time the event takes is printed after the "+" character.\n\n'
         )
         outfh.write("\n".join(record) + "\n")
-    outfh.write("%d boot records analyzed\n" % (idx + 1))
+    outfh.write("%d boot records analyzed\n" % count)
     clean_io(infh, outfh)
 
 
@@ -274,22 +315,102 @@ def analyze_dump(name, args: argparse.Namespace) -> None:
 
 
 def _get_events(infile: IO) -> List[Dict[str, Union[str, float]]]:
-    rawdata = None
-    events, rawdata = show.load_events_infile(infile)
+    first_line = infile.readline()
+    if first_line.strip() and first_line.lstrip()[0] not in "[{":
+        # Plain log file, parse it line by line without loading it whole
+        return list(dump.iter_events(itertools.chain([first_line], infile)))
+    events, rawdata = show.load_events_infile(infile, first_line)
+    if not isinstance(events, list):
+        events = dump.dump_trace_events(rawdata)
     if not events:
         events, _ = dump.dump_events(rawdata=rawdata)
     return events
 
 
+def _get_boot_records(
+    infile: IO, args: argparse.Namespace, print_format: Optional[str] = None
+) -> Iterable[Tuple[int, List[str]]]:
+    """Yield (boot number, records) for each boot record of infile.
+
+    When a single boot is requested with args.boot from a seekable log file,
+    only the lines of that boot are parsed.
+    """
+    boot = getattr(args, "boot", None)
+    raw = _get_seekable_log(infile) if boot is not None else None
+    if boot is not None and raw is not None:
+        offsets = dump.index_boots(raw)
+        idx = _get_boot_index(boot, len(offsets))
+        start = offsets[idx]
+        end = offsets[idx + 1] if idx + 1 < len(offsets) else None
+        raw.seek(start)
+        data = raw.read(-1 if end is None else end - start)
+        events = list(
+            dump.iter_events(data.decode(errors="replace").splitlines())
+        )
+        for record in show.show_events(
+            events, print_format or args.print_format
+        ):
+            yield idx + 1, record
+        return
+
+    events = _get_events(infile)
+    records = show.show_events(events, print_format or args.print_format)
+    if boot is None:
+        yield from enumerate(records, 1)
+    else:
+        idx = _get_boot_index(boot, len(records))
+        yield idx + 1, records[idx]
+
+
+def _get_boot_index(boot: int, count: int) -> int:
+    """Convert a 1-based or negative boot number to a list index."""
+    idx = boot - 1 if boot > 0 else count + boot
+    if boot == 0 or not 0 <= idx < count:
+        sys.stderr.write("Boot record %d not found\n" % boot)
+        sys.exit(1)
+    return idx
+
+
+def _get_seekable_log(infile: IO) -> Optional[IO[bytes]]:
+    """Return the binary buffer of infile if it is a seekable plain log."""
+    raw = getattr(infile, "buffer", None)
+    try:
+        if raw is None or not infile.seekable():
+            return None
+        first_line = infile.readline()
+        infile.seek(0)
+    except (OSError, ValueError):
+        return None
+    if not first_line.strip() or first_line.lstrip()[0] in "[{":
+        return None
+    return raw
+
+
+def _get_default_infile(args: argparse.Namespace) -> str:
+    """Return the boot trace of the current boot when present and no other
+    boot is asked for, else the log file holding all boots.
+    """
+    if getattr(args, "boot", None) is None:
+        trace_file = os.path.join(
+            read_cfg_paths().get_runpath(), performance.TRACE_FILE
+        )
+        if os.path.exists(trace_file):
+            return trace_file
+    return DEFAULT_LOG_FILE
+
+
 def configure_io(args: argparse.Namespace) -> Tuple[IO, IO]:
     """Common parsing and setup of input/output files"""
-    if args.infile == "-":
+    infile = args.infile
+    if infile is None:
+        infile = _get_default_infile(args)
+    if infile == "-":
         infh = sys.stdin
     else:
         try:
-            infh = open(args.infile, "r")
+            infh = open(infile, "r")
         except OSError:
-            sys.stderr.write("Cannot open file %s\n" % args.infile)
+            sys.stderr.write("Cannot open file %s\n" % infile)
             sys.exit(1)
 
     if args.outfile == "-":
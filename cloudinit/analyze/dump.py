@@ -1,10 +1,23 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import calendar
+import functools
+import json
 import logging
+import re
 import sys
 from datetime import datetime, timezone
-from typing import IO, Any, Dict, List, Optional, TextIO, Tuple
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
 from cloudinit import atomic_helper, subp, util
 
@@ -21,6 +34,13 @@ stage_to_description: Dict[str, str] = {
     "single": "running single module ",
 }
 
+# Keys present in every span record of a boot trace file written by
+# cloudinit.performance.flush_trace
+TRACE_SPAN_KEYS = frozenset(("name", "parent", "start", "duration", "stage"))
+
+# Boot trace stage names which differ from the event names used by analyze
+trace_stage_to_name: Dict[str, str] = {"init": "init-network"}
+
 # logger's asctime format
 CLOUD_INIT_ASCTIME_FMT = "%Y-%m-%d %H:%M:%S,%f"
 
@@ -30,17 +50,33 @@ CLOUD_INIT_JOURNALCTL_FMT = "%b %d %H:%M:%S.%f %Y"
 # other
 DEFAULT_FMT = "%b %d %H:%M:%S %Y"
 
+MONTHS = frozenset(calendar.month_abbr[m] for m in range(1, 13))
+
+# Lines which may contain a cloud-init stage or reporting event
+CI_EVENT_RE = re.compile(r"start:|finish:|Cloud-init v\.")
+
+CI_EVENT_BYTES_RE = re.compile(CI_EVENT_RE.pattern.encode())
+
+# Lines which mark the start of a new boot
+BOOT_START_RE = re.compile(
+    rb"Cloud-init v\. .* running 'init-local'|start: init-local: "
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _current_year() -> str:
+    return str(datetime.now().year)
+
 
 def parse_timestamp(timestampstr: str) -> float:
     # default syslog time does not include the current year
-    months = [calendar.month_abbr[m] for m in range(1, 13)]
-    if timestampstr.split()[0] in months:
+    if timestampstr.split()[0] in MONTHS:
         # Aug 29 22:55:26
         FMT = DEFAULT_FMT
         if "." in timestampstr:
             FMT = CLOUD_INIT_JOURNALCTL_FMT
         dt = datetime.strptime(
-            timestampstr + " " + str(datetime.now().year),
+            timestampstr + " " + _current_year(),
             FMT,
         ).replace(tzinfo=timezone.utc)
         timestamp = dt.timestamp()
@@ -51,13 +87,22 @@ def parse_timestamp(timestampstr: str) -> float:
         )
         timestamp = dt.timestamp()
     else:
-        # allow GNU date(1) to handle other formats we don't expect
-        # This may throw a ValueError if no GNU date can be found
-        timestamp = parse_timestamp_from_date(timestampstr)
+        try:
+            # 2016-08-30 21:53:25.972325+00:00
+            dt = datetime.fromisoformat(timestampstr)
+        except ValueError:
+            # allow GNU date(1) to handle other formats we don't expect
+            # This may throw a ValueError if no GNU date can be found
+            timestamp = parse_timestamp_from_date(timestampstr)
+        else:
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            timestamp = dt.timestamp()
 
     return float(timestamp)
 
 
+@functools.lru_cache(maxsize=None)
 def has_gnu_date() -> bool:
     """GNU date includes a string containing the word GNU in it in
     help output. Posix date does not. Use this to indicate on Linux
@@ -180,14 +225,52 @@ def parse_ci_logline(line: str) -> Optional[Dict[str, Any]]:
     return event
 
 
+def iter_events(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Lazily parse events from an iterable of cloud-init log lines.
+
+    Lines are consumed one at a time, so arbitrarily large log files can be
+    processed without reading them into memory.
+    """
+    for line in lines:
+        if not CI_EVENT_RE.search(line):
+            continue
+        try:
+            event = parse_ci_logline(line)
+        except ValueError:
+            sys.stderr.write("Skipping invalid entry\n")
+            continue
+        if event:
+            yield event
+
+
+def index_boots(cisource: IO[bytes]) -> List[int]:
+    """Return the byte offset of the first line of each boot in a log.
+
+    A boot starts at the beginning of the log or at the first 'init-local'
+    stage start following any other event, which matches the boot records
+    generated by cloudinit.analyze.show.generate_records.
+
+    :param cisource: Seekable binary file object positioned at the start of
+        the log.
+    """
+    offsets = [cisource.tell()]
+    offset = offsets[0]
+    seen_event = False
+    for line in cisource:
+        if BOOT_START_RE.search(line):
+            if seen_event:
+                offsets.append(offset)
+            seen_event = False
+        elif not seen_event and CI_EVENT_BYTES_RE.search(line):
+            seen_event = True
+        offset += len(line)
+    return offsets
+
+
 def dump_events(
     cisource: Optional[IO[str]] = None,
     rawdata: Optional[str] = None,
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
-    events = []
-    event = None
-    CI_EVENT_MATCHES = ["start:", "finish:", "Cloud-init v."]
-
     if not any([cisource, rawdata]):
         raise ValueError("Either cisource or rawdata parameters are required")
 
@@ -200,17 +283,70 @@ def dump_events(
             "Either cisource or rawdata parameters must have a value"
         )
 
-    for line in data:
-        for match in CI_EVENT_MATCHES:
-            if match in line:
-                try:
-                    event = parse_ci_logline(line)
-                except ValueError:
-                    sys.stderr.write("Skipping invalid entry\n")
-                if event:
-                    events.append(event)
-
-    return events, data
+    return list(iter_events(data)), data
+
+
+def parse_trace_spans(rawdata: str) -> Optional[List[Dict[str, Any]]]:
+    """Parse span records from the content of a boot trace file.
+
+    :return: List of span dicts, or None when rawdata is not a boot trace.
+    """
+    spans = []
+    for line in rawdata.splitlines():
+        if not line.strip():
+            continue
+        try:
+            span = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(span, dict) or not TRACE_SPAN_KEYS <= span.keys():
+            return None
+        spans.append(span)
+    return spans or None
+
+
+def _trace_event(event_type: str, span: Dict[str, Any]) -> Dict[str, Any]:
+    stage = trace_stage_to_name.get(span["stage"], span["stage"])
+    if span["parent"] is None:
+        name = stage
+        description = stage_to_description.get(stage, span["name"])
+    else:
+        name = "%s/%s" % (stage, span["name"])
+        description = span["name"]
+    event = {
+        "name": name,
+        "description": description,
+        "timestamp": float(span["start"]),
+        "origin": "cloudinit",
+        "event_type": event_type,
+    }
+    if event_type == "finish":
+        event["timestamp"] += float(span["duration"])
+        event["result"] = "SUCCESS"
+    return event
+
+
+def dump_trace_events(rawdata: str) -> Optional[List[Dict[str, Any]]]:
+    """Convert a boot trace file to start and finish events.
+
+    Spans are ordered by start time and nested by their time intervals so
+    that each child's events sit between the events of its parent.
+
+    :return: List of events, or None when rawdata is not a boot trace.
+    """
+    spans = parse_trace_spans(rawdata)
+    if not spans:
+        return None
+    events = []
+    open_spans: List[Tuple[float, Dict[str, Any]]] = []
+    for span in sorted(spans, key=lambda s: (s["start"], -s["duration"])):
+        while open_spans and open_spans[-1][0] <= span["start"]:
+            events.append(_trace_event("finish", open_spans.pop()[1]))
+        events.append(_trace_event("start", span))
+        open_spans.append((span["start"] + span["duration"], span))
+    while open_spans:
+        events.append(_trace_event("finish", open_spans.pop()[1]))
+    return events
 
 
 def main() -> str:
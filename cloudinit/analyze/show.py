@@ -418,15 +418,18 @@ def show_events(events: List[Event], print_format: str) -> List[List[str]]:
     return generate_records(events, print_format=print_format)
 
 
-def load_events_infile(infile: IO) -> Tuple[Optional[Any], str]:
+def load_events_infile(
+    infile: IO, head: str = ""
+) -> Tuple[Optional[Any], str]:
     """
     Takes in a log file, read it, and convert to json.
 
     :param infile: The Log file to be read
+    :param head: Content already read from infile, prepended to the data
 
     :return: json version of logfile, raw file
     """
-    data = infile.read()
+    data = head + infile.read()
     if not data.strip():
         sys.stderr.write("Empty file %s\n" % infile.name)
         sys.exit(1)
@@ -90,6 +90,53 @@ def json_serialize_default(_obj):
         return "Warning: redacted unserializable type {0}".format(type(_obj))
 
 
+def json_compatible(data):
+    """Return data as json.loads(json_dumps(data)) would, without the json.
+
+    Dicts and lists are copied, keys are converted to strings and values
+    json cannot serialize are replaced by json_serialize_default.
+
+    :raises: TypeError on keys json_dumps cannot serialize or sort.
+    """
+    if isinstance(data, str):
+        return data if type(data) is str else str.__str__(data)
+    if data is None or data is True or data is False:
+        return data
+    if isinstance(data, int):
+        return data if type(data) is int else int(data)
+    if isinstance(data, float):
+        return data if type(data) is float else float(data)
+    if isinstance(data, (list, tuple)):
+        return [json_compatible(item) for item in data]
+    if isinstance(data, dict):
+        if all(type(key) is str for key in data):
+            return {key: json_compatible(value) for key, value in data.items()}
+        # Keys are sorted before conversion and the last duplicate wins
+        return {
+            _json_key(key): json_compatible(data[key]) for key in sorted(data)
+        }
+    return json_compatible(json_serialize_default(data))
+
+
+def _json_key(key) -> str:
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return json.dumps(key)
+    raise TypeError(
+        "keys must be str, int, float, bool or None, not"
+        f" {type(key).__name__}"
+    )
+
+
 @performance.timed("Dumping json")
 def json_dumps(data):
     """Return data in nicely formatted json."""
@@ -70,6 +70,10 @@ class Cloud:
         """
         return self._runners.run(name, functor, args, freq, clear_on_fail)
 
+    def has_run(self, name, freq=None):
+        """Return whether run() would skip name for the given frequency."""
+        return self._runners.has_run(name, freq)
+
     def get_template_filename(self, name):
         fn = self.paths.template_tpl % (name)
         if not os.path.isfile(fn):
@@ -7,6 +7,7 @@
 """Define 'collect-logs' utility and handler to include in cloud-init cmd."""
 
 import argparse
+import functools
 import itertools
 import logging
 import os
@@ -14,17 +15,43 @@ import pathlib
 import stat
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterator, List, NamedTuple, Optional, cast
-
+from tarfile import TarFile
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from cloudinit import performance
 from cloudinit.log import loggers
 from cloudinit.stages import Init
 from cloudinit.subp import ProcessExecutionError, subp
 from cloudinit.temp_utils import tempdir
-from cloudinit.util import copy, get_config_logfiles, write_file
+from cloudinit.util import get_config_logfiles, write_file
 
 LOG = cast(loggers.CustomLoggerType, logging.getLogger(__name__))
 
+MIB = 1024 * 1024
+
+# Default size caps, in bytes, of a single collected item and of the sum of
+# all collected items before compression
+DEFAULT_MAX_ITEM_SIZE = 100 * MIB
+DEFAULT_MAX_TOTAL_SIZE = 1024 * MIB
+
+# Markers written in place of the data dropped from truncated items
+TRUNCATED_FILE_MARKER = "[collect-logs: truncated, first {} bytes omitted]\n"
+TRUNCATED_OUTPUT_MARKER = "\n[collect-logs: truncated after {} bytes]\n"
+
 
 class ApportFile(NamedTuple):
     path: str
@@ -130,9 +157,150 @@ def get_parser(
             "root read-only files."
         ),
     )
+    parser.add_argument(
+        "--max-item-size",
+        default=DEFAULT_MAX_ITEM_SIZE // MIB,
+        type=int,
+        help=(
+            "Maximum size in MiB of each collected file or command output."
+            " Larger items are truncated. 0 means unlimited."
+            f" Default: {DEFAULT_MAX_ITEM_SIZE // MIB}"
+        ),
+    )
+    parser.add_argument(
+        "--max-total-size",
+        default=DEFAULT_MAX_TOTAL_SIZE // MIB,
+        type=int,
+        help=(
+            "Maximum size in MiB of all collected data before compression."
+            " Items beyond this limit are truncated or skipped. 0 means"
+            f" unlimited. Default: {DEFAULT_MAX_TOTAL_SIZE // MIB}"
+        ),
+    )
     return parser
 
 
+class _PrefixedReader:
+    """File-like reader returning prefix followed by the content of fileobj.
+
+    Used to prepend a truncation marker to truncated files while streaming
+    them into the tarball.
+    """
+
+    def __init__(self, prefix: bytes, fileobj: IO[bytes]):
+        self._prefix = prefix
+        self._fileobj = fileobj
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            data, self._prefix = self._prefix, b""
+            return data + self._fileobj.read()
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        if len(data) < size:
+            data += self._fileobj.read(size - len(data))
+        return data
+
+
+class _PaddedReader:
+    """File-like reader returning exactly size bytes of fileobj.
+
+    Content beyond size is left out, and NUL bytes are returned once fileobj
+    ends early. tarfile requires members to match the size in their header,
+    which is written before their content is streamed, while a log can be
+    truncated as it is collected.
+    """
+
+    def __init__(self, fileobj: Any, size: int):
+        self._fileobj = fileobj
+        self._remaining = size
+        self.padding = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fileobj.read(size) if size else b""
+        if len(data) < size:
+            self.padding += size - len(data)
+            data += bytes(size - len(data))
+        self._remaining -= size
+        return data
+
+
+class LogArchive:
+    """Gzipped tarball which collected files are streamed into.
+
+    Files are read directly from their original location. Files larger than
+    max_item_size, or which would exceed max_total_size of data collected so
+    far, keep only their most recent (trailing) bytes, prefixed with a
+    truncation marker. Once max_total_size is reached, further files are
+    skipped. Files which shrink while they are streamed are padded with NUL
+    bytes to the size they had when their collection started.
+
+    :param tar: TarFile opened for writing.
+    :param dir_name: Name of the top-level directory within the tarball.
+    :param max_item_size: Size cap in bytes of each file, or 0 for no cap.
+    :param max_total_size: Size cap in bytes of all files, or 0 for no cap.
+    """
+
+    def __init__(
+        self,
+        tar: TarFile,
+        dir_name: str,
+        max_item_size: int = DEFAULT_MAX_ITEM_SIZE,
+        max_total_size: int = DEFAULT_MAX_TOTAL_SIZE,
+    ):
+        self.tar = tar
+        self.dir_name = dir_name
+        self.max_item_size = max_item_size
+        self.max_total_size = max_total_size
+        self.total_size = 0
+
+    def _size_limit(self) -> Optional[int]:
+        """Return the size cap of the next item, or None when uncapped."""
+        limits = []
+        if self.max_item_size:
+            limits.append(self.max_item_size)
+        if self.max_total_size:
+            limits.append(max(self.max_total_size - self.total_size, 0))
+        return min(limits) if limits else None
+
+    def add(self, path: pathlib.Path, arcname: str) -> None:
+        """Stream the file at path into the tarball as dir_name/arcname."""
+        limit = self._size_limit()
+        with path.open("rb") as f:
+            info = self.tar.gettarinfo(
+                arcname=os.path.join(self.dir_name, arcname), fileobj=f
+            )
+            fileobj: Any = f
+            if limit is not None and info.size > limit:
+                marker = TRUNCATED_FILE_MARKER.format(info.size).encode()
+                kept = limit - len(marker)
+                if kept <= 0:
+                    LOG.warning(
+                        "Total size limit reached, file %s was not collected",
+                        path,
+                    )
+                    return
+                f.seek(info.size - kept)
+                fileobj = _PrefixedReader(marker, f)
+                LOG.warning(
+                    "Truncated %s from %d to %d bytes",
+                    path,
+                    info.size,
+                    kept,
+                )
+                info.size = kept + len(marker)
+            reader = _PaddedReader(fileobj, info.size)
+            self.tar.addfile(info, reader)
+        if reader.padding:
+            LOG.warning(
+                "%s shrank while collected, padded with %d NUL bytes",
+                path,
+                reader.padding,
+            )
+        self.total_size += info.size
+
+
 def _write_command_output_to_file(
     cmd: List[str],
     file_path: pathlib.Path,
@@ -153,17 +321,40 @@ def _write_command_output_to_file(
 
 
 def _stream_command_output_to_file(
-    cmd: List[str], file_path: pathlib.Path, msg: str
+    cmd: List[str],
+    file_path: pathlib.Path,
+    msg: str,
+    max_size: int = 0,
 ) -> None:
     """Helper which runs a command and writes output or error to filename.
 
-    `subprocess.call` is invoked directly here to stream output to the file.
-    Otherwise memory usage can be high for large outputs.
+    Output is streamed to the file rather than held in memory, since it can
+    be large. When max_size is set, the command is killed once its output
+    exceeds max_size bytes, and a truncation marker ends the file.
     """
     file_path.parent.mkdir(parents=True, exist_ok=True)
+    marker = TRUNCATED_OUTPUT_MARKER.format(max_size).encode()
+    remaining = max(max_size - len(marker), 0) if max_size else None
     try:
-        with file_path.open("w") as f:
-            subprocess.call(cmd, stdout=f, stderr=f)  # nosec B603
+        with file_path.open("wb") as f, subprocess.Popen(  # nosec B603
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        ) as proc:
+            stdout = cast(IO[bytes], proc.stdout)
+            while True:
+                chunk = stdout.read(MIB)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    if len(chunk) > remaining:
+                        f.write(chunk[:remaining])
+                        f.write(marker)
+                        proc.kill()
+                        LOG.warning(
+                            "Truncated %s after %d bytes", msg, max_size
+                        )
+                        break
+                    remaining -= len(chunk)
+                f.write(chunk)
     except OSError as e:
         write_file(file_path, str(e))
         LOG.debug("collecting %s failed.", msg)
@@ -172,13 +363,12 @@ def _stream_command_output_to_file(
 
 
 def _collect_file(
-    path: pathlib.Path, out_dir: pathlib.Path, include_sensitive: bool
+    archive: LogArchive, path: pathlib.Path, include_sensitive: bool
 ) -> None:
-    """Collect a file into what will be the tarball."""
+    """Collect a file into the tarball, at its path relative to /."""
     if path.is_file():
         if include_sensitive or path.stat().st_mode & stat.S_IROTH:
-            out_dir.mkdir(parents=True, exist_ok=True)
-            copy(path, out_dir)
+            archive.add(path, str(path.relative_to("/")))
             LOG.debug("collected file: %s", path)
         else:
             LOG.trace("sensitive file %s was not collected", path)
@@ -187,22 +377,20 @@ def _collect_file(
 
 
 def _collect_installer_logs(
-    log_dir: pathlib.Path, include_sensitive: bool
+    archive: LogArchive, include_sensitive: bool
 ) -> None:
     """Obtain subiquity logs and config files."""
     for src_file in INSTALLER_APPORT_FILES:
-        destination_dir = pathlib.Path(log_dir, src_file.path[1:]).parent
         _collect_file(
+            archive,
             pathlib.Path(src_file.path),
-            destination_dir,
             include_sensitive=True,  # Because this function does check
         )
     if include_sensitive:
         for src_file in INSTALLER_APPORT_SENSITIVE_FILES:
-            destination_dir = pathlib.Path(log_dir, src_file.path[1:]).parent
             _collect_file(
+                archive,
                 pathlib.Path(src_file.path),
-                destination_dir,
                 include_sensitive=True,  # Because this function does check
             )
 
@@ -223,26 +411,45 @@ def _collect_version_info(log_dir: pathlib.Path) -> None:
         version = dpkg_ver or "not-available"
 
 
-def _collect_system_logs(
-    log_dir: pathlib.Path, include_sensitive: bool
-) -> None:
-    """Include dmesg and journalctl output in the logs."""
+def _get_system_log_collectors(
+    log_dir: pathlib.Path, include_sensitive: bool, max_size: int
+) -> List[Tuple[str, Callable[[], None]]]:
+    """Get (description, collector) of dmesg and journalctl output."""
+    commands = [
+        (
+            ["journalctl", "--boot=0", "-o", "short-precise"],
+            "journal.txt",
+            "systemd journal of current boot",
+        ),
+        (
+            ["journalctl", "--boot=-1", "-o", "short-precise"],
+            "journal-previous.txt",
+            "systemd journal of previous boot",
+        ),
+    ]
     if include_sensitive:
-        _stream_command_output_to_file(
-            cmd=["dmesg"],
-            file_path=log_dir / "dmesg.txt",
-            msg="dmesg output",
+        commands.insert(0, (["dmesg"], "dmesg.txt", "dmesg output"))
+    return [
+        (
+            msg,
+            functools.partial(
+                _stream_command_output_to_file,
+                cmd=cmd,
+                file_path=log_dir / name,
+                msg=msg,
+                max_size=max_size,
+            ),
         )
-    _stream_command_output_to_file(
-        cmd=["journalctl", "--boot=0", "-o", "short-precise"],
-        file_path=log_dir / "journal.txt",
-        msg="systemd journal of current boot",
-    )
-    _stream_command_output_to_file(
-        cmd=["journalctl", "--boot=-1", "-o", "short-precise"],
-        file_path=pathlib.Path(log_dir, "journal-previous.txt"),
-        msg="systemd journal of previous boot",
-    )
+        for cmd, name, msg in commands
+    ]
+
+
+def _collect_files(
+    archive: LogArchive, paths: Iterable[pathlib.Path], include_sensitive: bool
+) -> None:
+    """Collect each of the files in paths into the tarball."""
+    for path in paths:
+        _collect_file(archive, path, include_sensitive)
 
 
 def _get_cloudinit_logs(
@@ -298,37 +505,79 @@ def _get_run_dir(run_dir: pathlib.Path) -> Iterator[pathlib.Path]:
     return run_dir.glob("*")
 
 
-def _collect_logs_into_tmp_dir(
-    log_dir: pathlib.Path,
+def _run_collector(msg: str, collector: Callable[[], None]) -> None:
+    """Run a collector and report how long it took."""
+    with performance.Timed(msg, log_mode="skip") as timer:
+        collector()
+    LOG.debug("collecting %s took %.3f seconds", msg, timer.delta)
+
+
+def _collect_logs_into_archive(
+    archive: LogArchive,
+    tmp_dir: pathlib.Path,
     log_cfg: Dict[str, Any],
     run_dir: pathlib.Path,
     cloud_dir: pathlib.Path,
     include_sensitive: bool,
 ) -> None:
-    """Collect all cloud-init logs into the provided directory."""
-    _collect_version_info(log_dir)
-    _collect_system_logs(log_dir, include_sensitive)
-    _collect_installer_logs(log_dir, include_sensitive)
+    """Collect all cloud-init logs into the provided archive.
 
-    for logfile in _get_cloudinit_logs(log_cfg):
+    Command outputs are captured concurrently into tmp_dir while files are
+    streamed into the archive, then the command outputs are archived too.
+    They cannot be piped into the archive directly: the size of a member is
+    written before its content, and the compressed archive cannot be seeked
+    back into once the output length is known.
+    """
+    command_collectors: List[Tuple[str, Callable[[], None]]] = [
+        (
+            "cloud-init version",
+            functools.partial(_collect_version_info, tmp_dir),
+        ),
+        *_get_system_log_collectors(
+            tmp_dir, include_sensitive, archive.max_item_size
+        ),
+    ]
+    file_collectors: List[Tuple[str, Callable[[], None]]] = [
+        (
+            "installer logs",
+            functools.partial(
+                _collect_installer_logs, archive, include_sensitive
+            ),
+        ),
         # Even though log files are root read-only, the logs tarball
         # would be useless without them and we've been careful to not
         # include sensitive data in them.
-        _collect_file(
-            logfile,
-            log_dir / pathlib.Path(logfile).parent.relative_to("/"),
-            True,
-        )
-    for logfile in itertools.chain(
-        _get_etc_cloud(),
-        _get_var_lib_cloud(cloud_dir=cloud_dir),
-        _get_run_dir(run_dir=run_dir),
-    ):
-        _collect_file(
-            logfile,
-            log_dir / pathlib.Path(logfile).parent.relative_to("/"),
-            include_sensitive,
-        )
+        (
+            "cloud-init logs",
+            functools.partial(
+                _collect_files, archive, _get_cloudinit_logs(log_cfg), True
+            ),
+        ),
+        (
+            "cloud-init files",
+            functools.partial(
+                _collect_files,
+                archive,
+                itertools.chain(
+                    _get_etc_cloud(),
+                    _get_var_lib_cloud(cloud_dir=cloud_dir),
+                    _get_run_dir(run_dir=run_dir),
+                ),
+                include_sensitive,
+            ),
+        ),
+    ]
+    with ThreadPoolExecutor(max_workers=len(command_collectors)) as executor:
+        futures = [
+            executor.submit(_run_collector, msg, collector)
+            for msg, collector in command_collectors
+        ]
+        for msg, collector in file_collectors:
+            _run_collector(msg, collector)
+        for future in futures:
+            future.result()
+    for path in sorted(tmp_dir.iterdir()):
+        archive.add(path, path.name)
 
 
 def collect_logs(
@@ -337,6 +586,8 @@ def collect_logs(
     run_dir: pathlib.Path = pathlib.Path("/run/cloud-init"),
     cloud_dir: pathlib.Path = pathlib.Path("/var/lib/cloud"),
     include_sensitive: bool = True,
+    max_item_size: int = DEFAULT_MAX_ITEM_SIZE,
+    max_total_size: int = DEFAULT_MAX_TOTAL_SIZE,
 ) -> None:
     """Collect all cloud-init logs and tar them up into the provided tarfile.
 
@@ -345,30 +596,24 @@ def collect_logs(
     :param run_dir: The path to the cloud-init run directory.
     :param cloud_dir: The path to the cloud-init cloud directory.
     :param include_sensitive: Boolean, true means include sensitive data.
+    :param max_item_size: Size cap in bytes of each collected item, 0 means
+        unlimited.
+    :param max_total_size: Size cap in bytes of all collected items before
+        compression, 0 means unlimited.
     """
     tarfile = os.path.abspath(tarfile)
     dir_name = (
         datetime.now(timezone.utc).date().strftime("cloud-init-logs-%Y-%m-%d")
     )
-    with tempdir(dir=run_dir) as tmp_dir:
-        log_dir = pathlib.Path(tmp_dir, dir_name)
-        _collect_logs_into_tmp_dir(
-            log_dir=log_dir,
+    with tempdir(dir=run_dir) as tmp_dir, TarFile.open(tarfile, "w:gz") as tar:
+        _collect_logs_into_archive(
+            archive=LogArchive(tar, dir_name, max_item_size, max_total_size),
+            tmp_dir=pathlib.Path(tmp_dir),
             log_cfg=log_cfg,
             run_dir=run_dir,
             cloud_dir=cloud_dir,
             include_sensitive=include_sensitive,
         )
-        subp(
-            [
-                "tar",
-                "czf",
-                tarfile,
-                "-C",
-                tmp_dir,
-                str(log_dir).replace(f"{tmp_dir}/", ""),
-            ]
-        )
     LOG.info("Wrote %s", tarfile)
 
 
@@ -396,6 +641,8 @@ def collect_logs_cli(
     verbosity: int = 0,
     redact_sensitive: bool = True,
     include_userdata: bool = False,
+    max_item_size: int = DEFAULT_MAX_ITEM_SIZE,
+    max_total_size: int = DEFAULT_MAX_TOTAL_SIZE,
 ) -> None:
     """Handle calls to 'cloud-init collect-logs' as a subcommand."""
     _setup_logger(verbosity)
@@ -414,6 +661,8 @@ def collect_logs_cli(
         run_dir=pathlib.Path(init.paths.run_dir),
         cloud_dir=pathlib.Path(init.paths.cloud_dir),
         include_sensitive=not redact_sensitive,
+        max_item_size=max_item_size,
+        max_total_size=max_total_size,
     )
     if not redact_sensitive:
         LOG.warning(
@@ -436,6 +685,8 @@ def handle_collect_logs_args(_name: str, args: argparse.Namespace) -> int:
             tarfile=args.tarfile,
             redact_sensitive=args.redact_sensitive,
             include_userdata=args.userdata,
+            max_item_size=args.max_item_size * MIB,
+            max_total_size=args.max_total_size * MIB,
         )
         return 0
     except Exception as e:
@@ -6,7 +6,13 @@
 
 import argparse
 
-from cloudinit.cmd.devel import hotplug_hook, make_mime, net_convert, render
+from cloudinit.cmd.devel import (
+    hotplug_hook,
+    make_mime,
+    net_convert,
+    query_service,
+    render,
+)
 
 
 def get_parser(parser=None):
@@ -38,6 +44,12 @@ def get_parser(parser=None):
             make_mime.get_parser,
             make_mime.handle_args,
         ),
+        (
+            query_service.NAME,
+            query_service.__doc__,
+            query_service.get_parser,
+            query_service.handle_args,
+        ),
     ]
     for subcmd, helpmsg, get_parser, handler in subcmds:
         parser = subparsers.add_parser(subcmd, help=helpmsg)
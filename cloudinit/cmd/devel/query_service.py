@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Answer cloud-init query commands from a warm process."""
+
+import argparse
+import importlib
+import logging
+import os
+import pwd
+import signal
+import socket
+import struct
+import sys
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional, Union
+
+from cloudinit.cmd import query_client
+from cloudinit.cmd.devel import read_cfg_paths
+from cloudinit.cmd.query_client import (
+    QueryServiceError,
+    receive_message,
+    send_message,
+)
+from cloudinit.handlers import jinja_template
+from cloudinit.log import loggers
+
+NAME = "query-service"
+
+LOG = logging.getLogger(__name__)
+
+# Imported up front so that forked commands start with them loaded
+PRELOADED_MODULES = (
+    "cloudinit.cmd.main",
+    "cloudinit.cmd.cloud_id",
+    "cloudinit.cmd.query",
+    "cloudinit.cmd.status",
+    "cloudinit.config.schema",
+)
+
+# First file descriptor passed by systemd socket activation
+SD_LISTEN_FDS_START = 3
+
+# Seconds allowed for a client to send its request
+REQUEST_TIMEOUT = 5
+
+
+def _run_cloud_init(argv: List[str]):
+    from cloudinit.cmd import main
+
+    return main.main(argv)
+
+
+def _run_cloud_id(argv: List[str]):
+    from cloudinit.cmd import cloud_id
+
+    return cloud_id.main()
+
+
+COMMANDS: Dict[str, Callable[[List[str]], Optional[int]]] = {
+    "cloud-init": _run_cloud_init,
+    "cloud-id": _run_cloud_id,
+}
+
+
+def get_parser(parser=None):
+    """Build or extend an arg parser for the query-service utility.
+
+    @param parser: Optional existing ArgumentParser instance representing the
+        subcommand which will be extended to support the args of this utility.
+
+    @returns: ArgumentParser with proper argument configuration.
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(prog=NAME, description=__doc__)
+    parser.add_argument(
+        "-s",
+        "--socket",
+        default=query_client.SOCKET_PATH,
+        help=(
+            "Path of the socket to listen on when not started by systemd"
+            f" socket activation. Default: {query_client.SOCKET_PATH}"
+        ),
+    )
+    return parser
+
+
+def listen(socket_path: str) -> socket.socket:
+    """Return the socket passed by systemd, or listen on socket_path."""
+    if os.environ.get("LISTEN_PID") == str(os.getpid()) and os.environ.get(
+        "LISTEN_FDS"
+    ):
+        for name in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+            os.environ.pop(name, None)
+        return socket.socket(fileno=SD_LISTEN_FDS_START)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(socket_path)
+    # Any user may run the commands, with their own credentials
+    os.chmod(socket_path, 0o666)
+    sock.listen()
+    return sock
+
+
+def warm_caches():
+    """Load what the commands read on every run into this process.
+
+    Forked commands share whatever is loaded here. The instance-data caches
+    check the files for changes before reusing their content, so reloading
+    only happens when the files changed since the previous command.
+    """
+    paths = read_cfg_paths()
+    for key in ("instance_data", "instance_data_sensitive"):
+        instance_data_fn = paths.get_runpath(key)
+        if not os.path.exists(instance_data_fn):
+            continue
+        try:
+            jinja_template.load_instance_data(instance_data_fn)
+        except (OSError, ValueError) as e:
+            LOG.debug("Not caching %s: %s", instance_data_fn, e)
+
+
+def _validate_request(request: dict, fds: list):
+    if len(fds) != 3:
+        raise QueryServiceError("Expected standard input, output and error")
+    command = request.get("command")
+    argv = request.get("argv")
+    env = request.get("env")
+    if command not in COMMANDS:
+        raise QueryServiceError(f"Unknown command: {command}")
+    if not isinstance(argv, list) or not all(
+        isinstance(arg, str) for arg in argv
+    ):
+        raise QueryServiceError("Invalid argv")
+    if not query_client.is_forwarded(command, argv):
+        raise QueryServiceError(f"Not a query command: {argv}")
+    if not isinstance(request.get("cwd"), str):
+        raise QueryServiceError("Invalid cwd")
+    if not isinstance(env, dict) or not all(
+        isinstance(k, str) and isinstance(v, str) for k, v in env.items()
+    ):
+        raise QueryServiceError("Invalid env")
+
+
+def _assume_client(request: dict, fds: list, uid: int, gid: int):
+    """Take on the credentials, directory, environment and streams of the
+    client in this forked child.
+    """
+    if (uid, gid) != (os.geteuid(), os.getegid()):
+        if os.geteuid() != 0:
+            raise PermissionError(f"Cannot run commands for uid {uid}")
+        try:
+            groups = os.getgrouplist(pwd.getpwuid(uid).pw_name, gid)
+        except KeyError:
+            groups = [gid]
+        os.setgroups(groups)
+        os.setgid(gid)
+        os.setuid(uid)
+    if uid != 0:
+        # Root may have cached sensitive instance-data the client cannot read
+        jinja_template._INSTANCE_DATA_CACHE.clear()
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    loggers.reset_logging()
+
+
+def _call(command: str, argv: List[str]) -> int:
+    """Run command like the interpreter runs a script, returning the exit
+    code.
+    """
+    sys.argv = argv
+    exit_code: Union[int, str, None]
+    try:
+        exit_code = COMMANDS[command](argv)
+    except SystemExit as e:
+        exit_code = e.code
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    if exit_code is None:
+        exit_code = 0
+    elif not isinstance(exit_code, int):
+        print(exit_code, file=sys.stderr)
+        exit_code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return exit_code
+
+
+def _exit_on_disconnect(conn: socket.socket):
+    """Stop the command when the client goes away, as on Ctrl-C."""
+    try:
+        while conn.recv(1):
+            pass
+    except OSError:
+        pass
+    os._exit(130)
+
+
+def _run_request(conn: socket.socket, request: dict, fds: list, uid, gid):
+    try:
+        _assume_client(request, fds, uid, gid)
+    except OSError as e:
+        send_message(conn, {"accepted": False, "error": str(e)})
+        return
+    send_message(conn, {"accepted": True})
+    threading.Thread(
+        target=_exit_on_disconnect, args=(conn,), daemon=True
+    ).start()
+    exit_code = _call(request["command"], request["argv"])
+    send_message(conn, {"exit_code": exit_code})
+
+
+def _handle_request(conn: socket.socket):
+    """Read the request on conn and run it, in a forked child."""
+    creds = conn.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _pid, uid, gid = struct.unpack("3i", creds)
+    fds: list = []
+    try:
+        conn.settimeout(REQUEST_TIMEOUT)
+        request, fds = receive_message(conn, bytearray())
+        _validate_request(request, fds)
+        conn.settimeout(None)
+    except (OSError, QueryServiceError) as e:
+        LOG.warning("Refusing query service request: %s", e)
+        try:
+            send_message(conn, {"accepted": False, "error": str(e)})
+        except OSError:
+            pass
+        for fd in fds:
+            os.close(fd)
+        return
+    _run_request(conn, request, fds, uid, gid)
+
+
+def handle_connection(
+    conn: socket.socket, listener: Optional[socket.socket] = None
+) -> int:
+    """Read and run the request on conn in a forked child, so that a slow
+    or idle client cannot hold up other connections.
+
+    @param listener: The listening socket, closed in the child before it
+        takes on the credentials of the client.
+
+    @returns: The pid of the child.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    child = os.fork()
+    if child == 0:
+        try:
+            if listener is not None:
+                listener.close()
+            _handle_request(conn)
+        finally:
+            os._exit(0)
+    return child
+
+
+def serve(sock: socket.socket):
+    # Forked commands are never waited for
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while True:
+        try:
+            warm_caches()
+        except Exception as e:
+            LOG.warning("Failed to load cloud-init data: %s", e)
+        conn, _ = sock.accept()
+        with conn:
+            handle_connection(conn, sock)
+
+
+def handle_args(_name, args):
+    for module in PRELOADED_MODULES:
+        importlib.import_module(module)
+    serve(listen(args.socket))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(handle_args(NAME, get_parser().parse_args()))
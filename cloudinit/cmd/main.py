@@ -13,6 +13,7 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import argparse
+import contextlib
 import json
 import os
 import sys
@@ -443,6 +444,50 @@ def _should_wait_on_network(
     )
 
 
+class StageHandoff:
+    """Hands the Init of a boot stage over to the next one.
+
+    When all stages run in a single process, later stages reuse the Init of
+    the stage before them, along with its datasource, distro and paths,
+    rather than creating them again from files on disk.
+    """
+
+    def __init__(self):
+        self.init: Optional[stages.Init] = None
+
+    @contextlib.contextmanager
+    def stage(self, args):
+        args.handoff = self
+        try:
+            yield
+        except BaseException:
+            # What the stage left behind may be half updated
+            self.init = None
+            raise
+
+
+def _stage_init(args, ds_deps) -> stages.Init:
+    """Return the Init of a boot stage, with its config read."""
+    handoff = getattr(args, "handoff", None)
+    if handoff is None or handoff.init is None:
+        init = stages.Init(ds_deps=ds_deps, reporter=args.reporter)
+        init.read_cfg(extract_fns(args))
+        if handoff is not None:
+            handoff.init = init
+        return init
+    init = handoff.init
+    LOG.debug("Reusing state of the previous boot stage")
+    init.ds_deps = ds_deps
+    init.reporter = args.reporter
+    # The previous stage may have changed config: consuming user-data
+    # writes cloud-config and its modules may write any file.
+    init.reload_cfg(extract_fns(args))
+    if init.datasource is not None:
+        # As if restored from the cache written by the previous stage
+        init.ds_restored = True
+    return init
+
+
 def main_init(name, args):
     deps = [sources.DEP_FILESYSTEM, sources.DEP_NETWORK]
     if args.local:
@@ -472,9 +517,8 @@ def main_init(name, args):
     # 11. Done!
     bootstage_name = "init-local" if args.local else "init"
     w_msg = welcome_format(bootstage_name)
-    init = stages.Init(ds_deps=deps, reporter=args.reporter)
     # Stage 1
-    init.read_cfg(extract_fns(args))
+    init = _stage_init(args, deps)
     # Stage 2
     outfmt = None
     errfmt = None
@@ -769,9 +813,8 @@ def main_modules(action_name, args):
     # 6. Done!
     bootstage_name = "%s:%s" % (action_name, name)
     w_msg = welcome_format(bootstage_name)
-    init = stages.Init(ds_deps=[], reporter=args.reporter)
     # Stage 1
-    init.read_cfg(extract_fns(args))
+    init = _stage_init(args, [])
     # Stage 2
     try:
         init.fetch(existing="trust")
@@ -891,7 +934,11 @@ def main_single(name, args):
 
 
 def status_wrapper(name, args):
-    paths = read_cfg_paths()
+    handoff = getattr(args, "handoff", None)
+    if handoff is not None and handoff.init is not None:
+        paths = handoff.init.paths
+    else:
+        paths = read_cfg_paths()
     data_d = paths.get_cpath("data")
     link_d = os.path.normpath(paths.run_dir)
 
@@ -899,6 +946,7 @@ def status_wrapper(name, args):
     status_link = os.path.join(link_d, "status.json")
     result_path = os.path.join(data_d, "result.json")
     result_link = os.path.join(link_d, "result.json")
+    trace_link = os.path.join(link_d, performance.TRACE_FILE)
     root_logger = logging.getLogger()
 
     util.ensure_dirs(
@@ -941,7 +989,13 @@ def status_wrapper(name, args):
         }
     }
     if mode == "init-local":
-        for f in (status_link, result_link, status_path, result_path):
+        for f in (
+            status_link,
+            result_link,
+            status_path,
+            result_path,
+            trace_link,
+        ):
             util.del_file(f)
     else:
         try:
@@ -981,6 +1035,7 @@ def status_wrapper(name, args):
         os.path.relpath(status_path, link_d), status_link, force=True
     )
 
+    performance.start_trace(mode)
     try:
         ret = functor(name, args)
         if mode in ("init", "init-local"):
@@ -1031,6 +1086,7 @@ def status_wrapper(name, args):
 
         # Write status.json after running init / module code
         atomic_helper.write_json(status_path, status)
+        performance.flush_trace(trace_link)
 
     if mode == "modules-final":
         # write the 'finished' file
@@ -1337,13 +1393,16 @@ def all_stages(parser):
 
     # notify systemd that this stage has completed
     socket.sd_notify("READY=1")
+    # carries state from each stage to the next
+    handoff = StageHandoff()
     # wait for cloud-init-local.service to start
     with sync("local"):
         # set up logger
         args = parser.parse_args(args=["init", "--local"])
         args.skip_log_setup = False
         # run local stage
-        sync.systemd_exit_code = sub_main(args, parser)
+        with handoff.stage(args):
+            sync.systemd_exit_code = sub_main(args, parser)
 
     # wait for cloud-init-network.service to start
     with sync("network"):
@@ -1351,7 +1410,8 @@ def all_stages(parser):
         args = parser.parse_args(args=["init"])
         args.skip_log_setup = True
         # run init stage
-        sync.systemd_exit_code = sub_main(args, parser)
+        with handoff.stage(args):
+            sync.systemd_exit_code = sub_main(args, parser)
 
     # wait for cloud-config.service to start
     with sync("config"):
@@ -1359,7 +1419,8 @@ def all_stages(parser):
         args = parser.parse_args(args=["modules", "--mode=config"])
         args.skip_log_setup = True
         # run config stage
-        sync.systemd_exit_code = sub_main(args, parser)
+        with handoff.stage(args):
+            sync.systemd_exit_code = sub_main(args, parser)
 
     # wait for cloud-final.service to start
     with sync("final"):
@@ -1367,7 +1428,8 @@ def all_stages(parser):
         args = parser.parse_args(args=["modules", "--mode=final"])
         args.skip_log_setup = True
         # run final stage
-        sync.systemd_exit_code = sub_main(args, parser)
+        with handoff.stage(args):
+            sync.systemd_exit_code = sub_main(args, parser)
 
     # signal completion to cloud-init-main.service
     if sync.experienced_any_error:
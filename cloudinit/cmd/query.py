@@ -20,20 +20,32 @@ import logging
 import os
 import sys
 from errno import EACCES
+from typing import Any, Callable, Dict, Iterator, Mapping
+
+from jinja2 import TemplateSyntaxError
 
 from cloudinit import atomic_helper, util
 from cloudinit.cmd.devel import read_cfg_paths
 from cloudinit.handlers.jinja_template import (
+    VERSIONED_KEY_RE,
     convert_jinja_instance_data,
     get_jinja_variable_alias,
+    load_instance_data,
     render_jinja_payload,
 )
+from cloudinit.json_index import IndexedJson, IndexedObject
 from cloudinit.sources import REDACT_SENSITIVE_VALUE
-from cloudinit.templater import JinjaSyntaxParsingException
+from cloudinit.templater import (
+    JinjaSyntaxParsingException,
+    jinja_template_variables,
+)
 
 NAME = "query"
 LOG = logging.getLogger(__name__)
 
+# Keys added to instance-data from other files
+SUPPLEMENTAL_KEYS = ("userdata", "vendordata", "combined_cloud_config")
+
 
 def get_parser(parser=None):
     """Build or extend an arg parser for query utility.
@@ -138,15 +150,49 @@ def load_userdata(ud_file_path):
         return util.decomp_gzip(bdata, quiet=False, decode=True)
 
 
-def _read_instance_data(instance_data, user_data, vendor_data) -> dict:
-    """Return a dict of merged instance-data, vendordata and userdata.
+class _InstanceData(Mapping):
+    """instance-data with supplemental keys which are read on first access.
+
+    :param data: Mapping of the instance-data file content.
+    :param supplemental: Dict of functions returning the value of each
+        supplemental key, overriding any key of the same name in data.
+    """
+
+    def __init__(self, data: Mapping, supplemental: Dict[str, Callable]):
+        self._data = data
+        self._supplemental = supplemental
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, key):
+        if key in self._supplemental:
+            if key not in self._loaded:
+                self._loaded[key] = self._supplemental[key]()
+            return self._loaded[key]
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from (k for k in self._data if k not in self._supplemental)
+        yield from self._supplemental
 
-    The dict will contain supplemental userdata and vendordata keys sourced
-    from default user-data and vendor-data files.
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def _read_instance_data(
+    instance_data, user_data, vendor_data, indexed=False
+) -> Mapping:
+    """Return a mapping of merged instance-data, vendordata and userdata.
+
+    The mapping will contain supplemental userdata and vendordata keys sourced
+    from default user-data and vendor-data files. These are only read when
+    looked up.
 
     Non-root users will have redacted INSTANCE_JSON_FILE content and redacted
     vendordata and userdata values.
 
+    :param indexed: Read values of the instance-data file as they are looked
+        up, when it has an index.
+
     :raise: IOError/OSError on absence of instance-data.json file or invalid
         access perms.
     """
@@ -180,7 +226,13 @@ def _read_instance_data(instance_data, user_data, vendor_data) -> dict:
     combined_cloud_config_fn = paths.get_runpath("combined_cloud_config")
 
     try:
-        instance_json = util.load_text_file(instance_data_fn)
+        indexed_data = None
+        if indexed:
+            indexed_data = IndexedJson.load(instance_data_fn)
+        if indexed_data:
+            data: Mapping = indexed_data.root()
+        else:
+            data = load_instance_data(instance_data_fn)
     except (IOError, OSError) as e:
         if e.errno == EACCES:
             LOG.error("No read permission on '%s'. Try sudo", instance_data_fn)
@@ -188,41 +240,68 @@ def _read_instance_data(instance_data, user_data, vendor_data) -> dict:
             LOG.error("Missing instance-data file: %s", instance_data_fn)
         raise
 
-    instance_data = util.load_json(instance_json)
-    try:
-        combined_cloud_config = util.load_json(
-            util.load_text_file(combined_cloud_config_fn)
-        )
-    except (IOError, OSError):
-        # File will not yet be present in init-local stage.
-        # It's created in `init` when vendor-data and user-data are processed.
-        combined_cloud_config = None
+    def load_combined_cloud_config():
+        try:
+            return util.load_json(
+                util.load_text_file(combined_cloud_config_fn)
+            )
+        except (IOError, OSError):
+            # File will not yet be present in init-local stage.
+            # It's created in `init` when vendor-data and user-data are
+            # processed.
+            return None
+
+    def redacted(path):
+        return lambda: "<%s> file:%s" % (REDACT_SENSITIVE_VALUE, path)
 
     if uid != 0:
-        instance_data["userdata"] = "<%s> file:%s" % (
-            REDACT_SENSITIVE_VALUE,
-            user_data_fn,
-        )
-        instance_data["vendordata"] = "<%s> file:%s" % (
-            REDACT_SENSITIVE_VALUE,
-            vendor_data_fn,
-        )
-        instance_data["combined_cloud_config"] = "<%s> file:%s" % (
-            REDACT_SENSITIVE_VALUE,
-            combined_cloud_config_fn,
-        )
+        supplemental = {
+            "userdata": redacted(user_data_fn),
+            "vendordata": redacted(vendor_data_fn),
+            "combined_cloud_config": redacted(combined_cloud_config_fn),
+        }
     else:
-        instance_data["userdata"] = load_userdata(user_data_fn)
-        instance_data["vendordata"] = load_userdata(vendor_data_fn)
-        instance_data["combined_cloud_config"] = combined_cloud_config
-    return instance_data
+        supplemental = {
+            "userdata": lambda: load_userdata(user_data_fn),
+            "vendordata": lambda: load_userdata(vendor_data_fn),
+            "combined_cloud_config": load_combined_cloud_config,
+        }
+    return _InstanceData(data, supplemental)
+
+
+def _jinja_variables(data: Mapping, include_key_aliases: bool) -> dict:
+    """Return the jinja variable names of one level of instance-data.
+
+    Names map to the mapping and key holding their value, as the values
+    convert_jinja_instance_data would return for them, without reading or
+    converting the values.
+    """
+    result = {}
+    for key in sorted(data):
+        result[key] = (data, key)
+        if VERSIONED_KEY_RE.match(key):
+            value = data[key]
+            if isinstance(value, Mapping):
+                # Promote values to top-level aliases
+                result.update(_jinja_variables(value, include_key_aliases))
+        if include_key_aliases:
+            alias_name = get_jinja_variable_alias(key)
+            if alias_name:
+                result[alias_name] = result[key]
+    return result
+
+
+def _convert_value(value):
+    """Return value as found in convert_jinja_instance_data's result."""
+    if isinstance(value, IndexedObject):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return convert_jinja_instance_data(value)
+    return value
 
 
 def _find_instance_data_leaf_by_varname_path(
-    jinja_vars_without_aliases: dict,
-    jinja_vars_with_aliases: dict,
-    varname: str,
-    list_keys: bool,
+    instance_data: Mapping, varname: str
 ):
     """Return the value of the dot-delimited varname path in instance-data
 
@@ -230,16 +309,26 @@ def _find_instance_data_leaf_by_varname_path(
     path components into the instance_data and look up a matching jinja
     variable name or cloud-init's underscore-delimited key aliases.
 
+    Only the values along the path are read, so a leaf which is a mapping is
+    returned unconverted.
+
     :raises: ValueError when varname represents an invalid key name or path or
         if list-keys is provided by varname isn't a dict object.
     """
     walked_key_path = ""
-    response = jinja_vars_without_aliases
+    with_aliases: Any = instance_data
+    response: Any = instance_data
     for key_path_part in varname.split("."):
         try:
             # Walk key path using complete aliases dict, yet response
             # should only contain jinja_without_aliases
-            jinja_vars_with_aliases = jinja_vars_with_aliases[key_path_part]
+            if isinstance(with_aliases, Mapping):
+                container, key = _jinja_variables(with_aliases, True)[
+                    key_path_part
+                ]
+                with_aliases = container[key]
+            else:
+                with_aliases = with_aliases[key_path_part]
         except KeyError as e:
             if walked_key_path:
                 msg = "instance-data '{key_path}' has no '{leaf}'".format(
@@ -248,12 +337,14 @@ def _find_instance_data_leaf_by_varname_path(
             else:
                 msg = "Undefined instance-data key '{}'".format(varname)
             raise ValueError(msg) from e
-        if key_path_part in response:
-            response = response[key_path_part]
+        variables = _jinja_variables(response, False)
+        if key_path_part in variables:
+            container, key = variables[key_path_part]
+            response = container[key]
         else:  # We are an underscore_delimited key alias
-            for key in response:
-                if get_jinja_variable_alias(key) == key_path_part:
-                    response = response[key]
+            for name, (container, key) in variables.items():
+                if get_jinja_variable_alias(name) == key_path_part:
+                    response = container[key]
                     break
         if walked_key_path:
             walked_key_path += "."
@@ -272,17 +363,32 @@ def handle_args(name, args):
         return 1
     try:
         instance_data = _read_instance_data(
-            args.instance_data, args.user_data, args.vendor_data
+            args.instance_data,
+            args.user_data,
+            args.vendor_data,
+            # Look up only the values needed without --all or --format
+            indexed=bool(args.varname or args.list_keys) and not args.format,
         )
     except (IOError, OSError):
         return 1
     if args.format:
+        try:
+            referenced = jinja_template_variables(args.format)
+        except TemplateSyntaxError:
+            # Reported when rendering
+            referenced = None
         payload = "## template: jinja\n{fmt}".format(fmt=args.format)
         try:
             rendered_payload = render_jinja_payload(
                 payload=payload,
                 payload_fn="query command line",
-                instance_data=instance_data,
+                instance_data={
+                    key: instance_data[key]
+                    for key in instance_data
+                    if referenced is None
+                    or key in referenced
+                    or key not in SUPPLEMENTAL_KEYS
+                },
                 debug=True if args.debug else False,
             )
         except JinjaSyntaxParsingException as e:
@@ -300,28 +406,26 @@ def handle_args(name, args):
     #  - JSON dump of all instance-data/jinja variables
     #  - JSON dump of a value at an dict path into the instance-data dict.
     #  - a list of keys for a specific dict path into the instance-data dict.
-    response = convert_jinja_instance_data(instance_data)
+    response: Any = instance_data
     if args.varname:
-        jinja_vars_with_aliases = convert_jinja_instance_data(
-            instance_data, include_key_aliases=True
-        )
         try:
             response = _find_instance_data_leaf_by_varname_path(
-                jinja_vars_without_aliases=response,
-                jinja_vars_with_aliases=jinja_vars_with_aliases,
-                varname=args.varname,
-                list_keys=args.list_keys,
+                instance_data, args.varname
             )
         except (KeyError, ValueError) as e:
             LOG.error(e)
             return 1
     if args.list_keys:
-        if not isinstance(response, dict):
+        if not isinstance(response, Mapping):
             LOG.error(
                 "--list-keys provided but '%s' is not a dict", args.varname
             )
             return 1
-        response = "\n".join(sorted(response.keys()))
+        response = "\n".join(sorted(_jinja_variables(response, False)))
+    elif response is instance_data:
+        response = convert_jinja_instance_data(dict(instance_data))
+    else:
+        response = _convert_value(response)
     if not isinstance(response, str):
         response = atomic_helper.json_dumps(response)
     print(response)
@@ -0,0 +1,163 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Run cloud-init query commands through the optional query service.
+
+``cloud-init query``, ``cloud-init status``, ``cloud-init schema --system``
+and ``cloud-id`` spend most of their time importing cloud-init and
+re-reading its configuration. When the cloud-init-query socket is active,
+these commands are handed to ``cloud-init devel query-service``, which keeps
+a warm process around and runs the very same command in a child forked from
+it, with the credentials, working directory, environment and standard
+streams of the caller.
+
+This module is imported by the command line wrappers before anything else
+and must only depend on the standard library.
+"""
+
+import array
+import json
+import os
+import socket
+
+SOCKET_PATH = "/run/cloud-init/query.sock"
+
+# Commands answered by the query service, by program and subcommand
+FORWARDED_COMMANDS = {
+    "cloud-id": None,
+    "cloud-init": ("query", "status", "schema"),
+}
+
+# Largest request and reply line accepted on the socket
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# Seconds allowed for the query service to accept the connection and reply
+# to the request before the command is run in the calling process instead
+REPLY_TIMEOUT = 3
+
+
+class QueryServiceError(Exception):
+    pass
+
+
+def is_forwarded(command: str, argv: list) -> bool:
+    """Return whether command with argv is answered by the query service."""
+    if command not in FORWARDED_COMMANDS:
+        return False
+    subcommands = FORWARDED_COMMANDS[command]
+    if subcommands is None:
+        return True
+    if len(argv) < 2 or argv[1] not in subcommands:
+        return False
+    if argv[1] == "schema":
+        # Validating arbitrary files or stdin stays in the calling process
+        return "--system" in argv[2:]
+    return True
+
+
+def send_message(sock: socket.socket, message: dict, fds=()):
+    """Send message as a JSON line, along with any file descriptors."""
+    data = json.dumps(message).encode() + b"\n"
+    ancillary = []
+    if fds:
+        ancillary.append(
+            (
+                socket.SOL_SOCKET,
+                socket.SCM_RIGHTS,
+                array.array("i", fds).tobytes(),
+            )
+        )
+    sent = sock.sendmsg([data], ancillary)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def receive_message(sock: socket.socket, buffer: bytearray):
+    """Return the next JSON line from sock and the file descriptors sent.
+
+    :param buffer: Data received past the previous message, updated in place.
+
+    :raises: QueryServiceError when the connection is closed or the message
+        is invalid.
+    """
+    fds: list = []
+    fd_size = array.array("i").itemsize
+    while b"\n" not in buffer:
+        if len(buffer) > MAX_MESSAGE_SIZE:
+            raise QueryServiceError("Message too large")
+        data, ancillary, _flags, _addr = sock.recvmsg(
+            65536, socket.CMSG_SPACE(16 * fd_size)
+        )
+        for level, kind, cmsg_data in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                received = array.array("i")
+                received.frombytes(
+                    cmsg_data[: len(cmsg_data) - len(cmsg_data) % fd_size]
+                )
+                fds.extend(received)
+        if not data:
+            for fd in fds:
+                os.close(fd)
+            raise QueryServiceError("Connection closed")
+        buffer.extend(data)
+    line, _, rest = bytes(buffer).partition(b"\n")
+    buffer[:] = rest
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        for fd in fds:
+            os.close(fd)
+        raise QueryServiceError(f"Invalid message: {e}") from e
+    if not isinstance(message, dict):
+        for fd in fds:
+            os.close(fd)
+        raise QueryServiceError("Invalid message: not an object")
+    return message, fds
+
+
+def run(command: str, argv: list, socket_path: str = SOCKET_PATH):
+    """Run command through the query service.
+
+    :param command: The program run, cloud-init or cloud-id.
+    :param argv: The full command line, as in sys.argv.
+
+    :returns: The exit code of the command, or None when the query service
+        did not run it or did not accept it within REPLY_TIMEOUT seconds.
+        The caller is then expected to run the command itself.
+    """
+    if not is_forwarded(command, argv) or not os.path.exists(socket_path):
+        return None
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        return None
+    request = {
+        "command": command,
+        "argv": list(argv),
+        "cwd": cwd,
+        "env": dict(os.environ),
+    }
+    buffer = bytearray()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(REPLY_TIMEOUT)
+            sock.connect(socket_path)
+            send_message(sock, request, fds=(0, 1, 2))
+            reply, _ = receive_message(sock, buffer)
+            if not reply.get("accepted"):
+                # Nothing ran yet, the caller runs the command instead
+                return None
+            # The command itself may take as long as it needs
+            sock.settimeout(None)
+            try:
+                reply, _ = receive_message(sock, buffer)
+            except (OSError, QueryServiceError):
+                # The command may have produced output already, so it
+                # cannot be run again
+                return 1
+            except KeyboardInterrupt:
+                # Closing the connection stops the command
+                return 130
+    except (OSError, QueryServiceError):
+        return None
+    exit_code = reply.get("exit_code")
+    return exit_code if isinstance(exit_code, int) else 1
@@ -7,14 +7,17 @@
 """Define 'status' utility and handler as part of cloud-init command line."""
 
 import argparse
+import ctypes
+import ctypes.util
 import enum
 import json
 import os
+import select
 import sys
 from copy import deepcopy
 from datetime import datetime, timezone
-from time import sleep
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from time import monotonic, sleep
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
 from cloudinit import safeyaml, subp
 from cloudinit.cmd.devel import read_cfg_paths
@@ -24,6 +27,13 @@ from cloudinit.util import get_cmdline, load_json, load_text_file
 
 CLOUDINIT_DISABLED_FILE = "/etc/cloud/cloud-init.disabled"
 
+# Seconds between checks of status files when they can't be watched
+WAIT_POLL_INTERVAL = 0.25
+
+# Seconds after which status is re-read even if no status file changed, to
+# pick up systemd unit failures and changes of the boot status
+WAIT_RECHECK_INTERVAL = 5.0
+
 
 @enum.unique
 class RunningStatus(enum.Enum):
@@ -140,9 +150,144 @@ def get_parser(parser=None):
         default=False,
         help="Block waiting on cloud-init to complete",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help=(
+            "Block waiting on cloud-init to complete and print each status"
+            " change as a line of JSON"
+        ),
+    )
     return parser
 
 
+class _Inotify:
+    """Watch directories for changes using inotify(7).
+
+    :raises OSError: when inotify is unavailable.
+    """
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    # IN_CREATE | IN_DELETE
+    MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+
+    def __init__(self):
+        try:
+            self._libc = ctypes.CDLL(
+                ctypes.util.find_library("c"), use_errno=True
+            )
+            self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (AttributeError, OSError) as e:
+            raise OSError(f"inotify is unavailable: {e}") from e
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: Set[str] = set()
+
+    def watch(self, path: str) -> None:
+        """Watch the directory at path, if it exists."""
+        if path in self.watched:
+            return
+        if (
+            self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            >= 0
+        ):
+            self.watched.add(path)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for changes in watched directories.
+
+        :return: Whether a change occurred.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class StatusWatcher:
+    """Wait for changes to the files that cloud-init status is read from.
+
+    Directories holding the status files are watched with inotify when
+    possible, otherwise the files are polled. Either way, wait() also
+    returns every WAIT_RECHECK_INTERVAL seconds so that state not stored in
+    files (e.g. systemd units) is re-read periodically.
+
+    :param paths: An initialized cloudinit.helpers.Paths object.
+    """
+
+    def __init__(self, paths: Paths):
+        self.run_dir = str(paths.run_dir)
+        self.status_file = os.path.join(self.run_dir, "status.json")
+        self.result_file = os.path.join(self.run_dir, "result.json")
+        try:
+            self._inotify: Optional[_Inotify] = _Inotify()
+        except OSError:
+            self._inotify = None
+        self._fingerprint = self._get_fingerprint()
+        self._last_check = monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._inotify:
+            self._inotify.close()
+
+    def _get_fingerprint(self) -> Tuple:
+        fingerprint: List[Optional[Tuple[int, int, int]]] = []
+        for path in (
+            self.status_file,
+            self.result_file,
+            os.path.join(self.run_dir, "enabled"),
+            os.path.join(self.run_dir, "disabled"),
+            CLOUDINIT_DISABLED_FILE,
+        ):
+            try:
+                st = os.stat(path)
+            except OSError:
+                fingerprint.append(None)
+            else:
+                fingerprint.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(fingerprint)
+
+    def wait(self) -> bool:
+        """Wait for a change of status.
+
+        :return: Whether status must be re-read.
+        """
+        recheck_in = WAIT_RECHECK_INTERVAL - (monotonic() - self._last_check)
+        if self._inotify:
+            # status.json in run_dir is a symlink to a file which is
+            # atomically replaced in its own directory
+            for path in (self.run_dir, os.path.realpath(self.status_file)):
+                if os.path.isdir(path):
+                    self._inotify.watch(path)
+                else:
+                    self._inotify.watch(os.path.dirname(path))
+        if self._inotify and self._inotify.watched:
+            self._inotify.wait(max(recheck_in, 0))
+        else:
+            sleep(WAIT_POLL_INTERVAL)
+            fingerprint = self._get_fingerprint()
+            changed = fingerprint != self._fingerprint
+            self._fingerprint = fingerprint
+            if not changed and monotonic() - self._last_check < (
+                WAIT_RECHECK_INTERVAL
+            ):
+                return False
+        self._last_check = monotonic()
+        return True
+
+
 def translate_status(
     running: RunningStatus, condition: ConditionStatus
 ) -> Tuple[str, str]:
@@ -163,12 +308,12 @@ def translate_status(
     return running.value, running.value
 
 
-def print_status(args, details: StatusDetails):
-    """Print status out to the CLI."""
+def get_status_dict(details: StatusDetails) -> Dict[str, Any]:
+    """Return the status details as reported by the CLI."""
     status, extended_status = translate_status(
         details.running_status, details.condition_status
     )
-    details_dict: Dict[str, Any] = {
+    return {
         "datasource": details.datasource,
         "boot_status_code": details.boot_status_code.value,
         "status": status,
@@ -179,6 +324,11 @@ def print_status(args, details: StatusDetails):
         "last_update": details.last_update,
         **details.v1,
     }
+
+
+def print_status(args, details: StatusDetails):
+    """Print status out to the CLI."""
+    details_dict = get_status_dict(details)
     if args.format == "tabular":
         prefix = ""
 
@@ -229,23 +379,48 @@ def print_status(args, details: StatusDetails):
         print(safeyaml.dumps(details_dict))
 
 
-def handle_status_args(name, args) -> int:
-    """Handle calls to 'cloud-init status' as a subcommand."""
-    # Read configured paths
-    paths = read_cfg_paths()
-    details = get_status_details(paths, args.wait)
-    if args.wait:
+def stream_status(details: StatusDetails) -> None:
+    """Print status as a single line of JSON."""
+    print(json.dumps(get_status_dict(details), sort_keys=True), flush=True)
+
+
+def wait_for_status(paths: Paths, args, details: StatusDetails):
+    """Wait until cloud-init is no longer running and return its status.
+
+    Status is only re-read when its files change or periodically, so that
+    systemctl isn't queried on every check.
+    """
+    stream = getattr(args, "stream", False)
+    if stream:
+        stream_status(details)
+    with StatusWatcher(paths) as watcher:
         while details.running_status in (
             RunningStatus.NOT_STARTED,
             RunningStatus.RUNNING,
         ):
-            if args.format == "tabular":
+            if args.format == "tabular" and not stream:
                 sys.stdout.write(".")
                 sys.stdout.flush()
-            details = get_status_details(paths, args.wait)
-            sleep(0.25)
+            if not watcher.wait():
+                continue
+            previous_dict = get_status_dict(details)
+            details = get_status_details(paths, True)
+            if stream and get_status_dict(details) != previous_dict:
+                stream_status(details)
+    return details
+
+
+def handle_status_args(name, args) -> int:
+    """Handle calls to 'cloud-init status' as a subcommand."""
+    # Read configured paths
+    paths = read_cfg_paths()
+    stream = getattr(args, "stream", False)
+    details = get_status_details(paths, args.wait or stream)
+    if args.wait or stream:
+        details = wait_for_status(paths, args, details)
 
-    print_status(args, details)
+    if not stream:
+        print_status(args, details)
 
     # Hard error
     if details.condition_status == ConditionStatus.ERROR:
@@ -551,7 +551,9 @@ def generate_sources_list(cfg, release, mirrors, cloud, keys):
             return
         tmpl = util.load_text_file(template_fn)
 
-    rendered = templater.render_string(tmpl, params)
+    rendered = templater.render_string(
+        tmpl, params, cloud.paths.get_cpath("jinja_cache")
+    )
     if tmpl:
         if is_deb822_sources_format(rendered):
             if aptsrc_file == apt_sources_list:
@@ -892,7 +894,9 @@ def convert_to_v3_apt_format(cfg):
     return cfg
 
 
-def search_for_mirror_dns(configured, mirrortype, cfg, cloud):
+def search_for_mirror_dns(
+    configured, mirrortype, cfg, cloud, select_fastest=False
+):
     """
     Try to resolve a list of predefines DNS names to pick mirrors
     """
@@ -928,7 +932,9 @@ def search_for_mirror_dns(configured, mirrortype, cfg, cloud):
         for post in doms:
             mirror_list.append(mirrorfmt % (post))
 
-        mirror = util.search_for_mirror(mirror_list)
+        mirror = util.search_for_mirror(
+            mirror_list, select_fastest=select_fastest
+        )
 
     return mirror
 
@@ -986,17 +992,24 @@ def get_mirror(cfg, mirrortype, arch, cloud):
 
     # directly specified
     mirror = mcfg.get("uri", None)
+    select_fastest = mcfg.get("search_fastest", False)
 
     # fallback to search if specified
     if mirror is None:
         # list of mirrors to try to resolve
-        mirror = util.search_for_mirror(mcfg.get("search", None))
+        mirror = util.search_for_mirror(
+            mcfg.get("search", None), select_fastest=select_fastest
+        )
 
     # fallback to search_dns if specified
     if mirror is None:
         # list of mirrors to try to resolve
         mirror = search_for_mirror_dns(
-            mcfg.get("search_dns", None), mirrortype, cfg, cloud
+            mcfg.get("search_dns", None),
+            mirrortype,
+            cfg,
+            cloud,
+            select_fastest=select_fastest,
         )
 
     return mirror
@@ -27,11 +27,37 @@ meta: MetaSchema = {
 }
 
 
-def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
+VALID_VALUES = (
+    "enable-user",
+    "enable-system",
+    "enable",
+    "disable-user",
+    "disable-system",
+    "disable",
+)
+
+
+def _get_value(cfg: Config, args: list) -> str:
     if args:
         value = args[0]
     else:
         value = util.get_cfg_option_str(cfg, "byobu_by_default", "")
+    if value == "user" or value == "system":
+        value = "enable-%s" % value
+    return value
+
+
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    # Unknown values are left to handle, which warns about them
+    if _get_value(cfg, args) in VALID_VALUES and not subp.which("byobu"):
+        return ["byobu"]
+    return []
+
+
+def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
+    value = _get_value(cfg, args)
 
     if not value:
         LOG.debug("Skipping module named %s, no 'byobu' values found", name)
@@ -40,18 +66,7 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     if not subp.which("byobu"):
         cloud.distro.install_packages(["byobu"])
 
-    if value == "user" or value == "system":
-        value = "enable-%s" % value
-
-    valid = (
-        "enable-user",
-        "enable-system",
-        "enable",
-        "disable-user",
-        "disable-system",
-        "disable",
-    )
-    if value not in valid:
+    if value not in VALID_VALUES:
         LOG.warning("Unknown value %s for byobu_by_default", value)
 
     mod_user = value.endswith("-user")
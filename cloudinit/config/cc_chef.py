@@ -215,7 +215,12 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
             if k in CHEF_RB_TPL_PATH_KEYS and v:
                 param_paths.add(os.path.dirname(v))
         util.ensure_dirs(param_paths)
-        templater.render_to_file(template_fn, cfg_filename, params)
+        templater.render_to_file(
+            template_fn,
+            cfg_filename,
+            params,
+            cache_dir=cloud.paths.get_cpath("jinja_cache"),
+        )
     else:
         LOG.warning("No template found, not rendering to %s", cfg_filename)
 
@@ -323,6 +328,22 @@ def install_chef_from_omnibus(
     )
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    chef_cfg = cfg.get("chef")
+    if not isinstance(chef_cfg, dict):
+        return []
+    if util.get_cfg_option_str(
+        chef_cfg, "install_type", "packages"
+    ) == "packages" and (
+        not subp.is_exe(CHEF_EXEC_PATH)
+        or util.get_cfg_option_bool(chef_cfg, "force_install", default=False)
+    ):
+        return ["chef"]
+    return []
+
+
 def install_chef(cloud: Cloud, chef_cfg):
     # If chef is not installed, we install chef based on 'install_type'
     install_type = util.get_cfg_option_str(
@@ -50,6 +50,14 @@ def stop_update_start(distro, service, config_file, content):
     distro.manage_service("enable", service)
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    if (cfg.get("fan") or {}).get("config") and not subp.which("fanctl"):
+        return ["ubuntu-fan"]
+    return []
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     cfgin = cfg.get("fan")
     if not cfgin:
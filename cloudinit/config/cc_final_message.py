@@ -58,8 +58,11 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
             "datasource": str(cloud.datasource),
         }
         subs.update(dict([(k.upper(), v) for k, v in subs.items()]))
+        rendered = templater.render_string(
+            msg_in, subs, cloud.paths.get_cpath("jinja_cache")
+        )
         log_util.multi_log(
-            "%s\n" % (templater.render_string(msg_in, subs)),
+            "%s\n" % rendered,
             console=False,
             stderr=True,
             log=LOG,
@@ -41,6 +41,15 @@ meta: MetaSchema = {
 LOG = logging.getLogger(__name__)
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    ls_cloudcfg = cfg.get("landscape", {})
+    if isinstance(ls_cloudcfg, dict) and ls_cloudcfg:
+        return ["landscape-client"]
+    return []
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     """
     Basically turn a top level 'landscape' entry with a 'client' dict
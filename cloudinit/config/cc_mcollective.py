@@ -98,6 +98,12 @@ def configure(
     util.write_file(server_cfg, contents.getvalue(), mode=0o644)
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    return ["mcollective"] if "mcollective" in cfg else []
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     # If there isn't a mcollective key in the configuration don't do anything
     if "mcollective" not in cfg:
@@ -63,6 +63,12 @@ def _fire_reboot(
     )
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    return util.get_cfg_option_list(cfg, "packages", [])
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     # Handle the old style + new config names
     update = _multi_cfg_bool_get(cfg, "apt_update", "package_update")
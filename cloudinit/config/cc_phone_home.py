@@ -127,7 +127,9 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     url_params = {
         "INSTANCE_ID": all_keys["instance_id"],
     }
-    url = templater.render_string(url, url_params)
+    url = templater.render_string(
+        url, url_params, cloud.paths.get_cpath("jinja_cache")
+    )
     try:
         url_helper.read_file_or_url(
             url,
@@ -115,6 +115,31 @@ def install_puppet_aio(
         return subp.subp([tmpf] + args, capture=False)
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    """Return the puppet package when it is named and unversioned.
+
+    Without a package_name, handle() tries each of PUPPET_PACKAGE_NAMES in
+    turn, which cannot be planned ahead.
+    """
+    puppet_cfg = cfg.get("puppet")
+    if not isinstance(puppet_cfg, dict):
+        return []
+    if (
+        util.get_cfg_option_bool(puppet_cfg, "install", True)
+        and not util.get_cfg_option_str(puppet_cfg, "version", None)
+        and util.get_cfg_option_str(puppet_cfg, "install_type", "packages")
+        == "packages"
+    ):
+        package_name = util.get_cfg_option_str(
+            puppet_cfg, "package_name", None
+        )
+        if package_name:
+            return [package_name]
+    return []
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     # If there isn't a puppet key in the configuration don't do anything
     if "puppet" not in cfg:
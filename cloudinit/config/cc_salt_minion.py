@@ -54,6 +54,14 @@ class SaltConstants:
         )
 
 
+def get_required_packages(
+    name: str, cfg: Config, cloud: Cloud, args: list
+) -> list:
+    if "salt_minion" not in cfg:
+        return []
+    return [SaltConstants(cfg=cfg["salt_minion"]).pkg_name]
+
+
 def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
     # If there isn't a salt key in the configuration don't do anything
     if "salt_minion" not in cfg:
@@ -56,7 +56,10 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
             )
 
         templater.render_to_file(
-            tpl_fn_name, hosts_fn, {"hostname": hostname, "fqdn": fqdn}
+            tpl_fn_name,
+            hosts_fn,
+            {"hostname": hostname, "fqdn": fqdn},
+            cache_dir=cloud.paths.get_cpath("jinja_cache"),
         )
 
     elif manage_hosts == "localhost":
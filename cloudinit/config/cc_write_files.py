@@ -9,7 +9,8 @@
 import base64
 import logging
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
 
 from cloudinit import url_helper, util
 from cloudinit.cloud import Cloud
@@ -20,6 +21,7 @@ from cloudinit.settings import PER_INSTANCE
 DEFAULT_PERMS = 0o644
 DEFAULT_DEFER = False
 TEXT_PLAIN_ENC = "text/plain"
+MAX_FETCH_WORKERS = 8
 
 LOG = logging.getLogger(__name__)
 
@@ -78,6 +80,7 @@ def write_files(name, files, owner: str, ssl_details: Optional[dict] = None):
     if not files:
         return
 
+    planned = []
     for i, f_info in enumerate(files):
         path = f_info.get("path")
         if not path:
@@ -87,11 +90,18 @@ def write_files(name, files, owner: str, ssl_details: Optional[dict] = None):
                 name,
             )
             continue
-        path = os.path.abspath(path)
-        # Read content from provided URL, if any, or decode from inline
-        contents = read_url_or_decode(
+        planned.append((i, os.path.abspath(path), f_info))
+
+    # Download every remote source up front so slow servers overlap
+    # rather than serialize the writes behind them
+    fetched = fetch_sources(
+        [f_info.get("source", None) for _, _, f_info in planned], ssl_details
+    )
+    written = []
+    for (i, path, f_info), fetch_result in zip(planned, fetched):
+        contents = decode_contents(
             f_info.get("source", None),
-            ssl_details,
+            fetch_result,
             f_info.get("content", None),
             f_info.get("encoding", None),
         )
@@ -107,14 +117,14 @@ def write_files(name, files, owner: str, ssl_details: Optional[dict] = None):
         # example, if the URL fails and no inline content was provided
         u, g = util.extract_usergroup(f_info.get("owner", owner))
         perms = decode_perms(f_info.get("permissions"), DEFAULT_PERMS)
-        omode = "ab" if util.get_cfg_option_bool(f_info, "append") else "wb"
-        util.write_file(
-            path, contents, omode=omode, mode=perms, user=u, group=g
+        append = util.get_cfg_option_bool(f_info, "append")
+        uid, gid = util.getids_byname(u, g)
+        util.ensure_dir(os.path.dirname(path), user=u, group=g)
+        util.write_file_owned(
+            path, contents, perms, append=append, uid=uid, gid=gid
         )
-        util.chownbyname(path, u, g)
-        if util.get_permissions(path) != perms:
-            # Original setuid bit permissions were cleared due to chown
-            util.chmod(path, perms)
+        written.append(path)
+    util.restorecon_paths(written)
 
 
 def decode_perms(perm, default):
@@ -138,41 +148,68 @@ def decode_perms(perm, default):
         return default
 
 
-def read_url_or_decode(source, ssl_details, content, encoding):
-    url = None if source is None else source.get("uri", None)
-    use_url = bool(url)
-    # Special case: empty URL and content. Write a blank file
-    if content is None and not use_url:
-        return ""
-    # Fetch file content from source URL, if provided
-    result = None
-    if use_url:
-        try:
-            # NOTE: These retry parameters are arbitrarily chosen defaults.
-            # They have no significance, and may be changed if appropriate
-            result = url_helper.read_file_or_url(
-                url,
-                headers=source.get("headers", None),
-                retries=3,
-                sec_between=3,
-                ssl_details=ssl_details,
-            ).contents
-        except Exception:
-            util.logexc(
-                LOG,
-                'Failed to retrieve contents from source "%s"; falling back to'
-                ' data from "contents" key',
-                url,
-            )
-            use_url = False
-    # If inline content is provided, and URL is not provided or is
-    # inaccessible, parse the former
-    if content is not None and not use_url:
-        # NOTE: This is not simply an "else"! Notice that `use_url` can change
-        # in the previous "if" block
-        extractions = canonicalize_extraction(encoding)
-        result = extract_contents(content, extractions)
-    return result
+def fetch_sources(sources, ssl_details) -> List[Optional[bytes]]:
+    """Fetch the uri of each source concurrently.
+
+    Returns a list matching sources, holding the fetched contents or None
+    where no uri was given or retrieval failed.
+    """
+    results: List[Optional[bytes]] = [None] * len(sources)
+    to_fetch = [
+        (i, source)
+        for i, source in enumerate(sources)
+        if source and source.get("uri", None)
+    ]
+    if not to_fetch:
+        return results
+    workers = min(len(to_fetch), MAX_FETCH_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_fetch_source, source, ssl_details): i
+            for i, source in to_fetch
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def _fetch_source(source, ssl_details) -> Optional[bytes]:
+    url = source["uri"]
+    try:
+        # NOTE: These retry parameters are arbitrarily chosen defaults.
+        # They have no significance, and may be changed if appropriate
+        return url_helper.read_file_or_url(
+            url,
+            headers=source.get("headers", None),
+            retries=3,
+            sec_between=3,
+            ssl_details=ssl_details,
+        ).contents
+    except Exception:
+        util.logexc(
+            LOG,
+            'Failed to retrieve contents from source "%s"; falling back to'
+            ' data from "contents" key',
+            url,
+        )
+        return None
+
+
+def decode_contents(source, fetched, content, encoding):
+    """Return the fetched source contents or decode the inline content.
+
+    Inline content is used when no source uri is provided or when it could
+    not be retrieved.
+    """
+    if fetched is not None:
+        return fetched
+    if content is None:
+        # Special case: empty URL and content. Write a blank file
+        if source is None or not source.get("uri", None):
+            return ""
+        return None
+    extractions = canonicalize_extraction(encoding)
+    return extract_contents(content, extractions)
 
 
 def extract_contents(contents, extraction_types):
@@ -49,6 +49,21 @@ RENAMED_MODULES = {
 }
 
 
+# Modules which configure package repositories. Packages are only installed
+# ahead of the modules needing them when no such module runs in between.
+REPOSITORY_MODULES = frozenset(
+    [
+        "cc_apk_configure",
+        "cc_apt_configure",
+        "cc_rh_subscription",
+        "cc_spacewalk",
+        "cc_ubuntu_pro",
+        "cc_yum_add_repo",
+        "cc_zypper_add_repo",
+    ]
+)
+
+
 class ModuleDetails(NamedTuple):
     module: ModuleType
     name: str
@@ -255,13 +270,78 @@ class Modules:
             )
         return mostly_mods
 
+    def _plan_packages(self, mostly_mods, cc) -> Dict[str, list]:
+        """Collect the packages that modules about to run will install.
+
+        Modules may define get_required_packages(name, cfg, cloud, args),
+        returning the packages their handle() would install. It is called
+        for modules which will run after the last repository configuring
+        module of the list. Returns a dict of module name to packages when
+        more than one module needs packages, or an empty dict otherwise.
+        """
+        start = 0
+        for idx, (_mod, name, _freq, _args) in enumerate(mostly_mods):
+            if form_module_name(name) in REPOSITORY_MODULES:
+                start = idx + 1
+        planned = {}
+        for mod, name, freq, args in mostly_mods[start:]:
+            get_packages = getattr(mod, "get_required_packages", None)
+            if not get_packages or cc.has_run(f"config-{name}", freq):
+                continue
+            try:
+                packages = get_packages(name, self.cfg, cc, args)
+            except Exception as e:
+                LOG.debug(
+                    "Failed to determine packages for module %s: %s", name, e
+                )
+                continue
+            if packages:
+                planned[name] = packages
+        if len(planned) < 2:
+            return {}
+        return planned
+
+    def _install_planned_packages(self, cc, planned: Dict[str, list]):
+        """Install the packages of all planned modules in one transaction.
+
+        On failure each module installs its own packages when it runs, so
+        that errors are reported against the module needing the package.
+        """
+        packages: list = []
+        for module_packages in planned.values():
+            packages.extend(p for p in module_packages if p not in packages)
+        LOG.debug(
+            "Installing packages for modules %s: %s",
+            ", ".join(planned),
+            packages,
+        )
+        try:
+            with performance.Timed(
+                "Installing packages for modules %s" % ", ".join(planned)
+            ):
+                cc.distro.preinstall_packages(packages)
+        except Exception as e:
+            LOG.warning(
+                "Failed to install packages for modules together, each "
+                "module will install its own packages (%s): %s",
+                "; ".join(
+                    "%s: %s" % (name, module_packages)
+                    for name, module_packages in planned.items()
+                ),
+                e,
+            )
+
     def _run_modules(self, mostly_mods: List[ModuleDetails]):
         cc = self.init.cloudify()
         # Return which ones ran
         # and which ones failed + the exception of why it failed
         failures = []
         which_ran = []
+        planned = self._plan_packages(mostly_mods, cc)
         for mod, name, freq, args in mostly_mods:
+            if name in planned:
+                self._install_planned_packages(cc, planned)
+                planned = {}
             try:
                 LOG.debug(
                     "Running module %s (%s) with frequency %s", name, mod, freq
@@ -293,7 +373,7 @@ class Modules:
                         )
                         func_args.update({"log": LOG})
 
-                    with performance.Timed("", log_mode="skip") as timer:
+                    with performance.Timed(run_name, log_mode="skip") as timer:
                         ran, _r = cc.run(
                             run_name, mod.handle, func_args, freq=freq
                         )
@@ -31,6 +31,7 @@ from typing import (
     Tuple,
     Type,
     Union,
+    cast,
 )
 
 import cloudinit.net.netops.iproute2 as iproute2
@@ -168,10 +169,12 @@ class Distro(persistence.CloudInitPickleMixin, metaclass=abc.ABCMeta):
         self._cfg = cfg
         self.name = name
         self.networking: Networking = self.networking_cls()
-        self.dhcp_client_priority = dhcp.ALL_DHCP_CLIENTS
+        self.dhcp_client_priority = dhcp.DEFAULT_DHCP_CLIENTS
         self.net_ops = iproute2.Iproute2
         self._runner = helpers.Runners(paths)
         self.package_managers: List[PackageManager] = []
+        # Packages installed by preinstall_packages during this boot stage
+        self._preinstalled_packages: Set[str] = set()
         self._dhcp_client = None
         self._fallback_interface = None
         self.is_linux = True
@@ -193,6 +196,7 @@ class Distro(persistence.CloudInitPickleMixin, metaclass=abc.ABCMeta):
             self._fallback_interface = None
         if not hasattr(self, "is_linux"):
             self.is_linux = True
+        self.forget_preinstalled_packages()
 
     def _validate_entry(self, entry):
         if isinstance(entry, str):
@@ -233,7 +237,48 @@ class Distro(persistence.CloudInitPickleMixin, metaclass=abc.ABCMeta):
                 generic_packages.add(self._validate_entry(entry))
         return dict(packages_by_manager), generic_packages
 
+    def preinstall_packages(self, pkglist: PackageList):
+        """Install packages on behalf of modules which run later.
+
+        Subsequent install_packages calls in this boot stage skip the named
+        packages installed here, so several modules' packages can be
+        installed in a single transaction.
+        """
+        self.install_packages(pkglist)
+        self._preinstalled_packages.update(
+            pkg for pkg in pkglist if isinstance(pkg, str)
+        )
+
+    def forget_preinstalled_packages(self):
+        """Forget packages installed by preinstall_packages.
+
+        Called when a new boot stage starts with this distro, as only
+        preinstall_packages records from the current stage are trusted.
+        """
+        self._preinstalled_packages = set()
+
+    def _without_preinstalled(self, pkglist: PackageList) -> PackageList:
+        """Drop packages already installed by preinstall_packages."""
+        return cast(
+            PackageList,
+            [
+                pkg
+                for pkg in pkglist
+                if not (
+                    isinstance(pkg, str) and pkg in self._preinstalled_packages
+                )
+            ],
+        )
+
     def install_packages(self, pkglist: PackageList):
+        pkglist = self._without_preinstalled(pkglist)
+        if pkglist:
+            self._install_packages(pkglist)
+
+    def _install_packages(self, pkglist: PackageList):
+        """Install the packages not already installed by
+        preinstall_packages. Distros without package managers override this.
+        """
         error_message = (
             "Failed to install the following packages: %s. "
             "See associated package manager logs for more details."
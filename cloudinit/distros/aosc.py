@@ -104,7 +104,7 @@ class Distro(distros.Distro):
 
         subp.subp(cmd, capture=False)
 
-    def install_packages(self, pkglist: PackageList):
+    def _install_packages(self, pkglist: PackageList):
         self.package_command("install", pkgs=pkglist)
 
     def update_package_sources(self, *, force=False):
@@ -54,7 +54,7 @@ class Distro(distros.Distro):
         # https://github.com/systemd/systemd/pull/9864
         subp.subp(["localectl", "set-locale", locale], capture=False)
 
-    def install_packages(self, pkglist: PackageList):
+    def _install_packages(self, pkglist: PackageList):
         self.update_package_sources()
         self.package_command("", pkgs=pkglist)
 
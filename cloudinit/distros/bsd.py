@@ -105,7 +105,7 @@ class BSD(distros.Distro):
             )
         return nconf
 
-    def install_packages(self, pkglist: PackageList):
+    def _install_packages(self, pkglist: PackageList):
         self.update_package_sources()
         self.package_command("install", pkgs=pkglist)
 
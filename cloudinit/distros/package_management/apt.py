@@ -8,6 +8,10 @@ import time
 from typing import Any, Iterable, List, Mapping, Optional, Sequence, cast
 
 from cloudinit import helpers, subp, util
+from cloudinit.distros.package_management.index_cache import (
+    IndexCache,
+    get_max_age,
+)
 from cloudinit.distros.package_management.package_manager import (
     PackageManager,
     UninstalledPackages,
@@ -36,6 +40,20 @@ APT_LOCK_FILES = [
     "/var/lib/apt/lists/lock",
 ]
 APT_LOCK_WAIT_TIMEOUT = 30
+# Files whose content determines what "apt-get update" downloads
+APT_INDEX_SOURCES = (
+    "/etc/apt/sources.list",
+    "/etc/apt/sources.list.d/*",
+    "/etc/apt/trusted.gpg",
+    "/etc/apt/trusted.gpg.d/*",
+    "/etc/apt/keyrings/*",
+    "/usr/share/keyrings/*",
+)
+APT_INDEX_FILES = (
+    "/var/lib/apt/lists/*Release*",
+    "/var/lib/apt/lists/*Packages*",
+    "/var/lib/apt/lists/*Sources*",
+)
 
 
 def get_apt_wrapper(cfg: Optional[dict]) -> List[str]:
@@ -81,6 +99,7 @@ class Apt(PackageManager):
         apt_get_wrapper_command: Sequence[str] = (),
         apt_get_command: Optional[Sequence[str]] = None,
         apt_get_upgrade_subcommand: Optional[str] = None,
+        package_index_max_age: int = 0,
     ):
         super().__init__(runner)
         if apt_get_command is None:
@@ -93,6 +112,14 @@ class Apt(PackageManager):
 
         self.apt_get_upgrade_subcommand = apt_get_upgrade_subcommand
         self.environment = {"DEBIAN_FRONTEND": "noninteractive"}
+        self.index_cache: Optional[IndexCache] = None
+        if package_index_max_age > 0:
+            self.index_cache = IndexCache(
+                os.path.join(runner.paths.get_cpath("data"), "apt-index.json"),
+                sources=APT_INDEX_SOURCES,
+                index=APT_INDEX_FILES,
+                max_age=package_index_max_age,
+            )
 
     @classmethod
     def from_config(cls, runner: helpers.Runners, cfg: Mapping) -> "Apt":
@@ -103,6 +130,7 @@ class Apt(PackageManager):
             ),
             apt_get_command=cfg.get("apt_get_command"),
             apt_get_upgrade_subcommand=cfg.get("apt_get_upgrade_subcommand"),
+            package_index_max_age=get_max_age(cfg),
         )
 
     def available(self) -> bool:
@@ -111,11 +139,19 @@ class Apt(PackageManager):
     def update_package_sources(self, *, force=False):
         self.runner.run(
             "update-sources",
-            self.run_package_command,
-            ["update"],
+            self._update_package_sources,
+            [],
             freq=PER_ALWAYS if force else PER_INSTANCE,
         )
 
+    def _update_package_sources(self):
+        if self.index_cache and self.index_cache.is_fresh():
+            LOG.debug("Skipping apt-get update: package index is fresh")
+            return
+        self.run_package_command("update")
+        if self.index_cache:
+            self.index_cache.record()
+
     @functools.lru_cache(maxsize=1)
     def get_all_packages(self):
         resp: str = subp.subp(["apt-cache", "pkgnames"]).stdout
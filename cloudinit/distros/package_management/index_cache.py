@@ -0,0 +1,116 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+"""Track whether a package manager's index needs refreshing.
+
+Images are commonly built with a recent package index already in place. An
+``IndexCache`` fingerprints the files a package index is downloaded from
+(repository definitions and keyrings) together with the downloaded index
+files themselves. An update can then be skipped when none of them changed
+since the last update and that update is younger than a configured age.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Iterable, Mapping, Optional
+
+from cloudinit import util
+
+LOG = logging.getLogger(__name__)
+
+
+def get_max_age(cfg: Mapping) -> int:
+    """Return the package_index_max_age of system config cfg.
+
+    Invalid values are warned about and disable the cache, as does 0.
+    """
+    max_age = cfg.get("package_index_max_age", 0)
+    try:
+        return int(max_age)
+    except (TypeError, ValueError):
+        LOG.warning(
+            "Ignoring invalid package_index_max_age %r, the package index"
+            " is always updated",
+            max_age,
+        )
+        return 0
+
+
+class IndexCache:
+    def __init__(
+        self,
+        state_file: str,
+        *,
+        sources: Iterable[str],
+        index: Iterable[str],
+        max_age: int,
+    ):
+        """
+        @param state_file: Path recording the fingerprint of the last update.
+        @param sources: Glob patterns of files whose content determines the
+            index: repository definitions and keyrings.
+        @param index: Glob patterns of the downloaded index files. Only their
+            size and modification time are considered.
+        @param max_age: Seconds after an update for which an unchanged index
+            is considered fresh.
+        """
+        self.state_file = state_file
+        self.sources = tuple(sources)
+        self.index = tuple(index)
+        self.max_age = max_age
+
+    def _files(self, patterns) -> Iterable[str]:
+        for path in sorted(
+            set(p for pattern in patterns for p in glob.glob(pattern))
+        ):
+            if os.path.isfile(path):
+                yield path
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for path in self._files(self.sources):
+            digest.update(path.encode())
+            with open(path, "rb") as stream:
+                digest.update(hashlib.sha256(stream.read()).digest())
+        for path in self._files(self.index):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def _load(self) -> Optional[dict]:
+        try:
+            return json.loads(util.load_text_file(self.state_file))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            LOG.debug("Ignoring unreadable %s: %s", self.state_file, e)
+            return None
+
+    def is_fresh(self) -> bool:
+        """Return whether the index is unchanged since a recent update."""
+        state = self._load()
+        if not state or self.max_age <= 0:
+            return False
+        try:
+            age = time.time() - state["updated"]
+            fresh = (
+                0 <= age < self.max_age
+                and state["fingerprint"] == self.fingerprint()
+            )
+        except (KeyError, TypeError):
+            return False
+        if fresh:
+            LOG.debug(
+                "Package index unchanged since update %d seconds ago", age
+            )
+        return fresh
+
+    def record(self):
+        """Remember the current index as freshly updated."""
+        state = {"fingerprint": self.fingerprint(), "updated": time.time()}
+        try:
+            util.write_file(self.state_file, json.dumps(state), mode=0o644)
+        except OSError as e:
+            LOG.warning("Failed to write %s: %s", self.state_file, e)
@@ -83,7 +83,7 @@ class Distro(distros.Distro):
         cmd = ["systemctl", "restart", "systemd-localed"]
         self.exec_cmd(cmd)
 
-    def install_packages(self, pkglist: PackageList):
+    def _install_packages(self, pkglist: PackageList):
         # self.update_package_sources()
         self.package_command("install", pkgs=pkglist)
 
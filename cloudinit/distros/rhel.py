@@ -12,11 +12,27 @@ import os
 
 from cloudinit import distros, helpers, subp, util
 from cloudinit.distros import PackageList, rhel_util
+from cloudinit.distros.package_management.index_cache import (
+    IndexCache,
+    get_max_age,
+)
 from cloudinit.distros.parsers.hostname import HostnameConf
 from cloudinit.settings import PER_ALWAYS, PER_INSTANCE
 
 LOG = logging.getLogger(__name__)
 
+# Files whose content determines what "makecache" downloads
+DNF_INDEX_SOURCES = (
+    "/etc/yum.repos.d/*.repo",
+    "/etc/dnf/vars/*",
+    "/etc/yum/vars/*",
+    "/etc/pki/rpm-gpg/*",
+)
+DNF_INDEX_FILES = (
+    "/var/cache/dnf/*/repodata/repomd.xml",
+    "/var/cache/yum/*/*/*/repomd.xml",
+)
+
 
 class Distro(distros.Distro):
     # See: https://access.redhat.com/documentation/en-US/Red_Hat_Enterprise_Linux/7/html/Networking_Guide/sec-Network_Configuration_Using_sysconfig_Files.html # noqa
@@ -55,12 +71,21 @@ class Distro(distros.Distro):
         # calls from repeatedly happening (when they
         # should only happen say once per instance...)
         self._runner = helpers.Runners(paths)
+        self._index_cache = None
+        max_age = get_max_age(cfg)
+        if max_age > 0:
+            self._index_cache = IndexCache(
+                os.path.join(paths.get_cpath("data"), "dnf-index.json"),
+                sources=DNF_INDEX_SOURCES,
+                index=DNF_INDEX_FILES,
+                max_age=max_age,
+            )
         self.osfamily = "redhat"
         self.default_locale = "en_US.UTF-8"
         self.system_locale = None
         cfg["ssh_svcname"] = "sshd"
 
-    def install_packages(self, pkglist: PackageList):
+    def _install_packages(self, pkglist: PackageList):
         self.package_command("install", pkgs=pkglist)
 
     def get_locale(self):
@@ -211,7 +236,15 @@ class Distro(distros.Distro):
     def update_package_sources(self, *, force=False):
         self._runner.run(
             "update-sources",
-            self.package_command,
-            ["makecache"],
+            self._update_package_sources,
+            [],
             freq=PER_ALWAYS if force else PER_INSTANCE,
         )
+
+    def _update_package_sources(self):
+        if self._index_cache and self._index_cache.is_fresh():
+            LOG.debug("Skipping makecache: package index is fresh")
+            return
+        self.package_command("makecache")
+        if self._index_cache:
+            self._index_cache.record()
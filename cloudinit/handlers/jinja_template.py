@@ -4,8 +4,9 @@ import copy
 import logging
 import os
 import re
+from contextlib import suppress
 from errno import EACCES
-from typing import Optional
+from typing import Dict, FrozenSet, Optional, Tuple
 
 from jinja2 import exceptions, lexer
 
@@ -23,6 +24,9 @@ from cloudinit.util import load_json, load_text_file
 
 LOG = logging.getLogger(__name__)
 
+# Keys of versioned instance-data whose values are promoted to the top level
+VERSIONED_KEY_RE = re.compile(r"v\d+$")
+
 
 class JinjaLoadError(Exception):
     pass
@@ -32,6 +36,67 @@ class NotJinjaError(Exception):
     pass
 
 
+class _CachedInstanceData:
+    """An instance-data file's content and the jinja variables built from it.
+
+    The variables are only built the first time they are needed.
+    """
+
+    def __init__(self, stat_key: Optional[Tuple[int, int, int]], data: dict):
+        self.stat_key = stat_key
+        self.data = data
+        self._jinja_vars: Optional[dict] = None
+
+    @property
+    def jinja_vars(self) -> dict:
+        if self._jinja_vars is None:
+            self._jinja_vars = convert_jinja_instance_data(
+                self.data,
+                decode_paths=self.data.get("base64-encoded-keys", []),
+                include_key_aliases=True,
+            )
+        return self._jinja_vars
+
+
+# Instance-data files loaded by this process, by path. Templated config
+# files, user-data parts and query all render with the same instance data,
+# which only needs loading again once the file changes.
+_INSTANCE_DATA_CACHE: Dict[str, _CachedInstanceData] = {}
+
+
+def _load_instance_data(instance_data_file) -> _CachedInstanceData:
+    """Load instance_data_file, or reuse its content if it has not changed.
+
+    @raises: OSError when the file cannot be read, ValueError when it is
+        not JSON.
+    """
+    path = str(instance_data_file)
+    stat_key = None
+    with suppress(OSError):
+        st = os.stat(path)
+        stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    cached = _INSTANCE_DATA_CACHE.get(path)
+    if stat_key is None or cached is None or cached.stat_key != stat_key:
+        cached = _CachedInstanceData(
+            stat_key, load_json(load_text_file(instance_data_file))
+        )
+        if stat_key is not None:
+            _INSTANCE_DATA_CACHE[path] = cached
+    return cached
+
+
+def load_instance_data(instance_data_file) -> dict:
+    """Return the parsed content of an instance-data file.
+
+    The content is shared by every caller in this process for as long as the
+    file is unchanged, so it must not be modified.
+
+    @raises: OSError when the file cannot be read, ValueError when it is
+        not JSON.
+    """
+    return _load_instance_data(instance_data_file).data
+
+
 class JinjaTemplatePartHandler(handlers.Handler):
 
     prefixes = ["## template: jinja"]
@@ -50,7 +115,10 @@ class JinjaTemplatePartHandler(handlers.Handler):
         jinja_json_file = self.paths.get_runpath("instance_data_sensitive")
         try:
             rendered_payload = render_jinja_payload_from_file(
-                payload, filename, jinja_json_file
+                payload,
+                filename,
+                jinja_json_file,
+                cache_dir=self.paths.get_cpath("jinja_cache"),
             )
         except JinjaSyntaxParsingException as e:
             LOG.warning(
@@ -84,7 +152,7 @@ class JinjaTemplatePartHandler(handlers.Handler):
 
 
 def render_jinja_payload_from_file(
-    payload, payload_fn, instance_data_file, debug=False
+    payload, payload_fn, instance_data_file, debug=False, cache_dir=None
 ):
     r"""Render a jinja template sourcing variables from jinja_vars_path.
 
@@ -95,21 +163,23 @@ def render_jinja_payload_from_file(
         'part-##'.
     @param instance_data_file: A path to a json file containing variables that
         will be used as jinja template variables.
+    @param cache_dir: Optional directory in which the compiled template is
+        kept for later renders, see templater.detect_template.
 
     @return: A string of jinja-rendered content with the jinja header removed.
         Returns None on error.
     """
     if detect_template(payload)[0] != "jinja":
         raise NotJinjaError("Payload is not a jinja template")
-    instance_data = {}
-    rendered_payload = None
     if not os.path.exists(instance_data_file):
         raise JinjaLoadError(
             "Cannot render jinja template vars. Instance data not yet"
             " present at %s" % instance_data_file
         )
     try:
-        instance_data = load_json(load_text_file(instance_data_file))
+        instance_jinja_vars = _load_instance_data(
+            instance_data_file
+        ).jinja_vars
     except Exception as e:
         msg = "Loading Jinja instance data failed"
         if isinstance(e, (IOError, OSError)):
@@ -120,8 +190,8 @@ def render_jinja_payload_from_file(
                 )
         raise JinjaLoadError(msg) from e
 
-    rendered_payload = render_jinja_payload(
-        payload, payload_fn, instance_data, debug
+    rendered_payload = _render_jinja_vars(
+        payload, payload_fn, instance_jinja_vars, debug, cache_dir
     )
     if not rendered_payload:
         return None
@@ -134,12 +204,23 @@ def render_jinja_payload(payload, payload_fn, instance_data, debug=False):
         decode_paths=instance_data.get("base64-encoded-keys", []),
         include_key_aliases=True,
     )
+    return _render_jinja_vars(payload, payload_fn, instance_jinja_vars, debug)
+
+
+def _render_jinja_vars(
+    payload, payload_fn, instance_jinja_vars, debug, cache_dir=None
+):
     if debug:
         LOG.debug(
             "Converted jinja variables\n%s", json_dumps(instance_jinja_vars)
         )
     try:
-        rendered_payload = render_string(payload, instance_jinja_vars)
+        # Templates can modify their variables with the do extension, and
+        # the variables are shared with other renders and with the instance
+        # data, so each render is given its own copy.
+        rendered_payload = render_string(
+            payload, copy.deepcopy(instance_jinja_vars), cache_dir
+        )
     except (
         TypeError,
         exceptions.UndefinedError,
@@ -190,29 +271,43 @@ def convert_jinja_instance_data(
 
     Replace hyphens with underscores for jinja templates and decode any
     base64_encoded_keys.
+
+    Aliases and promoted versioned keys refer to the very values they alias
+    rather than to copies of them. Values which are not decoded may also be
+    shared with data. The result must therefore not be modified.
     """
+    return _convert_jinja_instance_data(
+        data,
+        prefix,
+        sep,
+        frozenset(path.replace("-", "_") for path in decode_paths),
+        include_key_aliases,
+    )
+
+
+def _convert_jinja_instance_data(
+    data,
+    prefix: str,
+    sep: str,
+    decode_paths: FrozenSet[str],
+    include_key_aliases: bool,
+) -> dict:
     result = {}
-    decode_paths = [path.replace("-", "_") for path in decode_paths]
     for key, value in sorted(data.items()):
         key_path = "{0}{1}{2}".format(prefix, sep, key) if prefix else key
         if key_path in decode_paths:
             value = b64d(value)
         if isinstance(value, dict):
-            result[key] = convert_jinja_instance_data(
-                value,
-                key_path,
-                sep=sep,
-                decode_paths=decode_paths,
-                include_key_aliases=include_key_aliases,
+            result[key] = _convert_jinja_instance_data(
+                value, key_path, sep, decode_paths, include_key_aliases
             )
-            if re.match(r"v\d+$", key):
-                # Copy values to top-level aliases
-                for subkey, subvalue in result[key].items():
-                    result[subkey] = copy.deepcopy(subvalue)
+            if VERSIONED_KEY_RE.match(key):
+                # Promote values to top-level aliases
+                result.update(result[key])
         else:
             result[key] = value
         if include_key_aliases:
             alias_name = get_jinja_variable_alias(key)
             if alias_name:
-                result[alias_name] = copy.deepcopy(result[key])
+                result[alias_name] = result[key]
     return result
@@ -14,6 +14,7 @@ import os
 from configparser import NoOptionError, NoSectionError, RawConfigParser
 from io import StringIO
 from time import time
+from typing import Optional, Set
 
 from cloudinit import persistence, settings, type_utils, util
 from cloudinit.settings import CFG_ENV_NAME, PER_ALWAYS, PER_INSTANCE, PER_ONCE
@@ -57,8 +58,17 @@ def canon_sem_name(name):
 
 
 class FileSemaphores:
+    """Semaphore files in sem_path, one per name and frequency.
+
+    The directory is listed once, on first use, and has_run is answered from
+    that listing, which semaphores taken or cleared through this object keep
+    up to date. Runners are created per stage, so semaphore files removed by
+    hand are noticed by the next stage.
+    """
+
     def __init__(self, sem_path):
         self.sem_path = sem_path
+        self._sem_names: Optional[Set[str]] = None
 
     @contextlib.contextmanager
     def lock(self, name, freq, clear_on_fail=False):
@@ -78,8 +88,26 @@ class FileSemaphores:
         except (IOError, OSError):
             util.logexc(LOG, "Failed deleting semaphore %s", sem_file)
             return False
+        if self._sem_names is not None:
+            self._sem_names.discard(os.path.basename(sem_file))
         return True
 
+    def _list_sem_names(self) -> Optional[Set[str]]:
+        """Return the names of the semaphore files, or None when the
+        directory cannot be listed.
+        """
+        if self._sem_names is None:
+            try:
+                self._sem_names = set(os.listdir(self.sem_path))
+            except FileNotFoundError:
+                self._sem_names = set()
+            except OSError as e:
+                LOG.debug(
+                    "Unable to list semaphores in %s: %s", self.sem_path, e
+                )
+                return None
+        return self._sem_names
+
     def _acquire(self, name, freq):
         # Check again if its been already gotten
         if self.has_run(name, freq):
@@ -89,11 +117,17 @@ class FileSemaphores:
         # and where cloud-init runs... (file writing is not a lock...)
         sem_file = self._get_path(name, freq)
         contents = "%s: %s\n" % (os.getpid(), time())
+        sem_names = self._list_sem_names()
         try:
-            util.write_file(sem_file, contents)
+            # The directory exists once it has a semaphore
+            util.write_file(
+                sem_file, contents, ensure_dir_exists=not sem_names
+            )
         except (IOError, OSError):
             util.logexc(LOG, "Failed writing semaphore file %s", sem_file)
             return None
+        if sem_names is not None:
+            sem_names.add(os.path.basename(sem_file))
         return FileLock(sem_file)
 
     def has_run(self, name, freq):
@@ -104,7 +138,10 @@ class FileSemaphores:
         sem_file = self._get_path(cname, freq)
         # This isn't really a good atomic check
         # but it suffices for where and when cloudinit runs
-        return os.path.exists(sem_file)
+        sem_names = self._list_sem_names()
+        if sem_names is None:
+            return os.path.exists(sem_file)
+        return os.path.basename(sem_file) in sem_names
 
     def _get_path(self, name, freq):
         sem_path = self.sem_path
@@ -138,6 +175,12 @@ class Runners:
             self.sems[sem_path] = FileSemaphores(sem_path)
         return self.sems[sem_path]
 
+    def has_run(self, name, freq=None):
+        sem = self._get_sem(freq)
+        if not sem:
+            return False
+        return sem.has_run(name, freq)
+
     def run(self, name, functor, args, freq=None, clear_on_fail=False):
         sem = self._get_sem(freq)
         if not sem:
@@ -326,6 +369,8 @@ class Paths(persistence.CloudInitPickleMixin):
             "cloud_config": "cloud-config.txt",
             "data": "data",
             "handlers": "handlers",
+            # Compiled jinja templates, see templater.detect_template
+            "jinja_cache": "data/jinja2",
             # File in which public available instance meta-data is written
             # security-sensitive key values are redacted from this
             # world-readable file
@@ -379,6 +424,8 @@ class Paths(persistence.CloudInitPickleMixin):
             )
         if "hotplug.enabled" not in self.lookups:
             self.lookups["hotplug.enabled"] = "hotplug.enabled"
+        if "jinja_cache" not in self.lookups:
+            self.lookups["jinja_cache"] = "data/jinja2"
 
     # get_ipath_cur: get the current instance path for an item
     def get_ipath_cur(self, name=None):
@@ -0,0 +1,209 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+"""Read parts of large JSON files without parsing all of them.
+
+``write_json`` writes the same content as ``atomic_helper.write_json`` plus
+an index file next to it. The index records the byte range of every value
+in the first ``INDEX_DEPTH`` levels of nested objects by JSON pointer, and
+the keys of those objects. ``IndexedJson`` then parses only the values that
+are looked up.
+
+The index records the inode, size and modification time of the file it
+was written for and is ignored when the file changed since.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from cloudinit import atomic_helper
+
+LOG = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+
+# Levels of nested objects whose values are indexed
+INDEX_DEPTH = 3
+
+
+def index_path(filename: str) -> str:
+    return filename + INDEX_SUFFIX
+
+
+def json_pointer(pointer: str, key: str) -> str:
+    """Return the JSON pointer to key in the object at pointer."""
+    return pointer + "/" + key.replace("~", "~0").replace("/", "~1")
+
+
+def json_dumps_indexed(data, depth: int = INDEX_DEPTH):
+    """Return atomic_helper.json_dumps(data) and the index of its values.
+
+    Values nested deeper than depth are dumped by atomic_helper.json_dumps
+    and indented to their level, which is exactly how the json module
+    formats them within their parents.
+
+    :return: Tuple of the JSON text, a dict of the (start, end) offsets of
+        each indexed value by JSON pointer, and a dict of the sorted keys
+        of each indexed object by JSON pointer.
+    """
+    chunks: List[str] = []
+    offsets: Dict[str, Tuple[int, int]] = {}
+    keys: Dict[str, List[str]] = {}
+    position = 0
+
+    def write(text: str):
+        nonlocal position
+        chunks.append(text)
+        position += len(text)
+
+    def dump(value, pointer: str, level: int):
+        start = position
+        if (
+            level < depth
+            and isinstance(value, dict)
+            and value
+            and all(isinstance(key, str) for key in value)
+        ):
+            keys[pointer] = sorted(value)
+            indent = "\n" + " " * (level + 1)
+            for i, key in enumerate(keys[pointer]):
+                write(("{" if i == 0 else ",") + indent)
+                write(json.dumps(key) + ": ")
+                dump(value[key], json_pointer(pointer, key), level + 1)
+            write("\n" + " " * level + "}")
+        else:
+            text = atomic_helper.json_dumps(value)
+            write(text.replace("\n", "\n" + " " * level) if level else text)
+        offsets[pointer] = (start, position)
+
+    dump(data, "", 0)
+    return "".join(chunks), offsets, keys
+
+
+def write_json(
+    filename: str, data, mode: int = 0o644, digest: Optional[str] = None
+):
+    """Write data as atomic_helper.write_json does along with its index.
+
+    :param digest: Optional digest of what data was built from, returned by
+        written_digest for as long as the file is unchanged.
+    """
+    content, offsets, keys = json_dumps_indexed(data)
+    atomic_helper.write_file(filename, content + "\n", omode="w", mode=mode)
+    stat = os.stat(filename)
+    index = {
+        "version": INDEX_VERSION,
+        "file": [stat.st_ino, stat.st_size, stat.st_mtime_ns],
+        "digest": digest,
+        "offsets": offsets,
+        "keys": keys,
+    }
+    try:
+        atomic_helper.write_file(
+            index_path(filename), json.dumps(index), omode="w", mode=mode
+        )
+    except OSError as e:
+        LOG.warning("Failed to write index of %s: %s", filename, e)
+
+
+def written_digest(filename: str) -> Optional[str]:
+    """Return the digest filename was written with by write_json.
+
+    :return: None when filename does not exist, has no digest or changed
+        since it was written.
+    """
+    try:
+        indexed = IndexedJson.load(filename)
+    except OSError:
+        return None
+    return indexed.digest if indexed else None
+
+
+class IndexedJson:
+    """Lazily parsed content of a JSON file written by write_json."""
+
+    def __init__(
+        self,
+        filename: str,
+        offsets: dict,
+        keys: dict,
+        digest: Optional[str] = None,
+    ):
+        self.filename = filename
+        self.offsets = offsets
+        self.keys = keys
+        self.digest = digest
+
+    @classmethod
+    def load(cls, filename: str) -> Optional["IndexedJson"]:
+        """Return the indexed content of filename.
+
+        :return: None when filename has no index or changed since the index
+            was written.
+
+        :raises: OSError when filename cannot be read.
+        """
+        stat = os.stat(filename)
+        try:
+            with open(index_path(filename)) as stream:
+                index = json.load(stream)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            LOG.debug("Ignoring unreadable index of %s: %s", filename, e)
+            return None
+        if (
+            not isinstance(index, dict)
+            or index.get("version") != INDEX_VERSION
+        ):
+            return None
+        if index.get("file") != [stat.st_ino, stat.st_size, stat.st_mtime_ns]:
+            LOG.debug("Ignoring outdated index of %s", filename)
+            return None
+        return cls(
+            filename, index["offsets"], index["keys"], index.get("digest")
+        )
+
+    def value(self, pointer: str):
+        """Return the value at JSON pointer, parsing only its bytes.
+
+        Objects which are indexed are returned as IndexedObject.
+        """
+        if pointer in self.keys:
+            return IndexedObject(self, pointer)
+        start, end = self.offsets[pointer]
+        with open(self.filename, "rb") as stream:
+            stream.seek(start)
+            return json.loads(stream.read(end - start))
+
+    def root(self):
+        return self.value("")
+
+
+class IndexedObject(Mapping):
+    """Read-only view of an indexed JSON object, parsed on access."""
+
+    def __init__(self, indexed: IndexedJson, pointer: str):
+        self._indexed = indexed
+        self._pointer = pointer
+        self._keys = indexed.keys[pointer]
+        self._key_set = frozenset(self._keys)
+
+    def __getitem__(self, key):
+        if key not in self._key_set:
+            raise KeyError(key)
+        return self._indexed.value(json_pointer(self._pointer, key))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def to_dict(self) -> dict:
+        """Return the whole object, parsed."""
+        start, end = self._indexed.offsets[self._pointer]
+        with open(self._indexed.filename, "rb") as stream:
+            stream.seek(start)
+            return json.loads(stream.read(end - start))
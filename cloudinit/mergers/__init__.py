@@ -4,7 +4,9 @@
 #
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import functools
 import re
+from typing import Callable, Dict
 
 from cloudinit import importer, type_utils
 
@@ -14,6 +16,8 @@ MERGER_ATTR = "Merger"
 
 
 class UnknownMerger:
+    _merge_methods: Dict[type, Callable]
+
     # Named differently so auto-method finding
     # doesn't pick this up if there is ever a type
     # named "unknown"
@@ -27,18 +31,29 @@ class UnknownMerger:
     #
     # If not found the merge will be given to a '_handle_unknown'
     # function which can decide what to do with the 2 values.
+    #
+    # The method found is remembered for each type, so it is only
+    # looked up by name the first time a value of that type is merged.
     def merge(self, source, merge_with):
-        type_name = type_utils.obj_name(source)
-        type_name = type_name.lower()
-        method_name = "_on_%s" % (type_name)
-        meth = None
-        args = [source, merge_with]
-        if hasattr(self, method_name):
-            meth = getattr(self, method_name)
+        try:
+            methods = self._merge_methods
+        except AttributeError:
+            methods = self._merge_methods = {}
+        source_type = type(source)
+        meth = methods.get(source_type)
+        if meth is None:
+            meth = methods[source_type] = self._find_merge_method(source_type)
+        return meth(source, merge_with)
+
+    def _find_merge_method(self, source_type):
+        method_name = "_on_%s" % (type_utils.obj_name(source_type).lower())
+        meth = getattr(self, method_name, None)
         if not meth:
-            meth = self._handle_unknown
-            args.insert(0, method_name)
-        return meth(*args)
+            meth = self._unknown_merge_method(method_name)
+        return meth
+
+    def _unknown_merge_method(self, method_name):
+        return functools.partial(self._handle_unknown, method_name)
 
 
 class LookupMerger(UnknownMerger):
@@ -71,6 +86,17 @@ class LookupMerger(UnknownMerger):
             )
         return meth(value, merge_with)
 
+    # Does the search _handle_unknown would do up front, so that it is
+    # only done once for each type merged.
+    def _unknown_merge_method(self, method_name):
+        for merger in self._lookups:
+            meth = getattr(merger, method_name, None)
+            if meth:
+                return meth
+        return functools.partial(
+            UnknownMerger._handle_unknown, self, method_name
+        )
+
 
 def dict_extract_mergers(config):
     parsed_mergers: list = []
@@ -123,7 +149,25 @@ def default_mergers():
     return tuple(string_extract_mergers(DEF_MERGE_TYPE))
 
 
+def _freeze(parsed_mergers):
+    return tuple((m_name, tuple(m_ops)) for m_name, m_ops in parsed_mergers)
+
+
 def construct(parsed_mergers):
+    """Return a merger applying parsed_mergers.
+
+    Mergers hold no state besides their options, so the merger built for a
+    given list of mergers is shared by every caller asking for the same one.
+    """
+    try:
+        return _construct(_freeze(parsed_mergers))
+    except TypeError:
+        # Options which are not hashable cannot be looked up in the cache
+        return _construct.__wrapped__(parsed_mergers)
+
+
+@functools.lru_cache(maxsize=None)
+def _construct(parsed_mergers):
     mergers_to_be = []
     for m_name, m_ops in parsed_mergers:
         if not m_name.startswith(MERGER_PREFIX):
@@ -61,23 +61,31 @@ class Merger:
             # Otherwise leave it be...
             return old_v
 
+        # value is only copied once something in it changes, so that
+        # subtrees left alone by merge_with are returned as they are.
+        merged = value
         for k, v in merge_with.items():
             if k in value:
                 if v is None and self._allow_delete:
-                    value.pop(k)
-                else:
-                    value[k] = merge_same_key(value[k], v)
-            else:
-                value[k] = v
-        return value
+                    if merged is value:
+                        merged = dict(value)
+                    merged.pop(k)
+                    continue
+                v = merge_same_key(value[k], v)
+                if v is value[k]:
+                    continue
+            if merged is value:
+                merged = dict(value)
+            merged[k] = v
+        return merged
 
     def _on_dict(self, value, merge_with):
         if not isinstance(merge_with, (dict)):
             return value
         if self._method == "replace":
-            merged = self._do_dict_replace(dict(value), merge_with, True)
+            merged = self._do_dict_replace(value, merge_with, True)
         elif self._method == "no_replace":
-            merged = self._do_dict_replace(dict(value), merge_with, False)
+            merged = self._do_dict_replace(value, merge_with, False)
         else:
             raise NotImplementedError("Unknown merge type %s" % (self._method))
         return merged
@@ -1,16 +1,20 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import Callable, Dict, Iterable, List, Optional, Type
 
-from cloudinit import subp, util
+from cloudinit import performance, subp, util
 from cloudinit.net import eni, netplan, network_manager, networkd
 from cloudinit.net.netops.iproute2 import Iproute2
 from cloudinit.net.network_state import NetworkState
 
 LOG = logging.getLogger(__name__)
 
+# Upper bound on interfaces brought up at once by activators that allow it
+MAX_CONCURRENT_BRING_UP = 8
+
 
 class NoActivatorException(Exception):
     pass
@@ -42,7 +46,36 @@ def _alter_interface_callable(
         return False
 
 
+def _bring_up_all(
+    bring_up: Callable[[str], bool],
+    device_names: Iterable[str],
+    max_workers: int = 1,
+) -> bool:
+    """Bring up each device, up to max_workers at a time.
+
+    The time taken by each device is logged. Return True if all devices
+    were brought up successfully.
+    """
+
+    def timed_bring_up(device_name: str) -> bool:
+        with performance.Timed(
+            f"Bringing up interface {device_name}", log_mode="always"
+        ):
+            return bring_up(device_name)
+
+    devices = list(device_names)
+    if max_workers < 2 or len(devices) < 2:
+        return all(timed_bring_up(device) for device in devices)
+    workers = min(len(devices), max_workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return all(list(executor.map(timed_bring_up, devices)))
+
+
 class NetworkActivator(ABC):
+    # Interfaces brought up concurrently by bring_up_interfaces. Tools
+    # without safe concurrent use keep the default of one at a time.
+    max_concurrent_bring_up = 1
+
     @staticmethod
     @abstractmethod
     def available() -> bool:
@@ -73,7 +106,9 @@ class NetworkActivator(ABC):
 
         Return True is successful, otherwise return False
         """
-        return all(cls.bring_up_interface(device) for device in device_names)
+        return _bring_up_all(
+            cls.bring_up_interface, device_names, cls.max_concurrent_bring_up
+        )
 
     @classmethod
     def bring_up_all_interfaces(cls, network_state: NetworkState) -> bool:
@@ -148,6 +183,8 @@ class IfConfigActivator(NetworkActivator):
 
 
 class NetworkManagerActivator(NetworkActivator):
+    max_concurrent_bring_up = MAX_CONCURRENT_BRING_UP
+
     @staticmethod
     def available() -> bool:
         """Return true if NetworkManager can be used on this system."""
@@ -190,8 +227,13 @@ class NetworkManagerActivator(NetworkActivator):
     def bring_up_interfaces(cls, device_names: Iterable[str]) -> bool:
         """Activate network
 
+        All connection files are loaded with a single nmcli call, then the
+        connections are brought up concurrently.
+
         Return True on success
         """
+        from cloudinit.net.network_manager import conn_filename
+
         state = subp.subp(
             [
                 "systemctl",
@@ -205,10 +247,56 @@ class NetworkManagerActivator(NetworkActivator):
                 "Expected NetworkManager SubState=running, but detected: %s",
                 state,
             )
-        return _alter_interface(
+        if not _alter_interface(
             ["systemctl", "try-reload-or-restart", "NetworkManager.service"],
             "all",
-        ) and all(cls.bring_up_interface(device) for device in device_names)
+        ):
+            return False
+
+        filenames = {}
+        success = True
+        for device_name in device_names:
+            filename = conn_filename(device_name)
+            if filename is None:
+                LOG.warning(
+                    "Unable to find an interface config file for %s. "
+                    "Unable to bring up interface.",
+                    device_name,
+                )
+                success = False
+            else:
+                filenames[device_name] = filename
+        if not filenames:
+            return success
+
+        cmd = ["nmcli", "connection", "load", *filenames.values()]
+        if _alter_interface(cmd, "all"):
+            up_cmds = {
+                device_name: ["nmcli", "connection", "up", "filename", f]
+                for device_name, f in filenames.items()
+            }
+        else:
+            _alter_interface(["nmcli", "connection", "reload"], "all")
+            up_cmds = {
+                device_name: [
+                    "nmcli",
+                    "connection",
+                    "up",
+                    "ifname",
+                    device_name,
+                ]
+                for device_name in filenames
+            }
+        return (
+            _bring_up_all(
+                lambda device_name: _alter_interface(
+                    up_cmds[device_name], device_name
+                ),
+                filenames,
+                cls.max_concurrent_bring_up,
+            )
+            and success
+        )
 
 
 class NetplanActivator(NetworkActivator):
@@ -282,6 +370,8 @@ class NetplanActivator(NetworkActivator):
 
 
 class NetworkdActivator(NetworkActivator):
+    max_concurrent_bring_up = MAX_CONCURRENT_BRING_UP
+
     @staticmethod
     def available() -> bool:
         """Return true if ifupdown can be used on this system."""
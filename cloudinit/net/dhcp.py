@@ -12,6 +12,7 @@ import re
 import signal
 import socket
 import struct
+import threading
 import time
 from contextlib import suppress
 from io import StringIO
@@ -21,7 +22,7 @@ from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 import configobj
 
 from cloudinit import subp, temp_utils, util
-from cloudinit.net import get_interface_mac, is_ib_interface
+from cloudinit.net import dhcp_protocol, get_interface_mac, is_ib_interface
 
 LOG = logging.getLogger(__name__)
 
@@ -222,6 +223,21 @@ def network_manager_get_option_from_leases(keyname: str) -> Optional[str]:
     return leases.get(keyname) if leases else None
 
 
+def _kill_client_by_pid_file(pid_file: str):
+    """Kill the DHCP client whose pid is in pid_file, if the process was
+    started with that pid file.
+    """
+    try:
+        pid = int(util.load_text_file(pid_file).strip())
+        cmdline = util.load_binary_file(f"/proc/{pid}/cmdline")
+    except (OSError, ValueError):
+        return
+    if pid_file.encode() in cmdline.split(b"\0"):
+        LOG.debug("Stopping DHCP client with pid=%s", pid)
+        with suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGKILL)
+
+
 class DhcpClient(abc.ABC):
     client_name = ""
     timeout = 10
@@ -230,6 +246,29 @@ class DhcpClient(abc.ABC):
         self.dhcp_client_path = subp.which(self.client_name)
         if not self.dhcp_client_path:
             raise NoDHCPLeaseMissingDhclientError()
+        self.discovery_stopped = threading.Event()
+
+    def for_interface(self, interface: str) -> Optional["DhcpClient"]:
+        """Return a client for discovery on interface alone.
+
+        Clients returned for different interfaces may run dhcp_discovery at
+        the same time, as they share no files or state, and support
+        stop_discovery.
+
+        @return: The new client, or None when this client cannot run
+            concurrently with others.
+        """
+        return None
+
+    def stop_discovery(self):
+        """Stop dhcp_discovery running in another thread, which then raises
+        NoDHCPLeaseError, or stop it from starting.
+        """
+        self.discovery_stopped.set()
+
+    def _check_discovery_stopped(self):
+        if self.discovery_stopped.is_set():
+            raise NoDHCPLeaseError("DHCP discovery was stopped")
 
     @classmethod
     def kill_dhcp_client(cls):
@@ -303,6 +342,17 @@ class IscDhclient(DhcpClient):
     def __init__(self):
         super().__init__()
         self.lease_file = "/run/dhclient.lease"
+        self.pid_file = "/run/dhclient.pid"
+
+    def for_interface(self, interface: str) -> Optional["IscDhclient"]:
+        client = IscDhclient()
+        client.lease_file = f"/run/dhclient.{interface}.lease"
+        client.pid_file = f"/run/dhclient.{interface}.pid"
+        return client
+
+    def stop_discovery(self):
+        super().stop_discovery()
+        _kill_client_by_pid_file(self.pid_file)
 
     @staticmethod
     def parse_leases(lease_content: str) -> List[Dict[str, Any]]:
@@ -389,7 +439,7 @@ class IscDhclient(DhcpClient):
         # We want to avoid running /sbin/dhclient-script because of
         # side-effects in # /etc/resolv.conf any any other vendor specific
         # scripts in /etc/dhcp/dhclient*hooks.d.
-        pid_file = "/run/dhclient.pid"
+        pid_file = self.pid_file
         config_file = None
         sleep_time = 0.01
         sleep_cycles = int(self.timeout / sleep_time)
@@ -424,6 +474,7 @@ class IscDhclient(DhcpClient):
             util.write_file(config_file, interface_dhclient_content)
 
         try:
+            self._check_discovery_stopped()
             out, err = subp.subp(
                 distro.build_dhclient_cmd(
                     self.dhcp_client_path,
@@ -993,6 +1044,19 @@ class Udhcpc(DhcpClient):
     def __init__(self):
         super().__init__()
         self.lease_file = ""
+        self.script_name = "udhcpc_script"
+        self.pid_file = ""
+
+    def for_interface(self, interface: str) -> Optional["Udhcpc"]:
+        client = Udhcpc()
+        # Concurrent runs must not see the script while it is rewritten
+        client.script_name = f"udhcpc_script.{interface}"
+        client.pid_file = f"/run/udhcpc.{interface}.pid"
+        return client
+
+    def stop_discovery(self):
+        super().stop_discovery()
+        _kill_client_by_pid_file(self.pid_file)
 
     def dhcp_discovery(
         self,
@@ -1018,7 +1082,7 @@ class Udhcpc(DhcpClient):
         # udhcpc needs the interface up to send initial discovery packets
         distro.net_ops.link_up(interface)
 
-        udhcpc_script = os.path.join(tmp_dir, "udhcpc_script")
+        udhcpc_script = os.path.join(tmp_dir, self.script_name)
         util.write_file(udhcpc_script, UDHCPC_SCRIPT, 0o755)
 
         cmd = [
@@ -1034,6 +1098,8 @@ class Udhcpc(DhcpClient):
             "-f",  # Run in foreground
             "-v",
         ]
+        if self.pid_file:
+            cmd.extend(["-p", self.pid_file])
 
         # For INFINIBAND port the dhcpc must be running with
         # client id option. So here we are checking if the interface is
@@ -1049,6 +1115,7 @@ class Udhcpc(DhcpClient):
                 ]
             )
         try:
+            self._check_discovery_stopped()
             out, err = subp.subp(
                 cmd, update_env={"LEASE_FILE": self.lease_file}, capture=True
             )
@@ -1089,4 +1156,108 @@ class Udhcpc(DhcpClient):
         return []
 
 
-ALL_DHCP_CLIENTS: List[Type[DhcpClient]] = [Dhcpcd, IscDhclient, Udhcpc]
+class NativeDhcpClient(DhcpClient):
+    """DHCPv4 client running within cloud-init.
+
+    Leases are obtained over a packet socket, without depending on the DHCP
+    client shipped in the image and without processes or files left behind.
+    Leases are only known to the process which obtained them.
+    """
+
+    client_name = "native"
+
+    def __init__(self):
+        # Nothing to install, but packet sockets only exist on Linux
+        if not hasattr(socket, "AF_PACKET"):
+            raise NoDHCPLeaseMissingDhclientError()
+        self.dhcp_client_path = None
+        self.discovery_stopped = threading.Event()
+        self.leases: Dict[str, Dict[str, Any]] = {}
+
+    def for_interface(self, interface: str) -> Optional["NativeDhcpClient"]:
+        client = NativeDhcpClient()
+        client.leases = self.leases
+        return client
+
+    @classmethod
+    def kill_dhcp_client(cls):
+        pass
+
+    def get_newest_lease(self, interface: str) -> Dict[str, Any]:
+        """Get the most recent lease obtained on interface as a dict.
+
+        @param interface: Name of the interface the lease was obtained on.
+        """
+        return self.leases.get(interface, {})
+
+    @staticmethod
+    def parse_static_routes(routes: str) -> List[Tuple[str, str]]:
+        # Leases record routes in the format of isc-dhclient
+        return IscDhclient.parse_static_routes(routes)
+
+    def dhcp_discovery(
+        self,
+        interface: str,
+        dhcp_log_func: Optional[Callable[[str, str, str], None]] = None,
+        distro=None,
+    ) -> Dict[str, Any]:
+        """Obtain a lease on the interface without configuring it.
+
+        @param interface: Name of the network interface on which to send a
+            dhcp request
+        @param dhcp_log_func: Callable accepting the interface and client's
+            stdout, stderr streams.
+        @param distro: a distro object for network interface manipulation
+        @return: dict of lease options in the format of isc-dhclient leases
+        """
+        LOG.debug("Performing a dhcp discovery on %s", interface)
+        if is_ib_interface(interface):
+            LOG.debug(
+                "The native DHCP client does not support InfiniBand"
+                " interface %s",
+                interface,
+            )
+            raise NoDHCPLeaseError()
+        mac = get_interface_mac(interface)
+        if not mac:
+            raise NoDHCPLeaseInterfaceError()
+        # Discovery packets are only sent once the link is up
+        distro.net_ops.link_up(interface)
+        transcript: List[str] = []
+        try:
+            with dhcp_protocol.open_socket(interface) as sock:
+                ack = dhcp_protocol.DhcpExchange(
+                    sock,
+                    interface,
+                    bytes.fromhex(mac.replace(":", "")),
+                    transcript.append,
+                    self.discovery_stopped,
+                ).run(self.timeout)
+        except OSError as e:
+            LOG.debug("DHCP discovery on %s failed: %s", interface, e)
+            raise NoDHCPLeaseError() from e
+        finally:
+            if dhcp_log_func is not None:
+                dhcp_log_func(interface, "\n".join(transcript), "")
+        if ack is None:
+            LOG.debug(
+                "No DHCP lease on %s after %s seconds",
+                interface,
+                self.timeout,
+            )
+            raise NoDHCPLeaseError()
+        lease = dhcp_protocol.lease_options(interface, ack)
+        self.leases[interface] = lease
+        return lease
+
+
+ALL_DHCP_CLIENTS: List[Type[DhcpClient]] = [
+    Dhcpcd,
+    IscDhclient,
+    Udhcpc,
+    NativeDhcpClient,
+]
+
+# Clients tried when network.dhcp_client_priority is not configured. The
+# native client is only used when configured.
+DEFAULT_DHCP_CLIENTS: List[Type[DhcpClient]] = [Dhcpcd, IscDhclient, Udhcpc]
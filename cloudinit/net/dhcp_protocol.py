@@ -0,0 +1,483 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Minimal DHCPv4 client protocol for ephemeral lease discovery.
+
+Implements the DISCOVER, OFFER, REQUEST and ACK exchange of RFC 2131 over a
+Linux packet socket, which works before the interface has an address. Leases
+are returned with the option names and value formats of isc-dhclient leases,
+so that they can be used like those of the external DHCP clients.
+"""
+
+import ipaddress
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+CLIENT_PORT = 68
+SERVER_PORT = 67
+
+ETH_P_IP = 0x0800
+BROADCAST_MAC = b"\xff" * 6
+
+BOOTREQUEST = 1
+BOOTREPLY = 2
+HTYPE_ETHER = 1
+MAGIC_COOKIE = b"\x63\x82\x53\x63"
+# op, htype, hlen, hops, xid, secs, flags, ciaddr, yiaddr, siaddr, giaddr,
+# chaddr, sname and file
+BOOTP_FORMAT = "!BBBBIHH4s4s4s4s16s64s128s"
+BOOTP_SIZE = struct.calcsize(BOOTP_FORMAT)
+
+DHCPDISCOVER = 1
+DHCPOFFER = 2
+DHCPREQUEST = 3
+DHCPACK = 5
+DHCPNAK = 6
+MESSAGE_TYPE_NAMES = {
+    DHCPDISCOVER: "DHCPDISCOVER",
+    DHCPOFFER: "DHCPOFFER",
+    DHCPREQUEST: "DHCPREQUEST",
+    DHCPACK: "DHCPACK",
+    DHCPNAK: "DHCPNAK",
+}
+
+OPT_PAD = 0
+OPT_SUBNET_MASK = 1
+OPT_ROUTERS = 3
+OPT_DOMAIN_NAME_SERVERS = 6
+OPT_HOST_NAME = 12
+OPT_DOMAIN_NAME = 15
+OPT_INTERFACE_MTU = 26
+OPT_BROADCAST_ADDRESS = 28
+OPT_NTP_SERVERS = 42
+OPT_REQUESTED_ADDRESS = 50
+OPT_LEASE_TIME = 51
+OPT_OVERLOAD = 52
+OPT_MESSAGE_TYPE = 53
+OPT_SERVER_IDENTIFIER = 54
+OPT_PARAMETER_REQUEST_LIST = 55
+OPT_MAX_MESSAGE_SIZE = 57
+OPT_RENEWAL_TIME = 58
+OPT_REBINDING_TIME = 59
+OPT_CLASSLESS_STATIC_ROUTES = 121
+OPT_MS_CLASSLESS_STATIC_ROUTES = 249
+OPT_AZURE_WIRESERVER = 245
+OPT_END = 255
+
+PARAMETER_REQUEST_LIST = bytes(
+    [
+        OPT_SUBNET_MASK,
+        OPT_BROADCAST_ADDRESS,
+        OPT_ROUTERS,
+        OPT_DOMAIN_NAME_SERVERS,
+        OPT_HOST_NAME,
+        OPT_DOMAIN_NAME,
+        OPT_INTERFACE_MTU,
+        OPT_NTP_SERVERS,
+        OPT_LEASE_TIME,
+        OPT_SERVER_IDENTIFIER,
+        OPT_RENEWAL_TIME,
+        OPT_REBINDING_TIME,
+        OPT_CLASSLESS_STATIC_ROUTES,
+        OPT_MS_CLASSLESS_STATIC_ROUTES,
+        OPT_AZURE_WIRESERVER,
+    ]
+)
+
+# isc-dhclient lease names of the options, by value format
+ADDRESS_OPTIONS = {
+    OPT_SUBNET_MASK: "subnet-mask",
+    OPT_BROADCAST_ADDRESS: "broadcast-address",
+    OPT_SERVER_IDENTIFIER: "dhcp-server-identifier",
+    OPT_AZURE_WIRESERVER: "unknown-245",
+}
+ADDRESS_LIST_OPTIONS = {
+    OPT_DOMAIN_NAME_SERVERS: "domain-name-servers",
+    OPT_NTP_SERVERS: "ntp-servers",
+}
+TEXT_OPTIONS = {
+    OPT_HOST_NAME: "host-name",
+    OPT_DOMAIN_NAME: "domain-name",
+}
+INTEGER_OPTIONS = {
+    OPT_INTERFACE_MTU: ("!H", "interface-mtu"),
+    OPT_LEASE_TIME: ("!I", "dhcp-lease-time"),
+    OPT_RENEWAL_TIME: ("!I", "dhcp-renewal-time"),
+    OPT_REBINDING_TIME: ("!I", "dhcp-rebinding-time"),
+}
+ROUTE_OPTIONS = {
+    OPT_CLASSLESS_STATIC_ROUTES: "rfc3442-classless-static-routes",
+    OPT_MS_CLASSLESS_STATIC_ROUTES: "classless-static-routes",
+}
+
+# Seconds waited for a reply before the first retransmission, doubled for
+# each following one
+RETRANSMIT_INTERVAL = 1
+MAX_RETRANSMIT_INTERVAL = 8
+
+# Longest time an exchange takes to notice it was stopped, in seconds
+STOP_POLL_INTERVAL = 0.1
+
+
+class DhcpMessage(NamedTuple):
+    op: int
+    xid: int
+    yiaddr: str
+    chaddr: bytes
+    options: Dict[int, bytes]
+
+    @property
+    def message_type(self) -> Optional[int]:
+        value = self.options.get(OPT_MESSAGE_TYPE)
+        return value[0] if value else None
+
+    @property
+    def server_identifier(self) -> Optional[bytes]:
+        return self.options.get(OPT_SERVER_IDENTIFIER)
+
+
+def encode_options(options: Dict[int, bytes]) -> bytes:
+    """Encode options, splitting values longer than 255 bytes (RFC 3396)."""
+    encoded = bytearray()
+    for code, value in options.items():
+        for start in range(0, max(len(value), 1), 255):
+            chunk = value[start : start + 255]
+            encoded += bytes([code, len(chunk)]) + chunk
+    encoded.append(OPT_END)
+    return bytes(encoded)
+
+
+def decode_options(data: bytes, options: Dict[int, bytes]):
+    """Decode options from data into options, concatenating values of
+    options present more than once (RFC 3396).
+
+    @raises: ValueError on truncated options.
+    """
+    position = 0
+    while position < len(data):
+        code = data[position]
+        if code == OPT_END:
+            return
+        if code == OPT_PAD:
+            position += 1
+            continue
+        if position + 1 >= len(data):
+            raise ValueError("Truncated DHCP option %d" % code)
+        length = data[position + 1]
+        value = data[position + 2 : position + 2 + length]
+        if len(value) != length:
+            raise ValueError("Truncated DHCP option %d" % code)
+        options[code] = options.get(code, b"") + value
+        position += 2 + length
+
+
+def build_message(
+    message_type: int, xid: int, mac: bytes, options: Dict[int, bytes]
+) -> bytes:
+    """Return the BOOTP payload of a DHCP client message."""
+    header = struct.pack(
+        BOOTP_FORMAT,
+        BOOTREQUEST,
+        HTYPE_ETHER,
+        len(mac),
+        0,
+        xid,
+        0,
+        0,
+        bytes(4),
+        bytes(4),
+        bytes(4),
+        bytes(4),
+        mac,
+        b"",
+        b"",
+    )
+    return (
+        header
+        + MAGIC_COOKIE
+        + encode_options({OPT_MESSAGE_TYPE: bytes([message_type]), **options})
+    )
+
+
+def parse_message(payload: bytes) -> Optional[DhcpMessage]:
+    """Return the DHCP message in a BOOTP payload, or None when it is not
+    a valid DHCP message.
+    """
+    if len(payload) < BOOTP_SIZE + len(MAGIC_COOKIE):
+        return None
+    op, _htype, hlen, _hops, xid, _secs, _flags = struct.unpack_from(
+        "!BBBBIHH", payload
+    )
+    if payload[BOOTP_SIZE : BOOTP_SIZE + len(MAGIC_COOKIE)] != MAGIC_COOKIE:
+        return None
+    options: Dict[int, bytes] = {}
+    try:
+        decode_options(payload[BOOTP_SIZE + len(MAGIC_COOKIE) :], options)
+        overload = options.pop(OPT_OVERLOAD, b"\x00")[0]
+        # The file and sname fields may carry more options
+        if overload & 1:
+            decode_options(payload[108:236], options)
+        if overload & 2:
+            decode_options(payload[44:108], options)
+    except (ValueError, IndexError):
+        return None
+    return DhcpMessage(
+        op=op,
+        xid=xid,
+        yiaddr=socket.inet_ntoa(payload[16:20]),
+        chaddr=payload[28 : 28 + min(hlen, 16)],
+        options=options,
+    )
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack("!%dH" % (len(data) // 2), data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def build_udp_packet(payload: bytes) -> bytes:
+    """Return payload in an IPv4 UDP packet broadcast from 0.0.0.0."""
+    source = bytes(4)
+    destination = b"\xff" * 4
+    udp_length = 8 + len(payload)
+    pseudo_header = struct.pack(
+        "!4s4sBBH", source, destination, 0, socket.IPPROTO_UDP, udp_length
+    )
+    udp_header = struct.pack("!HHHH", CLIENT_PORT, SERVER_PORT, udp_length, 0)
+    udp_checksum = _checksum(pseudo_header + udp_header + payload) or 0xFFFF
+    udp_header = udp_header[:6] + struct.pack("!H", udp_checksum)
+    ip_header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0x10,
+        20 + udp_length,
+        0,
+        0,
+        64,
+        socket.IPPROTO_UDP,
+        0,
+        source,
+        destination,
+    )
+    ip_header = (
+        ip_header[:10]
+        + struct.pack("!H", _checksum(ip_header))
+        + ip_header[12:]
+    )
+    return ip_header + udp_header + payload
+
+
+def parse_udp_packet(packet: bytes) -> Optional[bytes]:
+    """Return the payload of an IPv4 UDP packet sent to the client port, or
+    None for any other packet.
+    """
+    if len(packet) < 20 or packet[0] >> 4 != 4:
+        return None
+    header_length = (packet[0] & 0x0F) * 4
+    if packet[9] != socket.IPPROTO_UDP or len(packet) < header_length + 8:
+        return None
+    _source_port, destination_port, udp_length = struct.unpack_from(
+        "!HHH", packet, header_length
+    )
+    if destination_port != CLIENT_PORT or udp_length < 8:
+        return None
+    return packet[header_length + 8 : header_length + udp_length]
+
+
+def open_socket(interface: str) -> socket.socket:
+    """Return a packet socket sending and receiving IPv4 on interface."""
+    sock = socket.socket(
+        socket.AF_PACKET,
+        socket.SOCK_DGRAM,
+        socket.htons(ETH_P_IP),
+    )
+    try:
+        sock.bind((interface, ETH_P_IP))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _format_routes(value: bytes) -> str:
+    return ",".join(str(byte) for byte in value)
+
+
+def lease_options(interface: str, ack: DhcpMessage) -> Dict[str, str]:
+    """Return the lease in an ACK as isc-dhclient would record it."""
+    lease = {"interface": interface, "fixed-address": ack.yiaddr}
+    for code, value in ack.options.items():
+        if code in (OPT_MESSAGE_TYPE, OPT_OVERLOAD):
+            continue
+        if code in ADDRESS_OPTIONS and len(value) == 4:
+            lease[ADDRESS_OPTIONS[code]] = socket.inet_ntoa(value)
+        elif code == OPT_ROUTERS and len(value) >= 4:
+            # Ephemeral networking uses a single default gateway
+            lease["routers"] = socket.inet_ntoa(value[:4])
+        elif code in ADDRESS_LIST_OPTIONS and value and len(value) % 4 == 0:
+            lease[ADDRESS_LIST_OPTIONS[code]] = ",".join(
+                socket.inet_ntoa(value[i : i + 4])
+                for i in range(0, len(value), 4)
+            )
+        elif code in TEXT_OPTIONS:
+            lease[TEXT_OPTIONS[code]] = value.rstrip(b"\x00").decode(
+                "utf-8", "replace"
+            )
+        elif code in INTEGER_OPTIONS and len(value) == struct.calcsize(
+            INTEGER_OPTIONS[code][0]
+        ):
+            fmt, name = INTEGER_OPTIONS[code]
+            lease[name] = str(struct.unpack(fmt, value)[0])
+        elif code in ROUTE_OPTIONS:
+            lease[ROUTE_OPTIONS[code]] = _format_routes(value)
+        else:
+            lease["unknown-%d" % code] = ":".join("%x" % b for b in value)
+    if "subnet-mask" not in lease:
+        # Without a mask, the address is of its classful network
+        first_octet = int(ack.yiaddr.split(".")[0])
+        prefix = 8 if first_octet < 128 else 16 if first_octet < 192 else 24
+        lease["subnet-mask"] = str(
+            ipaddress.IPv4Network("0.0.0.0/%d" % prefix).netmask
+        )
+    return lease
+
+
+class DhcpExchange:
+    """Obtain a lease on an interface through a packet socket.
+
+    @param sock: Socket sending and receiving IPv4 packets on the interface,
+        as returned by open_socket.
+    @param mac: Hardware address of the interface.
+    @param log: Callable receiving a line for each message sent or
+        received, as DHCP clients print them.
+    @param stop: Event set from another thread to give up on the exchange.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        interface: str,
+        mac: bytes,
+        log: Optional[Callable[[str], None]] = None,
+        stop: Optional[threading.Event] = None,
+    ):
+        self.sock = sock
+        self.interface = interface
+        self.mac = mac
+        self.log = log or (lambda _line: None)
+        self.stop = stop or threading.Event()
+        self.xid = 0
+
+    def send(self, message_type: int, options: Dict[int, bytes]):
+        options = {
+            OPT_PARAMETER_REQUEST_LIST: PARAMETER_REQUEST_LIST,
+            OPT_MAX_MESSAGE_SIZE: struct.pack("!H", 1500),
+            **options,
+        }
+        packet = build_udp_packet(
+            build_message(message_type, self.xid, self.mac, options)
+        )
+        self.sock.sendto(
+            packet, (self.interface, ETH_P_IP, 0, 0, BROADCAST_MAC)
+        )
+
+    def receive(
+        self, deadline: float, message_types: List[int]
+    ) -> Optional[DhcpMessage]:
+        """Return the next reply to this exchange of one of message_types,
+        or None when none arrives before deadline.
+        """
+        while not self.stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            readable, _, _ = select.select(
+                [self.sock], [], [], min(remaining, STOP_POLL_INTERVAL)
+            )
+            if not readable:
+                continue
+            payload = parse_udp_packet(self.sock.recv(65535))
+            if payload is None:
+                continue
+            message = parse_message(payload)
+            if (
+                message is None
+                or message.op != BOOTREPLY
+                or message.xid != self.xid
+                or message.chaddr[: len(self.mac)] != self.mac
+                or message.message_type not in message_types
+            ):
+                continue
+            server_identifier = message.server_identifier
+            if server_identifier is None or len(server_identifier) != 4:
+                # Servers must identify themselves in offers, acks and naks
+                continue
+            self.log(
+                "%s of %s from %s"
+                % (
+                    MESSAGE_TYPE_NAMES[message.message_type],
+                    message.yiaddr,
+                    socket.inet_ntoa(server_identifier),
+                )
+            )
+            return message
+        return None
+
+    def _transact(
+        self,
+        message_type: int,
+        options: Dict[int, bytes],
+        reply_types: List[int],
+        deadline: float,
+    ) -> Optional[DhcpMessage]:
+        """Send a message until a reply arrives, retransmitting with
+        exponential backoff (RFC 2131 section 4.1).
+        """
+        interval = RETRANSMIT_INTERVAL
+        while time.monotonic() < deadline and not self.stop.is_set():
+            self.log(
+                "%s on %s (xid=0x%08x)"
+                % (MESSAGE_TYPE_NAMES[message_type], self.interface, self.xid)
+            )
+            self.send(message_type, options)
+            reply = self.receive(
+                min(deadline, time.monotonic() + interval), reply_types
+            )
+            if reply:
+                return reply
+            interval = min(interval * 2, MAX_RETRANSMIT_INTERVAL)
+        return None
+
+    def run(self, timeout: float) -> Optional[DhcpMessage]:
+        """Return the ACK of the lease obtained, or None on timeout or
+        when stopped.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.stop.is_set():
+            self.xid = random.getrandbits(32)
+            offer = self._transact(DHCPDISCOVER, {}, [DHCPOFFER], deadline)
+            if offer is None or offer.server_identifier is None:
+                return None
+            reply = self._transact(
+                DHCPREQUEST,
+                {
+                    OPT_REQUESTED_ADDRESS: socket.inet_aton(offer.yiaddr),
+                    OPT_SERVER_IDENTIFIER: offer.server_identifier,
+                },
+                [DHCPACK, DHCPNAK],
+                deadline,
+            )
+            if reply is None:
+                return None
+            if reply.message_type == DHCPACK:
+                return reply
+            # Start over after a DHCPNAK
+        return None
@@ -4,8 +4,20 @@
 
 import contextlib
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
 from functools import partial
-from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
 
 import cloudinit.net as net
 import cloudinit.netinfo as netinfo
@@ -277,6 +289,141 @@ class EphemeralIPv6Network:
         """No need to set the link to down state"""
 
 
+class ConcurrentDHCPDiscovery:
+    """DHCP discovery on several candidate interfaces at once.
+
+    Entering the context starts discovery on the first of the given
+    interfaces, each with its own DHCP client from DhcpClient.for_interface.
+    Discovery on the other interfaces starts after head_start seconds, or as
+    soon as the caller moves past the first interface. The clients only
+    obtain leases: nothing is configured until a lease is brought up, for
+    instance by EphemeralDHCPv4 with this discovery.
+
+    Iterating yields the interfaces as their discovery finishes, the first
+    of the given interfaces first among those already finished. Callers can
+    thus probe the metadata service on the first interface with a lease
+    without waiting for discovery to time out on the others, and stop
+    iterating once it is found. Exiting the context stops the clients still
+    running and waits for them to exit.
+
+    When the DHCP client of the distro cannot run concurrently, discovery
+    runs on each interface in the given order as its lease is requested.
+    """
+
+    def __init__(
+        self,
+        distro,
+        interfaces: List[str],
+        dhcp_log_func: Optional[Callable[[str, str, str], None]] = None,
+        head_start: float = 2,
+    ):
+        self.distro = distro
+        self.interfaces = list(interfaces)
+        self.dhcp_log_func = dhcp_log_func
+        self.head_start = head_start
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._clients: Dict[str, Any] = {}
+        self._futures: Dict[str, Future] = {}
+        self._start_all = threading.Event()
+
+    def __enter__(self):
+        clients = {}
+        if len(self.interfaces) > 1:
+            try:
+                dhcp_client = self.distro.dhcp_client
+                for interface in self.interfaces:
+                    client = dhcp_client.for_interface(interface)
+                    if client is None:
+                        LOG.debug(
+                            "DHCP client %s cannot run concurrently, running"
+                            " discovery one interface at a time",
+                            dhcp_client.client_name,
+                        )
+                        return self
+                    clients[interface] = client
+            except NoDHCPLeaseError:
+                # Raised again for each interface by lease()
+                return self
+        if clients:
+            LOG.debug(
+                "Running DHCP discovery concurrently on %s",
+                ", ".join(clients),
+            )
+            self._clients = clients
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(clients), thread_name_prefix="dhcp"
+            )
+            for interface in clients:
+                self._futures[interface] = self._executor.submit(
+                    self._discover, interface
+                )
+        return self
+
+    def __exit__(self, *_args):
+        if not self._executor:
+            return
+        self._start_all.set()
+        running = self._running()
+        while running:
+            # Stop again clients which had not started their DHCP client
+            # process when last stopped
+            for interface in running:
+                self._clients[interface].stop_discovery()
+            wait_for_futures(
+                [self._futures[interface] for interface in running],
+                timeout=0.5,
+            )
+            running = self._running()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _running(self) -> List[str]:
+        return [
+            interface
+            for interface, future in self._futures.items()
+            if not future.done()
+        ]
+
+    def _discover(self, interface: str) -> Dict[str, Any]:
+        if interface != self.interfaces[0]:
+            self._start_all.wait(self.head_start)
+        return self._clients[interface].dhcp_discovery(
+            interface, self.dhcp_log_func, self.distro
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        if not self._futures:
+            yield from self.interfaces
+            return
+        pending = list(self.interfaces)
+        while pending:
+            wait_for_futures(
+                [self._futures[interface] for interface in pending],
+                return_when=FIRST_COMPLETED,
+            )
+            interface = next(
+                interface
+                for interface in pending
+                if self._futures[interface].done()
+            )
+            pending.remove(interface)
+            yield interface
+            self._start_all.set()
+
+    def lease(self, interface: str) -> Dict[str, Any]:
+        """Return the lease obtained on interface.
+
+        @raises: NoDHCPLeaseError or the error discovery failed with.
+        """
+        if interface in self._futures:
+            if interface != self.interfaces[0]:
+                self._start_all.set()
+            return self._futures[interface].result()
+        return maybe_perform_dhcp_discovery(
+            self.distro, interface, self.dhcp_log_func
+        )
+
+
 class EphemeralDHCPv4:
     def __init__(
         self,
@@ -284,11 +431,13 @@ class EphemeralDHCPv4:
         iface=None,
         connectivity_urls_data: Optional[List[Dict[str, Any]]] = None,
         dhcp_log_func: Optional[Callable[[str, str, str], None]] = None,
+        dhcp_discovery: Optional[ConcurrentDHCPDiscovery] = None,
     ):
         self.iface = iface
         self._ephipv4: Optional[EphemeralIPv4Network] = None
         self.lease: Optional[Dict[str, Any]] = None
         self.dhcp_log_func = dhcp_log_func
+        self.dhcp_discovery = dhcp_discovery
         self.connectivity_urls_data = connectivity_urls_data or []
         self.distro = distro
         self.interface_addrs_before_dhcp = netinfo.netdev_info()
@@ -329,9 +478,12 @@ class EphemeralDHCPv4:
         """
         if self.lease:
             return self.lease
-        self.lease = maybe_perform_dhcp_discovery(
-            self.distro, self.iface, self.dhcp_log_func
-        )
+        if self.dhcp_discovery:
+            self.lease = self.dhcp_discovery.lease(self.iface)
+        else:
+            self.lease = maybe_perform_dhcp_discovery(
+                self.distro, self.iface, self.dhcp_log_func
+            )
         if not self.lease:
             raise NoDHCPLeaseError()
         LOG.debug(
@@ -408,6 +560,7 @@ class EphemeralIPNetwork:
         ipv6: bool = False,
         ipv4: bool = True,
         connectivity_urls_data: Optional[List[Dict[str, Any]]] = None,
+        dhcp_discovery: Optional[ConcurrentDHCPDiscovery] = None,
     ):
         """
         Args:
@@ -419,6 +572,8 @@ class EphemeralIPNetwork:
                 check before attempting to bring up ephemeral networks. If
                 connectivity can be established to any of the urls, then the
                 ephemeral network setup is skipped.
+            dhcp_discovery: Discovery running on interface, whose lease is
+                brought up instead of performing DHCP discovery.
         """
         self.interface = interface
         self.ipv4 = ipv4
@@ -427,6 +582,7 @@ class EphemeralIPNetwork:
         self.state_msg: str = ""
         self.distro = distro
         self.connectivity_urls_data = connectivity_urls_data
+        self.dhcp_discovery = dhcp_discovery
 
     def __enter__(self):
         if not self.ipv4 and not self.ipv6:
@@ -503,6 +659,7 @@ class EphemeralIPNetwork:
                     EphemeralDHCPv4(
                         distro=self.distro,
                         iface=self.interface,
+                        dhcp_discovery=self.dhcp_discovery,
                     )
                 )
             elif ip_version == "ipv6":
@@ -7,7 +7,7 @@ import os
 import re
 import textwrap
 from tempfile import SpooledTemporaryFile
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Set
 
 from cloudinit import features, safeyaml, subp, util
 from cloudinit.net import (
@@ -21,6 +21,8 @@ from cloudinit.net import (
 from cloudinit.net.network_state import NET_CONFIG_TO_V2, NetworkState
 
 CLOUDINIT_NETPLAN_FILE = "/etc/netplan/50-cloud-init.yaml"
+# Upper bound on concurrent `udevadm test-builtin net_setup_link` runs
+MAX_CONCURRENT_SETUP_LINK = 8
 
 KNOWN_SNAPD_CONFIG = b"""\
 # This is the initial network config.
@@ -440,19 +442,33 @@ class Renderer(renderer.Renderer):
         # It's possible we can race a udev rename and attempt to run
         # net_setup_link on a device that no longer exists. When this happens,
         # we don't know what the device was renamed to, so re-gather the
-        # entire list of devices and try again.
-        last_exception: Optional[Exception]
+        # entire list of devices and try again with the ones not yet set up.
+        done: Set[str] = set()
+        last_exception: Optional[Exception] = None
         for _ in range(5):
-            try:
-                for iface in get_devicelist():
-                    if os.path.islink(SYS_CLASS_NET + iface):
-                        subp.subp(
-                            setup_lnk + [SYS_CLASS_NET + iface], capture=True
-                        )
+            pending = [
+                iface
+                for iface in get_devicelist()
+                if iface not in done and os.path.islink(SYS_CLASS_NET + iface)
+            ]
+            if not pending:
                 last_exception = None
                 break
-            except subp.ProcessExecutionError as e:
-                last_exception = e
+            futures = subp.run_many(
+                [setup_lnk + [SYS_CLASS_NET + iface] for iface in pending],
+                max_workers=MAX_CONCURRENT_SETUP_LINK,
+                capture=True,
+            )
+            last_exception = None
+            for iface, future in zip(pending, futures):
+                try:
+                    future.result()
+                except subp.ProcessExecutionError as e:
+                    last_exception = e
+                else:
+                    done.add(iface)
+            if last_exception is None:
+                break
         if last_exception:
             raise RuntimeError(
                 "'udevadm test-builtin net_setup_link' unable to run "
@@ -1,9 +1,100 @@
+import collections
 import functools
+import json
 import logging
+import os
+import threading
 import time
+from typing import Any, Deque, Dict, List, Optional
 
 LOG = logging.getLogger(__name__)
 
+# Name of the boot trace file written below the cloud-init run directory
+TRACE_FILE = "boot-trace.jsonl"
+
+# Maximum number of spans buffered per stage. When exceeded, the oldest
+# spans are dropped.
+TRACE_BUFFER_SIZE = 10000
+
+
+class _Trace:
+    """In-memory ring buffer of span records for the running stage.
+
+    Tracing is disabled unless :func:`start_trace` was called, in which case
+    every :class:`Timed` context with a non-empty message records a span.
+    """
+
+    def __init__(self):
+        self.stage: Optional[str] = None
+        self.start = 0.0
+        self.spans: Deque[Dict] = collections.deque(maxlen=TRACE_BUFFER_SIZE)
+        self.local = threading.local()
+
+    def parents(self) -> List[str]:
+        try:
+            return self.local.parents
+        except AttributeError:
+            self.local.parents = []
+            return self.local.parents
+
+    def record(
+        self,
+        name: str,
+        parent: Optional[str],
+        start,
+        duration,
+        attrs: Optional[Dict[str, Any]] = None,
+    ):
+        span = {
+            "name": name,
+            "parent": parent,
+            "start": round(start, 6),
+            "duration": round(duration, 6),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "stage": self.stage,
+        }
+        if attrs:
+            span["attrs"] = attrs
+        self.spans.append(span)
+
+
+_TRACE = _Trace()
+
+
+def start_trace(stage: str) -> None:
+    """Start recording spans of Timed contexts for the given stage."""
+    _TRACE.stage = stage
+    _TRACE.start = time.time()
+    _TRACE.spans.clear()
+
+
+def flush_trace(trace_file: str) -> None:
+    """Append the stage span and all buffered spans to trace_file.
+
+    Each span is written as one JSON object per line. Tracing is disabled
+    after flushing.
+
+    :param trace_file: Path of the JSON lines file to append to.
+    """
+    stage = _TRACE.stage
+    if stage is None:
+        return
+    _TRACE.record(stage, None, _TRACE.start, time.time() - _TRACE.start)
+    spans = list(_TRACE.spans)
+    _TRACE.stage = None
+    _TRACE.spans.clear()
+    # Keep the stage span first so readers see parents before children
+    spans.insert(0, spans.pop())
+    try:
+        with open(trace_file, "a") as f:
+            f.writelines(
+                json.dumps(span, separators=(",", ":")) + "\n"
+                for span in spans
+            )
+    except OSError as e:
+        LOG.warning("Failed writing boot trace %s: %s", trace_file, e)
+
 
 class Timed:
     """
@@ -20,6 +111,11 @@ class Timed:
             'output' and 'delta' attributes, respectively. Used to manually
             coalesce with other logs at the call site.
 
+    While a stage trace is active (see :func:`start_trace`), a span record
+    is buffered for every context with a non-empty 'msg', regardless of
+    'log_mode'. Items added to the 'attrs' dict inside the context are
+    recorded with the span.
+
     usage:
 
         this call:
@@ -47,13 +143,32 @@ class Timed:
         self.output = ""
         self.start = 0.0
         self.delta = 0.0
+        self.attrs: Dict[str, Any] = {}
+        self._parent: Optional[str] = None
+        self._traced = False
 
     def __enter__(self):
+        if _TRACE.stage is not None and self.msg:
+            parents = _TRACE.parents()
+            self._parent = parents[-1] if parents else _TRACE.stage
+            self._traced = True
+            parents.append(self.msg)
         self.start = time.monotonic()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.delta = time.monotonic() - self.start
+        if self._traced:
+            self._traced = False
+            _TRACE.parents().pop()
+            if _TRACE.stage is not None:
+                _TRACE.record(
+                    self.msg,
+                    self._parent,
+                    time.time() - self.delta,
+                    self.delta,
+                    self.attrs,
+                )
         suffix = f"took {self.delta:.3f} seconds"
         if "always" == self.log_mode:
             LOG.debug("%s %s", self.msg, suffix)
@@ -0,0 +1,579 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+"""Read the files of ISO9660 and FAT seed media without mounting them.
+
+Mounting seed media forks mount and umount, and needs privileges and kernel
+modules that minimal images sometimes lack. ``extract`` copies the files of
+an ISO9660 filesystem, with Rock Ridge or Joliet names, or of a FAT12/16/32
+filesystem into a directory instead. Files are named as the Linux kernel
+shows them when the filesystem is mounted with default options.
+
+Anything this reader does not handle raises ``SeedFsError``, so callers can
+fall back to mounting. This includes symbolic links, relocated directories,
+clashing names, and media much larger than seed media usually are.
+"""
+
+import logging
+import os
+import shutil
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+LOG = logging.getLogger(__name__)
+
+ISO9660 = "iso9660"
+VFAT = "vfat"
+
+# Mount types of each filesystem, including their names on BSD
+MOUNT_TYPES = {
+    ISO9660: ("iso9660", "cd9660"),
+    VFAT: ("vfat", "msdos", "msdosfs"),
+}
+AUTO_MOUNT_TYPES = ("auto", "")
+
+# Larger filesystems are left to be mounted
+MAX_FILES = 4096
+MAX_SIZE = 64 * 1024 * 1024
+MAX_FAT_SIZE = 16 * 1024 * 1024
+
+# Devices may only support reads of whole sectors
+READ_ALIGNMENT = 4096
+
+ISO_SECTOR_SIZE = 2048
+ISO_FIRST_DESCRIPTOR = 16
+ISO_MAX_DESCRIPTORS = 64
+ISO_DIRECTORY = 0x02
+ISO_ASSOCIATED_FILE = 0x04
+ISO_MULTI_EXTENT = 0x80
+JOLIET_ESCAPE_SEQUENCES = (b"%/@", b"%/C", b"%/E")
+# Rock Ridge alternate name flags
+RR_NAME_CURRENT = 0x02
+RR_NAME_PARENT = 0x04
+SUSP_MAX_CONTINUATIONS = 32
+
+FAT_DIRECTORY = 0x10
+FAT_VOLUME_ID = 0x08
+FAT_LONG_NAME = 0x0F
+FAT_LAST_LONG_NAME = 0x40
+FAT_DELETED = 0xE5
+# Windows NT flags for lower case short names
+FAT_LOWER_CASE_BASE = 0x08
+FAT_LOWER_CASE_EXTENSION = 0x10
+
+
+class SeedFsError(Exception):
+    """The filesystem cannot be read without mounting it."""
+
+
+class Entry(NamedTuple):
+    """A file or directory in a filesystem.
+
+    extents are the (offset, length) byte ranges of its data.
+    """
+
+    name: str
+    is_dir: bool
+    size: int
+    extents: Tuple[Tuple[int, int], ...]
+
+
+class _Device:
+    """Read byte ranges of a device in whole aligned blocks."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        start = offset - offset % READ_ALIGNMENT
+        end = -(-(offset + length) // READ_ALIGNMENT) * READ_ALIGNMENT
+        self._stream.seek(start)
+        chunks = []
+        remaining = end - start
+        while remaining:
+            chunk = self._stream.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        data = b"".join(chunks)[offset - start : offset - start + length]
+        if len(data) != length:
+            raise SeedFsError("Read past the end of the device")
+        return data
+
+    def read_extents(self, entry: Entry) -> bytes:
+        data = b"".join(
+            self.read(offset, length) for offset, length in entry.extents
+        )
+        return data[: entry.size]
+
+
+def _iso_name(name: bytes) -> str:
+    """Return an ISO9660 file identifier as Linux shows it by default.
+
+    Names are lower case, without the version suffix ";1" or a trailing dot
+    before it. Other semicolons become dots.
+    """
+    text = name.decode("latin-1")
+    chars = []
+    for i, char in enumerate(text):
+        if char == "\x00":
+            break
+        if char == "." and text[i + 1 :] == ";1":
+            break
+        if char == ";" and text[i + 1 :] == "1":
+            break
+        chars.append("." if char == ";" else char.lower())
+    return "".join(chars)
+
+
+def _joliet_name(name: bytes) -> str:
+    text = name.decode("utf-16-be")
+    if text.endswith(";1"):
+        text = text[:-2]
+    if text.endswith("."):
+        text = text[:-1]
+    return text
+
+
+class Iso9660:
+    fstype = ISO9660
+
+    def __init__(self, device: _Device):
+        self._device = device
+        primary = joliet = None
+        for index in range(
+            ISO_FIRST_DESCRIPTOR, ISO_FIRST_DESCRIPTOR + ISO_MAX_DESCRIPTORS
+        ):
+            descriptor = device.read(index * ISO_SECTOR_SIZE, ISO_SECTOR_SIZE)
+            if descriptor[1:6] != b"CD001":
+                raise SeedFsError("No ISO9660 volume descriptors")
+            if descriptor[0] == 255:
+                break
+            if descriptor[0] == 1 and primary is None:
+                primary = descriptor
+            elif (
+                descriptor[0] == 2
+                and descriptor[88:91] in JOLIET_ESCAPE_SEQUENCES
+                and joliet is None
+            ):
+                joliet = descriptor
+        else:
+            raise SeedFsError("No ISO9660 volume descriptor set terminator")
+        if primary is None:
+            raise SeedFsError("No ISO9660 primary volume descriptor")
+        self.block_size = struct.unpack_from("<H", primary, 128)[0]
+        if self.block_size not in (512, 1024, 2048):
+            raise SeedFsError(f"Invalid ISO9660 block size {self.block_size}")
+        self._joliet = False
+        self._susp_skip: Optional[int] = None
+        self.root = self._root_entry(primary)
+        root_records = self._records(self._device.read_extents(self.root))
+        self._susp_skip = self._rock_ridge_skip(root_records[0])
+        if self._susp_skip is None and joliet is not None:
+            self._joliet = True
+            self.root = self._root_entry(joliet)
+
+    def _root_entry(self, descriptor: bytes) -> Entry:
+        return self._entry(descriptor[156:190], "")
+
+    def _entry(self, record: bytes, name: str) -> Entry:
+        extent, size = struct.unpack_from("<I4xI", record, 2)
+        if record[26] or record[27]:
+            raise SeedFsError("Interleaved ISO9660 files are not supported")
+        offset = (extent + record[1]) * self.block_size
+        return Entry(
+            name, bool(record[25] & ISO_DIRECTORY), size, ((offset, size),)
+        )
+
+    def _records(self, data: bytes) -> List[bytes]:
+        records = []
+        position = 0
+        while position < len(data):
+            length = data[position]
+            if length == 0:
+                # Records do not cross blocks, the rest of this one is unused
+                position = (position // self.block_size + 1) * self.block_size
+                continue
+            if length < 34 or position + length > len(data):
+                raise SeedFsError("Invalid ISO9660 directory record")
+            records.append(data[position : position + length])
+            position += length
+        if not records:
+            raise SeedFsError("Empty ISO9660 directory")
+        return records
+
+    @staticmethod
+    def _system_use(record: bytes) -> bytes:
+        name_length = record[32]
+        # Names of even length are followed by a padding byte
+        return record[33 + name_length + 1 - name_length % 2 :]
+
+    def _rock_ridge_skip(self, root_record: bytes) -> Optional[int]:
+        """Return the bytes to skip in system use areas to find the Rock
+        Ridge entries, or None without Rock Ridge.
+        """
+        system_use = self._system_use(root_record)
+        if system_use[:2] == b"SP" and system_use[4:6] == b"\xbe\xef":
+            return system_use[6]
+        return None
+
+    def _susp_entries(self, record: bytes) -> Iterator[Tuple[bytes, bytes]]:
+        """Yield the signature and data of the System Use Sharing Protocol
+        entries of record, following continuation areas.
+        """
+        assert self._susp_skip is not None
+        areas = [self._system_use(record)[self._susp_skip :]]
+        continuations = 0
+        while areas:
+            area = areas.pop()
+            position = 0
+            while position + 4 <= len(area):
+                signature = area[position : position + 2]
+                length = area[position + 2]
+                if length < 4 or position + length > len(area):
+                    break
+                data = area[position + 4 : position + length]
+                position += length
+                if signature == b"ST":
+                    break
+                if signature == b"CE":
+                    continuations += 1
+                    if continuations > SUSP_MAX_CONTINUATIONS:
+                        raise SeedFsError("Too many Rock Ridge continuations")
+                    block, offset, size = struct.unpack_from("<I4xI4xI", data)
+                    areas.append(
+                        self._device.read(
+                            block * self.block_size + offset, size
+                        )
+                    )
+                else:
+                    yield signature, data
+
+    def _rock_ridge_name(self, record: bytes) -> Optional[str]:
+        name = None
+        for signature, data in self._susp_entries(record):
+            if signature in (b"SL", b"CL", b"RE"):
+                raise SeedFsError(
+                    "Rock Ridge links and relocated directories are not"
+                    " supported"
+                )
+            if signature == b"NM":
+                if data[0] & (RR_NAME_CURRENT | RR_NAME_PARENT):
+                    continue
+                name = (name or "") + data[1:].decode("utf-8")
+        return name
+
+    def listdir(self, directory: Entry) -> List[Entry]:
+        entries = []
+        # Extents of a file whose last directory record is still to come
+        extents: List[Tuple[int, int]] = []
+        size = 0
+        records = self._records(self._device.read_extents(directory))
+        for record in records[2:]:
+            flags = record[25]
+            entry = self._entry(record, "")
+            extents.extend(entry.extents)
+            size += entry.size
+            if flags & ISO_MULTI_EXTENT:
+                continue
+            identifier = record[33 : 33 + record[32]]
+            name = None
+            if self._joliet:
+                name = _joliet_name(identifier)
+            elif self._susp_skip is not None:
+                name = self._rock_ridge_name(record)
+            if name is None:
+                name = _iso_name(identifier)
+            if not flags & ISO_ASSOCIATED_FILE:
+                entries.append(
+                    entry._replace(
+                        name=name, size=size, extents=tuple(extents)
+                    )
+                )
+            extents = []
+            size = 0
+        return entries
+
+
+def _short_name_checksum(short_name: bytes) -> int:
+    checksum = 0
+    for byte in short_name:
+        checksum = (((checksum & 1) << 7) + (checksum >> 1) + byte) & 0xFF
+    return checksum
+
+
+def _fat_short_name(short_name: bytes, flags: int) -> str:
+    """Return a short name as Linux shows it by default, in upper case
+    unless flagged as lower case.
+    """
+    base = short_name[:8].rstrip(b" ").decode("cp437")
+    extension = short_name[8:].rstrip(b" ").decode("cp437")
+    if flags & FAT_LOWER_CASE_BASE:
+        base = base.lower()
+    if flags & FAT_LOWER_CASE_EXTENSION:
+        extension = extension.lower()
+    return f"{base}.{extension}" if extension else base
+
+
+class Fat:
+    fstype = VFAT
+
+    def __init__(self, device: _Device):
+        self._device = device
+        boot = device.read(0, 512)
+        if boot[0] not in (0xEB, 0xE9) and boot[510:512] != b"\x55\xaa":
+            raise SeedFsError("No FAT boot sector")
+        (
+            sector_size,
+            cluster_sectors,
+            reserved_sectors,
+            fat_count,
+            root_entry_count,
+            total_sectors,
+            _media,
+            fat_sectors,
+        ) = struct.unpack_from("<HBHBHHBH", boot, 11)
+        if (
+            sector_size not in (512, 1024, 2048, 4096)
+            or cluster_sectors not in (1, 2, 4, 8, 16, 32, 64, 128)
+            or not reserved_sectors
+            or not fat_count
+        ):
+            raise SeedFsError("Invalid FAT boot sector")
+        total_sectors = total_sectors or struct.unpack_from("<I", boot, 32)[0]
+        root_cluster = 0
+        if not fat_sectors:
+            fat_sectors, root_cluster = struct.unpack_from("<I4xI", boot, 36)
+        root_sectors = -(-root_entry_count * 32 // sector_size)
+        fat_start = reserved_sectors * sector_size
+        root_start = fat_start + fat_count * fat_sectors * sector_size
+        self._data_start = root_start + root_sectors * sector_size
+        self._cluster_size = cluster_sectors * sector_size
+        data_sectors = total_sectors - self._data_start // sector_size
+        self._cluster_count = data_sectors // cluster_sectors
+        if data_sectors <= 0 or not fat_sectors:
+            raise SeedFsError("Invalid FAT boot sector")
+        if self._cluster_count < 4085:
+            self._fat_bits = 12
+        elif self._cluster_count < 65525:
+            self._fat_bits = 16
+        else:
+            self._fat_bits = 32
+        if (self._fat_bits == 32) != bool(root_cluster) or (
+            self._fat_bits == 32 and root_entry_count
+        ):
+            raise SeedFsError("Inconsistent FAT boot sector")
+        fat_size = fat_sectors * sector_size
+        if fat_size > MAX_FAT_SIZE:
+            raise SeedFsError("File allocation table is too large")
+        self._fat = device.read(fat_start, fat_size)
+        if root_cluster:
+            self.root = self._cluster_entry("", True, root_cluster, None)
+        else:
+            size = root_entry_count * 32
+            self.root = Entry("", True, size, ((root_start, size),))
+
+    def _next_cluster(self, cluster: int) -> int:
+        """Return the cluster after cluster, or 0 at the end of the chain."""
+        if self._fat_bits == 12:
+            value = struct.unpack_from(
+                "<H", self._fat, cluster + cluster // 2
+            )[0]
+            value = value >> 4 if cluster & 1 else value & 0xFFF
+            end = 0xFF8
+        elif self._fat_bits == 16:
+            value = struct.unpack_from("<H", self._fat, cluster * 2)[0]
+            end = 0xFFF8
+        else:
+            value = struct.unpack_from("<I", self._fat, cluster * 4)[0]
+            value &= 0x0FFFFFFF
+            end = 0x0FFFFFF8
+        return 0 if value >= end else value
+
+    def _cluster_entry(
+        self, name: str, is_dir: bool, cluster: int, size: Optional[int]
+    ) -> Entry:
+        """Return the entry of the data starting at cluster.
+
+        Directories have no size, their data is their whole cluster chain.
+        """
+        extents: List[Tuple[int, int]] = []
+        chain_size = 0
+        while cluster and (size is None or chain_size < size):
+            if not 2 <= cluster < self._cluster_count + 2:
+                raise SeedFsError(f"Invalid FAT cluster {cluster}")
+            if len(extents) > self._cluster_count:
+                raise SeedFsError("Looping FAT cluster chain")
+            offset = self._data_start + (cluster - 2) * self._cluster_size
+            if extents and sum(extents[-1]) == offset:
+                extents[-1] = (
+                    extents[-1][0],
+                    extents[-1][1] + self._cluster_size,
+                )
+            else:
+                extents.append((offset, self._cluster_size))
+            chain_size += self._cluster_size
+            cluster = self._next_cluster(cluster)
+        if size is None:
+            size = chain_size
+        elif chain_size < size:
+            raise SeedFsError(f"FAT cluster chain of {name} is too short")
+        return Entry(name, is_dir, size, tuple(extents))
+
+    def listdir(self, directory: Entry) -> List[Entry]:
+        data = self._device.read_extents(directory)
+        entries = []
+        long_name: Dict[int, bytes] = {}
+        checksum = None
+        for position in range(0, len(data) - 31, 32):
+            record = data[position : position + 32]
+            if record[0] == 0:
+                break
+            attributes = record[11]
+            if record[0] == FAT_DELETED:
+                long_name = {}
+                continue
+            if attributes == FAT_LONG_NAME:
+                if record[0] & FAT_LAST_LONG_NAME:
+                    long_name = {}
+                    checksum = record[13]
+                long_name[record[0] & 0x1F] = (
+                    record[1:11] + record[14:26] + record[28:32]
+                )
+                continue
+            parts, long_name = long_name, {}
+            if attributes & FAT_VOLUME_ID:
+                continue
+            short_name = record[:11]
+            if short_name[0] == 0x05:
+                short_name = b"\xe5" + short_name[1:]
+            if short_name in (b".          ", b"..         "):
+                continue
+            name = None
+            if (
+                parts
+                and sorted(parts) == list(range(1, len(parts) + 1))
+                and checksum == _short_name_checksum(short_name)
+            ):
+                name = (
+                    b"".join(parts[i] for i in sorted(parts))
+                    .decode("utf-16-le")
+                    .split("\x00")[0]
+                )
+            if not name:
+                name = _fat_short_name(short_name, record[12])
+            cluster = struct.unpack_from("<H", record, 26)[0]
+            if self._fat_bits == 32:
+                cluster |= struct.unpack_from("<H", record, 20)[0] << 16
+            is_dir = bool(attributes & FAT_DIRECTORY)
+            size = None if is_dir else struct.unpack_from("<I", record, 28)[0]
+            entries.append(self._cluster_entry(name, is_dir, cluster, size))
+        return entries
+
+
+FILESYSTEMS = (Iso9660, Fat)
+
+# Errors of invalid or unsupported filesystems
+PARSE_ERRORS = (SeedFsError, ValueError, struct.error, IndexError)
+
+
+def _walk(filesystem) -> Iterator[Tuple[str, Entry]]:
+    """Yield the relative path and entry of everything in filesystem,
+    parents first.
+    """
+    file_count = 0
+    total_size = 0
+    seen_directories = {filesystem.root.extents}
+    directories = [("", filesystem.root)]
+    while directories:
+        path, directory = directories.pop()
+        names: Set[str] = set()
+        for entry in filesystem.listdir(directory):
+            if (
+                entry.name in ("", ".", "..", *names)
+                or "/" in entry.name
+                or "\x00" in entry.name
+            ):
+                raise SeedFsError(f"Unsupported file name {entry.name!r}")
+            names.add(entry.name)
+            file_count += 1
+            total_size += entry.size
+            if file_count > MAX_FILES or total_size > MAX_SIZE:
+                raise SeedFsError("Too many files to copy")
+            entry_path = os.path.join(path, entry.name)
+            if entry.is_dir:
+                if entry.extents in seen_directories:
+                    raise SeedFsError(f"Directory loop at {entry_path}")
+                seen_directories.add(entry.extents)
+                directories.append((entry_path, entry))
+            yield entry_path, entry
+
+
+def _fstypes(mtypes: Optional[List[str]]) -> List[str]:
+    if not mtypes or any(mtype in AUTO_MOUNT_TYPES for mtype in mtypes):
+        return list(MOUNT_TYPES)
+    return [
+        fstype
+        for fstype, names in MOUNT_TYPES.items()
+        if any(mtype in names for mtype in mtypes)
+    ]
+
+
+def _empty_directory(path: str):
+    for name in os.listdir(path):
+        child = os.path.join(path, name)
+        if os.path.isdir(child) and not os.path.islink(child):
+            shutil.rmtree(child)
+        else:
+            os.unlink(child)
+
+
+def extract(device: str, target: str, mtypes: Optional[List[str]] = None):
+    """Copy the files of the filesystem on device into directory target.
+
+    @param device: Path of the device or image to read.
+    @param target: Empty directory to copy the files to.
+    @param mtypes: Mount types the filesystem may have, as given to mount.
+        None, "auto" or "" allow any supported type.
+
+    @returns: The type of the filesystem read.
+    @raises SeedFsError: When the filesystem cannot be read, leaving target
+        empty.
+    """
+    fstypes = _fstypes(mtypes)
+    if not fstypes:
+        raise SeedFsError(f"Unsupported filesystem types {mtypes}")
+    copying = False
+    try:
+        with open(device, "rb", buffering=0) as stream:
+            reader = _Device(stream)
+            filesystem = None
+            for filesystem_cls in FILESYSTEMS:
+                if filesystem_cls.fstype not in fstypes:
+                    continue
+                try:
+                    filesystem = filesystem_cls(reader)
+                    break
+                except PARSE_ERRORS as e:
+                    LOG.debug(
+                        "No %s on %s: %s", filesystem_cls.fstype, device, e
+                    )
+            if filesystem is None:
+                raise SeedFsError(f"No {' or '.join(fstypes)} filesystem")
+            entries = list(_walk(filesystem))
+            copying = True
+            for path, entry in entries:
+                entry_path = os.path.join(target, path)
+                if entry.is_dir:
+                    os.mkdir(entry_path)
+                else:
+                    with open(entry_path, "xb") as out:
+                        out.write(reader.read_extents(entry))
+            return filesystem.fstype
+    except (OSError, *PARSE_ERRORS) as e:
+        if copying:
+            _empty_directory(target)
+        if isinstance(e, SeedFsError):
+            raise
+        raise SeedFsError(f"Unable to read {device}: {e}") from e
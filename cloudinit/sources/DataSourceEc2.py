@@ -23,7 +23,10 @@ from cloudinit.distros import Distro
 from cloudinit.event import EventScope, EventType
 from cloudinit.net import device_driver, netplan
 from cloudinit.net.dhcp import NoDHCPLeaseError
-from cloudinit.net.ephemeral import EphemeralIPNetwork
+from cloudinit.net.ephemeral import (
+    ConcurrentDHCPDiscovery,
+    EphemeralIPNetwork,
+)
 from cloudinit.sources import HotplugRetrySettings, NicOrder
 from cloudinit.sources.helpers import ec2
 
@@ -164,29 +167,39 @@ class DataSourceEc2(sources.DataSource):
             if len(candidate_nics) < 1:
                 LOG.error("The instance must have at least one eligible NIC")
                 return False
-            for candidate_nic in sorted(
-                candidate_nics, key=_prefer_elastic_drivers
-            ):
-                try:
-                    with EphemeralIPNetwork(
-                        self.distro,
-                        candidate_nic,
-                        ipv4=True,
-                        ipv6=True,
-                    ) as netw:
-                        self._crawled_metadata = self.crawl_metadata()
-                        if self._crawled_metadata:
-                            self.distro.fallback_interface = candidate_nic
-                            LOG.debug("Set fallback NIC: %s.", candidate_nic)
-                            LOG.debug(
-                                "Crawled metadata service%s",
-                                f" {netw.state_msg}" if netw.state_msg else "",
-                            )
-                            break
-                except NoDHCPLeaseError:
-                    LOG.debug(
-                        "Unable to obtain a DHCP lease for %s", candidate_nic
-                    )
+            with ConcurrentDHCPDiscovery(
+                self.distro,
+                sorted(candidate_nics, key=_prefer_elastic_drivers),
+            ) as dhcp_discovery:
+                for candidate_nic in dhcp_discovery:
+                    try:
+                        with EphemeralIPNetwork(
+                            self.distro,
+                            candidate_nic,
+                            ipv4=True,
+                            ipv6=True,
+                            dhcp_discovery=dhcp_discovery,
+                        ) as netw:
+                            self._crawled_metadata = self.crawl_metadata()
+                            if self._crawled_metadata:
+                                self.distro.fallback_interface = candidate_nic
+                                LOG.debug(
+                                    "Set fallback NIC: %s.", candidate_nic
+                                )
+                                LOG.debug(
+                                    "Crawled metadata service%s",
+                                    (
+                                        f" {netw.state_msg}"
+                                        if netw.state_msg
+                                        else ""
+                                    ),
+                                )
+                                break
+                    except NoDHCPLeaseError:
+                        LOG.debug(
+                            "Unable to obtain a DHCP lease for %s",
+                            candidate_nic,
+                        )
         else:
             self._crawled_metadata = self.crawl_metadata()
         if not self._crawled_metadata:
@@ -729,7 +742,7 @@ class DataSourceEc2Local(DataSourceEc2):
 
     perform_dhcp_setup = True  # Use dhcp before querying metadata
 
-    def get_data(self):
+    def get_data(self, persist: bool = True):
         supported_platforms = (CloudNames.AWS, CloudNames.OUTSCALE)
         if self.cloud_name not in supported_platforms:
             LOG.debug(
@@ -738,7 +751,7 @@ class DataSourceEc2Local(DataSourceEc2):
                 self.cloud_name,
             )
             return False
-        return super(DataSourceEc2Local, self).get_data()
+        return super(DataSourceEc2Local, self).get_data(persist=persist)
 
 
 def read_strict_mode(cfgval, default):
@@ -11,7 +11,7 @@ from cloudinit import dmi, net, sources, url_helper, util
 from cloudinit.distros import ug_util
 from cloudinit.event import EventScope, EventType
 from cloudinit.net.dhcp import NoDHCPLeaseError
-from cloudinit.net.ephemeral import EphemeralDHCPv4
+from cloudinit.net.ephemeral import ConcurrentDHCPDiscovery, EphemeralDHCPv4
 from cloudinit.sources import DataSourceHostname
 
 LOG = logging.getLogger(__name__)
@@ -97,34 +97,40 @@ class DataSourceGCE(sources.DataSource):
             assert (
                 len(candidate_nics) >= 1
             ), "The instance has to have at least one candidate NIC"
-            for candidate_nic in candidate_nics:
-                network_context = EphemeralDHCPv4(
-                    self.distro,
-                    iface=candidate_nic,
-                )
-                try:
-                    with network_context:
-                        try:
-                            ret = read_md(
-                                address=self.metadata_address,
-                                url_params=url_params,
-                            )
-                        except Exception as e:
-                            LOG.debug(
-                                "Error fetching IMD with candidate NIC %s: %s",
-                                candidate_nic,
-                                e,
-                            )
-                            continue
-                except NoDHCPLeaseError:
-                    LOG.debug(
-                        "Unable to obtain a DHCP lease for %s", candidate_nic
+            with ConcurrentDHCPDiscovery(
+                self.distro, candidate_nics
+            ) as dhcp_discovery:
+                for candidate_nic in dhcp_discovery:
+                    network_context = EphemeralDHCPv4(
+                        self.distro,
+                        iface=candidate_nic,
+                        dhcp_discovery=dhcp_discovery,
                     )
-                    continue
-                if ret["success"]:
-                    self.distro.fallback_interface = candidate_nic
-                    LOG.debug("Primary NIC found: %s.", candidate_nic)
-                    break
+                    try:
+                        with network_context:
+                            try:
+                                ret = read_md(
+                                    address=self.metadata_address,
+                                    url_params=url_params,
+                                )
+                            except Exception as e:
+                                LOG.debug(
+                                    "Error fetching IMD with candidate NIC"
+                                    " %s: %s",
+                                    candidate_nic,
+                                    e,
+                                )
+                                continue
+                    except NoDHCPLeaseError:
+                        LOG.debug(
+                            "Unable to obtain a DHCP lease for %s",
+                            candidate_nic,
+                        )
+                        continue
+                    if ret["success"]:
+                        self.distro.fallback_interface = candidate_nic
+                        LOG.debug("Primary NIC found: %s.", candidate_nic)
+                        break
             if self.distro.fallback_interface is None:
                 LOG.warning(
                     "Did not find a fallback interface on %s.", self.cloud_name
@@ -10,11 +10,13 @@
 
 import abc
 import copy
-import json
+import hashlib
 import logging
 import os
 import pickle
 import re
+import threading
+import time
 from enum import Enum, unique
 from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union, cast
 
@@ -22,14 +24,16 @@ from cloudinit import (
     atomic_helper,
     dmi,
     importer,
+    json_index,
     lifecycle,
     net,
     performance,
     type_utils,
+    url_helper,
     user_data,
     util,
+    version,
 )
-from cloudinit.atomic_helper import write_json
 from cloudinit.distros import Distro
 from cloudinit.event import EventScope, EventType
 from cloudinit.filters import launch_index
@@ -117,9 +121,10 @@ def process_instance_metadata(metadata, key_path="", sensitive_keys=()):
 
     Strip ci-b64 prefix and catalog any 'base64_encoded_keys' as a list
 
-    @return Dict copy of processed metadata.
+    @return Dict copy of processed metadata. Values other than dicts are
+        shared with metadata.
     """
-    md_copy = copy.deepcopy(metadata)
+    md_copy = dict(metadata)
     base64_encoded_keys = []
     sens_keys = []
     for key, val in metadata.items():
@@ -158,9 +163,13 @@ def redact_sensitive_keys(metadata, redact_value=REDACT_SENSITIVE_VALUE):
     # "merged_cfg" will get replaced first, meaning "merged_cfg/ds/userdata"
     # no longer represents a valid key.
     # Thus, we still need to do membership checks in this function.
+    #
+    # Only the dicts holding redacted values are copied, everything else is
+    # shared with metadata.
     if not metadata.get("sensitive_keys", []):
         return metadata
-    md_copy = copy.deepcopy(metadata)
+    md_copy = dict(metadata)
+    copied = {id(md_copy)}
     for key_path in metadata.get("sensitive_keys"):
         path_parts = key_path.split("/")
         obj = md_copy
@@ -170,6 +179,9 @@ def redact_sensitive_keys(metadata, redact_value=REDACT_SENSITIVE_VALUE):
                 and isinstance(obj[path], dict)
                 and path != path_parts[-1]
             ):
+                if id(obj[path]) not in copied:
+                    obj[path] = dict(obj[path])
+                    copied.add(id(obj[path]))
                 obj = obj[path]
         if path in obj:
             obj[path] = redact_value
@@ -496,10 +508,13 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
             self._dirty_cache = False
 
     @performance.timed("Getting metadata", log_mode="always")
-    def get_data(self) -> bool:
+    def get_data(self, persist: bool = True) -> bool:
         """Datasources implement _get_data to setup metadata and userdata_raw.
 
         Minimally, the datasource should return a boolean True on success.
+
+        @param persist: Set False to leave persisting instance data to the
+            caller.
         """
         self._dirty_cache = True
         return_value = self._check_and_get_data()
@@ -511,7 +526,8 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         # exceptions later if/when they get used incorrectly.
         if not return_value:
             return return_value
-        self.persist_instance_data()
+        if persist:
+            self.persist_instance_data()
         return return_value
 
     def persist_instance_data(self, write_cache=True):
@@ -538,11 +554,11 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
             # correct and let the code throw an exception when it isn't.
             # This allows us to enable type checking on this module even
             # if it doesn't benefit this piece of code.
-            crawled_metadata = cast(
-                dict, copy.deepcopy(self._crawled_metadata)
-            )
-            crawled_metadata.pop("user-data", None)
-            crawled_metadata.pop("vendor-data", None)
+            crawled_metadata = {
+                key: value
+                for key, value in cast(dict, self._crawled_metadata).items()
+                if key not in ("user-data", "vendor-data")
+            }
             instance_data = {"ds": crawled_metadata}
         else:
             instance_data = {"ds": {"meta_data": self.metadata}}
@@ -552,35 +568,45 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
                 instance_data["ds"]["ec2_metadata"] = self.ec2_metadata
         instance_data["ds"]["_doc"] = EXPERIMENTAL_TEXT
         # Add merged cloud.cfg and sys info for jinja templates and cli query
-        instance_data["merged_cfg"] = copy.deepcopy(self.sys_cfg)
-        instance_data["merged_cfg"][
-            "_doc"
-        ] = "DEPRECATED: Use merged_system_cfg. Will be dropped from 24.1"
-        # Deprecate merged_cfg to a more specific key name merged_system_cfg
-        instance_data["merged_system_cfg"] = copy.deepcopy(
-            instance_data["merged_cfg"]
-        )
-        instance_data["merged_system_cfg"]["_doc"] = (
-            "Merged cloud-init system config from /etc/cloud/cloud.cfg and"
-            " /etc/cloud/cloud.cfg.d/"
-        )
+        instance_data["merged_cfg"] = self.sys_cfg
         instance_data["sys_info"] = util.system_info()
         instance_data.update(self._get_standardized_metadata(instance_data))
+        digest = self._instance_data_digest(instance_data)
+        json_sensitive_file = self.paths.get_runpath("instance_data_sensitive")
+        json_file = self.paths.get_runpath("instance_data")
+        if digest and all(
+            json_index.written_digest(path) == digest
+            for path in (json_sensitive_file, json_file)
+        ):
+            LOG.debug("Instance data unchanged, not rewriting %s", json_file)
+            return True
         try:
-            # Process content base64encoding unserializable values
-            content = atomic_helper.json_dumps(instance_data)
-            # Strip base64: prefix and set base64_encoded_keys list.
-            processed_data = process_instance_metadata(
-                json.loads(content),
-                sensitive_keys=self.sensitive_metadata_keys,
-            )
-        except TypeError as e:
-            LOG.warning("Error persisting instance-data.json: %s", str(e))
-            return False
-        except UnicodeDecodeError as e:
+            # Copy as json would read it back, base64encoding unserializable
+            # values
+            instance_data = atomic_helper.json_compatible(instance_data)
+        except (TypeError, UnicodeDecodeError) as e:
             LOG.warning("Error persisting instance-data.json: %s", str(e))
             return False
-        json_sensitive_file = self.paths.get_runpath("instance_data_sensitive")
+        # Both merged_cfg keys share the copied system config
+        merged_cfg = instance_data.pop("merged_cfg")
+        instance_data["merged_cfg"] = dict(
+            merged_cfg,
+            _doc=(
+                "DEPRECATED: Use merged_system_cfg. Will be dropped from 24.1"
+            ),
+        )
+        # Deprecate merged_cfg to a more specific key name merged_system_cfg
+        instance_data["merged_system_cfg"] = dict(
+            merged_cfg,
+            _doc=(
+                "Merged cloud-init system config from /etc/cloud/cloud.cfg and"
+                " /etc/cloud/cloud.cfg.d/"
+            ),
+        )
+        # Strip base64: prefix and set base64_encoded_keys list.
+        processed_data = process_instance_metadata(
+            instance_data, sensitive_keys=self.sensitive_metadata_keys
+        )
         cloud_id = instance_data["v1"].get("cloud_id", "none")
         cloud_id_file = os.path.join(self.paths.run_dir, "cloud-id")
         util.write_file(f"{cloud_id_file}-{cloud_id}", f"{cloud_id}\n")
@@ -594,12 +620,38 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         util.sym_link(new_cloud_id_file, cloud_id_file, force=True)
         if prev_cloud_id_file and prev_cloud_id_file != new_cloud_id_file:
             util.del_file(prev_cloud_id_file)
-        write_json(json_sensitive_file, processed_data, mode=0o600)
-        json_file = self.paths.get_runpath("instance_data")
+        # Indexed for cloud-init query to read only the values it looks up
+        json_index.write_json(
+            json_sensitive_file, processed_data, mode=0o600, digest=digest
+        )
         # World readable
-        write_json(json_file, redact_sensitive_keys(processed_data))
+        json_index.write_json(
+            json_file, redact_sensitive_keys(processed_data), digest=digest
+        )
         return True
 
+    def _instance_data_digest(self, instance_data) -> Optional[str]:
+        """Return a digest of what persist_instance_data writes.
+
+        The digest covers everything the written files are built from, so
+        unchanged files need not be rebuilt.
+
+        :return: None when instance_data cannot be pickled.
+        """
+        try:
+            content = pickle.dumps(
+                (
+                    version.version_string(),
+                    self.sensitive_metadata_keys,
+                    instance_data,
+                ),
+                protocol=4,
+            )
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            LOG.debug("Not comparing unpicklable instance data: %s", e)
+            return None
+        return hashlib.sha256(content).hexdigest()
+
     def _get_data(self) -> bool:
         """Walk metadata sources, process crawled data and save attributes."""
         raise NotImplementedError(
@@ -929,7 +981,7 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         return supported_events
 
     def update_metadata_if_supported(
-        self, source_event_types: List[EventType]
+        self, source_event_types: List[EventType], persist: bool = True
     ) -> bool:
         """Refresh cached metadata if the datasource supports this event.
 
@@ -939,6 +991,8 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
 
         @param source_event_types: List of EventTypes which may trigger a
             metadata update.
+        @param persist: Set False to leave persisting instance data to the
+            caller.
 
         @return True if the datasource did successfully update cached metadata
             due to source_event_type.
@@ -956,7 +1010,10 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
             self.clear_cached_attrs((("_%s_config" % scope, UNSET),))
         if supported_events:
             self.clear_cached_attrs()
-            result = self.get_data()
+            # Datasources overriding get_data may not take persist
+            result = (
+                self.get_data() if persist else self.get_data(persist=False)
+            )
             if result:
                 return True
         LOG.debug(
@@ -1069,32 +1126,118 @@ def normalize_pubkey_data(pubkey_data):
     return []
 
 
+def _search_source(
+    cls, name, mode, sys_cfg, distro, paths, reporter, cancelled=None
+) -> Optional[DataSource]:
+    """Return an instance of cls if it finds data, None otherwise.
+
+    When cancelled is given, the search is being raced against other
+    datasources: instance data is not persisted, url requests stop once
+    cancelled is set, and the time taken is added to the report event
+    message, which also notes if a higher priority datasource already won
+    the race.
+    """
+    myrep = events.ReportEventStack(
+        name="search-%s" % name.replace("DataSource", ""),
+        description="searching for %s data from %s" % (mode, name),
+        message="no %s data found from %s" % (mode, name),
+        parent=reporter,
+    )
+    start_time = time.monotonic()
+    found = None
+    try:
+        with myrep:
+            LOG.debug("Seeing if we can get any data from %s", cls)
+            s = cls(sys_cfg, distro, paths)
+            if cancelled is None:
+                updated = s.update_metadata_if_supported(
+                    [EventType.BOOT_NEW_INSTANCE]
+                )
+            else:
+                with url_helper.cancel_requests_on(cancelled):
+                    updated = s.update_metadata_if_supported(
+                        [EventType.BOOT_NEW_INSTANCE], persist=False
+                    )
+            if updated:
+                myrep.message = "found %s data from %s" % (mode, name)
+                found = s
+            if cancelled is not None:
+                if cancelled.is_set():
+                    myrep.message += " after search was cancelled"
+                myrep.message += " in %.3f seconds" % (
+                    time.monotonic() - start_time
+                )
+    except Exception:
+        util.logexc(LOG, "Getting data from %s failed", cls)
+    return found
+
+
+def _race_sources(
+    ds_list, ds_names, mode, sys_cfg, distro, paths, reporter
+) -> Optional[Tuple[DataSource, str]]:
+    """Search all datasources concurrently, in priority order.
+
+    The highest priority datasource that finds data wins, so the result is
+    the same as a sequential search. It is known once every higher priority
+    search has finished, rather than after each search in turn. The lower
+    priority searches are then cancelled: their url requests stop, but one
+    already in flight runs until it completes or times out. Their threads
+    are waited for, as they share distro and paths, and only the winner
+    persists its instance data.
+    """
+    cancelled = threading.Event()
+    results: List[Optional[DataSource]] = [None] * len(ds_list)
+
+    def search(idx, name, cls):
+        results[idx] = _search_source(
+            cls, name, mode, sys_cfg, distro, paths, reporter, cancelled
+        )
+
+    threads = [
+        threading.Thread(
+            target=search, args=(idx, name, cls), name="search-%s" % name
+        )
+        for idx, (name, cls) in enumerate(zip(ds_names, ds_list))
+    ]
+    for thread in threads:
+        thread.start()
+    winner: Optional[Tuple[DataSource, str]] = None
+    for idx, (thread, cls) in enumerate(zip(threads, ds_list)):
+        thread.join()
+        found = results[idx]
+        if winner is None and found is not None:
+            winner = (found, type_utils.obj_name(cls))
+            cancelled.set()
+    if winner is not None:
+        winner[0].persist_instance_data()
+    return winner
+
+
 def find_source(
     sys_cfg, distro, paths, ds_deps, cfg_list, pkg_list, reporter
 ) -> Tuple[DataSource, str]:
     ds_list = list_sources(cfg_list, ds_deps, pkg_list)
     ds_names = [type_utils.obj_name(f) for f in ds_list]
     mode = "network" if DEP_NETWORK in ds_deps else "local"
+    search_mode = sys_cfg.get("datasource_search_mode", "sequential")
     LOG.debug("Searching for %s data source in: %s", mode, ds_names)
 
-    for name, cls in zip(ds_names, ds_list):
-        myrep = events.ReportEventStack(
-            name="search-%s" % name.replace("DataSource", ""),
-            description="searching for %s data from %s" % (mode, name),
-            message="no %s data found from %s" % (mode, name),
-            parent=reporter,
+    # Local datasources may bring up ephemeral networking to find their
+    # data, so only network datasources are safe to search concurrently
+    if search_mode == "race" and mode == "network" and len(ds_list) > 1:
+        LOG.debug("Racing %s data source searches", mode)
+        found = _race_sources(
+            ds_list, ds_names, mode, sys_cfg, distro, paths, reporter
         )
-        try:
-            with myrep:
-                LOG.debug("Seeing if we can get any data from %s", cls)
-                s = cls(sys_cfg, distro, paths)
-                if s.update_metadata_if_supported(
-                    [EventType.BOOT_NEW_INSTANCE]
-                ):
-                    myrep.message = "found %s data from %s" % (mode, name)
-                    return (s, type_utils.obj_name(cls))
-        except Exception:
-            util.logexc(LOG, "Getting data from %s failed", cls)
+        if found:
+            return found
+    else:
+        for name, cls in zip(ds_names, ds_list):
+            s = _search_source(
+                cls, name, mode, sys_cfg, distro, paths, reporter
+            )
+            if s is not None:
+                return (s, type_utils.obj_name(cls))
 
     msg = "Did not find any data source, searched classes: (%s)" % ", ".join(
         ds_names
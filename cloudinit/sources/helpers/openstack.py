@@ -12,6 +12,9 @@ import copy
 import functools
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 from cloudinit import net, sources, subp, url_helper, util
 from cloudinit.sources import BrokenMetadata
@@ -21,6 +24,9 @@ from cloudinit.sources.helpers import ec2
 
 LOG = logging.getLogger(__name__)
 
+# Matches the default connection pool size of a requests.Session
+MAX_CONCURRENT_READS = 10
+
 FILES_V1 = {
     # Path <-> (metadata key name, translator function, default value)
     "etc/network/interfaces": ("network_config", lambda x: x, ""),
@@ -207,14 +213,27 @@ class BaseReader(metaclass=abc.ABCMeta):
         )
         return selected_version
 
-    def _read_content_path(self, item, decode=False):
+    def _read_paths(self, paths):
+        """Read each of paths.
+
+        Return a dict mapping each path to its content, or to the exception
+        raised while reading it.
+        """
+        results = {}
+        for path in paths:
+            try:
+                results[path] = self._path_read(path)
+            except Exception as e:
+                results[path] = e
+        return results
+
+    def _content_path(self, item):
         path = item.get("content_path", "").lstrip("/")
         path_pieces = path.split("/")
         valid_pieces = [p for p in path_pieces if len(p)]
         if not valid_pieces:
             raise BrokenMetadata("Item %s has no valid content path" % (item))
-        path = self._path_join(self.base_path, "openstack", *path_pieces)
-        return self._path_read(path, decode=decode)
+        return self._path_join(self.base_path, "openstack", *path_pieces)
 
     def read_v2(self):
         """Reads a version 2 formatted location.
@@ -265,35 +284,39 @@ class BaseReader(metaclass=abc.ABCMeta):
             "userdata": "",
             "version": 2,
         }
-        data = datafiles(self._find_working_version())
+        data = {
+            name: (self._path_join(self.base_path, path), required, translator)
+            for name, (path, required, translator) in datafiles(
+                self._find_working_version()
+            ).items()
+        }
+        fetched = self._read_paths([path for path, _, _ in data.values()])
         for name, (path, required, translator) in data.items():
-            path = self._path_join(self.base_path, path)
-            data = None
-            found = False
-            try:
-                data = self._path_read(path)
-            except IOError as e:
+            content = fetched[path]
+            if isinstance(content, Exception):
+                if not isinstance(content, IOError):
+                    raise content
                 if not required:
                     LOG.debug(
-                        "Failed reading optional path %s due to: %s", path, e
-                    )
-                else:
-                    LOG.debug(
-                        "Failed reading mandatory path %s due to: %s", path, e
+                        "Failed reading optional path %s due to: %s",
+                        path,
+                        content,
                     )
-            else:
-                found = True
-            if required and not found:
+                    continue
+                LOG.debug(
+                    "Failed reading mandatory path %s due to: %s",
+                    path,
+                    content,
+                )
                 raise NonReadable("Missing mandatory path: %s" % path)
-            if found and translator:
+            if translator:
                 try:
-                    data = translator(data)
+                    content = translator(content)
                 except Exception as e:
                     raise BrokenMetadata(
                         "Failed to process path %s: %s" % (path, e)
                     ) from e
-            if found:
-                results[name] = data
+            results[name] = content
 
         metadata = results["metadata"]
         if "random_seed" in metadata:
@@ -305,33 +328,46 @@ class BaseReader(metaclass=abc.ABCMeta):
                     "Badly formatted metadata random_seed entry: %s" % e
                 ) from e
 
-        # load any files that were provided
-        files = {}
-        metadata_files = metadata.get("files", [])
-        for item in metadata_files:
+        # load any files that were provided, along with the network config,
+        # in a single batch
+        file_paths = {}
+        for item in metadata.get("files", []):
             if "path" not in item:
                 continue
-            path = item["path"]
             try:
-                files[path] = self._read_content_path(item)
-            except Exception as e:
+                file_paths[item["path"]] = self._content_path(item)
+            except BrokenMetadata as e:
                 raise BrokenMetadata(
-                    "Failed to read provided file %s: %s" % (path, e)
+                    "Failed to read provided file %s: %s" % (item["path"], e)
                 ) from e
-        results["files"] = files
-
         # The 'network_config' item in metadata is a content pointer
         # to the network config that should be applied. It is just a
         # ubuntu/debian '/etc/network/interfaces' file.
         net_item = metadata.get("network_config", None)
-        if net_item:
-            try:
-                content = self._read_content_path(net_item, decode=True)
-                results["network_config"] = content
-            except IOError as e:
+        net_path = self._content_path(net_item) if net_item else None
+        fetched = self._read_paths(
+            list(file_paths.values()) + ([net_path] if net_path else [])
+        )
+
+        files = {}
+        for path, content_path in file_paths.items():
+            content = fetched[content_path]
+            if isinstance(content, Exception):
                 raise BrokenMetadata(
-                    "Failed to read network configuration: %s" % (e)
-                ) from e
+                    "Failed to read provided file %s: %s" % (path, content)
+                ) from content
+            files[path] = content
+        results["files"] = files
+
+        if net_path:
+            content = fetched[net_path]
+            if isinstance(content, IOError):
+                raise BrokenMetadata(
+                    "Failed to read network configuration: %s" % (content)
+                ) from content
+            if isinstance(content, Exception):
+                raise content
+            results["network_config"] = util.decode_binary(content)
 
         # To openstack, user can specify meta ('nova boot --meta=key=value')
         # and those will appear under metadata['meta'].
@@ -476,6 +512,8 @@ class MetadataReader(BaseReader):
         self.timeout = float(timeout)
         self.retries = int(retries)
         self._versions = None
+        # Shared so that concurrent reads reuse keep-alive connections
+        self._session = requests.Session()
 
     def _fetch_available_versions(self):
         # <baseurl>/openstack/ returns a newline separated list of versions
@@ -509,12 +547,28 @@ class MetadataReader(BaseReader):
             ssl_details=self.ssl_details,
             timeout=self.timeout,
             exception_cb=should_retry_cb,
+            session=self._session,
         )
         if decode:
             return response.contents.decode()
         else:
             return response.contents
 
+    def _read_paths(self, paths):
+        """Read all paths concurrently, each with its own retries."""
+        if len(paths) < 2:
+            return super()._read_paths(paths)
+        workers = min(len(paths), MAX_CONCURRENT_READS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                path: executor.submit(self._path_read, path) for path in paths
+            }
+        results = {}
+        for path, future in futures.items():
+            error = future.exception()
+            results[path] = future.result() if error is None else error
+        return results
+
     def _path_join(self, base, *add_ons):
         return url_helper.combine_url(base, *add_ons)
 
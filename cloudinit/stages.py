@@ -53,6 +53,10 @@ LOG = logging.getLogger(__name__)
 
 NO_PREVIOUS_INSTANCE_ID = "NO_PREVIOUS_INSTANCE_ID"
 
+# File under the run directory caching the merged system config, so that
+# later stages and CLI tools need not parse it again. None disables it.
+SYSTEM_CONFIG_CACHE: Optional[str] = "system-config.pkl"
+
 
 class _Semaphore:
     def __init__(self, semaphore, args):
@@ -166,6 +170,28 @@ class Init:
         self._paths = None
         self._distro = None
 
+    def reload_cfg(self, extra_fns=None):
+        """Read the config again, as files it is read from may have changed.
+
+        Used when one boot stage hands this Init over to the next one. The
+        paths and distro are kept unless their system_info config changed.
+        """
+        system_info = self._cfg.get("system_info")
+        paths = self._paths
+        distro = self._distro
+        self._reset()
+        self.read_cfg(extra_fns)
+        if self._cfg.get("system_info") == system_info:
+            # Also held by the datasource and the Runners of the distro
+            self._paths = paths
+            if distro is not None:
+                distro.forget_preinstalled_packages()
+                self._distro = distro
+        elif self.datasource is not None:
+            self.datasource.paths = self.paths
+        if self.datasource is not None:
+            self.datasource.sys_cfg = self.cfg
+
     @property
     def distro(self):
         if not self._distro:
@@ -1146,7 +1172,13 @@ def fetch_base_config(run_dir: str, *, instance_data_file=None) -> dict:
             util.get_builtin_cfg(),
             # Anything in your conf.d or 'default' cloud.cfg location.
             util.read_conf_with_confd(
-                CLOUD_CONFIG, instance_data_file=instance_data_file
+                CLOUD_CONFIG,
+                instance_data_file=instance_data_file,
+                cache_file=(
+                    os.path.join(run_dir, SYSTEM_CONFIG_CACHE)
+                    if SYSTEM_CONFIG_CACHE
+                    else None
+                ),
             ),
             # runtime config. I.e., /run/cloud-init/cloud.cfg
             read_runtime_config(run_dir),
@@ -5,9 +5,10 @@ import collections
 import logging
 import os
 import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
 from errno import ENOEXEC
 from io import TextIOWrapper
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Union
 
 from cloudinit import performance
 
@@ -15,6 +16,9 @@ LOG = logging.getLogger(__name__)
 
 SubpResult = collections.namedtuple("SubpResult", ["stdout", "stderr"])
 
+# Default maximum number of commands run at once by run_many
+MAX_CONCURRENT_COMMANDS = 8
+
 
 def prepend_base_command(base_command, commands):
     """Ensure user-provided commands start with base_command; warn otherwise.
@@ -201,7 +205,8 @@ def subp(
     :param cwd:
         change the working directory to cwd before executing the command.
     :param timeout: maximum time for the subprocess to run, passed directly to
-        the timeout parameter of Popen.communicate()
+        the timeout parameter of Popen.communicate(). When it expires, the
+        subprocess is killed and subprocess.TimeoutExpired is raised.
 
     :return
         if not capturing, return is (None, None)
@@ -259,7 +264,7 @@ def subp(
     try:
         with performance.Timed(
             "Running {!r}".format(logstring if logstring else args)
-        ):
+        ) as timer:
             sp = subprocess.Popen(
                 bytes_args,
                 stdout=stdout,
@@ -269,7 +274,21 @@ def subp(
                 shell=shell,
                 cwd=cwd,
             )
-            out, err = sp.communicate(data, timeout=timeout)
+            try:
+                out, err = sp.communicate(data, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # Don't leave the command running past its timeout. Its
+                # output isn't drained, as children it forked may keep the
+                # pipes open.
+                sp.kill()
+                sp.wait()
+                timer.attrs["timeout"] = timeout
+                raise
+            timer.attrs.update(
+                exit_code=sp.returncode,
+                stdout_bytes=len(out) if out else 0,
+                stderr_bytes=len(err) if err else 0,
+            )
     except OSError as e:
         raise ProcessExecutionError(
             cmd=args,
@@ -294,6 +313,35 @@ def subp(
     return SubpResult(out, err)
 
 
+def run_many(
+    commands: Iterable[Union[str, bytes, List[str], List[bytes]]],
+    *,
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> List["Future[SubpResult]"]:
+    """Run independent commands concurrently.
+
+    :param commands: the commands to run, each as accepted by subp().
+    :param max_workers: maximum number of commands running at once,
+        MAX_CONCURRENT_COMMANDS by default.
+    :param kwargs: keyword arguments passed to subp() for every command.
+
+    :return: a future for each command, in the same order as commands. Each
+        resolves to the SubpResult of its command, or raises what subp()
+        raised for it.
+    """
+    commands = list(commands)
+    if not commands:
+        return []
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(commands), max_workers or MAX_CONCURRENT_COMMANDS)
+    )
+    futures = [executor.submit(subp, cmd, **kwargs) for cmd in commands]
+    # Workers exit once every command has completed
+    executor.shutdown(wait=False)
+    return futures
+
+
 def target_path(target=None, path=None):
     # return 'path' inside target, accepting target as None
     if target in (None, ""):
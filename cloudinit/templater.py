@@ -13,11 +13,21 @@
 # noqa: E402
 
 import collections
+import hashlib
 import logging
+import os
 import re
 import sys
+from functools import lru_cache
+from typing import Optional, Set
 
-from jinja2 import DebugUndefined, TemplateSyntaxError
+from jinja2 import (
+    DebugUndefined,
+    FileSystemBytecodeCache,
+    Template,
+    TemplateSyntaxError,
+    meta,
+)
 from jinja2.sandbox import SandboxedEnvironment
 
 from cloudinit import performance
@@ -27,6 +37,8 @@ from cloudinit.atomic_helper import write_file
 
 LOG = logging.getLogger(__name__)
 MISSING_JINJA_PREFIX = "CI_MISSING_JINJA_VAR/"
+# Number of compiled jinja templates each process keeps in memory
+JINJA_TEMPLATE_CACHE_SIZE = 64
 
 
 class JinjaSyntaxParsingException(TemplateSyntaxError):
@@ -129,18 +141,76 @@ def basic_render(content, params):
     )
 
 
-def detect_template(text):
+def _get_bytecode_cache(
+    cache_dir: Optional[str],
+) -> Optional[FileSystemBytecodeCache]:
+    """Return a bytecode cache in cache_dir, if it is usable."""
+    # Only cache once cloud-init has set up its data directory. This keeps
+    # build time renders of the templates from creating it.
+    if not cache_dir or not os.path.isdir(os.path.dirname(cache_dir)):
+        return None
+    try:
+        util.ensure_dir(cache_dir, mode=0o700)
+    except OSError as e:
+        LOG.debug("Not caching compiled jinja templates: %s", e)
+        return None
+    if not os.access(cache_dir, os.W_OK | os.X_OK):
+        return None
+    return FileSystemBytecodeCache(cache_dir)
+
+
+@lru_cache(maxsize=None)
+def _get_jinja_env(cache_dir: Optional[str]) -> SandboxedEnvironment:
+    """Return the environment shared by all jinja renders in this process."""
+    return SandboxedEnvironment(
+        undefined=UndefinedJinjaVariable,
+        trim_blocks=True,
+        extensions=["jinja2.ext.do"],
+        bytecode_cache=_get_bytecode_cache(cache_dir),
+    )
+
+
+@lru_cache(maxsize=JINJA_TEMPLATE_CACHE_SIZE)
+def _get_jinja_template(content: str, cache_dir: Optional[str]) -> Template:
+    """Compile content, reusing bytecode from cache_dir when available."""
+    env = _get_jinja_env(cache_dir)
+    bytecode_cache = env.bytecode_cache
+    if bytecode_cache is None:
+        return env.from_string(content)
+    name = hashlib.sha256(content.encode()).hexdigest()
+    try:
+        bucket = bytecode_cache.get_bucket(env, name, None, content)
+    except OSError as e:
+        LOG.debug("Failed to read compiled jinja template: %s", e)
+        return env.from_string(content)
+    if bucket.code is None:
+        bucket.code = env.compile(content)
+        try:
+            bytecode_cache.set_bucket(bucket)
+        except OSError as e:
+            LOG.debug("Failed to cache compiled jinja template: %s", e)
+    return env.template_class.from_code(
+        env, bucket.code, env.make_globals(None), None
+    )
+
+
+def detect_template(text, cache_dir: Optional[str] = None):
+    """Return the type, renderer and content of a template.
+
+    @param cache_dir: Directory in which jinja templates are kept compiled,
+        keyed by a hash of their content, so that later boot stages and
+        boots need not compile them again. Usually the jinja_cache path of
+        cloud-init's Paths. Compiled templates are only kept in memory when
+        None.
+    """
+
     def jinja_render(content, params):
         # keep_trailing_newline is in jinja2 2.7+, not 2.6
         add = "\n" if content.endswith("\n") else ""
         try:
             with performance.Timed("Rendering jinja2 template"):
-                jinja_env = SandboxedEnvironment(
-                    undefined=UndefinedJinjaVariable,
-                    trim_blocks=True,
-                    extensions=["jinja2.ext.do"],
-                )
-                return jinja_env.from_string(content).render(**params) + add
+                template = _get_jinja_template(content, cache_dir)
+                return template.render(**params) + add
         except TemplateSyntaxError as template_syntax_error:
             template_syntax_error.lineno += 1
             raise JinjaSyntaxParsingException(
@@ -170,27 +240,39 @@ def detect_template(text):
         return ("basic", basic_render, rest)
 
 
-def render_from_file(fn, params):
+def render_from_file(fn, params, cache_dir: Optional[str] = None):
     if not params:
         params = {}
-    template_type, renderer, content = detect_template(util.load_text_file(fn))
+    template_type, renderer, content = detect_template(
+        util.load_text_file(fn), cache_dir
+    )
     LOG.debug("Rendering content of '%s' using renderer %s", fn, template_type)
     return renderer(content, params)
 
 
-def render_to_file(fn, outfn, params, mode=0o644):
-    contents = render_from_file(fn, params)
+def render_to_file(
+    fn, outfn, params, mode=0o644, cache_dir: Optional[str] = None
+):
+    contents = render_from_file(fn, params, cache_dir)
     util.write_file(outfn, contents, mode=mode)
 
 
-def render_string(content, params):
+def render_string(content, params, cache_dir: Optional[str] = None):
     """Render string"""
     if not params:
         params = {}
-    _template_type, renderer, content = detect_template(content)
+    _template_type, renderer, content = detect_template(content, cache_dir)
     return renderer(content, params)
 
 
+def jinja_template_variables(content: str) -> Set[str]:
+    """Return the names of the parameters read by a jinja template.
+
+    :raises: TemplateSyntaxError when content is not a valid jinja template.
+    """
+    return meta.find_undeclared_variables(_get_jinja_env(None).parse(content))
+
+
 def render_template(variant, template, output, is_yaml, prefix=None):
     contents = util.load_text_file(template)
     tpl_params = {"variant": variant, "prefix": prefix}
@@ -17,6 +17,7 @@ import os
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from contextlib import contextmanager
 from email.utils import parsedate
 from functools import partial
 from http.client import NOT_FOUND
@@ -359,6 +360,42 @@ class UrlError(IOError):
         self.url = url
 
 
+# Holds the event set to cancel the url requests of the current thread
+_cancellation = threading.local()
+
+
+@contextmanager
+def cancel_requests_on(event: threading.Event):
+    """Cancel the url requests this thread makes once event is set.
+
+    readurl then raises UrlError instead of making a request or retrying,
+    and wait_for_url stops waiting as if it ran out of time. Waits between
+    retries end as soon as event is set. A request already in flight still
+    runs until it completes or times out.
+    """
+    _cancellation.event = event
+    try:
+        yield
+    finally:
+        del _cancellation.event
+
+
+def _requests_cancelled() -> bool:
+    event = getattr(_cancellation, "event", None)
+    return event is not None and event.is_set()
+
+
+def _sleep(seconds: float):
+    """Sleep for seconds, or until the requests of this thread are
+    cancelled.
+    """
+    event = getattr(_cancellation, "event", None)
+    if event is None:
+        time.sleep(seconds)
+    else:
+        event.wait(seconds)
+
+
 def _get_ssl_args(url, ssl_details):
     ssl_args = {}
     scheme = urlparse(url).scheme
@@ -539,6 +576,8 @@ def readurl(
     # Handle retrying ourselves since the built-in support
     # doesn't handle sleeping between tries...
     for i in count():
+        if _requests_cancelled():
+            raise UrlError("Request cancelled", url=url)
         if headers_cb:
             headers = headers_cb(url)
 
@@ -619,7 +658,7 @@ def readurl(
                     "Please wait %s seconds while we wait to try again",
                     sec_between,
                 )
-            time.sleep(sleep_time)
+            _sleep(sleep_time)
 
     raise RuntimeError("This path should be unreachable...")
 
@@ -956,13 +995,13 @@ def wait_for_url(
 
     loop_n: int = 0
     response = None
-    while True:
+    while not _requests_cancelled():
         resp = do_read_url(start_time, timeout, exception_cb, status_cb)
         must_try_again = False
         if resp.response:
             return resp.url, resp.response.contents
         elif resp.wait_time:
-            time.sleep(resp.wait_time)
+            _sleep(resp.wait_time)
             loop_n = loop_n + 1
             must_try_again = True
             continue
@@ -976,7 +1015,7 @@ def wait_for_url(
             "Please wait %s seconds while we wait to try again",
             current_sleep_time,
         )
-        time.sleep(current_sleep_time)
+        _sleep(current_sleep_time)
 
         # shorten timeout to not run way over max_time
         current_time = time.monotonic()
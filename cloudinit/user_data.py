@@ -380,7 +380,12 @@ def convert_string(raw_data, content_type=NOT_MULTIPART_TYPE):
         bdata = raw_data
     bdata = util.decomp_gzip(bdata, decode=False)
     if b"mime-version:" in bdata[0:4096].lower():
-        msg = util.message_from_string(bdata.decode("utf-8"))
+        if bdata.isascii():
+            # Large MIME user-data is typically base64 encoded parts, parse
+            # it directly from bytes rather than holding a decoded copy
+            msg = util.message_from_bytes(bdata)
+        else:
+            msg = util.message_from_string(bdata.decode("utf-8"))
     else:
         msg = create_binmsg(bdata, content_type)
 
@@ -12,6 +12,7 @@ import binascii
 import contextlib
 import copy as obj_copy
 import email
+import email.parser
 import glob
 import grp
 import gzip
@@ -21,6 +22,7 @@ import json
 import logging
 import os
 import os.path
+import pickle
 import platform
 import pwd
 import random
@@ -32,9 +34,11 @@ import stat
 import string
 import subprocess
 import sys
+import threading
 import time
 from base64 import b64decode
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, suppress
 from errno import ENOENT
 from functools import lru_cache
@@ -48,11 +52,13 @@ from typing import (
     Deque,
     Dict,
     Generator,
+    Iterable,
     List,
     Mapping,
     NamedTuple,
     Optional,
     Sequence,
+    Tuple,
     Union,
     cast,
 )
@@ -66,6 +72,7 @@ from cloudinit import (
     mergers,
     net,
     performance,
+    seedfs,
     settings,
     subp,
     temp_utils,
@@ -81,6 +88,12 @@ if TYPE_CHECKING:
     from cloudinit.helpers import Paths
 
 _DNS_REDIRECT_IP = None
+# Successful name lookups made by is_resolvable, so that a stage resolves
+# each mirror candidate at most once. Maps a hostname to the first address
+# it resolved to. Failed lookups are not kept, as the name may resolve once
+# networking changes.
+_DNS_CACHE: Dict[str, str] = {}
+_DNS_REDIRECT_LOCK = threading.Lock()
 LOG = logging.getLogger(__name__)
 
 # Helps cleanup filenames to ensure they aren't FS incompatible
@@ -89,6 +102,21 @@ FN_REPLACEMENTS = {
 }
 FN_ALLOWED = "_-.()" + string.digits + string.ascii_letters
 
+GZIP_MAGIC = b"\x1f\x8b"
+# Chunk size used when feeding raw user-data to the MIME parser
+MIME_FEED_CHUNK_SIZE = 64 * 1024
+
+# libyaml's parser, when PyYAML was built against it
+_CSafeLoader = getattr(yaml, "CSafeLoader", None)
+
+# Format of the cache written by read_conf_with_confd, bumped when it changes
+CONF_CACHE_VERSION = 1
+
+# Upper bound on concurrent lookups or connections made by search_for_mirror
+MAX_MIRROR_PROBES = 8
+# Seconds to wait for a mirror to accept a connection when timing mirrors
+MIRROR_CONNECT_TIMEOUT = 2.0
+
 TRUE_STRINGS = ("true", "1", "on", "yes")
 FALSE_STRINGS = ("off", "0", "no", "false")
 
@@ -205,30 +233,50 @@ class SeLinuxGuard:
     def __exit__(self, excp_type, excp_value, excp_traceback):
         if not self.selinux or not self.selinux.is_selinux_enabled():
             return
-        if not os.path.lexists(self.path):
-            return
+        _restorecon(self.selinux, self.path, self.recursive)
 
-        path = os.path.realpath(self.path)
-        try:
-            stats = os.lstat(path)
-            self.selinux.matchpathcon(path, stats[stat.ST_MODE])
-        except OSError:
-            return
 
-        LOG.debug(
-            "Restoring selinux mode for %s (recursive=%s)",
+def _restorecon(selinux: ModuleType, path: str, recursive: bool):
+    if not os.path.lexists(path):
+        return
+
+    path = os.path.realpath(path)
+    try:
+        stats = os.lstat(path)
+        selinux.matchpathcon(path, stats[stat.ST_MODE])
+    except OSError:
+        return
+
+    LOG.debug(
+        "Restoring selinux mode for %s (recursive=%s)",
+        path,
+        recursive,
+    )
+    try:
+        selinux.restorecon(path, recursive=recursive)
+    except OSError as e:
+        LOG.warning(
+            "restorecon failed on %s,%s maybe badness? %s",
             path,
-            self.recursive,
+            recursive,
+            e,
         )
-        try:
-            self.selinux.restorecon(path, recursive=self.recursive)
-        except OSError as e:
-            LOG.warning(
-                "restorecon failed on %s,%s maybe badness? %s",
-                path,
-                self.recursive,
-                e,
-            )
+
+
+def restorecon_paths(paths: Iterable[str], recursive: bool = False):
+    """Restore the SELinux context of many paths in a single pass.
+
+    Equivalent to wrapping each write in a SeLinuxGuard, but the selinux
+    module is imported and queried only once for the whole batch.
+    """
+    try:
+        selinux = importer.import_module("selinux")
+    except ImportError:
+        return
+    if not selinux.is_selinux_enabled():
+        return
+    for path in paths:
+        _restorecon(selinux, path, recursive)
 
 
 class MountFailedError(Exception):
@@ -399,10 +447,13 @@ def clean_filename(fn):
 
 
 def decomp_gzip(data, quiet=True, decode=True):
+    bdata = encode_text(data)
+    if quiet and not bdata.startswith(GZIP_MAGIC):
+        # Don't wrap payloads that cannot be gzip in a GzipFile only to
+        # catch the resulting error
+        return data
     try:
-        with io.BytesIO(encode_text(data)) as buf, gzip.GzipFile(
-            None, "rb", 1, buf
-        ) as gh:
+        with io.BytesIO(bdata) as buf, gzip.GzipFile(None, "rb", 1, buf) as gh:
             if decode:
                 return decode_binary(gh.read())
             else:
@@ -968,6 +1019,18 @@ def fetch_ssl_details(paths=None):
     return ssl_details
 
 
+def _safe_load_yaml(blob):
+    """Like yaml.safe_load, but parse with libyaml when it is available.
+
+    Documents libyaml rejects are parsed again by the pure Python loader, so
+    errors (and their marks) are those yaml.safe_load would raise.
+    """
+    if _CSafeLoader is not None:
+        with suppress(yaml.YAMLError):
+            return yaml.load(blob, Loader=_CSafeLoader)
+    return yaml.safe_load(blob)
+
+
 def load_yaml(blob, default=None, allowed=(dict,)):
     loaded = default
     blob = decode_binary(blob)
@@ -978,7 +1041,7 @@ def load_yaml(blob, default=None, allowed=(dict,)):
             len(blob),
             allowed,
         )
-        converted = yaml.safe_load(blob)
+        converted = _safe_load_yaml(blob)
         if converted is None:
             LOG.debug("loaded blob returned None, returning default.")
             converted = default
@@ -1095,7 +1158,68 @@ def read_conf_d(confd, *, instance_data_file=None) -> dict:
     return mergemanydict(cfgs)
 
 
-def read_conf_with_confd(cfgfile, *, instance_data_file=None) -> dict:
+def _conf_cache_key(cfgfile, confd, instance_data_file) -> str:
+    """Return a key identifying everything read_conf_with_confd depends on.
+
+    Config files are identified by path, size and modification time, the
+    instance data used to render templates by its content.
+    """
+    confd = confd or f"{cfgfile}.d"
+    paths = [str(cfgfile)]
+    with suppress(OSError):
+        paths.extend(
+            os.path.join(confd, f)
+            for f in sorted(os.listdir(confd))
+            if f.endswith(".cfg")
+        )
+    digest = hashlib.sha256(f"{version.version_string()}\0{confd}".encode())
+    for path in paths:
+        try:
+            st = os.stat(path)
+            digest.update(f"\0{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+        except OSError as e:
+            digest.update(f"\0{path}:{e.errno}".encode())
+    if instance_data_file:
+        digest.update(f"\0{instance_data_file}:".encode())
+        with suppress(OSError):
+            digest.update(load_binary_file(instance_data_file))
+    return digest.hexdigest()
+
+
+def _load_conf_cache(cache_file) -> dict:
+    """Return the cache written by _write_conf_cache, or {} if unusable."""
+    try:
+        if os.stat(cache_file).st_uid != os.geteuid():
+            return {}
+        with open(cache_file, "rb") as stream:
+            cache = pickle.load(stream)
+        if cache.get("version") == CONF_CACHE_VERSION:
+            return cache
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        LOG.debug("Ignoring unusable config cache %s: %s", cache_file, e)
+    return {}
+
+
+def _write_conf_cache(cache_file, key, confd, cfg):
+    if os.geteuid() != 0 or not os.path.isdir(os.path.dirname(cache_file)):
+        return
+    cache = {
+        "version": CONF_CACHE_VERSION,
+        "key": key,
+        "confd": confd,
+        "cfg": cfg,
+    }
+    try:
+        write_file(cache_file, pickle.dumps(cache), mode=0o600)
+    except Exception as e:
+        LOG.debug("Failed to write config cache %s: %s", cache_file, e)
+
+
+def read_conf_with_confd(
+    cfgfile, *, instance_data_file=None, cache_file=None
+) -> dict:
     """Read yaml file along with optional ".d" directory, return merged config
 
     Given a yaml file, load the file as a dictionary. Additionally, if there
@@ -1106,7 +1230,23 @@ def read_conf_with_confd(cfgfile, *, instance_data_file=None) -> dict:
 
     For example, this function can read both /etc/cloud/cloud.cfg and all
     files in /etc/cloud/cloud.cfg.d and merge all configs into a single dict.
+
+    If cache_file is given, the merged config is kept there and returned
+    without parsing anything for as long as none of the files it was read
+    from, nor the instance data, change.
     """
+    key = ""
+    cache: dict = {}
+    if cache_file:
+        cache = _load_conf_cache(cache_file)
+        # The key is taken before reading so that changes made while
+        # reading invalidate what is cached. cloud.cfg may point conf_d
+        # elsewhere: guess it is where it pointed last time.
+        key = _conf_cache_key(cfgfile, cache.get("confd"), instance_data_file)
+        if cache.get("key") == key:
+            LOG.debug("Using merged config cached in %s", cache_file)
+            return cache["cfg"]
+
     cfgs: Deque[Dict] = deque()
     cfg: dict = {}
     try:
@@ -1139,7 +1279,14 @@ def read_conf_with_confd(cfgfile, *, instance_data_file=None) -> dict:
         confd_cfg = read_conf_d(confd, instance_data_file=instance_data_file)
         cfgs.appendleft(confd_cfg)
 
-    return mergemanydict(cfgs)
+    merged = mergemanydict(cfgs)
+    if cache_file:
+        confd = confd or f"{cfgfile}.d"
+        if confd != (cache.get("confd") or f"{cfgfile}.d"):
+            # The guess was wrong, record conf_d for the next read
+            key = ""
+        _write_conf_cache(cache_file, key, confd, merged)
+    return merged
 
 
 def read_conf_from_cmdline(cmdline=None):
@@ -1279,6 +1426,60 @@ def get_fqdn_from_hosts(hostname, filename="/etc/hosts"):
     return fqdn
 
 
+def _getaddr(name) -> Optional[str]:
+    """Return the first address name resolves to, or None.
+
+    Addresses found are kept in _DNS_CACHE.
+    """
+    try:
+        return _DNS_CACHE[name]
+    except KeyError:
+        pass
+    try:
+        addr = str(socket.getaddrinfo(name, None)[0][4][0])
+    except (socket.gaierror, socket.error):
+        return None
+    _DNS_CACHE[name] = addr
+    return addr
+
+
+def _detect_dns_redirect() -> set:
+    """Return the addresses names which should not exist resolve to.
+
+    The probes are resolved concurrently so that a resolver which times out
+    on unknown names costs one timeout rather than three.
+    """
+    badnames = (
+        "does-not-exist.example.com.",
+        "example.invalid.",
+        "__cloud_init_expected_not_found__",
+    )
+
+    def probe(iname):
+        try:
+            return socket.getaddrinfo(
+                iname, None, 0, 0, socket.SOCK_STREAM, socket.AI_CANONNAME
+            )
+        except (socket.gaierror, socket.error):
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(badnames)) as executor:
+        results = dict(zip(badnames, executor.map(probe, badnames)))
+
+    badips = set()
+    badresults: dict = {}
+    for iname, result in results.items():
+        if result is None:
+            continue
+        badresults[iname] = []
+        for _fam, _stype, _proto, cname, sockaddr in result:
+            badresults[iname].append("%s: %s" % (cname, sockaddr[0]))
+            badips.add(sockaddr[0])
+    if badresults:
+        LOG.debug("detected dns redirection: %s", badresults)
+    return badips
+
+
 @performance.timed("Resolving URL")
 def is_resolvable(url) -> bool:
     """determine if a url's network address is resolvable, return a boolean
@@ -1291,6 +1492,8 @@ def is_resolvable(url) -> bool:
     The top level 'invalid' domain is invalid per RFC.  And example.com
     should also not exist.  The '__cloud_init_expected_not_found__' entry will
     be resolved inside the search list.
+
+    This is safe to call from several threads at once.
     """
     global _DNS_REDIRECT_IP
     parsed_url = parse.urlparse(url)
@@ -1300,36 +1503,15 @@ def is_resolvable(url) -> bool:
     with suppress(ValueError):
         if net.is_ip_address(name):
             return True
-    try:
-        hostname_result = socket.getaddrinfo(name, None)
-    except (socket.gaierror, socket.error):
+    addr = _getaddr(name)
+    if addr is None:
         return False
 
     if _DNS_REDIRECT_IP is None:
-        badips = set()
-        badnames = (
-            "does-not-exist.example.com.",
-            "example.invalid.",
-            "__cloud_init_expected_not_found__",
-        )
-        badresults: dict = {}
-        for iname in badnames:
-            try:
-                result = socket.getaddrinfo(
-                    iname, None, 0, 0, socket.SOCK_STREAM, socket.AI_CANONNAME
-                )
-                badresults[iname] = []
-                for _fam, _stype, _proto, cname, sockaddr in result:
-                    badresults[iname].append("%s: %s" % (cname, sockaddr[0]))
-                    badips.add(sockaddr[0])
-            except (socket.gaierror, socket.error):
-                pass
-        _DNS_REDIRECT_IP = badips
-        if badresults:
-            LOG.debug("detected dns redirection: %s", badresults)
-
-    # check first result's sockaddr field
-    addr = hostname_result[0][4][0]
+        with _DNS_REDIRECT_LOCK:
+            if _DNS_REDIRECT_IP is None:
+                _DNS_REDIRECT_IP = _detect_dns_redirect()
+
     if addr in _DNS_REDIRECT_IP:
         return False
     return True
@@ -1352,23 +1534,67 @@ def is_resolvable_url(url):
     return is_resolvable(url)
 
 
-def search_for_mirror(candidates):
+def _mirror_connect_time(url, timeout=MIRROR_CONNECT_TIMEOUT):
+    """Return the seconds taken to connect to url's host, or None."""
+    parsed_url = parse.urlparse(url)
+    start = time.monotonic()
+    try:
+        port = parsed_url.port or (443 if parsed_url.scheme == "https" else 80)
+        with socket.create_connection((parsed_url.hostname, port), timeout):
+            return time.monotonic() - start
+    except (OSError, ValueError):
+        return None
+
+
+def search_for_mirror(candidates, select_fastest=False):
     """
     Search through a list of mirror urls for one that works
     This needs to return quickly.
+
+    All candidates are resolved concurrently and the first one, in list
+    order, that resolves is returned. With select_fastest, every candidate
+    that resolves is connected to and the one quickest to accept the
+    connection is returned instead.
     """
-    if candidates is None:
+    if not candidates:
         return None
 
     LOG.debug("search for mirror in candidates: '%s'", candidates)
-    for cand in candidates:
-        try:
-            if is_resolvable_url(cand):
+    # Don't wait on lookups of lower priority candidates after a hit
+    executor = ThreadPoolExecutor(
+        max_workers=min(MAX_MIRROR_PROBES, len(candidates))
+    )
+    try:
+        futures = [
+            executor.submit(is_resolvable_url, cand) for cand in candidates
+        ]
+        resolved = []
+        for cand, future in zip(candidates, futures):
+            try:
+                if not future.result():
+                    continue
+            except Exception:
+                continue
+            if not select_fastest:
                 LOG.debug("found working mirror: '%s'", cand)
                 return cand
-        except Exception:
-            pass
-    return None
+            resolved.append(cand)
+        if not resolved:
+            return None
+
+        latencies = dict(
+            zip(resolved, executor.map(_mirror_connect_time, resolved))
+        )
+    finally:
+        executor.shutdown(wait=False)
+    LOG.debug("mirror connect times: %s", latencies)
+    reachable = [cand for cand in resolved if latencies[cand] is not None]
+    if not reachable:
+        LOG.debug("no mirror accepted a connection, using '%s'", resolved[0])
+        return resolved[0]
+    fastest = min(reachable, key=lambda cand: latencies[cand])
+    LOG.debug("found fastest mirror: '%s'", fastest)
+    return fastest
 
 
 def find_devs_with_freebsd(
@@ -1649,7 +1875,8 @@ def chownbyid(fname, uid=None, gid=None):
     os.chown(fname, uid, gid)
 
 
-def chownbyname(fname, user=None, group=None):
+def getids_byname(user=None, group=None) -> Tuple[int, int]:
+    """Return the (uid, gid) pair for user and group names, -1 if unset."""
     uid = -1
     gid = -1
     try:
@@ -1659,6 +1886,11 @@ def chownbyname(fname, user=None, group=None):
             gid = grp.getgrnam(group).gr_gid
     except KeyError as e:
         raise OSError("Unknown user or group: %s" % (e)) from e
+    return uid, gid
+
+
+def chownbyname(fname, user=None, group=None):
+    uid, gid = getids_byname(user, group)
     chownbyid(fname, uid, gid)
 
 
@@ -1981,6 +2213,20 @@ def mounts():
     return mounted
 
 
+def _read_without_mount(device, target, mtypes) -> bool:
+    """Copy the files of seed media on device to target without mounting it.
+
+    @returns: False when device has to be mounted instead.
+    """
+    try:
+        fstype = seedfs.extract(device, target, mtypes)
+    except seedfs.SeedFsError as e:
+        LOG.debug("Mounting %s as it cannot be read directly: %s", device, e)
+        return False
+    LOG.debug("Read %s filesystem on %s without mounting it", fstype, device)
+    return True
+
+
 def mount_cb(
     device,
     callback,
@@ -1994,6 +2240,9 @@ def mount_cb(
     in which it was mounted, then unmount.  Return whatever 'callback'
     returned.  If data != None, also pass data to callback.
 
+    ISO9660 and FAT filesystems are copied to a temporary directory
+    instead of being mounted, unless they cannot be read directly.
+
     mtype is a filesystem type.  it may be a list, string (a single fsname)
     or a list of fsnames.
     """
@@ -2033,6 +2282,8 @@ def mount_cb(
         umount = ""
         if os.path.realpath(device) in mounted:
             mountpoint = mounted[os.path.realpath(device)]["mountpoint"]
+        elif _read_without_mount(device, tmpd, mtypes):
+            mountpoint = tmpd
         else:
             failure_reason = None
             for mtype in mtypes:
@@ -2330,6 +2581,55 @@ def write_file(
     chmod(filename, mode)
 
 
+def write_file_owned(
+    filename: str,
+    content: Union[str, bytes],
+    mode: int = 0o644,
+    *,
+    append: bool = False,
+    uid: int = -1,
+    gid: int = -1,
+):
+    """
+    Writes bytes to a file, setting ownership and mode on the open
+    descriptor before any content is written.
+
+    Unlike write_file, the parent directory must already exist and the
+    SELinux context is not restored; callers writing many files should
+    relabel them together with restorecon_paths.
+
+    @param filename: The full path of the file to write.
+    @param content: The content to write to the file.
+    @param mode: The filesystem mode to set on the file.
+    @param append: If True, append to the file instead of truncating it.
+    @param uid: The user id to set on the file, -1 to leave it unchanged.
+    @param gid: The group id to set on the file, -1 to leave it unchanged.
+    """
+    content = encode_text(content)
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+    flags |= os.O_APPEND if append else os.O_TRUNC
+    LOG.debug(
+        "Writing to %s - %s: [%o] %s bytes",
+        filename,
+        "ab" if append else "wb",
+        mode,
+        len(content),
+    )
+    # Create new files private to the owner so content is never exposed
+    # with broader permissions than requested
+    fd = os.open(filename, flags, 0o600)
+    with open(fd, "wb") as fh:
+        if uid != -1 or gid != -1:
+            LOG.debug(
+                "Changing the ownership of %s to %s:%s", filename, uid, gid
+            )
+            os.fchown(fd, uid, gid)
+        # Applied after fchown, which clears setuid and setgid bits
+        if mode:
+            os.fchmod(fd, mode)
+        fh.write(content)
+
+
 def delete_dir_contents(dirname):
     """
     Deletes all contents of a directory without deleting the directory itself.
@@ -2931,6 +3231,19 @@ def message_from_string(string):
     return email.message_from_string(string)
 
 
+def message_from_bytes(data: bytes, chunk_size: int = MIME_FEED_CHUNK_SIZE):
+    """Parse a MIME message from bytes, feeding the parser in chunks.
+
+    Unlike email.message_from_bytes, this never holds a decoded copy of
+    the whole input alongside the parsed message.
+    """
+    parser = email.parser.BytesFeedParser()
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        parser.feed(bytes(view[start : start + chunk_size]))
+    return parser.close()
+
+
 def get_installed_packages():
     out = subp.subp(["dpkg-query", "--list"], capture=True)
 
@@ -92,3 +92,21 @@ class TestDHCP:
             assert "'unknown-245'" in log, "Failed to get unknown option 245"
         verify_clean_log(log)
         verify_clean_boot(client)
+
+    def test_native_client(self, client):
+        """force the native dhcp client and test that it worked"""
+        assert client.execute(
+            "sed -i 's|"
+            "dhcp_client_priority.*$"
+            "|dhcp_client_priority: [native]"
+            "|' /etc/cloud/cloud.cfg"
+        ).ok
+        client.execute("cloud-init clean --logs")
+        client.restart()
+        log = client.read_from_file("/var/log/cloud-init.log")
+        assert "DHCP client selected: native" in log
+        assert "Received dhcp lease on" in log, "No lease received"
+        if "azure" == PLATFORM:
+            assert "'unknown-245'" in log, "Failed to get unknown option 245"
+        verify_clean_log(log)
+        verify_clean_boot(client)
@@ -11,7 +11,10 @@ import pytest
 
 from cloudinit.analyze.dump import (
     dump_events,
+    dump_trace_events,
     has_gnu_date,
+    index_boots,
+    iter_events,
     parse_ci_logline,
     parse_timestamp,
     parse_timestamp_from_date,
@@ -229,7 +232,10 @@ class TestParseCILogLine:
     def test_parse_logline_returns_event_for_finish_events(
         self, m_parse_from_date
     ):
-        """parse_ci_logline returns a finish event for a parsed log line."""
+        """parse_ci_logline returns a finish event for a parsed log line.
+
+        ISO 8601 timestamps are parsed natively, without GNU date(1).
+        """
         line = (
             "2016-08-30 21:53:25.972325+00:00 y1 [CLOUDINIT]"
             " handlers.py[DEBUG]: finish: modules-final: SUCCESS: running"
@@ -241,13 +247,10 @@ class TestParseCILogLine:
             "name": "modules-final",
             "origin": "cloudinit",
             "result": "SUCCESS",
-            "timestamp": 1472594005.972,
+            "timestamp": 1472594005.972325,
         }
-        m_parse_from_date.return_value = "1472594005.972"
         assert expected == parse_ci_logline(line)
-        m_parse_from_date.assert_has_calls(
-            [mock.call("2016-08-30 21:53:25.972325+00:00")]
-        )
+        assert 0 == m_parse_from_date.call_count
 
     def test_parse_logline_returns_event_for_amazon_linux_2_line(self):
         line = (
@@ -295,12 +298,9 @@ class TestDumpEvents:
     @mock.patch("cloudinit.analyze.dump.parse_timestamp_from_date")
     def test_dump_events_with_rawdata(self, m_parse_from_date):
         """Rawdata is split and parsed into a tuple of events and data"""
-        m_parse_from_date.return_value = "1472594005.972"
         events, data = dump_events(rawdata=SAMPLE_LOGS)
         expected_data = SAMPLE_LOGS.splitlines()
-        assert [
-            mock.call("2016-08-30 21:53:25.972325+00:00")
-        ] == m_parse_from_date.call_args_list
+        assert 0 == m_parse_from_date.call_count
         assert expected_data == data
         year = datetime.now().year
         dt1 = datetime.strptime(
@@ -321,7 +321,7 @@ class TestDumpEvents:
                 "name": "modules-final",
                 "origin": "cloudinit",
                 "result": "SUCCESS",
-                "timestamp": 1472594005.972,
+                "timestamp": 1472594005.972325,
             },
         ]
         assert expected_events == events
@@ -331,7 +331,6 @@ class TestDumpEvents:
         """Cisource file is read and parsed into a tuple of events and data."""
         tmpfile = str(tmpdir.join(("logfile")))
         write_file(tmpfile, SAMPLE_LOGS)
-        m_parse_from_date.return_value = 1472594005.972
         with open(tmpfile) as file:
             events, data = dump_events(cisource=file)
         year = datetime.now().year
@@ -353,11 +352,89 @@ class TestDumpEvents:
                 "name": "modules-final",
                 "origin": "cloudinit",
                 "result": "SUCCESS",
-                "timestamp": 1472594005.972,
+                "timestamp": 1472594005.972325,
             },
         ]
         assert expected_events == events
         assert SAMPLE_LOGS.splitlines() == [d.strip() for d in data]
-        m_parse_from_date.assert_has_calls(
-            [mock.call("2016-08-30 21:53:25.972325+00:00")]
-        )
+        assert 0 == m_parse_from_date.call_count
+
+
+SAMPLE_TRACE = """\
+{"name":"init","parent":null,"start":10.0,"duration":2.0,"pid":1,\
+"thread":"MainThread","stage":"init"}
+{"name":"config-ssh","parent":"init","start":10.5,"duration":0.25,"pid":1,\
+"thread":"MainThread","stage":"init"}
+{"name":"Writing file","parent":"config-ssh","start":10.5,"duration":0.1,\
+"pid":1,"thread":"MainThread","stage":"init"}
+"""
+
+
+class TestDumpTraceEvents:
+    def test_dump_trace_events_returns_none_for_logs(self):
+        """Content which is not a boot trace is not converted."""
+        assert dump_trace_events(SAMPLE_LOGS) is None
+        assert dump_trace_events('{"name": "incomplete"}') is None
+
+    def test_dump_trace_events_nests_spans_by_time(self):
+        """Spans become start/finish events nested by their intervals."""
+        events = dump_trace_events(SAMPLE_TRACE)
+        assert events is not None
+        assert [
+            (e["event_type"], e["name"], e["timestamp"]) for e in events
+        ] == [
+            ("start", "init-network", 10.0),
+            ("start", "init-network/config-ssh", 10.5),
+            ("start", "init-network/Writing file", 10.5),
+            ("finish", "init-network/Writing file", 10.6),
+            ("finish", "init-network/config-ssh", 10.75),
+            ("finish", "init-network", 12.0),
+        ]
+        assert "searching for network datasources" == events[0]["description"]
+        assert "SUCCESS" == events[-1]["result"]
+
+
+TWO_BOOT_LOGS = dedent("""\
+2017-05-22 18:02:01,088 - util.py[DEBUG]: Cloud-init v. 0.7.9 running\
+ 'init-local' at Mon, 22 May 2017 18:02:01 +0000. Up 2.0 seconds.
+2017-05-22 18:02:01,090 - handlers.py[DEBUG]: start: init-local:\
+ searching for local datasources
+2017-05-22 18:02:01,100 - handlers.py[DEBUG]: start:\
+ init-local/check-cache: attempting to read from cache [check]
+2017-05-22 18:02:01,500 - handlers.py[DEBUG]: finish:\
+ init-local/check-cache: SUCCESS: no cache found
+2017-05-22 18:02:02,000 - handlers.py[DEBUG]: finish: init-local:\
+ SUCCESS: searching for local datasources
+2017-05-23 10:00:00,001 - util.py[DEBUG]: Cloud-init v. 0.7.9 running\
+ 'init-local' at Tue, 23 May 2017 10:00:00 +0000. Up 2.0 seconds.
+2017-05-23 10:00:00,002 - handlers.py[DEBUG]: start: init-local:\
+ searching for local datasources
+2017-05-23 10:00:00,010 - handlers.py[DEBUG]: start:\
+ init-local/check-cache: attempting to read from cache [check]
+2017-05-23 10:00:00,400 - handlers.py[DEBUG]: finish:\
+ init-local/check-cache: SUCCESS: no cache found
+2017-05-23 10:00:00,500 - handlers.py[DEBUG]: finish: init-local:\
+ SUCCESS: searching for local datasources
+""")
+
+
+class TestIterEvents:
+    def test_iter_events_is_lazy(self):
+        """Events are parsed only as lines are consumed."""
+        lines = iter(TWO_BOOT_LOGS.splitlines())
+        events = iter_events(lines)
+        assert "init-local" == next(events)["name"]
+        assert 9 == len(list(lines))
+
+
+class TestIndexBoots:
+    def test_index_boots_returns_offsets_of_each_boot(self, tmp_path):
+        """Each init-local stage following other events starts a boot."""
+        logfile = tmp_path / "cloud-init.log"
+        logfile.write_text("unrelated line\n" + TWO_BOOT_LOGS)
+        with open(logfile, "rb") as f:
+            offsets = index_boots(f)
+        content = logfile.read_bytes()
+        assert 2 == len(offsets)
+        assert 0 == offsets[0]
+        assert content[offsets[1] :].startswith(b"2017-05-23 10:00:00,001")
@@ -2,7 +2,11 @@ from collections import namedtuple
 
 import pytest
 
-from cloudinit.analyze import analyze_show
+from cloudinit import helpers
+from cloudinit.analyze import analyze_show, get_parser
+from tests.unittests.analyze.test_dump import SAMPLE_TRACE, TWO_BOOT_LOGS
+
+M_PATH = "cloudinit.analyze."
 
 
 @pytest.fixture
@@ -22,3 +26,77 @@ class TestAnalyzeShow:
         with pytest.raises(SystemExit):
             analyze_show("dontcare", mock_io)
         assert capsys.readouterr().err == f"Empty file {mock_io.infile}\n"
+
+    @pytest.mark.parametrize(
+        "boot,expected_delta",
+        [(2, "00.49800"), (-1, "00.49800"), (1, "00.91000")],
+    )
+    def test_show_single_boot(self, boot, expected_delta, mock_io):
+        """Only the requested boot record is shown."""
+        mock_io.infile.write_text(TWO_BOOT_LOGS)
+        args = get_parser().parse_args(
+            [
+                "show",
+                "-i",
+                str(mock_io.infile),
+                "-o",
+                str(mock_io.outfile),
+                "-b",
+                str(boot),
+            ]
+        )
+        analyze_show("show", args)
+        output = mock_io.outfile.read_text()
+        assert 1 == output.count("-- Boot Record")
+        assert f"Finished stage: (init-local) {expected_delta} seconds" in (
+            output
+        )
+        assert output.endswith("1 boot records analyzed\n")
+
+    def test_show_missing_boot(self, mock_io, capsys):
+        """A boot number beyond the last boot is an error."""
+        mock_io.infile.write_text(TWO_BOOT_LOGS)
+        args = get_parser().parse_args(
+            ["show", "-i", str(mock_io.infile), "-b", "3"]
+        )
+        with pytest.raises(SystemExit):
+            analyze_show("show", args)
+        assert "Boot record 3 not found\n" == capsys.readouterr().err
+
+
+class TestDefaultInfile:
+    """Without --infile, the boot trace is preferred over the log file."""
+
+    @pytest.fixture(autouse=True)
+    def files(self, tmp_path, mocker):
+        log_file = tmp_path / "cloud-init.log"
+        log_file.write_text(TWO_BOOT_LOGS)
+        mocker.patch(M_PATH + "DEFAULT_LOG_FILE", str(log_file))
+        mocker.patch(
+            M_PATH + "read_cfg_paths",
+            return_value=helpers.Paths({"run_dir": str(tmp_path)}),
+        )
+        return tmp_path
+
+    def _show(self, files, *args):
+        outfile = files / "outfile"
+        analyze_show(
+            "show",
+            get_parser().parse_args(["show", "-o", str(outfile), *args]),
+        )
+        return outfile.read_text()
+
+    def test_reads_boot_trace(self, files):
+        (files / "boot-trace.jsonl").write_text(SAMPLE_TRACE)
+        output = self._show(files)
+        assert "Finished stage: (init-network) 02.00000 seconds" in output
+        assert output.endswith("1 boot records analyzed\n")
+
+    def test_falls_back_to_log_file(self, files):
+        assert self._show(files).endswith("2 boot records analyzed\n")
+
+    def test_boot_reads_log_file(self, files):
+        """The trace only covers the current boot, so it has no others."""
+        (files / "boot-trace.jsonl").write_text(SAMPLE_TRACE)
+        output = self._show(files, "-b", "1")
+        assert "Finished stage: (init-local) 00.91000 seconds" in output
@@ -1,17 +1,18 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
-import glob
+import io
 import os
 import pathlib
 import sys
 import tarfile
 from datetime import datetime, timezone
+from typing import IO, cast
 
 import pytest
 
 from cloudinit.cmd.devel import logs
 from cloudinit.cmd.devel.logs import ApportFile
-from cloudinit.subp import SubpResult, subp
+from cloudinit.subp import SubpResult
 from cloudinit.util import ensure_dir, load_text_file, write_file
 
 M_PATH = "cloudinit.cmd.devel.logs."
@@ -19,10 +20,6 @@ INSTANCE_JSON_SENSITIVE_FILE = "instance-data-sensitive.json"
 
 
 def fake_subp(cmd):
-    if cmd[0] == "tar" and cmd[1] == "czf":
-        subp(cmd)  # Pass through tar cmd so we can check output
-        return SubpResult("", "")
-
     expected_subp = {
         (
             "dpkg-query",
@@ -41,20 +38,47 @@ def fake_subp(cmd):
     return SubpResult(expected_subp[cmd_tuple], "")
 
 
-# the new _stream_command_output_to_file function uses subprocess.call
-# instead of subp, so we need to mock that as well
-def fake_subprocess_call(cmd, stdout=None, stderr=None):
+class FakePopen:
+    """Fake subprocess.Popen streaming canned output of expected commands."""
+
     expected_calls = {
-        ("dmesg",): "dmesg-out\n",
-        ("journalctl", "--boot=0", "-o", "short-precise"): "journal-out\n",
-        ("journalctl", "--boot=-1", "-o", "short-precise"): "journal-prev\n",
+        ("dmesg",): b"dmesg-out\n",
+        ("journalctl", "--boot=0", "-o", "short-precise"): b"journal-out\n",
+        ("journalctl", "--boot=-1", "-o", "short-precise"): b"journal-prev\n",
     }
-    cmd_tuple = tuple(cmd)
-    if cmd_tuple not in expected_calls:
-        raise AssertionError(
-            "Unexpected command provided to subprocess: {0}".format(cmd)
+
+    def __init__(self, cmd, stdout=None, stderr=None):
+        cmd_tuple = tuple(cmd)
+        if cmd_tuple not in self.expected_calls:
+            raise AssertionError(
+                "Unexpected command provided to subprocess: {0}".format(cmd)
+            )
+        self.stdout = io.BytesIO(self.expected_calls[cmd_tuple])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def kill(self):
+        pass
+
+
+def collect_into_tarball(tmp_path, collect_dir, log_cfg, include_sensitive):
+    """Collect logs into a tarball and return the names of its members."""
+    tarball = tmp_path / "collected.tar.gz"
+    with tarfile.open(tarball, "w:gz") as tar:
+        logs._collect_logs_into_archive(
+            archive=logs.LogArchive(tar, "logs"),
+            tmp_dir=collect_dir,
+            log_cfg=log_cfg,
+            run_dir=collect_dir,
+            cloud_dir=collect_dir,
+            include_sensitive=include_sensitive,
         )
-    stdout.write(expected_calls[cmd_tuple])
+    with tarfile.open(tarball) as tar:
+        return tar.getnames()
 
 
 def patch_subiquity_paths(mocker, tmp_path):
@@ -91,9 +115,7 @@ class TestCollectLogs:
 
     def test_collect_logs_end_to_end(self, mocker, tmp_path):
         mocker.patch(f"{M_PATH}subp", side_effect=fake_subp)
-        mocker.patch(
-            f"{M_PATH}subprocess.call", side_effect=fake_subprocess_call
-        )
+        mocker.patch(f"{M_PATH}subprocess.Popen", FakePopen)
         mocker.patch(
             f"{M_PATH}_get_etc_cloud",
             return_value=[
@@ -163,9 +185,7 @@ class TestCollectLogs:
     def test_logs_and_installer_ignore_sensitive_flag(self, mocker, tmp_path):
         """Regardless of the sensitive flag, we always want these logs."""
         mocker.patch(f"{M_PATH}subp", side_effect=fake_subp)
-        mocker.patch(
-            f"{M_PATH}subprocess.call", side_effect=fake_subprocess_call
-        )
+        mocker.patch(f"{M_PATH}subprocess.Popen", FakePopen)
         mocker.patch(f"{M_PATH}_get_etc_cloud", return_value=[])
         patch_subiquity_paths(mocker, tmp_path)
 
@@ -184,28 +204,25 @@ class TestCollectLogs:
 
         collect_dir = tmp_path / "collect"
         collect_dir.mkdir()
-        logs._collect_logs_into_tmp_dir(
-            log_dir=collect_dir,
+        collected = collect_into_tarball(
+            tmp_path,
+            collect_dir,
             log_cfg={
                 "def_log_file": str(tmp_path / "var/log/cloud-init.log"),
                 "output": {
                     "all": f"| tee -a {tmp_path}/var/log/cloud-init-output.log"
                 },
             },
-            run_dir=collect_dir,
-            cloud_dir=collect_dir,
             include_sensitive=False,
         )
 
         for name in to_collect:
-            assert (collect_dir / str(tmp_path)[1:] / name).exists()
+            assert f"logs/{str(tmp_path)[1:]}/{name}" in collected
 
     def test_root_read_only_not_collected_on_redact(self, mocker, tmp_path):
         """Don't collect root read-only files."""
         mocker.patch(f"{M_PATH}subp", side_effect=fake_subp)
-        mocker.patch(
-            f"{M_PATH}subprocess.call", side_effect=fake_subprocess_call
-        )
+        mocker.patch(f"{M_PATH}subprocess.Popen", FakePopen)
         mocker.patch(f"{M_PATH}_get_etc_cloud", return_value=[])
         patch_subiquity_paths(mocker, tmp_path)
 
@@ -230,22 +247,22 @@ class TestCollectLogs:
 
         collect_dir = tmp_path / "collect"
         collect_dir.mkdir()
-        logs._collect_logs_into_tmp_dir(
-            log_dir=collect_dir,
+        collected = collect_into_tarball(
+            tmp_path,
+            collect_dir,
             log_cfg={
                 "def_log_file": str(tmp_path / "var/log/cloud-init.log"),
                 "output": {
                     "all": f"| tee -a {tmp_path}/var/log/cloud-init-output.log"
                 },
             },
-            run_dir=collect_dir,
-            cloud_dir=collect_dir,
             include_sensitive=False,
         )
 
         for name in to_collect:
-            assert not (collect_dir / str(tmp_path)[1:] / name).exists()
-        assert not (collect_dir / "dmsg.txt").exists()
+            assert f"logs/{str(tmp_path)[1:]}/{name}" not in collected
+        assert "logs/dmesg.txt" not in collected
+        assert "logs/journal.txt" in collected
 
     @pytest.mark.parametrize(
         "cmd, expected_file_contents, expected_return_value",
@@ -308,6 +325,98 @@ class TestCollectLogs:
         assert expected_file_contents == load_text_file(output_file)
 
 
+class TestLogArchive:
+    def _archive(self, tmp_path, files, **kwargs):
+        tarball = tmp_path / "logs.tar.gz"
+        with tarfile.open(tarball, "w:gz") as tar:
+            archive = logs.LogArchive(tar, "logs", **kwargs)
+            for name, content in files:
+                write_file(tmp_path / name, content)
+                archive.add(tmp_path / name, name)
+        with tarfile.open(tarball) as tar:
+            return {
+                member.name: cast(IO[bytes], tar.extractfile(member)).read()
+                for member in tar.getmembers()
+            }
+
+    def test_add_streams_files_unmodified(self, tmp_path):
+        files = [("a.log", "a" * 100), ("b.log", "b" * 100)]
+        assert {
+            "logs/a.log": b"a" * 100,
+            "logs/b.log": b"b" * 100,
+        } == self._archive(tmp_path, files)
+
+    def test_add_keeps_tail_of_files_exceeding_max_item_size(self, tmp_path):
+        content = "".join(f"line {i}\n" for i in range(1000))
+        collected = self._archive(
+            tmp_path, [("a.log", content)], max_item_size=100
+        )
+        data = collected["logs/a.log"]
+        marker = logs.TRUNCATED_FILE_MARKER.format(len(content)).encode()
+        assert 100 == len(data)
+        assert data.startswith(marker)
+        assert content.encode().endswith(data[len(marker) :])
+
+    def test_add_skips_files_beyond_max_total_size(self, tmp_path, caplog):
+        files = [("a.log", "a" * 100), ("b.log", "b" * 300), ("c.log", "c")]
+        collected = self._archive(
+            tmp_path, files, max_item_size=0, max_total_size=200
+        )
+        assert b"a" * 100 == collected["logs/a.log"]
+        assert 100 == len(collected["logs/b.log"])
+        assert collected["logs/b.log"].endswith(b"bbb")
+        assert "logs/c.log" not in collected
+        assert "Total size limit reached" in caplog.text
+
+    @pytest.mark.parametrize("max_item_size", (0, 150))
+    def test_add_pads_files_shrinking_while_collected(
+        self, max_item_size, tmp_path, mocker, caplog
+    ):
+        """A log truncated while collected does not break the archive."""
+        write_file(tmp_path / "a.log", "a" * 200)
+        tarball = tmp_path / "logs.tar.gz"
+        with tarfile.open(tarball, "w:gz") as tar:
+            gettarinfo = tar.gettarinfo
+
+            def truncate_after_stat(*args, **kwargs):
+                info = gettarinfo(*args, **kwargs)
+                write_file(tmp_path / "a.log", "a" * 10)
+                return info
+
+            archive = logs.LogArchive(tar, "logs", max_item_size=max_item_size)
+            mocker.patch.object(
+                tar, "gettarinfo", side_effect=truncate_after_stat
+            )
+            archive.add(tmp_path / "a.log", "a.log")
+            mocker.stopall()
+            write_file(tmp_path / "b.log", "b" * 100)
+            archive.add(tmp_path / "b.log", "b.log")
+        with tarfile.open(tarball) as tar:
+            a_log = cast(IO[bytes], tar.extractfile("logs/a.log")).read()
+            b_log = cast(IO[bytes], tar.extractfile("logs/b.log")).read()
+        assert b"b" * 100 == b_log
+        assert (max_item_size or 200) == len(a_log)
+        assert a_log.endswith(b"\0" * 90)
+        assert "a.log shrank while collected" in caplog.text
+
+    def test_stream_command_output_truncates_at_max_size(self, tmp_path):
+        output_file = tmp_path / "test-output-file.txt"
+
+        logs._stream_command_output_to_file(
+            cmd=["sh", "-c", "yes | head -n 100000"],
+            file_path=output_file,
+            msg="",
+            max_size=1000,
+        )
+
+        content = output_file.read_bytes()
+        assert 1000 == len(content)
+        assert content.endswith(
+            logs.TRUNCATED_OUTPUT_MARKER.format(1000).encode()
+        )
+        assert content.startswith(b"y\ny\n")
+
+
 class TestCollectInstallerLogs:
     @pytest.mark.parametrize(
         "include_sensitive, apport_files, apport_sensitive_files",
@@ -345,7 +454,7 @@ class TestCollectInstallerLogs:
         src_dir = tmpdir.join("src")
         ensure_dir(src_dir.strpath)
         # collect-logs nests full directory path to file in the tarfile
-        destination_dir = tmpdir.join(src_dir)
+        destination_dir = f"logs/{src_dir.strpath[1:]}"
 
         # Create tmppath-based userdata_files, installer_logs, installer_dirs
         expected_files = []
@@ -357,9 +466,7 @@ class TestCollectInstallerLogs:
         if apport_files:
             write_file(apport_files[-1].path, apport_files[-1].label)
             expected_files += [
-                destination_dir.join(
-                    os.path.basename(apport_files[-1].path)
-                ).strpath
+                f"{destination_dir}/{os.path.basename(apport_files[-1].path)}"
             ]
         apport_sensitive_files = [
             logs.ApportFile(src_dir.join(apport.path).strpath, apport.label)
@@ -372,25 +479,22 @@ class TestCollectInstallerLogs:
             )
             if include_sensitive:
                 expected_files += [
-                    destination_dir.join(
-                        os.path.basename(apport_sensitive_files[-1].path)
-                    ).strpath
+                    os.path.join(
+                        destination_dir,
+                        os.path.basename(apport_sensitive_files[-1].path),
+                    )
                 ]
         mocker.patch(M_PATH + "INSTALLER_APPORT_FILES", apport_files)
         mocker.patch(
             M_PATH + "INSTALLER_APPORT_SENSITIVE_FILES", apport_sensitive_files
         )
-        logs._collect_installer_logs(
-            log_dir=tmpdir.strpath,
-            include_sensitive=include_sensitive,
-        )
-        expect_userdata = bool(include_sensitive and apport_sensitive_files)
-        # when subiquity artifacts exist, and userdata set true, expect logs
-        expect_subiquity_logs = any([apport_files, expect_userdata])
-        if expect_subiquity_logs:
-            assert destination_dir.exists(), "Missing subiquity artifact dir"
-            assert sorted(expected_files) == sorted(
-                glob.glob(f"{destination_dir.strpath}/*")
+        tarball = tmpdir.join("logs.tar.gz").strpath
+        with tarfile.open(tarball, "w:gz") as tar:
+            logs._collect_installer_logs(
+                archive=logs.LogArchive(tar, "logs"),
+                include_sensitive=include_sensitive,
             )
-        else:
-            assert not destination_dir.exists(), "Unexpected subiquity dir"
+        with tarfile.open(tarball) as tar:
+            collected = tar.getnames()
+        # when subiquity artifacts exist, and userdata set true, expect logs
+        assert sorted(expected_files) == sorted(collected)
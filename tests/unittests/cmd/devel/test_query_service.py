@@ -0,0 +1,151 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+from cloudinit.cmd import query_client
+from cloudinit.cmd.devel import query_service
+from cloudinit.handlers import jinja_template
+from cloudinit.helpers import Paths
+
+M_PATH = "cloudinit.cmd.devel.query_service."
+
+
+def fake_command(argv):
+    print(f"ran {argv[1:]} in {os.getcwd()}")
+    print(f"env {os.environ.get('QUERY_SERVICE_TEST')}", file=sys.stderr)
+    return int(argv[-1])
+
+
+class TestQueryService:
+    @pytest.fixture
+    def listener(self, tmp_path):
+        sock = query_service.listen(str(tmp_path / "query.sock"))
+        yield sock
+        sock.close()
+
+    def run_client(self, sock, command, argv):
+        result = {}
+
+        def run():
+            result["exit_code"] = query_client.run(
+                command, argv, socket_path=sock.getsockname()
+            )
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        conn, _ = sock.accept()
+        with conn:
+            child = query_service.handle_connection(conn, sock)
+        os.waitpid(child, 0)
+        thread.join()
+        return result["exit_code"], child
+
+    def test_socket_usable_by_all_users(self, listener):
+        assert 0o666 == os.stat(listener.getsockname()).st_mode & 0o777
+
+    def test_runs_command_with_client_streams_and_environment(
+        self, listener, capfd, mocker, monkeypatch, tmp_path
+    ):
+        mocker.patch.dict(query_service.COMMANDS, {"cloud-id": fake_command})
+        monkeypatch.setenv("QUERY_SERVICE_TEST", "from client")
+        monkeypatch.chdir(tmp_path)
+        exit_code, child = self.run_client(
+            listener, "cloud-id", ["cloud-id", "--json", "4"]
+        )
+        assert child
+        assert 4 == exit_code
+        out, err = capfd.readouterr()
+        assert f"ran ['--json', '4'] in {tmp_path}\n" == out
+        assert "env from client\n" == err
+
+    @pytest.mark.parametrize(
+        "exception,expected_exit,expected_err",
+        [
+            (SystemExit(2), 2, ""),
+            (SystemExit(None), 0, ""),
+            (SystemExit("usage: cloud-id"), 1, "usage: cloud-id\n"),
+            (RuntimeError("boom"), 1, "RuntimeError: boom\n"),
+        ],
+    )
+    def test_exit_code_as_interpreter_reports(
+        self, exception, expected_exit, expected_err, listener, capfd, mocker
+    ):
+        mocker.patch.dict(
+            query_service.COMMANDS,
+            {"cloud-id": mocker.Mock(side_effect=exception)},
+        )
+        exit_code, _child = self.run_client(listener, "cloud-id", ["cloud-id"])
+        assert expected_exit == exit_code
+        assert capfd.readouterr().err.endswith(expected_err)
+
+    @pytest.mark.parametrize(
+        "request_,fds,error",
+        [
+            (
+                {"command": "cloud-init", "argv": ["cloud-init", "init"]},
+                (0, 1, 2),
+                "Not a query command",
+            ),
+            (
+                {"command": "cloud-init-per", "argv": ["cloud-init-per"]},
+                (0, 1, 2),
+                "Unknown command",
+            ),
+            (
+                {"command": "cloud-id", "argv": ["cloud-id"]},
+                (1,),
+                "Expected standard input, output and error",
+            ),
+        ],
+    )
+    def test_refuses_invalid_requests(self, request_, fds, error, listener):
+        request_.update(cwd="/", env={})
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(listener.getsockname())
+            query_client.send_message(client, request_, fds=fds)
+            conn, _ = listener.accept()
+            with conn:
+                child = query_service.handle_connection(conn, listener)
+            reply, _ = query_client.receive_message(client, bytearray())
+        os.waitpid(child, 0)
+        assert False is reply["accepted"]
+        assert error in reply["error"]
+
+    def test_idle_client_does_not_hold_up_others(
+        self, listener, capfd, mocker
+    ):
+        """Requests are read in the forked child, not while accepting."""
+        mocker.patch.dict(query_service.COMMANDS, {"cloud-id": fake_command})
+        mocker.patch.object(query_service, "REQUEST_TIMEOUT", 1)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.connect(listener.getsockname())
+            conn, _ = listener.accept()
+            with conn:
+                idle_child = query_service.handle_connection(conn, listener)
+            exit_code, _child = self.run_client(
+                listener, "cloud-id", ["cloud-id", "5"]
+            )
+        os.waitpid(idle_child, 0)
+        assert 5 == exit_code
+
+    def test_refuses_other_users_when_not_root(self, mocker):
+        mocker.patch("os.geteuid", return_value=1000)
+        mocker.patch("os.getegid", return_value=1000)
+        with pytest.raises(PermissionError):
+            query_service._assume_client({}, [], 1001, 1001)
+
+    def test_warm_caches_loads_instance_data(self, mocker, tmp_path):
+        paths = Paths({"run_dir": str(tmp_path)})
+        mocker.patch(M_PATH + "read_cfg_paths", return_value=paths)
+        mocker.patch.dict(jinja_template._INSTANCE_DATA_CACHE, clear=True)
+        instance_data_fn = paths.get_runpath("instance_data")
+        with open(instance_data_fn, "w") as stream:
+            json.dump({"v1": {"cloud_name": "nocloud"}}, stream)
+        query_service.warm_caches()
+        assert [instance_data_fn] == list(jinja_template._INSTANCE_DATA_CACHE)
@@ -1,5 +1,6 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import argparse
 import copy
 import getpass
 import os
@@ -403,3 +404,49 @@ class TestShouldBringUpInterfaces:
 
         result = main._should_bring_up_interfaces(init, args)
         assert result == expected
+
+
+class TestStageHandoff:
+    @pytest.fixture
+    def m_init(self, mocker):
+        return mocker.patch("cloudinit.cmd.main.stages.Init")
+
+    def _args(self, **kwargs):
+        return argparse.Namespace(reporter=mock.sentinel.reporter, **kwargs)
+
+    def test_init_created_without_handoff(self, m_init):
+        init = main._stage_init(self._args(files=None), ["FILESYSTEM"])
+        assert m_init.return_value is init
+        m_init.assert_called_once_with(
+            ds_deps=["FILESYSTEM"], reporter=mock.sentinel.reporter
+        )
+        m_init.return_value.read_cfg.assert_called_once_with([])
+
+    def test_first_stage_hands_its_init_over(self, m_init):
+        handoff = main.StageHandoff()
+        args = self._args(files=None)
+        with handoff.stage(args):
+            init = main._stage_init(args, ["FILESYSTEM"])
+        assert m_init.return_value is init
+        assert init is handoff.init
+
+    def test_later_stages_reuse_init(self, m_init):
+        handoff = main.StageHandoff()
+        previous = handoff.init = mock.Mock(ds_restored=False)
+        args = self._args(files=None)
+        with handoff.stage(args):
+            init = main._stage_init(args, [])
+        assert previous is init
+        m_init.assert_not_called()
+        previous.reload_cfg.assert_called_once_with([])
+        assert [] == init.ds_deps
+        assert mock.sentinel.reporter == init.reporter
+        assert init.ds_restored is True
+
+    def test_failed_stage_does_not_hand_over(self):
+        handoff = main.StageHandoff()
+        handoff.init = mock.Mock()
+        with pytest.raises(RuntimeError):
+            with handoff.stage(self._args()):
+                raise RuntimeError()
+        assert handoff.init is None
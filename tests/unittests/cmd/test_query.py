@@ -1,17 +1,21 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import copy
 import errno
 import gzip
 import json
 import os
+import time
 from collections import namedtuple
 from io import BytesIO
 from pathlib import Path
 from textwrap import dedent
+from typing import Any, Dict
 from unittest import mock
 
 import pytest
 
+from cloudinit import atomic_helper, json_index
 from cloudinit.atomic_helper import b64e
 from cloudinit.cmd import query
 from cloudinit.helpers import Paths
@@ -632,3 +636,167 @@ class TestQuery:
             m_getuid.return_value = 100
             assert 1 == query.handle_args("anyname", args)
         assert expected_error in caplog.text
+
+
+INDEXED_INSTANCE_DATA: Dict[str, Any] = {
+    "base64_encoded_keys": [],
+    "ds": {
+        "_doc": "EXPERIMENTAL",
+        "meta_data": {
+            "local-hostname": "myhost",
+            "public-keys": {"0": {"openssh-key": "ssh-rsa AAA"}},
+            "block-device-mapping": {"ami": "/dev/sda1", "root": "sda1"},
+        },
+        "user.network-config": {"version": 2},
+    },
+    "sys_info": {"dist": ["ubuntu", "24.04", "noble"]},
+    "v1": {
+        "cloud_name": "ec2",
+        "instance_id": "i-123",
+        "local-hostname": "myhost",
+        "v1_1": {"nested": True},
+    },
+    "v2": {"cloud_name": "aws"},
+}
+
+
+class TestIndexedQuery:
+    Args = TestQuery.Args
+
+    @pytest.fixture
+    def instance_data_fn(self, tmp_path):
+        instance_data_fn = str(tmp_path / "instance-data.json")
+        json_index.write_json(instance_data_fn, INDEXED_INSTANCE_DATA)
+        return instance_data_fn
+
+    def query(self, instance_data_fn, capsys, varname, list_keys=False):
+        args = self.Args(
+            debug=False,
+            dump_all=False,
+            format=None,
+            instance_data=instance_data_fn,
+            list_keys=list_keys,
+            user_data="ud",
+            vendor_data="vd",
+            varname=varname,
+        )
+        with mock.patch("os.getuid", return_value=100):
+            exit_code = query.handle_args("anyname", args)
+        out, _err = capsys.readouterr()
+        return exit_code, out
+
+    @pytest.mark.parametrize(
+        "varname,list_keys",
+        [
+            (None, True),
+            ("v1", False),
+            ("v1", True),
+            ("cloud_name", False),
+            ("local_hostname", False),
+            ("local-hostname", False),
+            ("v1_1", False),
+            ("nested", False),
+            ("ds", False),
+            ("ds", True),
+            ("ds.meta_data", False),
+            ("ds.meta_data", True),
+            ("ds.meta_data.local_hostname", False),
+            ("ds.meta_data.public_keys.0.openssh_key", False),
+            ("ds.meta_data.block_device_mapping", False),
+            ("ds.user_network_config.version", False),
+            ("sys_info.dist", False),
+            ("sys_info.dist", True),
+            ("userdata", False),
+            ("combined_cloud_config", False),
+            ("v1.absent", False),
+            ("absent", False),
+        ],
+    )
+    def test_indexed_output_matches_parsed_output(
+        self, varname, list_keys, instance_data_fn, capsys
+    ):
+        indexed = self.query(instance_data_fn, capsys, varname, list_keys)
+        os.unlink(json_index.index_path(instance_data_fn))
+        parsed = self.query(instance_data_fn, capsys, varname, list_keys)
+        assert parsed == indexed
+
+    def test_indexed_query_reads_only_values_looked_up(
+        self, instance_data_fn, capsys, mocker
+    ):
+        m_load = mocker.patch(M_PATH + "load_instance_data")
+        m_loads = mocker.spy(json_index.json, "loads")
+        assert (0, "i-123\n") == self.query(
+            instance_data_fn, capsys, "instance_id"
+        )
+        m_load.assert_not_called()
+        index = Path(json_index.index_path(instance_data_fn)).read_text()
+        parsed = [
+            call.args[0]
+            for call in list(m_loads.call_args_list)
+            if call.args[0] != index
+        ]
+        assert {b'"i-123"'} == set(parsed)
+
+    def test_outdated_index_is_ignored(self, instance_data_fn, capsys):
+        data = copy.deepcopy(INDEXED_INSTANCE_DATA)
+        data["v1"]["instance_id"] = "i-456"
+        index_fn = json_index.index_path(instance_data_fn)
+        index = Path(index_fn).read_text()
+        atomic_helper.write_json(instance_data_fn, data)
+        Path(index_fn).write_text(index)
+        assert (0, "i-456\n") == self.query(
+            instance_data_fn, capsys, "instance_id"
+        )
+
+    @pytest.mark.parametrize(
+        "args,reads_user_data",
+        [
+            ({"varname": "v1.cloud_name"}, False),
+            ({"list_keys": True}, False),
+            ({"format": "{{ v1.cloud_name }}"}, False),
+            ({"varname": "userdata"}, True),
+            ({"format": "{{ userdata }}"}, True),
+            ({"dump_all": True}, True),
+        ],
+    )
+    def test_user_data_read_only_when_referenced(
+        self, args, reads_user_data, instance_data_fn, capsys, mocker
+    ):
+        m_lud = mocker.patch(M_PATH + "load_userdata", return_value="ud")
+        defaults = {
+            "debug": False,
+            "dump_all": False,
+            "format": None,
+            "instance_data": instance_data_fn,
+            "list_keys": False,
+            "user_data": "ud",
+            "vendor_data": "vd",
+            "varname": None,
+        }
+        defaults.update(args)
+        with mock.patch("os.getuid", return_value=0):
+            assert 0 == query.handle_args("anyname", self.Args(**defaults))
+        assert reads_user_data == (mock.call("ud") in m_lud.call_args_list)
+
+    def test_indexed_query_of_multi_megabyte_instance_data(
+        self, tmp_path, capsys
+    ):
+        """Looking up a key costs far less than parsing all instance-data."""
+        data = copy.deepcopy(INDEXED_INSTANCE_DATA)
+        data["ds"]["meta_data"]["blobs"] = {
+            f"blob{i}": {"data": ["x" * 100] * 100} for i in range(500)
+        }
+        instance_data_fn = str(tmp_path / "instance-data.json")
+        json_index.write_json(instance_data_fn, data)
+        assert os.path.getsize(instance_data_fn) > 5 * 1024 * 1024
+
+        def timed(varname):
+            start = time.perf_counter()
+            result = self.query(instance_data_fn, capsys, varname)
+            return result, time.perf_counter() - start
+
+        indexed, indexed_time = timed("instance_id")
+        os.unlink(json_index.index_path(instance_data_fn))
+        parsed, parsed_time = timed("instance_id")
+        assert (0, "i-123\n") == indexed == parsed
+        assert indexed_time < parsed_time
@@ -0,0 +1,120 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Tests for the query service client."""
+
+import os
+import socket
+import threading
+
+import pytest
+
+from cloudinit.cmd import query_client
+
+
+class TestIsForwarded:
+    @pytest.mark.parametrize(
+        "command,argv,forwarded",
+        [
+            ("cloud-id", ["cloud-id"], True),
+            ("cloud-id", ["cloud-id", "--json"], True),
+            ("cloud-init", ["cloud-init", "status", "--long"], True),
+            ("cloud-init", ["cloud-init", "query", "--all"], True),
+            ("cloud-init", ["cloud-init", "schema", "--system"], True),
+            ("cloud-init", ["cloud-init", "schema", "-c", "ud.yaml"], False),
+            ("cloud-init", ["cloud-init", "init"], False),
+            ("cloud-init", ["cloud-init"], False),
+            ("cloud-init", ["cloud-init", "--debug", "status"], False),
+            ("cloud-init-per", ["cloud-init-per", "once"], False),
+        ],
+    )
+    def test_is_forwarded(self, command, argv, forwarded):
+        assert forwarded is query_client.is_forwarded(command, argv)
+
+
+class TestRun:
+    @pytest.fixture
+    def server(self, tmp_path):
+        """Serve one connection with the replies given, recording the
+        request and the number of file descriptors received.
+        """
+        socket_path = str(tmp_path / "query.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen()
+        received: dict = {}
+
+        def serve(replies):
+            conn, _ = listener.accept()
+            with conn:
+                request, fds = query_client.receive_message(conn, bytearray())
+                received["request"] = request
+                received["fds"] = len(fds)
+                for fd in fds:
+                    os.close(fd)
+                for reply in replies:
+                    query_client.send_message(conn, reply)
+
+        def start(*replies):
+            thread = threading.Thread(target=serve, args=(replies,))
+            thread.start()
+            return thread
+
+        yield socket_path, start, received
+        listener.close()
+
+    def test_not_forwarded_without_socket(self, tmp_path):
+        socket_path = str(tmp_path / "query.sock")
+        assert None is query_client.run(
+            "cloud-id", ["cloud-id"], socket_path=socket_path
+        )
+
+    def test_not_forwarded_for_other_commands(self, server):
+        socket_path, _start, received = server
+        assert None is query_client.run(
+            "cloud-init", ["cloud-init", "init"], socket_path=socket_path
+        )
+        assert not received
+
+    def test_returns_exit_code_of_command(self, server):
+        socket_path, start, received = server
+        thread = start({"accepted": True}, {"exit_code": 3})
+        argv = ["cloud-init", "status", "--long"]
+        assert 3 == query_client.run(
+            "cloud-init", argv, socket_path=socket_path
+        )
+        thread.join()
+        assert {
+            "command": "cloud-init",
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        } == received["request"]
+        assert 3 == received["fds"]
+
+    def test_falls_back_when_refused(self, server):
+        socket_path, start, _received = server
+        thread = start({"accepted": False, "error": "Cannot run commands"})
+        assert None is query_client.run(
+            "cloud-id", ["cloud-id"], socket_path=socket_path
+        )
+        thread.join()
+
+    def test_fails_when_service_stops_during_command(self, server):
+        """Output may have been written already, so do not run it again."""
+        socket_path, start, _received = server
+        thread = start({"accepted": True})
+        assert 1 == query_client.run(
+            "cloud-id", ["cloud-id"], socket_path=socket_path
+        )
+        thread.join()
+
+    def test_falls_back_when_service_does_not_reply(self, tmp_path, mocker):
+        """A stalled service does not hold up the command."""
+        mocker.patch.object(query_client, "REPLY_TIMEOUT", 0.1)
+        socket_path = str(tmp_path / "query.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(socket_path)
+            listener.listen()
+            assert None is query_client.run(
+                "cloud-id", ["cloud-id"], socket_path=socket_path
+            )
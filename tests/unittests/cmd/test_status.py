@@ -2,6 +2,8 @@
 
 import json
 import os
+import threading
+import time
 from collections import namedtuple
 from textwrap import dedent
 from typing import Callable, Dict, Optional, Union
@@ -775,7 +777,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
     def test_status_wait_blocks_until_done(
         self, m_get_systemd_status, m_read_cfg_paths, config: Config, capsys
     ):
-        """Specifying wait will poll every 1/4 second until done state."""
+        """Without inotify, wait polls every 1/4 second until done state."""
         m_read_cfg_paths.return_value = config.paths
         running_json = {
             "v1": {
@@ -811,15 +813,16 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             {
                 "sleep": {"side_effect": fake_sleep},
                 "get_bootstatus": (status.EnabledStatus.UNKNOWN, ""),
+                "_Inotify": {"side_effect": OSError},
             },
             status.handle_status_args,
             "ignored",
             cmdargs,
         )
         assert retcode == 0
-        assert sleep_calls == 4
+        assert sleep_calls == 3
         out, _err = capsys.readouterr()
-        assert out == "....status: done\n"
+        assert out == "...status: done\n"
 
     @mock.patch(M_PATH + "read_cfg_paths")
     @mock.patch(
@@ -829,7 +832,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
     def test_status_wait_blocks_until_error(
         self, m_get_systemd_status, m_read_cfg_paths, config: Config, capsys
     ):
-        """Specifying wait will poll every 1/4 second until error state."""
+        """Without inotify, wait polls every 1/4 second until error state."""
         m_read_cfg_paths.return_value = config.paths
         running_json = {
             "v1": {
@@ -868,15 +871,16 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             {
                 "sleep": {"side_effect": fake_sleep},
                 "get_bootstatus": (status.EnabledStatus.UNKNOWN, ""),
+                "_Inotify": {"side_effect": OSError},
             },
             status.handle_status_args,
             "ignored",
             cmdargs,
         )
         assert retcode == 1
-        assert sleep_calls == 4
+        assert sleep_calls == 3
         out, _err = capsys.readouterr()
-        assert out == "....status: error\n"
+        assert out == "...status: error\n"
 
     @mock.patch(M_PATH + "read_cfg_paths")
     @mock.patch(
@@ -905,6 +909,85 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
         out, _err = capsys.readouterr()
         assert out == "status: running\n"
 
+    @mock.patch(M_PATH + "read_cfg_paths")
+    @mock.patch(f"{M_PATH}systemd_failed", return_value=None)
+    def test_status_stream_prints_each_change(
+        self, m_get_systemd_status, m_read_cfg_paths, config: Config, capsys
+    ):
+        """Stream prints a JSON line for each status change until done."""
+        m_read_cfg_paths.return_value = config.paths
+        running_json = {
+            "v1": {"stage": "init", "init": {"start": 124.4, "finished": None}}
+        }
+        done_json = {
+            "v1": {"stage": None, "init": {"start": 124.4, "finished": 125.6}}
+        }
+        sleep_calls = 0
+
+        def fake_sleep(interval):
+            nonlocal sleep_calls
+            sleep_calls += 1
+            if sleep_calls == 2:
+                write_json(config.status_file, running_json)
+            elif sleep_calls == 4:
+                write_json(config.status_file, done_json)
+                ensure_file(config.result_file)
+
+        cmdargs = status.get_parser().parse_args(["--stream"])
+        retcode = wrap_and_call(
+            M_NAME,
+            {
+                "sleep": {"side_effect": fake_sleep},
+                "get_bootstatus": (status.EnabledStatus.UNKNOWN, ""),
+                "_Inotify": {"side_effect": OSError},
+            },
+            status.handle_status_args,
+            "ignored",
+            cmdargs,
+        )
+        assert retcode == 0
+        out, _err = capsys.readouterr()
+        assert ["not started", "running", "done"] == [
+            json.loads(line)["status"] for line in out.splitlines()
+        ]
+
+
+class TestStatusWatcher:
+    def test_wait_polls_status_files_without_inotify(self, mocker, config):
+        """Without inotify, wait reports whether a status file changed."""
+        mocker.patch(f"{M_PATH}_Inotify", side_effect=OSError)
+        m_sleep = mocker.patch(f"{M_PATH}sleep")
+        with status.StatusWatcher(config.paths) as watcher:
+            assert not watcher.wait()
+            write_json(config.status_file, {})
+            assert watcher.wait()
+            assert not watcher.wait()
+        assert 3 == m_sleep.call_count
+
+    def test_wait_rechecks_periodically_without_changes(self, mocker, config):
+        """Status is re-read after the recheck interval even if unchanged."""
+        mocker.patch(f"{M_PATH}_Inotify", side_effect=OSError)
+        mocker.patch(f"{M_PATH}sleep")
+        m_monotonic = mocker.patch(f"{M_PATH}monotonic", return_value=10.0)
+        with status.StatusWatcher(config.paths) as watcher:
+            assert not watcher.wait()
+            m_monotonic.return_value = 10.0 + status.WAIT_RECHECK_INTERVAL
+            assert watcher.wait()
+
+    def test_wait_wakes_up_on_inotify_event(self, config):
+        """With inotify, wait returns as soon as a status file is written."""
+        try:
+            status._Inotify().close()
+        except OSError:
+            pytest.skip("inotify is unavailable")
+        timer = threading.Timer(0.1, write_json, (config.status_file, {}))
+        with status.StatusWatcher(config.paths) as watcher:
+            start = time.monotonic()
+            timer.start()
+            assert watcher.wait()
+            assert time.monotonic() - start < status.WAIT_RECHECK_INTERVAL
+        timer.join()
+
 
 class TestSystemdFailed:
     @pytest.fixture(autouse=True)
@@ -858,13 +858,42 @@ class TestAptSourceConfig:
                 cfg, get_cloud(), "amd64"
             )
 
-        calls = [call(["pfailme", pmir]), call(["sfailme", smir])]
+        calls = [
+            call(["pfailme", pmir], select_fastest=False),
+            call(["sfailme", smir], select_fastest=False),
+        ]
         mocksearch.assert_has_calls(calls)
 
         assert mirrors["MIRROR"] == pmir
         assert mirrors["PRIMARY"] == pmir
         assert mirrors["SECURITY"] == smir
 
+    def test_apt_v3_mirror_search_fastest(self):
+        """search_fastest selects mirrors by connect time"""
+        pmir = "http://us.archive.ubuntu.com/ubuntu/"
+        cfg = {
+            "primary": [
+                {
+                    "arches": ["default"],
+                    "search": ["pfailme", pmir],
+                    "search_fastest": True,
+                }
+            ],
+        }
+
+        with mock.patch.object(
+            cc_apt_configure.util, "search_for_mirror", return_value=pmir
+        ) as mocksearch:
+            mirrors = cc_apt_configure.find_apt_mirror_info(
+                cfg, get_cloud(), "amd64"
+            )
+
+        mocksearch.assert_called_once_with(
+            ["pfailme", pmir], select_fastest=True
+        )
+        assert mirrors["PRIMARY"] == pmir
+        assert mirrors["SECURITY"] == pmir
+
     def test_apt_v3_mirror_search_many2(self):
         """test_apt_v3_mirror_search_many3 - Test both mirrors specs at once"""
         pmir = "http://us.archive.ubuntu.com/ubuntu/"
@@ -1205,8 +1234,8 @@ deb http://ubuntu.com/ubuntu/ xenial-proposed main"""
         ) as mocksdns:
             mirrors = cc_apt_configure.find_apt_mirror_info(cfg, mycloud, arch)
         calls = [
-            call(True, "primary", cfg, mycloud),
-            call(True, "security", cfg, mycloud),
+            call(True, "primary", cfg, mycloud, select_fastest=False),
+            call(True, "security", cfg, mycloud, select_fastest=False),
         ]
         mocksdns.assert_has_calls(calls)
 
@@ -1219,19 +1248,21 @@ deb http://ubuntu.com/ubuntu/ xenial-proposed main"""
             mirrors = cc_apt_configure.find_apt_mirror_info(cfg, mycloud, arch)
 
         calls = [
-            call(None),
+            call(None, select_fastest=False),
             call(
                 [
                     "http://ubuntu-mirror.localdomain/ubuntu",
                     "http://ubuntu-mirror/ubuntu",
-                ]
+                ],
+                select_fastest=False,
             ),
-            call(None),
+            call(None, select_fastest=False),
             call(
                 [
                     "http://ubuntu-security-mirror.localdomain/ubuntu",
                     "http://ubuntu-security-mirror/ubuntu",
-                ]
+                ],
+                select_fastest=False,
             ),
         ]
         mockse.assert_has_calls(calls)
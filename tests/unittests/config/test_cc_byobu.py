@@ -94,6 +94,23 @@ class TestHandleByobu:
         else:
             install_pkgs.assert_called_once_with(["byobu"])
 
+    @pytest.mark.parametrize(
+        "cfg, args, packages",
+        (
+            ({}, [], []),
+            ({"byobu_by_default": "user"}, [], ["byobu"]),
+            ({"byobu_by_default": "disable"}, [], ["byobu"]),
+            ({"byobu_by_default": "bogus"}, [], []),
+            ({"byobu_by_default": "bogus"}, ["enable"], ["byobu"]),
+        ),
+    )
+    @mock.patch(M_PATH + "subp.which", return_value="")
+    def test_get_required_packages(self, _m_which, cfg, args, packages):
+        """Only valid values require byobu."""
+        assert packages == cc_byobu.get_required_packages(
+            "byobu", cfg, get_cloud(), args
+        )
+
 
 class TestByobuSchema:
     """Directly test schema rather than through handle."""
@@ -1,4 +1,5 @@
 # This file is part of cloud-init. See LICENSE file for license information.
+import os
 import re
 from copy import deepcopy
 from unittest import mock
@@ -56,10 +57,11 @@ class TestLxd:
         subp.side_effect = my_subp
         system_info.return_value = {"uname": [0, 1, "mykernel"]}
         sem_file = f"{tmpdir}/sem/snap_seeded.once"
-        cc = get_cloud(mocked_distro=True, paths=Paths({"cloud_dir": tmpdir}))
-        install = cc.distro.install_packages
-
         for backend, cmd, package in BACKEND_DEF:
+            cc = get_cloud(
+                mocked_distro=True, paths=Paths({"cloud_dir": tmpdir})
+            )
+            install = cc.distro.install_packages
             lxd_cfg = deepcopy(LXD_INIT_CFG)
             lxd_cfg["lxd"]["init"]["storage_backend"] = backend
             subp.call_args_list = []
@@ -88,7 +90,7 @@ class TestLxd:
                 ),
             ] == subp.call_args_list
 
-            assert [mock.call(sem_file)] == exists.call_args_list
+            assert os.path.isfile(sem_file)
             del_file(sem_file)
 
     @mock.patch("cloudinit.config.cc_lxd.maybe_cleanup_default")
@@ -421,6 +421,35 @@ class TestPuppetHandle:
         assert 2 == m_man_puppet.call_count
 
 
+class TestGetRequiredPackages:
+    @pytest.mark.parametrize(
+        "cfg, packages",
+        [
+            ({}, []),
+            ({"puppet": {}}, []),
+            ({"puppet": {"package_name": "puppet8"}}, ["puppet8"]),
+            (
+                {"puppet": {"package_name": "puppet8", "version": "8.1"}},
+                [],
+            ),
+            ({"puppet": {"package_name": "puppet8", "install": False}}, []),
+            (
+                {
+                    "puppet": {
+                        "package_name": "puppet8",
+                        "install_type": "aio",
+                    }
+                },
+                [],
+            ),
+        ],
+    )
+    def test_get_required_packages(self, cfg, packages):
+        assert packages == cc_puppet.get_required_packages(
+            "puppet", cfg, get_cloud(), []
+        )
+
+
 URL_MOCK = mock.Mock()
 URL_MOCK.contents = b'#!/bin/bash\necho "Hi Mom"'
 
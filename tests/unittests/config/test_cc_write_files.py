@@ -4,7 +4,9 @@ import base64
 import gzip
 import io
 import logging
+import os
 import re
+import threading
 from unittest import mock
 
 import pytest
@@ -60,8 +62,8 @@ VALID_SCHEMA = {
 
 
 OWNER = "root:root"
-USER = "root"
-GROUP = "root"
+UID = 0
+GID = 0
 
 
 @pytest.fixture
@@ -72,9 +74,9 @@ def cloud():
 
 
 @pytest.mark.usefixtures("fake_filesystem")
-@mock.patch("cloudinit.config.cc_write_files.util.chownbyname")
+@mock.patch("cloudinit.util.os.fchown")
 class TestWriteFiles:
-    def test_simple(self, m_chownbyname):
+    def test_simple(self, m_fchown):
         expected = "hello world\n"
         filename = str("/tmp/my.file")
         write_files(
@@ -83,11 +85,9 @@ class TestWriteFiles:
             OWNER,
         )
         assert util.load_text_file(filename) == expected
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_empty(self, m_chownbyname):
+    def test_empty(self, m_fchown):
         filename = str("/tmp/my.file")
         write_files(
             "test_empty",
@@ -95,11 +95,9 @@ class TestWriteFiles:
             OWNER,
         )
         assert util.load_text_file(filename) == ""
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_append(self, m_chownbyname):
+    def test_append(self, m_fchown):
         existing = "hello "
         added = "world\n"
         expected = existing + added
@@ -111,11 +109,9 @@ class TestWriteFiles:
             OWNER,
         )
         assert util.load_text_file(filename) == expected
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_special_permission_bits(self, m_chownbyname, tmp_path):
+    def test_special_permission_bits(self, m_fchown, tmp_path):
         expected = "hello world\n"
         filename = str(tmp_path / "special.file")
         permissions = 0o4711
@@ -131,14 +127,12 @@ class TestWriteFiles:
             OWNER,
         )
         assert util.load_text_file(filename) == expected
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
         assert util.get_permissions(filename) == decode_perms(
             permissions, None
         )
 
-    def test_yaml_binary(self, m_chownbyname):
+    def test_yaml_binary(self, m_fchown):
         data_wrong_paths = util.load_yaml(YAML_TEXT)
         data = []
         for content in data_wrong_paths["write_files"]:
@@ -148,9 +142,9 @@ class TestWriteFiles:
         write_files("testname", data, OWNER)
         for path, content in YAML_CONTENT_EXPECTED.items():
             assert util.load_text_file(path) == content
-        assert 5 == m_chownbyname.call_count
+        assert 3 == m_fchown.call_count
 
-    def test_all_decodings(self, m_chownbyname):
+    def test_all_decodings(self, m_fchown):
         # build a 'files' array that has a dictionary of encodings
         # for 'gz', 'gzip', 'gz+base64' ...
         data = b"foobzr"
@@ -189,9 +183,9 @@ class TestWriteFiles:
             datum
         )
         assert len(expected) == flen_expected
-        assert len(expected) == m_chownbyname.call_count
+        assert len(expected) == m_fchown.call_count
 
-    def test_handle_plain_text(self, m_chownbyname, caplog, cloud):
+    def test_handle_plain_text(self, m_fchown, caplog, cloud):
         file_path = "/tmp/file-text-plain"
         content = "asdf"
         cfg = {
@@ -207,11 +201,9 @@ class TestWriteFiles:
         handle("ignored", cfg, cloud, [])
         assert content == util.load_text_file(file_path)
         assert "Unknown encoding type text/plain" not in caplog.text
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_file_uri(self, m_chownbyname, cloud):
+    def test_file_uri(self, m_fchown, cloud):
         src_path = "/tmp/file-uri"
         dst_path = "/tmp/file-uri-target"
         content = "asdf"
@@ -226,10 +218,10 @@ class TestWriteFiles:
         }
         handle("ignored", cfg, cloud, [])
         assert util.load_text_file(src_path) == util.load_text_file(dst_path)
-        assert m_chownbyname.call_count
+        assert m_fchown.call_count
 
     @responses.activate
-    def test_http_uri(self, m_chownbyname, cloud):
+    def test_http_uri(self, m_fchown, cloud):
         path = "/tmp/http-uri-target"
         url = "http://hostname/path"
         content = "more asdf"
@@ -250,11 +242,9 @@ class TestWriteFiles:
         }
         handle("ignored", cfg, cloud, [])
         assert content == util.load_text_file(path)
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_uri_fallback(self, m_chownbyname, cloud):
+    def test_uri_fallback(self, m_fchown, cloud):
         src_path = "tmp/INVALID"
         dst_path = "/tmp/uri-fallback-target"
         content = "asdf"
@@ -271,17 +261,71 @@ class TestWriteFiles:
         }
         handle("ignored", cfg, cloud, [])
         assert content == util.load_text_file(dst_path)
-        assert [
-            mock.call(mock.ANY, USER, GROUP)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, UID, GID)] == m_fchown.call_args_list
 
-    def test_deferred(self, m_chownbyname, cloud):
+    def test_deferred(self, m_fchown, cloud):
         file_path = "/tmp/deferred.file"
         config = {"write_files": [{"path": file_path, "defer": True}]}
         handle("cc_write_file", config, cloud, [])
         with pytest.raises(FileNotFoundError):
             util.load_text_file(file_path)
-        assert [] == m_chownbyname.call_args_list
+        assert [] == m_fchown.call_args_list
+
+    def test_sources_fetched_concurrently(self, m_fchown, mocker):
+        """All source uris are downloaded in parallel before writing."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_read(url, **kwargs):
+            barrier.wait()
+            return mock.Mock(contents=url.encode())
+
+        mocker.patch(
+            "cloudinit.config.cc_write_files.url_helper.read_file_or_url",
+            side_effect=fake_read,
+        )
+        files = [
+            {"source": {"uri": "http://host/%d" % i}, "path": "/tmp/f%d" % i}
+            for i in range(3)
+        ]
+        write_files("test_concurrent", files, OWNER)
+        for i in range(3):
+            assert "http://host/%d" % i == util.load_text_file("/tmp/f%d" % i)
+
+    def test_failed_source_without_content_is_skipped(
+        self, m_fchown, mocker, caplog
+    ):
+        """An unreachable source and no inline content writes nothing."""
+        mocker.patch(
+            "cloudinit.config.cc_write_files.url_helper.read_file_or_url",
+            side_effect=OSError("unreachable"),
+        )
+        write_files(
+            "test_skip",
+            [{"source": {"uri": "http://host/a"}, "path": "/tmp/skipped"}],
+            OWNER,
+        )
+        assert not os.path.exists("/tmp/skipped")
+        assert "No content could be loaded for entry 1" in caplog.text
+        assert [] == m_fchown.call_args_list
+
+    def test_many_small_files_relabelled_once(self, m_fchown, mocker):
+        """SELinux is queried once for a large batch of files."""
+        fake_se = mock.Mock()
+        fake_se.is_selinux_enabled.return_value = True
+        m_import = mocker.patch(
+            "cloudinit.util.importer.import_module", return_value=fake_se
+        )
+        files = [
+            {"content": "file %d\n" % i, "path": "/tmp/many/%d" % i}
+            for i in range(1000)
+        ]
+        write_files("test_many", files, OWNER)
+        assert "file 999\n" == util.load_text_file("/tmp/many/999")
+        assert 1000 == m_fchown.call_count
+        # The guard around creating /tmp/many accounts for one import and
+        # one relabel, all the files share the other
+        assert 2 == m_import.call_count
+        assert 1001 == fake_se.restorecon.call_count
 
 
 class TestDecodePerms:
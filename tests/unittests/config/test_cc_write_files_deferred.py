@@ -23,8 +23,8 @@ class TestWriteFilesDeferred:
 
     USER = "root"
 
-    @mock.patch("cloudinit.config.cc_write_files.util.chownbyname")
-    def test_filtering_deferred_files(self, m_chownbyname):
+    @mock.patch("cloudinit.util.os.fchown")
+    def test_filtering_deferred_files(self, m_fchown):
         expected = "hello world\n"
         config = {
             "write_files": [
@@ -45,9 +45,7 @@ class TestWriteFilesDeferred:
         assert util.load_text_file("/tmp/deferred.file") == expected
         with pytest.raises(FileNotFoundError):
             util.load_text_file("/tmp/not_deferred.file")
-        assert [
-            mock.call(mock.ANY, self.USER, self.USER)
-        ] == m_chownbyname.call_args_list
+        assert [mock.call(mock.ANY, 0, 0)] == m_fchown.call_args_list
 
 
 class TestWriteFilesDeferredSchema:
@@ -221,3 +221,116 @@ class TestModules:
             "Config modules with a `log` parameter is deprecated in 23.2"
             in caplog.text
         )
+
+
+def _module_details(name, packages=None):
+    module = mock.Mock(spec=["handle", "get_required_packages", "meta"])
+    if packages is None:
+        del module.get_required_packages
+    else:
+        module.get_required_packages.return_value = packages
+    return ModuleDetails(
+        module=module, name=name, frequency="always", run_args=[]
+    )
+
+
+class TestPlannedPackages:
+    @pytest.fixture
+    def mods(self, mocker):
+        mocker.patch(M_PATH + "ReportEventStack")
+        mocker.patch(
+            M_PATH + "signature",
+            return_value=inspect.signature(
+                lambda name, cfg, cloud, args: None
+            ),
+        )
+        mods = Modules(
+            init=mock.Mock(spec=Init),
+            cfg_files=mock.Mock(),
+            reporter=mock.Mock(),
+        )
+        mods._cached_cfg = {}
+        m_cc = mods.init.cloudify.return_value
+        m_cc.has_run.return_value = False
+
+        def run(name, *args, **kwargs):
+            # Record module runs alongside the distro's package calls
+            m_cc.distro.ran(name)
+            return True, None
+
+        m_cc.run.side_effect = run
+        return mods
+
+    def test_packages_installed_together(self, mods):
+        m_cc = mods.init.cloudify.return_value
+        mods._run_modules(
+            [
+                _module_details("first"),
+                _module_details("puppet", ["puppet", "git"]),
+                _module_details("other"),
+                _module_details("chef", ["chef", "git"]),
+            ]
+        )
+
+        assert [
+            mock.call.ran("config-first"),
+            mock.call.preinstall_packages(["puppet", "git", "chef"]),
+            mock.call.ran("config-puppet"),
+            mock.call.ran("config-other"),
+            mock.call.ran("config-chef"),
+        ] == m_cc.distro.method_calls
+
+    @pytest.mark.parametrize(
+        "modules",
+        [
+            pytest.param(
+                [
+                    _module_details("puppet", ["puppet"]),
+                    _module_details("apt_configure"),
+                    _module_details("chef", ["chef"]),
+                ],
+                id="repository_module_in_between",
+            ),
+            pytest.param(
+                [
+                    _module_details("puppet", ["puppet"]),
+                    _module_details("chef", []),
+                ],
+                id="single_module_with_packages",
+            ),
+        ],
+    )
+    def test_nothing_to_batch(self, mods, modules):
+        m_cc = mods.init.cloudify.return_value
+        mods._run_modules(modules)
+
+        m_cc.distro.preinstall_packages.assert_not_called()
+
+    def test_modules_which_ran_are_skipped(self, mods):
+        m_cc = mods.init.cloudify.return_value
+        m_cc.has_run.side_effect = lambda name, freq: name == "config-chef"
+        mods._run_modules(
+            [
+                _module_details("puppet", ["puppet"]),
+                _module_details("chef", ["chef"]),
+            ]
+        )
+
+        m_cc.distro.preinstall_packages.assert_not_called()
+
+    def test_failure_attributed_to_modules(self, mods, caplog):
+        m_cc = mods.init.cloudify.return_value
+        m_cc.distro.preinstall_packages.side_effect = RuntimeError("no repo")
+        which_ran, failures = mods._run_modules(
+            [
+                _module_details("puppet", ["puppet"]),
+                _module_details("chef", ["chef"]),
+            ]
+        )
+
+        assert ["puppet", "chef"] == which_ran
+        assert [] == failures
+        assert (
+            "each module will install its own packages "
+            "(puppet: ['puppet']; chef: ['chef']): no repo"
+        ) in caplog.text
@@ -13,7 +13,9 @@ from cloudinit import (
     distros,
     helpers,
     lifecycle,
+    stages,
     temp_utils,
+    templater,
 )
 from cloudinit import user_data as ud
 from cloudinit import (
@@ -28,6 +30,12 @@ from tests.unittests.helpers import (
 )
 
 
+def pytest_configure(config):
+    # Some modules read the system config when imported during collection,
+    # before any fixture runs. Avoid caching it in /run/cloud-init.
+    stages.SYSTEM_CONFIG_CACHE = None
+
+
 @pytest.fixture
 def Distro(paths):
     def _get_distro(name, cfg=None):
@@ -75,6 +83,7 @@ FS_FUNCS = {
     ],
     util: [
         ("write_file", 1),
+        ("write_file_owned", 1),
         ("append_file", 1),
         ("load_binary_file", 1),
         ("load_text_file", 1),
@@ -178,10 +187,24 @@ def disable_netdev_info(request):
         yield mock_netdev
 
 
+@pytest.fixture(autouse=True)
+def disable_jinja_bytecode_cache(request):
+    """Avoid tests writing compiled templates to /var/lib/cloud."""
+    if "allow_jinja_bytecode_cache" in request.keywords:
+        yield
+        return
+    with mock.patch.object(
+        templater, "_get_bytecode_cache", return_value=None
+    ):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def disable_dns_lookup(request):
     if "allow_dns_lookup" in request.keywords:
+        util._DNS_CACHE.clear()
         yield
+        util._DNS_CACHE.clear()
         return
 
     def side_effect(args, *other_args, **kwargs):
@@ -159,3 +159,38 @@ class TestUpdatePackageSources:
         instance.update_package_sources()
         assert 1 == len(m_subp.call_args_list)
         TMP_DIR.cleanup()
+
+    @mock.patch.object(apt.subp, "which", return_value=True)
+    @mock.patch.object(apt.subp, "subp")
+    def test_fresh_index_skips_update(
+        self, m_subp, m_which, apt_paths, tmp_path
+    ):
+        """An unchanged, recently updated index is not updated again"""
+        sources = tmp_path / "sources.list"
+        sources.write_text("deb http://archive.ubuntu.com/ubuntu noble main")
+        with mock.patch.object(
+            apt, "APT_INDEX_SOURCES", (str(sources),)
+        ), mock.patch.object(apt, "APT_INDEX_FILES", ()):
+            instance = apt.Apt(
+                helpers.Runners(apt_paths), package_index_max_age=3600
+            )
+            instance.update_package_sources(force=True)
+            sources.write_text(
+                "deb http://archive.ubuntu.com/ubuntu noble main"
+            )
+            instance.update_package_sources(force=True)
+            assert 1 == len(m_subp.call_args_list)
+
+            sources.write_text(
+                "deb http://archive.ubuntu.com/ubuntu noble main universe"
+            )
+            instance.update_package_sources(force=True)
+            assert 2 == len(m_subp.call_args_list)
+
+    def test_from_config_quoted_max_age(self, apt_paths):
+        """A quoted package_index_max_age enables the index cache"""
+        instance = apt.Apt.from_config(
+            helpers.Runners(apt_paths), {"package_index_max_age": "3600"}
+        )
+        assert instance.index_cache is not None
+        assert 3600 == instance.index_cache.max_age
@@ -0,0 +1,99 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+import os
+from unittest import mock
+
+import pytest
+
+from cloudinit.distros.package_management import index_cache
+from cloudinit.distros.package_management.index_cache import IndexCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    (tmp_path / "sources.d").mkdir()
+    (tmp_path / "sources.d" / "main.list").write_text("deb http://mirror/")
+    (tmp_path / "keyring.gpg").write_bytes(b"key")
+    (tmp_path / "lists").mkdir()
+    (tmp_path / "lists" / "mirror_Packages").write_text("Package: hello")
+    return IndexCache(
+        str(tmp_path / "state.json"),
+        sources=[str(tmp_path / "sources.d/*"), str(tmp_path / "*.gpg")],
+        index=[str(tmp_path / "lists/*")],
+        max_age=3600,
+    )
+
+
+class TestIndexCache:
+    def test_not_fresh_without_state(self, cache):
+        assert not cache.is_fresh()
+
+    def test_fresh_after_record(self, cache):
+        cache.record()
+        assert cache.is_fresh()
+
+    def test_disabled_by_max_age(self, cache):
+        cache.record()
+        cache.max_age = 0
+        assert not cache.is_fresh()
+
+    def test_expires(self, cache):
+        with mock.patch.object(index_cache.time, "time", return_value=1000):
+            cache.record()
+        with mock.patch.object(index_cache.time, "time", return_value=4599):
+            assert cache.is_fresh()
+        with mock.patch.object(index_cache.time, "time", return_value=4600):
+            assert not cache.is_fresh()
+
+    def test_rewritten_identical_sources_stay_fresh(self, cache, tmp_path):
+        cache.record()
+        (tmp_path / "sources.d" / "main.list").write_text("deb http://mirror/")
+        assert cache.is_fresh()
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            pytest.param(
+                lambda d: (d / "sources.d" / "main.list").write_text("deb x"),
+                id="source_changed",
+            ),
+            pytest.param(
+                lambda d: (d / "sources.d" / "new.list").write_text("deb x"),
+                id="source_added",
+            ),
+            pytest.param(
+                lambda d: (d / "keyring.gpg").unlink(), id="keyring_removed"
+            ),
+            pytest.param(
+                lambda d: os.utime(d / "lists" / "mirror_Packages", (1, 1)),
+                id="index_touched",
+            ),
+        ],
+    )
+    def test_changes_invalidate(self, cache, tmp_path, change):
+        cache.record()
+        change(tmp_path)
+        assert not cache.is_fresh()
+
+    def test_corrupt_state_is_not_fresh(self, cache):
+        with open(cache.state_file, "w") as stream:
+            stream.write("{not json")
+        assert not cache.is_fresh()
+
+
+class TestGetMaxAge:
+    @pytest.mark.parametrize(
+        "cfg, expected",
+        (
+            ({}, 0),
+            ({"package_index_max_age": 3600}, 3600),
+            ({"package_index_max_age": "3600"}, 3600),
+        ),
+    )
+    def test_valid(self, cfg, expected, caplog):
+        assert expected == index_cache.get_max_age(cfg)
+        assert "invalid" not in caplog.text
+
+    @pytest.mark.parametrize("max_age", ("an hour", None, [3600]))
+    def test_invalid(self, max_age, caplog):
+        assert 0 == index_cache.get_max_age({"package_index_max_age": max_age})
+        assert "Ignoring invalid package_index_max_age" in caplog.text
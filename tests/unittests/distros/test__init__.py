@@ -7,7 +7,13 @@ import pytest
 
 from cloudinit import distros, util
 from cloudinit.distros.ubuntu import Distro
-from cloudinit.net.dhcp import Dhcpcd, IscDhclient, Udhcpc
+from cloudinit.net.dhcp import (
+    Dhcpcd,
+    IscDhclient,
+    NativeDhcpClient,
+    NoDHCPLeaseMissingDhclientError,
+    Udhcpc,
+)
 
 M_PATH = "cloudinit.distros."
 
@@ -586,6 +592,18 @@ class TestDistro:
             [False, False, True, True],
             id="second_client_is_found_from_config_dhcpcd",
         ),
+        pytest.param(
+            NativeDhcpClient,
+            {"network": {"dhcp_client_priority": ["native"]}},
+            [None],
+            id="native_client_is_found_from_config",
+        ),
+        pytest.param(
+            NativeDhcpClient,
+            {"network": {"dhcp_client_priority": ["dhcpcd", "native"]}},
+            [None, None],
+            id="native_client_is_used_without_dhcpcd",
+        ),
     ],
 )
 class TestDHCP:
@@ -600,3 +618,12 @@ class TestDHCP:
         distro = Distro("", {}, {})
         distro._cfg = config
         assert isinstance(distro.dhcp_client, chosen_client)
+
+
+@mock.patch("cloudinit.net.dhcp.subp.which", return_value=None)
+def test_native_dhcp_client_is_not_used_by_default(m_which):
+    """Without configuration, only external DHCP clients are selected."""
+    distro = Distro("", {}, {})
+    distro._cfg = {}
+    with pytest.raises(NoDHCPLeaseMissingDhclientError):
+        distro.dhcp_client
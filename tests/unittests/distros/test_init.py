@@ -464,6 +464,45 @@ class TestInstall:
         assert "pkg1" in apt_install_args
         m_snap_install.assert_not_called()
 
+    def test_preinstalled_packages_are_skipped(self, m_apt_install):
+        """Packages from preinstall_packages are not installed again."""
+        distro = get_distro("ubuntu")
+        distro.preinstall_packages(["pkg1", "pkg2"])
+        distro.install_packages(["pkg1", "pkg3"])
+        distro.install_packages(["pkg2"])
+
+        assert [
+            {"pkg1", "pkg2"},
+            {"pkg3"},
+        ] == [set(c[0][0]) for c in m_apt_install.call_args_list]
+
+    def test_failed_preinstall_is_retried(self, mocker):
+        m_apt_install = mocker.patch(
+            M_PATH + "apt.Apt.install_packages",
+            side_effect=[["pkg2"], []],
+        )
+        mocker.patch(
+            M_PATH + "snap.Snap.install_packages",
+            side_effect=lambda pkglist: list(pkglist),
+        )
+        distro = get_distro("ubuntu")
+        with pytest.raises(PackageInstallerError):
+            distro.preinstall_packages(["pkg1", "pkg2"])
+        distro.install_packages(["pkg2"])
+
+        assert {"pkg2"} == set(m_apt_install.call_args_list[1][0][0])
+
+    def test_preinstalled_packages_are_skipped_by_overrides(self, mocker):
+        """Distros overriding _install_packages skip preinstalled packages."""
+        m_package_command = mocker.patch(
+            "cloudinit.distros.rhel.Distro.package_command"
+        )
+        distro = get_distro("rhel")
+        distro.preinstall_packages(["pkg1"])
+        distro.install_packages(["pkg1"])
+
+        m_package_command.assert_called_once_with("install", pkgs=["pkg1"])
+
     def test_no_attempt_if_no_package_manager(
         self, mocker, m_apt_install, m_snap_install, caplog
     ):
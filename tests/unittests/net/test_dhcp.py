@@ -13,9 +13,11 @@ from cloudinit.distros import alpine, amazon, centos, debian, freebsd, rhel
 from cloudinit.distros.ubuntu import Distro
 from cloudinit.net.dhcp import (
     DHCLIENT_FALLBACK_LEASE_DIR,
+    UDHCPC_SCRIPT,
     Dhcpcd,
     InvalidDHCPLeaseFileError,
     IscDhclient,
+    NativeDhcpClient,
     NoDHCPLeaseError,
     NoDHCPLeaseInterfaceError,
     NoDHCPLeaseMissingDhclientError,
@@ -26,6 +28,7 @@ from cloudinit.net.dhcp import (
     networkd_load_leases,
     run_nmcli,
 )
+from cloudinit.net.dhcp_protocol import DhcpMessage
 from cloudinit.net.ephemeral import EphemeralDHCPv4
 from cloudinit.subp import SubpResult
 from cloudinit.util import ensure_file, load_binary_file, subp, write_file
@@ -38,6 +41,7 @@ from tests.unittests.helpers import (
 )
 from tests.unittests.util import MockDistro
 
+M_PATH = "cloudinit.net.dhcp."
 PID_F = "/run/dhclient.pid"
 LEASE_F = "/run/dhclient.lease"
 DHCLIENT = "/sbin/dhclient"
@@ -876,6 +880,43 @@ class TestEphemeralDhcpLeaseErrors:
 
 
 class TestUDHCPCDiscoveryClean:
+    @mock.patch("cloudinit.net.dhcp.subp.which", return_value="/sbin/udhcpc")
+    @mock.patch("cloudinit.net.dhcp.os.remove")
+    @mock.patch("cloudinit.net.dhcp.subp.subp", return_value=("", ""))
+    @mock.patch("cloudinit.util.load_json", return_value={})
+    @mock.patch("cloudinit.util.load_text_file")
+    @mock.patch("cloudinit.util.write_file")
+    def test_udhcpc_for_interface_uses_own_script(
+        self, m_write_file, _m_load_file, _m_loadjson, m_subp, *_
+    ):
+        """Concurrent discoveries never rewrite each other's script."""
+        Udhcpc().for_interface("eth9").dhcp_discovery(
+            "eth9", distro=MockDistro()
+        )
+        script = "/var/tmp/cloud-init/udhcpc_script.eth9"
+        m_write_file.assert_called_once_with(script, UDHCPC_SCRIPT, 0o755)
+        assert script in m_subp.call_args_list[-1][0][0]
+        assert [
+            "-p",
+            "/run/udhcpc.eth9.pid",
+        ] == m_subp.call_args_list[
+            -1
+        ][0][
+            0
+        ][-2:]
+
+    @mock.patch("cloudinit.net.dhcp.subp.which", return_value="/sbin/udhcpc")
+    @mock.patch("cloudinit.net.dhcp.subp.subp")
+    @mock.patch("cloudinit.util.write_file")
+    def test_udhcpc_not_run_once_stopped(self, _m_write_file, m_subp, _):
+        client = Udhcpc().for_interface("eth9")
+        client.stop_discovery()
+        with pytest.raises(NoDHCPLeaseError):
+            client.dhcp_discovery("eth9", distro=MockDistro())
+        assert "udhcpc" not in [
+            call[0][0][0] for call in m_subp.call_args_list
+        ]
+
     @mock.patch("cloudinit.net.dhcp.is_ib_interface", return_value=False)
     @mock.patch("cloudinit.net.dhcp.subp.which", return_value="/sbin/udhcpc")
     @mock.patch("cloudinit.net.dhcp.os.remove")
@@ -1143,8 +1184,48 @@ class TestISCDHClient:
             centos.Distro
         )
 
+    @pytest.mark.usefixtures("dhclient_exists")
+    def test_for_interface_uses_own_files(self):
+        """Clients for concurrent discovery share no lease or pid file."""
+        eth0 = IscDhclient().for_interface("eth0")
+        eth1 = IscDhclient().for_interface("eth1")
+        assert "/run/dhclient.eth0.lease" == eth0.lease_file
+        assert "/run/dhclient.eth0.pid" == eth0.pid_file
+        assert "/run/dhclient.eth1.lease" == eth1.lease_file
+        assert "/run/dhclient.eth1.pid" == eth1.pid_file
+
+    @pytest.mark.usefixtures("dhclient_exists")
+    @mock.patch("cloudinit.net.dhcp.os.kill")
+    @mock.patch("cloudinit.util.load_binary_file")
+    @mock.patch("cloudinit.util.load_text_file", return_value="1234\n")
+    def test_stop_discovery_kills_own_dhclient(
+        self, m_load_text, m_load_binary, m_kill
+    ):
+        """Only a dhclient run with the pid file of the client is killed."""
+        client = IscDhclient().for_interface("eth1")
+        m_load_binary.return_value = b"dhclient\0-pf\0/run/dhclient.eth1.pid\0"
+        client.stop_discovery()
+        m_load_text.assert_called_once_with("/run/dhclient.eth1.pid")
+        m_load_binary.assert_called_once_with("/proc/1234/cmdline")
+        m_kill.assert_called_once_with(1234, signal.SIGKILL)
+        assert client.discovery_stopped.is_set()
+
+        m_kill.reset_mock()
+        m_load_binary.return_value = b"sshd\0"
+        client.stop_discovery()
+        assert not m_kill.called
+
+        m_load_text.side_effect = FileNotFoundError()
+        client.stop_discovery()
+        assert not m_kill.called
+
 
 class TestDhcpcd:
+    @mock.patch("cloudinit.net.dhcp.subp.which", return_value="/sbin/dhcpcd")
+    def test_no_concurrent_discovery(self, _m_which):
+        """dhcpcd configures the interfaces, so it never runs concurrently."""
+        assert None is Dhcpcd().for_interface("eth0")
+
     def test_parse_lease_dump(self):
         lease = dedent("""
             broadcast_address='192.168.15.255'
@@ -1367,6 +1448,96 @@ class TestDhcpcd:
         )
 
 
+class TestNativeDhcpClient:
+    ACK = DhcpMessage(
+        op=2,
+        xid=1,
+        yiaddr="10.0.0.5",
+        chaddr=bytes.fromhex("0a1b2c3d4e5f"),
+        options={
+            1: socket.inet_aton("255.255.255.0"),
+            3: socket.inet_aton("10.0.0.1"),
+            53: b"\x05",
+            54: socket.inet_aton("10.0.0.1"),
+        },
+    )
+
+    @pytest.fixture
+    def m_exchange(self, mocker):
+        mocker.patch(M_PATH + "is_ib_interface", return_value=False)
+        mocker.patch(
+            M_PATH + "get_interface_mac", return_value="0a:1b:2c:3d:4e:5f"
+        )
+        m_open_socket = mocker.patch(M_PATH + "dhcp_protocol.open_socket")
+        m_exchange = mocker.patch(M_PATH + "dhcp_protocol.DhcpExchange")
+        m_exchange.open_socket = m_open_socket
+        return m_exchange
+
+    def test_dhcp_discovery(self, m_exchange):
+        def run(timeout):
+            m_exchange.call_args[0][3]("DHCPACK of 10.0.0.5 from 10.0.0.1")
+            return self.ACK
+
+        m_exchange.return_value.run.side_effect = run
+        distro = mock.Mock()
+        log_func = mock.Mock()
+        client = NativeDhcpClient()
+        lease = client.dhcp_discovery("eth0", log_func, distro)
+        assert {
+            "interface": "eth0",
+            "fixed-address": "10.0.0.5",
+            "subnet-mask": "255.255.255.0",
+            "routers": "10.0.0.1",
+            "dhcp-server-identifier": "10.0.0.1",
+        } == lease
+        distro.net_ops.link_up.assert_called_once_with("eth0")
+        m_exchange.open_socket.assert_called_once_with("eth0")
+        sock = m_exchange.open_socket.return_value.__enter__.return_value
+        assert (
+            sock,
+            "eth0",
+            bytes.fromhex("0a1b2c3d4e5f"),
+        ) == m_exchange.call_args[0][:3]
+        m_exchange.return_value.run.assert_called_once_with(client.timeout)
+        log_func.assert_called_once_with(
+            "eth0", "DHCPACK of 10.0.0.5 from 10.0.0.1", ""
+        )
+        assert lease == client.get_newest_lease("eth0")
+        assert {} == client.get_newest_lease("eth1")
+
+    def test_for_interface_shares_leases(self, m_exchange):
+        m_exchange.return_value.run.return_value = self.ACK
+        client = NativeDhcpClient()
+        client.for_interface("eth1").dhcp_discovery("eth1", None, mock.Mock())
+        assert "10.0.0.5" == client.get_newest_lease("eth1")["fixed-address"]
+
+    def test_no_lease(self, m_exchange):
+        m_exchange.return_value.run.return_value = None
+        with pytest.raises(NoDHCPLeaseError):
+            NativeDhcpClient().dhcp_discovery("eth0", None, mock.Mock())
+
+    def test_socket_error(self, m_exchange):
+        m_exchange.open_socket.side_effect = PermissionError("not root")
+        log_func = mock.Mock()
+        with pytest.raises(NoDHCPLeaseError):
+            NativeDhcpClient().dhcp_discovery("eth0", log_func, mock.Mock())
+        log_func.assert_called_once_with("eth0", "", "")
+
+    def test_infiniband_unsupported(self, m_exchange, mocker):
+        mocker.patch(M_PATH + "is_ib_interface", return_value=True)
+        with pytest.raises(NoDHCPLeaseError):
+            NativeDhcpClient().dhcp_discovery("ib0", None, mock.Mock())
+        assert not m_exchange.open_socket.called
+
+    def test_parse_static_routes(self):
+        assert [
+            ("169.254.169.254/32", "10.0.0.1"),
+            ("0.0.0.0/0", "10.0.0.1"),
+        ] == NativeDhcpClient.parse_static_routes(
+            "32,169,254,169,254,10,0,0,1,0,10,0,0,1"
+        )
+
+
 class TestMaybePerformDhcpDiscovery:
     def test_none_and_missing_fallback(self):
         with pytest.raises(NoDHCPLeaseInterfaceError):
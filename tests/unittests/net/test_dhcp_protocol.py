@@ -0,0 +1,351 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, cast
+from unittest import mock
+
+import pytest
+
+from cloudinit.net import dhcp_protocol
+from cloudinit.net.dhcp_protocol import (
+    DHCPACK,
+    DHCPDISCOVER,
+    DHCPNAK,
+    DHCPOFFER,
+    DHCPREQUEST,
+    DhcpExchange,
+    DhcpMessage,
+    build_message,
+    build_udp_packet,
+    decode_options,
+    encode_options,
+    lease_options,
+    parse_message,
+    parse_udp_packet,
+)
+
+MAC = bytes.fromhex("0a1b2c3d4e5f")
+SERVER = socket.inet_aton("10.0.0.1")
+
+M_PATH = "cloudinit.net.dhcp_protocol."
+
+
+def parse(payload) -> DhcpMessage:
+    """Return the message in payload, which must be valid."""
+    message = parse_message(payload)
+    assert message is not None
+    return message
+
+
+def exchange(sock: "FakeServerSocket", log=None) -> DhcpExchange:
+    """Return a DhcpExchange on eth0 through sock."""
+    return DhcpExchange(cast(socket.socket, sock), "eth0", MAC, log)
+
+
+def server_reply(request, message_type, yiaddr="10.0.0.5", options=None):
+    """Return the IPv4 packet of a server reply to request."""
+    header = struct.pack(
+        dhcp_protocol.BOOTP_FORMAT,
+        dhcp_protocol.BOOTREPLY,
+        1,
+        6,
+        0,
+        request.xid,
+        0,
+        0,
+        bytes(4),
+        socket.inet_aton(yiaddr),
+        bytes(4),
+        bytes(4),
+        request.chaddr,
+        b"",
+        b"",
+    )
+    all_options = {
+        dhcp_protocol.OPT_MESSAGE_TYPE: bytes([message_type]),
+        dhcp_protocol.OPT_SERVER_IDENTIFIER: SERVER,
+        **(options or {}),
+    }
+    payload = header + dhcp_protocol.MAGIC_COOKIE + encode_options(all_options)
+    udp = struct.pack("!HHHH", 67, 68, 8 + len(payload), 0) + payload
+    ip = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        20 + len(udp),
+        0,
+        0,
+        64,
+        socket.IPPROTO_UDP,
+        0,
+        SERVER,
+        b"\xff" * 4,
+    )
+    return ip + udp
+
+
+class FakeServerSocket:
+    """Packet socket whose sent requests are answered by reply_func."""
+
+    def __init__(self, reply_func):
+        self.reply_func = reply_func
+        self.requests = []
+        self._reader, self._writer = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_DGRAM
+        )
+
+    def sendto(self, packet, address):
+        assert ("eth0", dhcp_protocol.ETH_P_IP, 0, 0, b"\xff" * 6) == address
+        request = parse_message(parse_udp_packet_from_client(packet))
+        self.requests.append(request)
+        for reply in self.reply_func(request, len(self.requests)):
+            self._writer.send(reply)
+
+    def recv(self, size):
+        return self._reader.recv(size)
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+
+
+def parse_udp_packet_from_client(packet):
+    """Return the payload of a packet the client sent to the server."""
+    assert 4 == packet[0] >> 4
+    source_port, destination_port, length, _ = struct.unpack_from(
+        "!HHHH", packet, 20
+    )
+    assert (68, 67) == (source_port, destination_port)
+    return packet[28 : 20 + length]
+
+
+class TestOptions:
+    def test_encode_decode_round_trip(self):
+        options = {1: b"\xff\xff\xff\x00", 121: bytes(range(256)) * 2, 80: b""}
+        encoded = encode_options(options)
+        assert 255 == encoded[-1]
+        decoded: Dict[int, bytes] = {}
+        decode_options(encoded, decoded)
+        assert options == decoded
+
+    def test_decode_skips_padding_and_stops_at_end(self):
+        decoded: Dict[int, bytes] = {}
+        decode_options(b"\x00\x00\x01\x01\x18\xff\x03\x01\x02", decoded)
+        assert {1: b"\x18"} == decoded
+
+    def test_decode_truncated(self):
+        with pytest.raises(ValueError):
+            decode_options(b"\x01\x04\xff", {})
+
+
+class TestMessages:
+    def test_build_and_parse(self):
+        message = parse(
+            build_message(DHCPDISCOVER, 0x1234, MAC, {55: b"\x01\x03"})
+        )
+        assert message.op == dhcp_protocol.BOOTREQUEST
+        assert message.xid == 0x1234
+        assert message.chaddr == MAC
+        assert message.message_type == DHCPDISCOVER
+        assert message.options[55] == b"\x01\x03"
+
+    def test_parse_options_overloaded_in_file_field(self):
+        payload = bytearray(build_message(DHCPOFFER, 1, MAC, {52: b"\x01"}))
+        payload[108:112] = b"\x1a\x02\x05\xdc"
+        assert b"\x05\xdc" == parse(bytes(payload)).options[26]
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            pytest.param(b"short", id="too_short"),
+            pytest.param(bytes(240), id="no_magic_cookie"),
+            pytest.param(
+                build_message(DHCPOFFER, 1, MAC, {})[:-1] + b"\x01\x04",
+                id="truncated_options",
+            ),
+        ],
+    )
+    def test_parse_invalid(self, payload):
+        assert parse_message(payload) is None
+
+    def test_udp_packet_checksums(self):
+        packet = build_udp_packet(b"payload")
+        # Checksums of valid headers and data sum up to 0xffff
+        assert 0 == dhcp_protocol._checksum(packet[:20])
+        pseudo_header = packet[12:20] + struct.pack("!BBH", 0, 17, 15)
+        assert 0 == dhcp_protocol._checksum(pseudo_header + packet[20:])
+        assert b"payload" == parse_udp_packet_from_client(packet)
+
+    def test_parse_udp_packet_ignores_other_traffic(self):
+        reply = server_reply(parse_message(build_message(1, 1, MAC, {})), 2)
+        assert parse_udp_packet(reply) is not None
+        assert parse_udp_packet(reply[:9] + b"\x06" + reply[10:]) is None
+        assert parse_udp_packet(reply[:22] + b"\x00\x35" + reply[24:]) is None
+
+
+class TestLeaseOptions:
+    def test_isc_dhclient_format(self):
+        ack = parse(
+            build_message(
+                DHCPACK,
+                1,
+                MAC,
+                {
+                    1: socket.inet_aton("255.255.255.0"),
+                    3: socket.inet_aton("10.0.0.1")
+                    + socket.inet_aton("10.0.0.2"),
+                    6: socket.inet_aton("10.0.0.53")
+                    + socket.inet_aton("10.0.0.54"),
+                    15: b"example.internal\x00",
+                    26: struct.pack("!H", 9001),
+                    51: struct.pack("!I", 3600),
+                    54: SERVER,
+                    121: bytes([32, 169, 254, 169, 254, 10, 0, 0, 1]),
+                    249: bytes([0, 10, 0, 0, 1]),
+                    245: socket.inet_aton("168.63.129.16"),
+                    224: b"\x0a\x00",
+                },
+            )
+        )._replace(yiaddr="10.0.0.5")
+        assert {
+            "interface": "eth0",
+            "fixed-address": "10.0.0.5",
+            "subnet-mask": "255.255.255.0",
+            "routers": "10.0.0.1",
+            "domain-name-servers": "10.0.0.53,10.0.0.54",
+            "domain-name": "example.internal",
+            "interface-mtu": "9001",
+            "dhcp-lease-time": "3600",
+            "dhcp-server-identifier": "10.0.0.1",
+            "rfc3442-classless-static-routes": "32,169,254,169,254,10,0,0,1",
+            "classless-static-routes": "0,10,0,0,1",
+            "unknown-245": "168.63.129.16",
+            "unknown-224": "a:0",
+        } == lease_options("eth0", ack)
+
+    @pytest.mark.parametrize(
+        "address, mask",
+        [
+            ("10.1.2.3", "255.0.0.0"),
+            ("172.16.2.3", "255.255.0.0"),
+            ("192.168.2.3", "255.255.255.0"),
+        ],
+    )
+    def test_classful_mask_without_subnet_mask(self, address, mask):
+        ack = parse(build_message(DHCPACK, 1, MAC, {}))._replace(
+            yiaddr=address
+        )
+        assert mask == lease_options("eth0", ack)["subnet-mask"]
+
+
+class TestDhcpExchange:
+    def test_discover_offer_request_ack(self):
+        def reply(request, count):
+            if request.message_type == DHCPDISCOVER:
+                return [server_reply(request, DHCPOFFER)]
+            return [server_reply(request, DHCPACK)]
+
+        sock = FakeServerSocket(reply)
+        log: List[str] = []
+        ack = exchange(sock, log.append).run(5)
+        assert ack is not None
+        assert DHCPACK == ack.message_type
+        assert "10.0.0.5" == ack.yiaddr
+        discover, request = sock.requests
+        assert DHCPDISCOVER == discover.message_type
+        assert DHCPREQUEST == request.message_type
+        assert discover.xid == request.xid
+        assert socket.inet_aton("10.0.0.5") == request.options[50]
+        assert SERVER == request.options[54]
+        assert [
+            "DHCPDISCOVER on eth0 (xid=0x%08x)" % discover.xid,
+            "DHCPOFFER of 10.0.0.5 from 10.0.0.1",
+            "DHCPREQUEST on eth0 (xid=0x%08x)" % discover.xid,
+            "DHCPACK of 10.0.0.5 from 10.0.0.1",
+        ] == log
+        sock.close()
+
+    def test_ignores_replies_to_others(self):
+        def reply(request, count):
+            other = request._replace(xid=request.xid + 1)
+            if request.message_type == DHCPDISCOVER:
+                return [
+                    server_reply(other, DHCPOFFER, "10.0.0.9"),
+                    server_reply(
+                        request._replace(chaddr=bytes(6)),
+                        DHCPOFFER,
+                        "10.0.0.8",
+                    ),
+                    b"not a packet",
+                    server_reply(
+                        request,
+                        DHCPOFFER,
+                        "10.0.0.7",
+                        {dhcp_protocol.OPT_SERVER_IDENTIFIER: b"\x0a"},
+                    ),
+                    server_reply(request, DHCPOFFER),
+                ]
+            return [server_reply(request, DHCPACK)]
+
+        sock = FakeServerSocket(reply)
+        ack = exchange(sock).run(5)
+        assert ack is not None
+        assert "10.0.0.5" == ack.yiaddr
+        sock.close()
+
+    @mock.patch(M_PATH + "RETRANSMIT_INTERVAL", 0.01)
+    def test_retransmits_until_reply(self):
+        def reply(request, count):
+            if count < 3:
+                return []
+            if request.message_type == DHCPDISCOVER:
+                return [server_reply(request, DHCPOFFER)]
+            return [server_reply(request, DHCPACK)]
+
+        sock = FakeServerSocket(reply)
+        assert exchange(sock).run(5)
+        assert [DHCPDISCOVER] * 3 + [DHCPREQUEST] == [
+            r.message_type for r in sock.requests
+        ]
+        sock.close()
+
+    def test_restarts_after_nak(self):
+        def reply(request, count):
+            if request.message_type == DHCPDISCOVER:
+                return [server_reply(request, DHCPOFFER)]
+            if count == 2:
+                return [server_reply(request, DHCPNAK, "0.0.0.0")]
+            return [server_reply(request, DHCPACK)]
+
+        sock = FakeServerSocket(reply)
+        assert exchange(sock).run(5)
+        types = [r.message_type for r in sock.requests]
+        assert [DHCPDISCOVER, DHCPREQUEST, DHCPDISCOVER, DHCPREQUEST] == types
+        assert sock.requests[0].xid != sock.requests[2].xid
+        sock.close()
+
+    @mock.patch(M_PATH + "RETRANSMIT_INTERVAL", 0.01)
+    def test_timeout(self):
+        sock = FakeServerSocket(lambda request, count: [])
+        assert exchange(sock).run(0.05) is None
+        assert sock.requests
+        sock.close()
+
+    def test_stop(self):
+        """Setting stop ends the exchange from another thread."""
+        sock = FakeServerSocket(lambda request, count: [])
+        stop = threading.Event()
+        dhcp_exchange = DhcpExchange(
+            cast(socket.socket, sock), "eth0", MAC, None, stop
+        )
+        threading.Timer(0.1, stop.set).start()
+        start = time.monotonic()
+        assert dhcp_exchange.run(60) is None
+        assert time.monotonic() - start < 5
+        sock.close()
@@ -1,10 +1,19 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import threading
 from unittest import mock
 
 import pytest
 
-from cloudinit.net.ephemeral import EphemeralIPNetwork
+from cloudinit.net.dhcp import (
+    NoDHCPLeaseError,
+    NoDHCPLeaseMissingDhclientError,
+)
+from cloudinit.net.ephemeral import (
+    ConcurrentDHCPDiscovery,
+    EphemeralDHCPv4,
+    EphemeralIPNetwork,
+)
 from cloudinit.subp import ProcessExecutionError
 from cloudinit.url_helper import UrlError
 from tests.unittests.helpers import does_not_raise
@@ -92,6 +101,7 @@ class TestEphemeralIPNetwork:
                 mock.call(
                     distro=distro,
                     iface=interface,
+                    dhcp_discovery=None,
                 )
             ] == m_ephemeral_dhcp_v4.call_args_list
         # otherwise, assert that ephemeral_dhcp_v4 was not called
@@ -273,3 +283,194 @@ class TestEphemeralIPNetwork:
                 "No connectivity to IMDS, attempting DHCP setup."
                 in caplog.text
             )
+
+
+class TestConcurrentDHCPDiscovery:
+    @staticmethod
+    def _distro(discoveries):
+        """Return a distro whose per-interface clients run discoveries."""
+        distro = mock.Mock()
+
+        def for_interface(interface):
+            client = mock.Mock()
+            client.dhcp_discovery.side_effect = discoveries[interface]
+            return client
+
+        distro.dhcp_client.for_interface.side_effect = for_interface
+        return distro
+
+    @staticmethod
+    def _blocking_distro(leases):
+        """Return a distro whose per-interface clients return leases[iface]
+        at once, or block until stopped when there is none, like real
+        clients. Started interfaces are recorded on distro.started.
+        """
+        distro = mock.Mock()
+        distro.started = []
+
+        def for_interface(interface):
+            client = mock.Mock()
+            stopped = threading.Event()
+            client.stop_discovery.side_effect = stopped.set
+
+            def dhcp_discovery(interface, _log_func, _distro):
+                if stopped.is_set():
+                    raise NoDHCPLeaseError()
+                distro.started.append(interface)
+                if interface in leases:
+                    return leases[interface]
+                assert stopped.wait(5)
+                raise NoDHCPLeaseError()
+
+            client.dhcp_discovery.side_effect = dhcp_discovery
+            return client
+
+        distro.dhcp_client.for_interface.side_effect = for_interface
+        return distro
+
+    def test_yields_interfaces_as_leases_arrive(self):
+        """A slow first interface does not delay the others."""
+        eth0_done = threading.Event()
+        leases_seen = []
+
+        def slow(interface, _log_func, _distro):
+            assert eth0_done.wait(5)
+            raise NoDHCPLeaseError()
+
+        def fast(interface, _log_func, _distro):
+            return {"interface": interface}
+
+        distro = self._distro({"eth0": slow, "eth1": fast})
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth0", "eth1"], head_start=0
+        ) as discovery:
+            for interface in discovery:
+                try:
+                    leases_seen.append(discovery.lease(interface))
+                except NoDHCPLeaseError:
+                    leases_seen.append(None)
+                eth0_done.set()
+        assert [{"interface": "eth1"}, None] == leases_seen
+
+    def test_prefers_earlier_interfaces_among_finished(self):
+        def lease(interface, _log_func, _distro):
+            return {"interface": interface}
+
+        distro = self._distro({"eth0": lease, "eth1": lease, "eth2": lease})
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth2", "eth0", "eth1"], head_start=0
+        ) as discovery:
+            # All discoveries finish before the interfaces are picked
+            for future in discovery._futures.values():
+                future.result()
+            assert ["eth2", "eth0", "eth1"] == list(discovery)
+            assert {"interface": "eth0"} == discovery.lease("eth0")
+
+    def test_exit_stops_running_clients(self):
+        """No client nor worker thread is left running after exit."""
+        distro = self._blocking_distro({"eth1": {"interface": "eth1"}})
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth0", "eth1", "eth2"], head_start=0
+        ) as discovery:
+            assert "eth1" == next(iter(discovery))
+            futures = list(discovery._futures.values())
+            workers = [
+                thread
+                for thread in threading.enumerate()
+                if thread.name.startswith("dhcp")
+            ]
+        assert all(future.done() for future in futures)
+        assert not any(worker.is_alive() for worker in workers)
+        for interface in ("eth0", "eth2"):
+            with pytest.raises(NoDHCPLeaseError):
+                discovery.lease(interface)
+
+    def test_first_interface_has_head_start(self):
+        """Other interfaces are not started when the first one answers
+        within its head start.
+        """
+        distro = self._blocking_distro({"eth0": {"interface": "eth0"}})
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth0", "eth1"], head_start=5
+        ) as discovery:
+            for interface in discovery:
+                assert {"interface": "eth0"} == discovery.lease(interface)
+                break
+        assert ["eth0"] == distro.started
+        with pytest.raises(NoDHCPLeaseError):
+            discovery.lease("eth1")
+
+    def test_others_start_once_first_interface_fails(self):
+        def fail(interface, _log_func, _distro):
+            raise NoDHCPLeaseError()
+
+        def lease(interface, _log_func, _distro):
+            return {"interface": interface}
+
+        distro = self._distro({"eth0": fail, "eth1": lease})
+        seen = []
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth0", "eth1"], head_start=60
+        ) as discovery:
+            for interface in discovery:
+                try:
+                    seen.append(discovery.lease(interface))
+                except NoDHCPLeaseError:
+                    seen.append(None)
+        assert [None, {"interface": "eth1"}] == seen
+
+    @mock.patch(M_PATH + "maybe_perform_dhcp_discovery")
+    def test_sequential_without_concurrent_client(self, m_dhcp):
+        """Clients which cannot run concurrently discover on demand."""
+        distro = mock.Mock()
+        distro.dhcp_client.for_interface.return_value = None
+        m_dhcp.return_value = {"interface": "eth1"}
+        log_func = mock.Mock()
+        with ConcurrentDHCPDiscovery(
+            distro, ["eth0", "eth1"], log_func
+        ) as discovery:
+            assert not m_dhcp.called
+            assert ["eth0", "eth1"] == list(discovery)
+            assert {"interface": "eth1"} == discovery.lease("eth1")
+        m_dhcp.assert_called_once_with(distro, "eth1", log_func)
+
+    @mock.patch(M_PATH + "maybe_perform_dhcp_discovery")
+    def test_sequential_on_single_interface(self, m_dhcp):
+        distro = mock.Mock()
+        with ConcurrentDHCPDiscovery(distro, ["eth0"]) as discovery:
+            assert ["eth0"] == list(discovery)
+        assert not distro.dhcp_client.for_interface.called
+
+    @mock.patch(M_PATH + "maybe_perform_dhcp_discovery")
+    def test_sequential_without_dhcp_client(self, m_dhcp):
+        """A missing DHCP client fails each lease as before."""
+        distro = mock.Mock()
+        type(distro).dhcp_client = mock.PropertyMock(
+            side_effect=NoDHCPLeaseMissingDhclientError()
+        )
+        m_dhcp.side_effect = NoDHCPLeaseMissingDhclientError()
+        with ConcurrentDHCPDiscovery(distro, ["eth0", "eth1"]) as discovery:
+            assert ["eth0", "eth1"] == list(discovery)
+            with pytest.raises(NoDHCPLeaseMissingDhclientError):
+                discovery.lease("eth0")
+
+    @mock.patch(M_PATH + "EphemeralIPv4Network")
+    @mock.patch(M_PATH + "maybe_perform_dhcp_discovery")
+    def test_ephemeral_dhcp_brings_up_discovered_lease(
+        self, m_dhcp, m_ephipv4, disable_netdev_info
+    ):
+        lease = {
+            "interface": "eth1",
+            "fixed-address": "192.168.2.2",
+            "subnet-mask": "255.255.255.0",
+            "routers": "192.168.2.1",
+        }
+        discovery = mock.Mock()
+        discovery.lease.return_value = lease
+        with EphemeralDHCPv4(
+            MockDistro(), iface="eth1", dhcp_discovery=discovery
+        ) as obtained:
+            assert lease == obtained
+        discovery.lease.assert_called_once_with("eth1")
+        assert not m_dhcp.called
+        assert "192.168.2.2" == m_ephipv4.call_args[1]["ip"]
@@ -41,6 +41,44 @@ class TestNetplanRenderer:
             mock.call(run=True, config_changed=config_changed)
         ]
 
+    def test_net_setup_link_retries_only_failed_devices(
+        self, renderer, mocker
+    ):
+        """Devices already set up are not set up again after a rename."""
+        mocker.patch("cloudinit.util.get_cmdline", return_value="")
+        mocker.patch("os.path.islink", return_value=True)
+        mocker.patch.object(
+            netplan,
+            "get_devicelist",
+            side_effect=[["eth0", "eth1"], ["eth1", "ens3"]],
+        )
+
+        def fake_subp(cmd, capture):
+            if cmd[-1].endswith("/eth0"):
+                raise netplan.subp.ProcessExecutionError(cmd=cmd)
+            return ("", "")
+
+        m_subp = mocker.patch.object(
+            netplan.subp, "subp", side_effect=fake_subp
+        )
+        renderer._net_setup_link(run=True)
+        assert sorted(
+            call[0][0][-1].rsplit("/", 1)[-1] for call in m_subp.call_args_list
+        ) == ["ens3", "eth0", "eth1"]
+
+    def test_net_setup_link_gives_up(self, renderer, mocker):
+        mocker.patch("cloudinit.util.get_cmdline", return_value="")
+        mocker.patch("os.path.islink", return_value=True)
+        mocker.patch.object(netplan, "get_devicelist", return_value=["eth0"])
+        m_subp = mocker.patch.object(
+            netplan.subp,
+            "subp",
+            side_effect=netplan.subp.ProcessExecutionError(),
+        )
+        with pytest.raises(RuntimeError, match="unable to run successfully"):
+            renderer._net_setup_link(run=True)
+        assert 5 == m_subp.call_count
+
 
 class TestNetplanAPIWriteYAMLFile:
     def test_no_netplan_python_api(self, caplog):
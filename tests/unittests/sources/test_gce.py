@@ -431,6 +431,8 @@ class TestDataSourceGCE:
         self._set_mock_metadata()
         distro = mock.MagicMock()
         distro.get_tmp_exec_path = str(tmp_path)
+        # Discover one NIC at a time to try them in a known order
+        distro.dhcp_client.for_interface.return_value = None
         ds = DataSourceGCE.DataSourceGCELocal(
             sys_cfg={}, distro=distro, paths=None
         )
@@ -459,10 +461,14 @@ class TestDataSourceGCE:
         )
         assert ds._get_data() is True
         assert m_dhcp.call_args_list == [
-            mock.call(distro, iface=DataSourceGCE.DEFAULT_PRIMARY_INTERFACE),
-            mock.call(distro, iface="ens0p4"),
-            mock.call(distro, iface="ens0p5"),
-            mock.call(distro, iface="ens0p6"),
+            mock.call(
+                distro,
+                iface=DataSourceGCE.DEFAULT_PRIMARY_INTERFACE,
+                dhcp_discovery=mock.ANY,
+            ),
+            mock.call(distro, iface="ens0p4", dhcp_discovery=mock.ANY),
+            mock.call(distro, iface="ens0p5", dhcp_discovery=mock.ANY),
+            mock.call(distro, iface="ens0p6", dhcp_discovery=mock.ANY),
         ]
         assert ds.distro.fallback_interface == "ens0p6"
         assert ds.metadata == "md"
@@ -517,8 +523,8 @@ class TestDataSourceGCE:
         )
         assert ds._get_data() is False
         assert m_dhcp.call_args_list == [
-            mock.call(distro, iface="ens0p4"),
-            mock.call(distro, iface="ens0p5"),
+            mock.call(distro, iface="ens0p4", dhcp_discovery=mock.ANY),
+            mock.call(distro, iface="ens0p5", dhcp_discovery=mock.ANY),
         ]
 
         expected_logs = (
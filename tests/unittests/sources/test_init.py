@@ -5,21 +5,28 @@ import copy
 import inspect
 import logging
 import os
+import re
 import stat
+import threading
+import time
 
 import pytest
 
-from cloudinit import importer, util
+from cloudinit import importer, url_helper, util
 from cloudinit.distros import ubuntu
 from cloudinit.event import EventScope, EventType
 from cloudinit.helpers import Paths
+from cloudinit.reporting import events
 from cloudinit.sources import (
+    DEP_NETWORK,
     EXPERIMENTAL_TEXT,
     METADATA_UNKNOWN,
     REDACT_SENSITIVE_VALUE,
     UNSET,
     DataSource,
+    DataSourceNotFoundException,
     canonical_cloud_id,
+    find_source,
     pkl_load,
     redact_sensitive_keys,
 )
@@ -338,6 +345,16 @@ class TestDataSource:
             json_file
         ), f"Found unexpected file {json_file}"
 
+    def test_get_data_does_not_write_instance_data_without_persist(
+        self, datasource, paths
+    ):
+        """get_data leaves persisting to the caller when persist is False."""
+        assert datasource.get_data(persist=False) is True
+        json_file = paths.get_runpath("instance_data")
+        assert not os.path.exists(
+            json_file
+        ), f"Found unexpected file {json_file}"
+
     def test_get_data_writes_json_instance_data_on_success(
         self, datasource, paths
     ):
@@ -739,6 +756,66 @@ class TestDataSource:
         assert util.is_link(cloud_id_link)
         assert "my-cloud2\n" == util.load_text_file(cloud_id_link)
 
+    def test_persist_instance_data_skips_unchanged_writes(self, tmp_path):
+        """Files are only rewritten when what they are built from changed."""
+        tmp = str(tmp_path)
+        cloud_dir = os.path.join(tmp, "cloud")
+        util.ensure_dir(cloud_dir)
+        paths = Paths({"run_dir": tmp, "cloud_dir": cloud_dir})
+        datasource = DataSourceTestSubclassNet(
+            self.sys_cfg,
+            self.distro,
+            paths,
+        )
+        datasource.get_data()
+        json_file = paths.get_runpath("instance_data")
+        content = util.load_text_file(json_file)
+        with mock.patch(
+            "cloudinit.sources.json_index.write_json"
+        ) as m_write_json:
+            assert datasource.persist_instance_data()
+            m_write_json.assert_not_called()
+            # Rewritten when a file changed behind cloud-init's back
+            util.write_file(json_file, "{}")
+            assert datasource.persist_instance_data()
+            assert 2 == m_write_json.call_count
+        datasource.persist_instance_data()
+        assert content == util.load_text_file(json_file)
+        datasource.network_json = {"network_json": "is good"}
+        datasource.persist_instance_data()
+        instance_data = util.load_json(util.load_text_file(json_file))
+        assert {"network_json": "is good"} == instance_data["ds"][
+            "network_json"
+        ]
+
+    def test_persist_instance_data_matches_json_round_trip(self, tmp_path):
+        """Content is processed as when read back from serialized json."""
+        tmp = str(tmp_path)
+        cloud_dir = os.path.join(tmp, "cloud")
+        util.ensure_dir(cloud_dir)
+        paths = Paths({"run_dir": tmp, "cloud_dir": cloud_dir})
+        sys_cfg = {"datasource": {"x": {1: b"\x01", 2: (b"\x01", "ci")}}}
+        datasource = DataSourceTestSubclassNet(sys_cfg, self.distro, paths)
+        datasource.get_data()
+        crawled_metadata = copy.deepcopy(datasource._crawled_metadata)
+        instance_data = util.load_json(
+            util.load_text_file(paths.get_runpath("instance_data_sensitive"))
+        )
+        assert {"x": {"1": "AQ==", "2": ["ci-b64:AQ==", "ci"]}} == (
+            instance_data["merged_system_cfg"]["datasource"]
+        )
+        assert [
+            "merged_cfg/datasource/x/1",
+            "merged_system_cfg/datasource/x/1",
+        ] == [
+            key for key in instance_data["base64_encoded_keys"] if "/x/" in key
+        ]
+        # The datasource's own data is left untouched
+        assert crawled_metadata == datasource._crawled_metadata
+        assert {
+            "datasource": {"x": {1: b"\x01", 2: (b"\x01", "ci")}}
+        } == sys_cfg
+
     def test_persist_instance_data_writes_network_json_when_set(
         self, tmp_path
     ):
@@ -935,6 +1012,142 @@ class TestDataSource:
         ) in caplog.record_tuples
 
 
+def _fake_source(name, found=True, started=None, release=None):
+    """Return a datasource class whose search waits for release, if set.
+
+    found may be a callable, called to search. Like DataSource.get_data, a
+    search that finds data persists it unless persist is False. Persisted
+    instances are appended to the class's persisted list.
+    """
+
+    def update_metadata_if_supported(self, source_event_types, persist=True):
+        if started is not None:
+            started.set()
+        if release is not None:
+            assert release.wait(5)
+        result = found() if callable(found) else found
+        if result and persist:
+            self.persist_instance_data()
+        return result
+
+    def persist_instance_data(self):
+        self.persisted.append(self)
+
+    return type(
+        name,
+        (object,),
+        {
+            "__init__": lambda self, sys_cfg, distro, paths: None,
+            "update_metadata_if_supported": update_metadata_if_supported,
+            "persist_instance_data": persist_instance_data,
+            "persisted": [],
+        },
+    )
+
+
+class TestFindSource:
+    @pytest.fixture
+    def reporter(self):
+        return events.ReportEventStack(
+            "init-network", "searching", reporting_enabled=False
+        )
+
+    def find(self, ds_list, reporter, mode=None):
+        sys_cfg = {} if mode is None else {"datasource_search_mode": mode}
+        with mock.patch(
+            "cloudinit.sources.list_sources", return_value=ds_list
+        ):
+            return find_source(
+                sys_cfg, None, None, [DEP_NETWORK], [], [], reporter
+            )
+
+    def test_sequential_stops_at_first_found(self, reporter):
+        ds_list = [
+            _fake_source("DataSourceA", found=False),
+            _fake_source("DataSourceB"),
+            _fake_source("DataSourceC"),
+        ]
+        ds, name = self.find(ds_list, reporter)
+        assert isinstance(ds, ds_list[1])
+        assert "DataSourceB" == name
+        assert {
+            "search-A": (
+                "SUCCESS",
+                "no network data found from DataSourceA",
+            ),
+            "search-B": ("SUCCESS", "found network data from DataSourceB"),
+        } == reporter.children
+
+    def test_race_searches_concurrently_and_keeps_priority(self, reporter):
+        """A slow high priority datasource beats a faster low priority one.
+
+        DataSourceA can only finish once DataSourceB has started, which
+        would deadlock a sequential search.
+        """
+        b_started = threading.Event()
+        ds_list = [
+            _fake_source("DataSourceA", release=b_started),
+            _fake_source("DataSourceB", started=b_started),
+        ]
+        ds, name = self.find(ds_list, reporter, mode="race")
+        assert isinstance(ds, ds_list[0])
+        assert "DataSourceA" == name
+        result, msg = reporter.children["search-A"]
+        assert re.match(
+            r"found network data from DataSourceA in \d+\.\d{3} seconds$",
+            msg,
+        )
+
+    def test_race_persists_only_winner(self, reporter):
+        """DataSourceC finds data after DataSourceB has won the race."""
+        b_done = threading.Event()
+        ds_list = [
+            _fake_source("DataSourceA", found=False),
+            _fake_source("DataSourceB", started=b_done),
+            _fake_source("DataSourceC", release=b_done),
+        ]
+        ds, name = self.find(ds_list, reporter, mode="race")
+        assert "DataSourceB" == name
+        assert [ds] == ds_list[1].persisted
+        assert [] == ds_list[2].persisted
+        assert "search-C" in reporter.children
+
+    def test_race_cancels_lower_priority_searches(self, reporter, mocker):
+        """DataSourceB stops waiting for its url once DataSourceA wins."""
+        mocker.patch(
+            "cloudinit.url_helper.readurl",
+            side_effect=url_helper.UrlError("unreachable"),
+        )
+
+        def wait_for_metadata_service():
+            url, _ = url_helper.wait_for_url(
+                ["http://169.254.169.254/"], max_wait=60, sleep_time=10
+            )
+            return bool(url)
+
+        ds_list = [
+            _fake_source("DataSourceA"),
+            _fake_source("DataSourceB", found=wait_for_metadata_service),
+        ]
+        start = time.monotonic()
+        ds, name = self.find(ds_list, reporter, mode="race")
+        assert time.monotonic() - start < 5
+        assert "DataSourceA" == name
+        _result, msg = reporter.children["search-B"]
+        assert msg.startswith(
+            "no network data found from DataSourceB after search was"
+            " cancelled in "
+        )
+
+    def test_race_not_found(self, reporter):
+        ds_list = [
+            _fake_source("DataSourceA", found=False),
+            _fake_source("DataSourceB", found=False),
+        ]
+        with pytest.raises(DataSourceNotFoundException):
+            self.find(ds_list, reporter, mode="race")
+
+
 class TestRedactSensitiveData:
     def test_redact_sensitive_data_noop_when_no_sensitive_keys_present(self):
         """When sensitive_keys is absent or empty from metadata do nothing."""
@@ -963,6 +1176,25 @@ class TestRedactSensitiveData:
         secure_md["md"]["secure"] = "redacted for non-root user"
         assert secure_md == redact_sensitive_keys(md)
 
+    def test_redact_sensitive_data_shares_unredacted_values(self):
+        """Only dicts holding redacted values are copied."""
+        md = {
+            "sensitive_keys": ["md/secure", "md/nested/secret"],
+            "md": {
+                "secure": "s3kr1t",
+                "nested": {"secret": "s3kr1t"},
+                "insecure": {"publik": True},
+            },
+            "other": {"publik": True},
+        }
+        expected = copy.deepcopy(md)
+        redacted = redact_sensitive_keys(md, redact_value="redacted")
+        assert expected == md
+        assert "redacted" == redacted["md"]["secure"]
+        assert "redacted" == redacted["md"]["nested"]["secret"]
+        assert md["other"] is redacted["other"]
+        assert md["md"]["insecure"] is redacted["md"]["insecure"]
+
 
 class TestCanonicalCloudID:
     def test_cloud_id_returns_platform_on_unknowns(self):
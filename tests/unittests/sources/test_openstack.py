@@ -7,6 +7,7 @@
 import copy
 import json
 import re
+import threading
 from io import StringIO
 from unittest import mock
 from urllib.parse import urlparse
@@ -849,3 +850,81 @@ class TestMetadataReader:
         reader._read_ec2_metadata = mock_read_ec2
         assert expected == reader.read_v2()
         assert 1 == mock_read_ec2.call_count
+
+    def test_read_v2_reads_documents_concurrently(self):
+        """All version 2 documents are requested at the same time."""
+        barrier = threading.Barrier(5, timeout=5)
+        docs = {
+            "meta_data.json": json.dumps(self.md_base).encode(),
+            "user_data": b"#cloud-config\n",
+            "vendor_data.json": b"{}",
+            "vendor_data2.json": b"{}",
+            "network_data.json": b"{}",
+        }
+
+        def path_read(path, decode=False):
+            barrier.wait()
+            return docs[path.rsplit("/", 1)[-1]]
+
+        reader = openstack.MetadataReader(self.burl)
+        with mock.patch.object(
+            reader, "_find_working_version", return_value=openstack.OS_OCATA
+        ), mock.patch.object(
+            reader, "_path_read", side_effect=path_read
+        ), mock.patch.object(
+            reader, "_read_ec2_metadata", return_value={}
+        ):
+            results = reader.read_v2()
+        assert b"#cloud-config\n" == results["userdata"]
+        assert self.md_base["uuid"] == results["metadata"]["instance-id"]
+
+    @responses.activate
+    def test_read_v2_files_and_network_config(self):
+        """Content paths for files and network_config are read."""
+        md = copy.deepcopy(self.md_base)
+        md["files"] = [
+            {"path": "/etc/foo.cfg", "content_path": "/content/0000"},
+            {"path": "/etc/bar.cfg", "content_path": "/content/0001"},
+        ]
+        md["network_config"] = {"content_path": "/content/0002"}
+        self.register_versions([openstack.OS_OCATA, openstack.OS_LATEST])
+        self.register_version(
+            openstack.OS_OCATA, {"meta_data.json": json.dumps(md)}
+        )
+        for path in ("vendor_data.json", "vendor_data2.json"):
+            self.register(
+                "/%s/%s" % (openstack.OS_OCATA, path), "", status=404
+            )
+        self.register(
+            "/%s/network_data.json" % openstack.OS_OCATA, "", status=404
+        )
+        self.register("/content/0000", "foo")
+        self.register("/content/0001", "bar")
+        self.register("/content/0002", "auto lo\n")
+
+        reader = openstack.MetadataReader(self.burl, retries=0)
+        with mock.patch.object(reader, "_read_ec2_metadata", return_value={}):
+            results = reader.read_v2()
+        assert {
+            "/etc/foo.cfg": b"foo",
+            "/etc/bar.cfg": b"bar",
+        } == results["files"]
+        assert "auto lo\n" == results["network_config"]
+        assert "vendordata" not in results
+
+    @responses.activate
+    def test_read_v2_missing_file_is_broken(self):
+        md = copy.deepcopy(self.md_base)
+        md["files"] = [{"path": "/etc/foo.cfg", "content_path": "/nope"}]
+        self.register_versions([openstack.OS_LATEST])
+        self.register_version(
+            openstack.OS_LATEST, {"meta_data.json": json.dumps(md)}
+        )
+        self.register("/nope", "", status=404)
+
+        reader = openstack.MetadataReader(self.burl, retries=0)
+        with mock.patch.object(reader, "_read_ec2_metadata", return_value={}):
+            with pytest.raises(
+                BrokenMetadata, match="Failed to read provided file"
+            ):
+                reader.read_v2()
@@ -1,12 +1,23 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import enum
 import json
 import os
 import stat
 
+import pytest
+
 from cloudinit import atomic_helper
 
 
+class _StrEnum(str, enum.Enum):
+    A = "a"
+
+
+class _IntEnum(enum.IntEnum):
+    B = 2
+
+
 class TestAtomicHelper:
     def test_basic_usage(self, tmp_path):
         """write_file takes bytes if no omode."""
@@ -68,3 +79,27 @@ class TestAtomicHelper:
         contents = b"Hey there\n"
         atomic_helper.write_file(path, contents)
         self.check_file(path, contents)
+
+
+class TestJsonCompatible:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"a": [1, (2, 3), b"\xff", {"b": None}], "c": 2.5},
+            {1: "one", 2: {True: 1, False: 0}, 3: {None: 2}, 4: {1.5: 3}},
+            {"str": _StrEnum.A, "int": _IntEnum.B, "set": {1}},
+            {"inf": float("inf"), "nested": [[{"d": b"bytes"}]]},
+            [object()],
+            "text",
+        ],
+    )
+    def test_matches_json_round_trip(self, data):
+        expected = json.loads(atomic_helper.json_dumps(data))
+        assert expected == atomic_helper.json_compatible(data)
+
+    @pytest.mark.parametrize("data", [{1: "int", "1": "str"}, {(1,): "x"}])
+    def test_raises_type_error_like_json(self, data):
+        with pytest.raises(TypeError):
+            atomic_helper.json_dumps(data)
+        with pytest.raises(TypeError):
+            atomic_helper.json_compatible(data)
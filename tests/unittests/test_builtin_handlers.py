@@ -18,7 +18,9 @@ from cloudinit.handlers.jinja_template import (
     JinjaLoadError,
     JinjaTemplatePartHandler,
     convert_jinja_instance_data,
+    load_instance_data,
     render_jinja_payload,
+    render_jinja_payload_from_file,
 )
 from cloudinit.handlers.shell_script import ShellScriptPartHandler
 from cloudinit.handlers.shell_script_by_frequency import (
@@ -343,6 +345,77 @@ class TestConvertJinjaInstanceData:
         )
         assert expected_data == converted_data
 
+    def test_convert_instance_data_aliases_are_not_copies(self):
+        """Aliases and promoted keys refer to the values they alias."""
+        data = {"v1": {"my-key": {"a": [1]}}}
+        converted_data = convert_jinja_instance_data(
+            data=data, include_key_aliases=True
+        )
+        value = converted_data["v1"]["my-key"]
+        assert {"a": [1]} == value
+        assert value is converted_data["v1"]["my_key"]
+        assert value is converted_data["my-key"]
+        assert value is converted_data["my_key"]
+
+
+class TestRenderJinjaPayloadFromFile:
+    PAYLOAD = "## template: jinja\n{{ v1.local_hostname }}"
+
+    def test_instance_data_loaded_once_while_unchanged(self, tmp_path, mocker):
+        instance_data = tmp_path / INSTANCE_DATA_FILE
+        instance_data.write_text('{"v1": {"local-hostname": "foo"}}')
+        m_load = mocker.patch(MPATH + "load_json", side_effect=util.load_json)
+        m_convert = mocker.patch(
+            MPATH + "convert_jinja_instance_data",
+            side_effect=convert_jinja_instance_data,
+        )
+        for _ in range(3):
+            assert "foo" == render_jinja_payload_from_file(
+                self.PAYLOAD, "part", instance_data
+            )
+        assert 1 == m_load.call_count
+        assert 1 == m_convert.call_count
+
+    def test_instance_data_loaded_again_when_changed(self, tmp_path):
+        instance_data = tmp_path / INSTANCE_DATA_FILE
+        instance_data.write_text('{"v1": {"local-hostname": "foo"}}')
+        assert "foo" == render_jinja_payload_from_file(
+            self.PAYLOAD, "part", instance_data
+        )
+        atomic_helper.write_json(
+            instance_data, {"v1": {"local-hostname": "barbaz"}}
+        )
+        assert "barbaz" == render_jinja_payload_from_file(
+            self.PAYLOAD, "part", instance_data
+        )
+
+    def test_templates_cannot_modify_shared_instance_data(self, tmp_path):
+        """Changes a template makes to its variables do not outlive it."""
+        instance_data = tmp_path / INSTANCE_DATA_FILE
+        instance_data.write_text('{"v1": {"local-hostname": "foo"}}')
+        assert "evil" == render_jinja_payload_from_file(
+            "## template: jinja\n"
+            '{% do v1.update({"local_hostname": "evil"}) %}'
+            "{{ v1.local_hostname }}",
+            "part",
+            instance_data,
+        )
+        assert "foo" == render_jinja_payload_from_file(
+            self.PAYLOAD, "part", instance_data
+        )
+        assert {"v1": {"local-hostname": "foo"}} == load_instance_data(
+            instance_data
+        )
+
+    def test_jinja_vars_built_only_when_rendering(self, tmp_path, mocker):
+        instance_data = tmp_path / INSTANCE_DATA_FILE
+        instance_data.write_text('{"v1": {"local-hostname": "foo"}}')
+        m_convert = mocker.patch(MPATH + "convert_jinja_instance_data")
+        assert {"v1": {"local-hostname": "foo"}} == load_instance_data(
+            instance_data
+        )
+        assert 0 == m_convert.call_count
+
 
 class TestRenderJinjaPayload:
 
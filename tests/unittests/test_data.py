@@ -5,6 +5,7 @@
 import gzip
 import logging
 import os
+import tracemalloc
 from email import encoders
 from email.mime.application import MIMEApplication
 from email.mime.base import MIMEBase
@@ -813,6 +814,32 @@ class TestConvertString:
         msg = ud.convert_string(str(message))
         assert "Just text" == msg.get_payload(decode=False)
 
+    def test_mime_parsed_from_bytes(self):
+        """ASCII MIME user-data keeps its exact payload bytes."""
+        message = MIMEMultipart()
+        message.attach(MIMEApplication(b"\x00\xff" * 1024))
+        msg = ud.convert_string(message.as_bytes())
+        assert [b"\x00\xff" * 1024] == [
+            part.get_payload(decode=True)
+            for part in msg.walk()
+            if not ud.is_skippable(part)
+        ]
+
+    def test_large_mime_peak_memory(self):
+        """Parsing large MIME user-data needs about its own size in RAM."""
+        message = MIMEMultipart()
+        for _ in range(4):
+            message.attach(MIMEApplication(os.urandom(1024 * 1024)))
+        blob = message.as_bytes()
+        tracemalloc.start()
+        try:
+            ud.convert_string(blob)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # Decoding to str before parsing peaked at over 6 times the size
+        assert peak < 2 * len(blob)
+
 
 class TestFetchBaseConfig:
     @pytest.fixture(autouse=True)
@@ -854,6 +881,18 @@ class TestFetchBaseConfig:
         )
         assert config == {"key": "template_value"}
 
+    def test_system_config_cached_in_run_dir(self, mocker, tmp_path):
+        mocker.patch(f"{MPATH}.SYSTEM_CONFIG_CACHE", "system-config.pkl")
+        m_read = mocker.patch(
+            f"{MPATH}.util.read_conf_with_confd", return_value={}
+        )
+        stages.fetch_base_config(str(tmp_path), instance_data_file="/i.json")
+        m_read.assert_called_once_with(
+            stages.CLOUD_CONFIG,
+            instance_data_file="/i.json",
+            cache_file=str(tmp_path / "system-config.pkl"),
+        )
+
     def test_cmdline_overrides_defaults(self, mocker):
         builtin = util.get_builtin_cfg()
         test_key = sorted(builtin)[0]
@@ -4,8 +4,10 @@
 
 import os
 from pathlib import Path
+from unittest import mock
 
-from cloudinit import sources
+from cloudinit import helpers, sources
+from cloudinit.settings import PER_INSTANCE, PER_ONCE
 from tests.helpers import cloud_init_project_dir, get_top_level_dir
 
 
@@ -36,6 +38,59 @@ class TestPaths:
         assert paths.get_ipath() is None
 
 
+class TestFileSemaphores:
+    def test_lock_writes_semaphore_files(self, tmp_path):
+        sem_path = tmp_path / "sem"
+        sems = helpers.FileSemaphores(str(sem_path))
+        with sems.lock("config-foo", PER_INSTANCE) as lock:
+            assert lock
+        with sems.lock("config-bar", PER_ONCE) as lock:
+            assert lock
+        assert ["config_bar.once", "config_foo"] == sorted(
+            os.listdir(sem_path)
+        )
+        assert sems.has_run("config_foo", PER_INSTANCE)
+        assert sems.has_run("config-bar", PER_ONCE)
+        assert not sems.has_run("config-bar", PER_INSTANCE)
+
+    def test_has_run_lists_semaphores_once(self, tmp_path):
+        (tmp_path / "config_foo").write_text("1: 2\n")
+        (tmp_path / "config_bar.once").write_text("1: 2\n")
+        sems = helpers.FileSemaphores(str(tmp_path))
+        with mock.patch.object(
+            helpers.os, "listdir", wraps=os.listdir
+        ) as m_listdir, mock.patch.object(
+            helpers.os.path, "exists"
+        ) as m_exists:
+            assert sems.has_run("config-foo", PER_INSTANCE)
+            assert sems.has_run("config-bar", PER_ONCE)
+            assert not sems.has_run("config-baz", PER_INSTANCE)
+            with sems.lock("config-baz", PER_INSTANCE):
+                pass
+            assert sems.has_run("config-baz", PER_INSTANCE)
+            assert sems.clear("config-foo", PER_INSTANCE)
+            assert not sems.has_run("config-foo", PER_INSTANCE)
+        assert 1 == m_listdir.call_count
+        assert 0 == m_exists.call_count
+        assert ["config_bar.once", "config_baz"] == sorted(
+            os.listdir(tmp_path)
+        )
+
+    def test_missing_directory(self, tmp_path):
+        sems = helpers.FileSemaphores(str(tmp_path / "sem"))
+        assert not sems.has_run("config-foo", PER_INSTANCE)
+        assert sems.clear("config-foo", PER_INSTANCE)
+
+    def test_unlistable_directory_checks_files(self, tmp_path):
+        (tmp_path / "config_foo").write_text("1: 2\n")
+        sems = helpers.FileSemaphores(str(tmp_path))
+        with mock.patch.object(
+            helpers.os, "listdir", side_effect=PermissionError()
+        ):
+            assert sems.has_run("config-foo", PER_INSTANCE)
+            assert not sems.has_run("config-bar", PER_INSTANCE)
+
+
 class Testcloud_init_project_dir:
     top_dir = get_top_level_dir()
 
@@ -0,0 +1,104 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import json
+import os
+
+import pytest
+
+from cloudinit import atomic_helper, json_index
+
+DATA = {
+    "ds": {
+        "meta_data": {
+            "a/b~c": {"deep": {"deeper": [1, {"x": "y"}]}},
+            "empty": {},
+            "list": [],
+            "unicode": "café\n",
+        },
+        "bytes": b"\x00\xff",
+    },
+    "int_keys": {1: "one", 2: "two"},
+    "none": None,
+    "v1": {"cloud_name": "nocloud"},
+}
+
+
+class TestJsonDumpsIndexed:
+    @pytest.mark.parametrize("depth", [0, 1, 2, 3, 10])
+    @pytest.mark.parametrize(
+        "data", [DATA, {}, [], "text", {"a": {}}, {"a": [{"b": {"c": 1}}]}]
+    )
+    def test_content_matches_json_dumps(self, data, depth):
+        content, _offsets, _keys = json_index.json_dumps_indexed(data, depth)
+        assert atomic_helper.json_dumps(data) == content
+
+    def test_offsets_delimit_values(self):
+        content, offsets, keys = json_index.json_dumps_indexed(DATA, depth=3)
+        assert ["ds", "int_keys", "none", "v1"] == keys[""]
+        assert "/ds/meta_data/a~1b~0c" in offsets
+        # Objects with keys other than strings are dumped as a whole
+        assert "/int_keys" not in keys
+        parsed = json.loads(content)
+        for pointer, (start, end) in offsets.items():
+            value = parsed
+            for part in pointer.split("/")[1:]:
+                value = value[part.replace("~1", "/").replace("~0", "~")]
+            assert value == json.loads(content[start:end])
+
+
+class TestIndexedJson:
+    @pytest.fixture
+    def filename(self, tmp_path):
+        filename = str(tmp_path / "instance-data.json")
+        json_index.write_json(filename, DATA, mode=0o600)
+        return filename
+
+    def test_write_json_matches_atomic_helper(self, filename, tmp_path):
+        expected = str(tmp_path / "expected.json")
+        atomic_helper.write_json(expected, DATA)
+        with open(filename) as stream, open(expected) as expected_stream:
+            assert expected_stream.read() == stream.read()
+        index_fn = json_index.index_path(filename)
+        assert 0o600 == os.stat(index_fn).st_mode & 0o777
+
+    def test_values_read_on_access(self, filename):
+        indexed = json_index.IndexedJson.load(filename)
+        assert indexed is not None
+        root = indexed.root()
+        assert isinstance(root, json_index.IndexedObject)
+        assert ["ds", "int_keys", "none", "v1"] == list(root)
+        meta_data = root["ds"]["meta_data"]
+        assert isinstance(meta_data, json_index.IndexedObject)
+        assert "café\n" == meta_data["unicode"]
+        assert {"deep": {"deeper": [1, {"x": "y"}]}} == meta_data["a/b~c"]
+        assert {"1": "one", "2": "two"} == root["int_keys"]
+        assert None is root["none"]
+        with open(filename) as stream:
+            assert json.load(stream) == root.to_dict()
+        with pytest.raises(KeyError):
+            root["absent"]
+
+    def test_missing_index(self, filename):
+        os.unlink(json_index.index_path(filename))
+        assert None is json_index.IndexedJson.load(filename)
+
+    def test_outdated_index(self, filename):
+        index_fn = json_index.index_path(filename)
+        with open(index_fn) as stream:
+            index = stream.read()
+        atomic_helper.write_json(filename, {"v1": {}})
+        with open(index_fn, "w") as stream:
+            stream.write(index)
+        assert None is json_index.IndexedJson.load(filename)
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            json_index.IndexedJson.load(str(tmp_path / "absent.json"))
+
+    def test_written_digest(self, filename, tmp_path):
+        assert None is json_index.written_digest(filename)
+        json_index.write_json(filename, DATA, digest="abc")
+        assert "abc" == json_index.written_digest(filename)
+        atomic_helper.write_json(filename, DATA)
+        assert None is json_index.written_digest(filename)
+        assert None is json_index.written_digest(str(tmp_path / "absent"))
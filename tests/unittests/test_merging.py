@@ -6,11 +6,12 @@ import os
 import random
 import re
 import string
+from unittest import mock
 
 import pytest
 
 from cloudinit import helpers as c_helpers
-from cloudinit import util
+from cloudinit import mergers, util
 from cloudinit.config.schema import (
     SchemaValidationError,
     get_schema,
@@ -264,6 +265,52 @@ class TestSimpleRun:
         assert c == d
 
 
+class TestMergerEngine:
+    def test_construct_shares_mergers_for_same_spec(self):
+        spec = mergers.string_extract_mergers("dict(replace)+list(append)")
+        merger = mergers.construct(spec)
+        assert merger is mergers.construct(
+            mergers.string_extract_mergers("dict(replace)+list(append)")
+        )
+        assert merger is not mergers.construct(mergers.default_mergers())
+
+    def test_construct_with_unhashable_options(self):
+        spec = [("dict", [["replace"]])]
+        merger = mergers.construct(spec)
+        assert {"a": 1} == merger.merge({}, {"a": 1})
+        assert merger is not mergers.construct(spec)
+
+    def test_merge_methods_looked_up_once_per_type(self, mocker):
+        # A new merger, as those constructed by others have looked up dict
+        merger = mergers._construct.__wrapped__([("dict", ["replace"])])
+        m_find = mocker.spy(merger, "_find_merge_method")
+        merger.merge({"a": {"b": 1}}, {"a": {"c": 2}})
+        merger.merge({"a": {"b": 1}}, {"a": {"c": 3}})
+        assert [mock.call(dict)] == m_find.call_args_list
+
+    def test_unknown_types_are_kept(self):
+        merger = mergers.construct(mergers.default_mergers())
+        assert {"a": 1} == merger.merge({"a": 1}, {"a": 2})
+        assert 1 == merger.merge(1, 2)
+
+    def test_unchanged_subtrees_are_not_copied(self):
+        a = {"same": {"x": [1]}, "changed": {"y": 1}}
+        b = {"same": {"x": [2]}, "changed": {"z": 2}}
+        merged = util.mergemanydict([a, b])
+        assert {"same": {"x": [1]}, "changed": {"y": 1, "z": 2}} == merged
+        assert merged["same"] is a["same"]
+        assert merged["changed"] is not a["changed"]
+        assert {"y": 1} == a["changed"]
+
+    def test_allow_delete_does_not_modify_sources(self):
+        a = {"a": 1, "b": 2}
+        merged = util.mergemanydict(
+            [a, {"merge_how": "dict(allow_delete,replace)", "a": None}]
+        )
+        assert {"b": 2} == merged
+        assert {"a": 1, "b": 2} == a
+
+
 class TestMergingSchema:
     @pytest.mark.parametrize(
         "config, error_msg",
@@ -241,7 +241,33 @@ NETWORK_MANAGER_BRING_UP_ALL_CALL_LIST: list = [
         {},
     ),
     ((["systemctl", "try-reload-or-restart", "NetworkManager.service"],), {}),
-] + NETWORK_MANAGER_BRING_UP_CALL_LIST
+    (
+        (
+            [
+                "nmcli",
+                "connection",
+                "load",
+                "".join(
+                    [
+                        "/etc/NetworkManager/system-connections",
+                        "/cloud-init-eth0.nmconnection",
+                    ]
+                ),
+                "".join(
+                    [
+                        "/etc/NetworkManager/system-connections",
+                        "/cloud-init-eth1.nmconnection",
+                    ]
+                ),
+            ],
+        ),
+        {},
+    ),
+] + [
+    call
+    for call in NETWORK_MANAGER_BRING_UP_CALL_LIST
+    if call[0][0][2] == "up"
+]
 
 NETWORKD_BRING_UP_CALL_LIST: list = [
     ((["ip", "link", "set", "dev", "eth0", "up"],), {}),
@@ -302,8 +328,13 @@ class TestActivatorsBringUpAll:
     def test_bring_up_interfaces(
         self, m_subp, activator, expected_call_list, available_mocks
     ):
-        index = 0
         activator.bring_up_interfaces(["eth0", "eth1"])
+        if activator.max_concurrent_bring_up > 1:
+            # Interfaces are brought up in any order
+            for call in m_subp.call_args_list:
+                assert call in expected_call_list
+            return
+        index = 0
         for call in m_subp.call_args_list:
             assert call == expected_call_list[index]
             index += 1
@@ -363,6 +394,37 @@ class TestActivatorsBringDown:
 
 
 class TestNetworkManagerActivatorBringUp:
+    @patch("cloudinit.subp.subp", return_value=subp.SubpResult("", ""))
+    def test_bring_up_interfaces_loads_connections_once(
+        self, m_subp, available_mocks
+    ):
+        """All connections are loaded together before being brought up."""
+        assert NetworkManagerActivator.bring_up_interfaces(["eth0", "eth1"])
+        cmds = [call[0][0] for call in m_subp.call_args_list]
+        assert 5 == len(cmds)
+        assert NETWORK_MANAGER_BRING_UP_ALL_CALL_LIST[2][0][0] == cmds[2]
+        assert [
+            call[0][0] for call in NETWORK_MANAGER_BRING_UP_ALL_CALL_LIST[3:]
+        ] == sorted(cmds[3:])
+
+    @patch("cloudinit.subp.subp")
+    def test_bring_up_interfaces_load_failure_uses_ifname(
+        self, m_subp, available_mocks
+    ):
+        def fake_subp(cmd, *args, **kwargs):
+            if cmd[:3] == ["nmcli", "connection", "load"]:
+                raise subp.ProcessExecutionError(cmd=cmd)
+            return subp.SubpResult("", "")
+
+        m_subp.side_effect = fake_subp
+        assert NetworkManagerActivator.bring_up_interfaces(["eth0", "eth1"])
+        cmds = [call[0][0] for call in m_subp.call_args_list]
+        assert ["nmcli", "connection", "reload"] == cmds[3]
+        assert [
+            ["nmcli", "connection", "up", "ifname", "eth0"],
+            ["nmcli", "connection", "up", "ifname", "eth1"],
+        ] == sorted(cmds[4:])
+
     @patch("cloudinit.subp.subp", return_value=("", ""))
     @patch(
         "cloudinit.net.network_manager.available_nm_ifcfg_rh",
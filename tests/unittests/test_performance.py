@@ -0,0 +1,41 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import json
+
+from cloudinit import performance
+
+
+class TestBootTrace:
+    def test_timed_does_not_record_without_trace(self, tmp_path):
+        """No spans are buffered or written when tracing is not started."""
+        trace_file = tmp_path / "trace.jsonl"
+        with performance.Timed("untraced"):
+            pass
+        performance.flush_trace(str(trace_file))
+        assert not trace_file.exists()
+
+    def test_flush_trace_writes_stage_and_nested_spans(self, tmp_path):
+        """Spans record their parent and the stage span is written first."""
+        trace_file = tmp_path / "trace.jsonl"
+        performance.start_trace("init-local")
+        with performance.Timed("outer", log_mode="skip"):
+            with performance.Timed("inner"):
+                pass
+        with performance.Timed("", log_mode="skip"):
+            pass
+        performance.flush_trace(str(trace_file))
+
+        spans = [json.loads(line) for line in trace_file.read_text().split()]
+        assert [(s["name"], s["parent"]) for s in spans] == [
+            ("init-local", None),
+            ("inner", "outer"),
+            ("outer", "init-local"),
+        ]
+        assert {"init-local"} == {s["stage"] for s in spans}
+        assert spans[0]["duration"] >= spans[2]["duration"]
+
+        # tracing is disabled after flushing
+        with performance.Timed("untraced"):
+            pass
+        performance.flush_trace(str(trace_file))
+        assert 3 == len(trace_file.read_text().splitlines())
@@ -0,0 +1,548 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import os
+import struct
+from typing import Dict, List
+from unittest import mock
+
+import pytest
+
+from cloudinit import seedfs
+from cloudinit.seedfs import SeedFsError
+
+M_PATH = "cloudinit.seedfs."
+
+SECTOR = 2048
+
+
+def both_endian(fmt, value):
+    return struct.pack("<" + fmt, value) + struct.pack(">" + fmt, value)
+
+
+def iso_record(extent, size, is_dir, identifier, system_use=b"", flags=0):
+    padding = b"" if len(identifier) % 2 else b"\x00"
+    length = 33 + len(identifier) + len(padding) + len(system_use)
+    record = (
+        bytes([length + length % 2, 0])
+        + both_endian("I", extent)
+        + both_endian("I", size)
+        + bytes(7)
+        + bytes([flags | (seedfs.ISO_DIRECTORY if is_dir else 0), 0, 0])
+        + both_endian("H", 1)
+        + bytes([len(identifier)])
+        + identifier
+        + padding
+        + system_use
+    )
+    return record + bytes(length % 2)
+
+
+def rock_ridge_name(name):
+    encoded = name.encode("utf-8")
+    return b"NM" + bytes([5 + len(encoded), 1, 0]) + encoded
+
+
+def iso_image(path, files, rock_ridge=False, joliet=False, identifiers=None):
+    """Write an ISO9660 image of files, a dict of data by path.
+
+    Directories and files each take whole sectors. ISO9660 identifiers are
+    the upper case names, unless given in identifiers by path.
+    """
+    identifiers = identifiers or {}
+    directories: Dict[str, List[str]] = {"": []}
+    for file_path in sorted(files):
+        parts = file_path.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth])
+            child = "/".join(parts[: depth + 1])
+            if child not in directories and child not in files:
+                directories[child] = []
+            if child not in directories[parent]:
+                directories[parent].append(child)
+    # Volume descriptors start at sector 16, followed by the terminator
+    trees = [(False, 16)]
+    if joliet:
+        trees.append((True, 17))
+    next_sector = trees[-1][1] + 2
+    locations = {}
+    for tree_joliet, _ in trees:
+        for directory in directories:
+            locations[(tree_joliet, directory)] = next_sector
+            next_sector += 1
+    for file_path, data in files.items():
+        locations[file_path] = next_sector
+        next_sector += -(-len(data) // SECTOR) or 1
+
+    image = bytearray(next_sector * SECTOR)
+
+    def record_for(child, tree_joliet):
+        name = child.rsplit("/", 1)[-1]
+        is_dir = child in directories
+        if tree_joliet:
+            identifier = (name if is_dir else name + ";1").encode("utf-16-be")
+            return iso_record(
+                locations[(True, child)] if is_dir else locations[child],
+                SECTOR if is_dir else len(files[child]),
+                is_dir,
+                identifier,
+            )
+        default = name.upper() if is_dir else name.upper() + ";1"
+        return iso_record(
+            locations[(False, child)] if is_dir else locations[child],
+            SECTOR if is_dir else len(files[child]),
+            is_dir,
+            identifiers.get(child, default).encode("latin-1"),
+            rock_ridge_name(name) if rock_ridge else b"",
+        )
+
+    for tree_joliet, descriptor_sector in trees:
+        for directory, children in directories.items():
+            location = locations[(tree_joliet, directory)]
+            self_use = b""
+            if rock_ridge and not tree_joliet and directory == "":
+                self_use = b"SP\x07\x01\xbe\xef\x00"
+            data = iso_record(location, SECTOR, True, b"\x00", self_use)
+            data += iso_record(location, SECTOR, True, b"\x01")
+            for child in children:
+                data += record_for(child, tree_joliet)
+            assert len(data) <= SECTOR
+            image[location * SECTOR : location * SECTOR + len(data)] = data
+        descriptor = bytearray(SECTOR)
+        descriptor[0:7] = bytes([2 if tree_joliet else 1]) + b"CD001\x01"
+        if tree_joliet:
+            descriptor[88:91] = b"%/E"
+        descriptor[128:132] = both_endian("H", SECTOR)
+        descriptor[156:190] = iso_record(
+            locations[(tree_joliet, "")], SECTOR, True, b"\x00"
+        )
+        start = descriptor_sector * SECTOR
+        image[start : start + SECTOR] = descriptor
+    terminator = (trees[-1][1] + 1) * SECTOR
+    image[terminator : terminator + 7] = b"\xffCD001\x01"
+    for file_path, data in files.items():
+        start = locations[file_path] * SECTOR
+        image[start : start + len(data)] = data
+    with open(path, "wb") as stream:
+        stream.write(image)
+    return path
+
+
+FAT_GEOMETRY = {
+    # bits: (total sectors, root directory entries)
+    12: (2048, 224),
+    16: (8192, 512),
+    32: (70000, 0),
+}
+
+
+def fat_short_entry(short_name, attributes, cluster, size, nt_flags=0):
+    return (
+        short_name
+        + bytes([attributes, nt_flags])
+        + bytes(7)
+        + struct.pack("<H", cluster >> 16)
+        + bytes(4)
+        + struct.pack("<HI", cluster & 0xFFFF, size)
+    )
+
+
+def fat_long_entries(name, short_name):
+    chars = name.encode("utf-16-le")
+    if len(chars) % 26:
+        chars += b"\x00\x00"
+        chars += b"\xff" * (-len(chars) % 26)
+    checksum = seedfs._short_name_checksum(short_name)
+    entries = []
+    count = len(chars) // 26
+    for sequence in range(count, 0, -1):
+        part = chars[(sequence - 1) * 26 : sequence * 26]
+        entries.append(
+            bytes([sequence | (0x40 if sequence == count else 0)])
+            + part[:10]
+            + bytes([seedfs.FAT_LONG_NAME, 0, checksum])
+            + part[10:22]
+            + b"\x00\x00"
+            + part[22:]
+        )
+    return b"".join(entries)
+
+
+def fat_entries(name, index, attributes, cluster, size):
+    """Return the directory entries of name, using a short name only when
+    it fits and a long name otherwise.
+    """
+    base, _, extension = name.partition(".")
+    if (
+        len(base) <= 8
+        and len(extension) <= 3
+        and "." not in extension
+        and all(c.isalnum() or c == "_" for c in base + extension)
+        and (name.isupper() or name.islower() or not name.isalpha())
+    ):
+        short_name = (
+            base.upper().ljust(8).encode()
+            + extension.upper().ljust(3).encode()
+        )
+        nt_flags = 0
+        if base.islower():
+            nt_flags |= seedfs.FAT_LOWER_CASE_BASE
+        if extension.islower():
+            nt_flags |= seedfs.FAT_LOWER_CASE_EXTENSION
+        return fat_short_entry(short_name, attributes, cluster, size, nt_flags)
+    short_name = f"LONG~{index}".ljust(8).encode() + b"   "
+    return fat_long_entries(name, short_name) + fat_short_entry(
+        short_name, attributes, cluster, size
+    )
+
+
+def fat_image(path, files, bits=12, fragment=False, extra_root_entries=b""):
+    """Write a FAT image of files, a dict of data by path, with 512 byte
+    sectors and clusters.
+
+    With fragment, clusters are allocated every other cluster first.
+    """
+    total_sectors, root_entry_count = FAT_GEOMETRY[bits]
+    fat_sectors = -(-(total_sectors + 2) * bits // 8 // 512) + 1
+    root_sectors = root_entry_count * 32 // 512
+    fat_start = 512
+    root_start = fat_start + 2 * fat_sectors * 512
+    data_start = root_start + root_sectors * 512
+    cluster_count = (total_sectors - data_start // 512) + 2
+    free = list(range(2, cluster_count))
+    if fragment:
+        free = free[::2] + free[1::2]
+    fat = {}
+
+    def allocate(size):
+        clusters = [free.pop(0) for _ in range(-(-size // 512))]
+        for current, following in zip(clusters, clusters[1:] + [None]):
+            fat[current] = following or 0x0FFFFFFF
+        return clusters
+
+    directories: Dict[str, List[str]] = {"": []}
+    for file_path in sorted(files):
+        parts = file_path.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth])
+            child = "/".join(parts[: depth + 1])
+            if child not in directories and child not in files:
+                directories[child] = []
+            if child not in directories[parent]:
+                directories[parent].append(child)
+
+    data = {}
+    root_clusters = allocate(512) if bits == 32 else []
+    dir_clusters = {"": root_clusters}
+    for directory in directories:
+        if directory:
+            dir_clusters[directory] = allocate(1024)
+    for file_path, content in files.items():
+        data[file_path] = allocate(len(content)), content
+
+    image = open(path, "wb")
+    image.truncate(total_sectors * 512)
+    boot = bytearray(512)
+    boot[0:3] = b"\xeb\x3c\x90"
+    struct.pack_into(
+        "<HBHBHHBH",
+        boot,
+        11,
+        512,
+        1,
+        1,
+        2,
+        root_entry_count,
+        total_sectors if total_sectors < 0x10000 else 0,
+        0xF8,
+        fat_sectors if bits != 32 else 0,
+    )
+    struct.pack_into("<I", boot, 32, total_sectors)
+    if bits == 32:
+        struct.pack_into("<I4xI", boot, 36, fat_sectors, root_clusters[0])
+    boot[510:512] = b"\x55\xaa"
+    image.write(boot)
+
+    table = bytearray(fat_sectors * 512)
+    for cluster, value in fat.items():
+        if bits == 12:
+            value &= 0xFFF
+            offset = cluster + cluster // 2
+            current = struct.unpack_from("<H", table, offset)[0]
+            if cluster & 1:
+                current = (current & 0x000F) | (value << 4)
+            else:
+                current = (current & 0xF000) | value
+            struct.pack_into("<H", table, offset, current)
+        elif bits == 16:
+            struct.pack_into("<H", table, cluster * 2, value & 0xFFFF)
+        else:
+            struct.pack_into("<I", table, cluster * 4, value)
+    for copy in range(2):
+        image.seek(fat_start + copy * fat_sectors * 512)
+        image.write(table)
+
+    def cluster_offset(cluster):
+        return data_start + (cluster - 2) * 512
+
+    def write_clusters(clusters, content):
+        for index, cluster in enumerate(clusters):
+            image.seek(cluster_offset(cluster))
+            image.write(content[index * 512 : (index + 1) * 512])
+
+    for directory, children in directories.items():
+        entries = b""
+        if directory:
+            entries += fat_short_entry(
+                b".          ", 0x10, dir_clusters[directory][0], 0
+            )
+            entries += fat_short_entry(b"..         ", 0x10, 0, 0)
+        else:
+            entries += extra_root_entries
+        for index, child in enumerate(children):
+            name = child.rsplit("/", 1)[-1]
+            if child in directories:
+                entries += fat_entries(
+                    name, index, 0x10, dir_clusters[child][0], 0
+                )
+            else:
+                clusters, content = data[child]
+                entries += fat_entries(
+                    name,
+                    index,
+                    0x20,
+                    clusters[0] if clusters else 0,
+                    len(content),
+                )
+        if directory or bits == 32:
+            assert len(entries) <= len(dir_clusters[directory]) * 512
+            write_clusters(dir_clusters[directory], entries)
+        else:
+            image.seek(root_start)
+            image.write(entries)
+    for clusters, content in data.values():
+        write_clusters(clusters, content)
+    image.close()
+    return path
+
+
+def read_tree(path):
+    """Return the files in path by relative path, and its directories."""
+    files = {}
+    directories = []
+    for root, dirnames, filenames in os.walk(path):
+        for dirname in dirnames:
+            directories.append(
+                os.path.relpath(os.path.join(root, dirname), path)
+            )
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            with open(file_path, "rb") as stream:
+                files[os.path.relpath(file_path, path)] = stream.read()
+    return files, sorted(directories)
+
+
+SEED = {
+    "meta-data": b"instance-id: iid-abc\n",
+    "user-data": b"#cloud-config\n" + bytes(range(256)) * 20,
+    "empty": b"",
+    "openstack/latest/meta_data.json": b'{"uuid": "abc"}',
+    "openstack/2012-08-10/user_data": b"#!/bin/sh\n",
+}
+
+
+@pytest.fixture
+def target(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir()
+    return target
+
+
+class TestIso9660:
+    @pytest.mark.parametrize(
+        "rock_ridge, joliet",
+        [(True, False), (False, True), (True, True)],
+    )
+    def test_extract(self, rock_ridge, joliet, tmp_path, target):
+        files = dict(SEED, **{"Mixed Case.json": b"{}"})
+        image = iso_image(tmp_path / "seed.iso", files, rock_ridge, joliet)
+        assert "iso9660" == seedfs.extract(str(image), str(target))
+        assert (
+            files,
+            ["openstack", "openstack/2012-08-10", "openstack/latest"],
+        ) == read_tree(target)
+
+    def test_plain_names_are_mapped_like_linux(self, tmp_path, target):
+        image = iso_image(
+            tmp_path / "seed.iso",
+            {"a": b"1", "b": b"2", "c": b"3", "d": b"4"},
+            identifiers={
+                "a": "META_DATA.;1",
+                "b": "USER_DATA;1",
+                "c": "OVF-ENV.XML;1",
+                "d": "NAME;2",
+            },
+        )
+        seedfs.extract(str(image), str(target))
+        assert {
+            "meta_data": b"1",
+            "user_data": b"2",
+            "ovf-env.xml": b"3",
+            "name.2": b"4",
+        } == read_tree(target)[0]
+
+    def test_rock_ridge_preferred_to_joliet(self, tmp_path, target):
+        image = iso_image(
+            tmp_path / "seed.iso", SEED, rock_ridge=True, joliet=True
+        )
+        with open(image, "rb", buffering=0) as stream:
+            iso = seedfs.Iso9660(seedfs._Device(stream))
+            assert iso._susp_skip == 0
+            assert not iso._joliet
+
+    def test_multi_extent_file(self, tmp_path, target):
+        image = bytearray(
+            iso_image(
+                tmp_path / "seed.iso", {"a": b"x" * SECTOR, "b": b"y"}
+            ).read_bytes()
+        )
+        root = struct.unpack_from("<I", image, 16 * SECTOR + 158)[0] * SECTOR
+        records = seedfs.Iso9660._records(
+            mock.Mock(block_size=SECTOR), bytes(image[root : root + SECTOR])
+        )
+        first = bytearray(records[2])
+        first[25] |= seedfs.ISO_MULTI_EXTENT
+        data = records[0] + records[1] + first + records[3]
+        image[root : root + SECTOR] = data.ljust(SECTOR, b"\x00")
+        (tmp_path / "multi.iso").write_bytes(image)
+        seedfs.extract(str(tmp_path / "multi.iso"), str(target))
+        assert {"b": b"x" * SECTOR + b"y"} == read_tree(target)[0]
+
+    def test_symbolic_links_are_not_supported(self, tmp_path, target):
+        image = bytearray(
+            iso_image(
+                tmp_path / "seed.iso", SEED, rock_ridge=True
+            ).read_bytes()
+        )
+        name = rock_ridge_name("meta-data")
+        image = image.replace(name, b"SL" + name[2:])
+        (tmp_path / "link.iso").write_bytes(image)
+        with pytest.raises(SeedFsError, match="links"):
+            seedfs.extract(str(tmp_path / "link.iso"), str(target))
+        assert [] == os.listdir(target)
+
+
+class TestFat:
+    @pytest.mark.parametrize("bits", [12, 16, 32])
+    @pytest.mark.parametrize("fragment", [False, True])
+    def test_extract(self, bits, fragment, tmp_path, target):
+        files = dict(
+            SEED,
+            **{
+                "UPPER.TXT": b"upper",
+                "lower.txt": b"lower",
+                "A long name, with ünïcödé.json": b"{}",
+                "big": bytes(range(256)) * 30,
+            },
+        )
+        image = fat_image(tmp_path / "seed.img", files, bits, fragment)
+        with open(image, "rb", buffering=0) as stream:
+            assert bits == seedfs.Fat(seedfs._Device(stream))._fat_bits
+        assert "vfat" == seedfs.extract(str(image), str(target))
+        assert (
+            files,
+            ["openstack", "openstack/2012-08-10", "openstack/latest"],
+        ) == read_tree(target)
+
+    def test_skips_volume_label_and_deleted_entries(self, tmp_path, target):
+        deleted = fat_long_entries("deleted", b"DELETED    ") + (
+            fat_short_entry(b"\xe5ELETED    ", 0x20, 0, 0)
+        )
+        label = fat_short_entry(b"CIDATA     ", seedfs.FAT_VOLUME_ID, 0, 0)
+        image = fat_image(
+            tmp_path / "seed.img",
+            {"meta-data": b"md"},
+            extra_root_entries=label + deleted,
+        )
+        seedfs.extract(str(image), str(target))
+        assert {"meta-data": b"md"} == read_tree(target)[0]
+
+    def test_mismatched_long_name_is_ignored(self, tmp_path, target):
+        entries = fat_long_entries("other-name", b"OTHER      ")
+        image = fat_image(
+            tmp_path / "seed.img",
+            {"META": b"md"},
+            extra_root_entries=entries,
+        )
+        seedfs.extract(str(image), str(target))
+        assert {"META": b"md"} == read_tree(target)[0]
+
+    def test_truncated_cluster_chain(self, tmp_path, target):
+        image = fat_image(tmp_path / "seed.img", {"big": b"x" * 2000})
+        data = bytearray(image.read_bytes())
+        # End the chain of the file after its first cluster
+        fat = bytes(data[512:1024])
+        struct.pack_into("<H", data, 512 + 3, fat[3] & 0xF0 | 0xFF0F)
+        image.write_bytes(data)
+        with pytest.raises(SeedFsError):
+            seedfs.extract(str(image), str(target))
+        assert [] == os.listdir(target)
+
+
+class TestExtract:
+    def test_missing_device(self, tmp_path, target):
+        with pytest.raises(SeedFsError, match="Unable to read"):
+            seedfs.extract(str(tmp_path / "missing"), str(target))
+
+    def test_unsupported_filesystem(self, tmp_path, target):
+        image = tmp_path / "zeros.img"
+        image.write_bytes(bytes(64 * 1024))
+        with pytest.raises(SeedFsError, match="No iso9660 or vfat"):
+            seedfs.extract(str(image), str(target))
+
+    @pytest.mark.parametrize(
+        "mtypes, supported",
+        [
+            (None, True),
+            (["auto"], True),
+            ([""], True),
+            (["iso9660"], True),
+            (["cd9660"], True),
+            (["vfat"], False),
+            (["ntfs"], False),
+        ],
+    )
+    def test_mount_types(self, mtypes, supported, tmp_path, target):
+        image = iso_image(tmp_path / "seed.iso", SEED, rock_ridge=True)
+        if supported:
+            seedfs.extract(str(image), str(target), mtypes)
+        else:
+            with pytest.raises(SeedFsError):
+                seedfs.extract(str(image), str(target), mtypes)
+
+    def test_too_many_files(self, tmp_path, target):
+        image = fat_image(tmp_path / "seed.img", SEED)
+        with mock.patch(M_PATH + "MAX_FILES", 3):
+            with pytest.raises(SeedFsError, match="Too many"):
+                seedfs.extract(str(image), str(target))
+        assert [] == os.listdir(target)
+
+    def test_clashing_names(self, tmp_path, target):
+        image = iso_image(
+            tmp_path / "seed.iso",
+            {"a": b"1", "b": b"2"},
+            identifiers={"a": "SAME;1", "b": "same;1"},
+        )
+        with pytest.raises(SeedFsError, match="Unsupported file name"):
+            seedfs.extract(str(image), str(target))
+        assert [] == os.listdir(target)
+
+    def test_unaligned_reads(self, tmp_path):
+        image = tmp_path / "data"
+        image.write_bytes(bytes(range(256)) * 64)
+        with open(image, "rb", buffering=0) as stream:
+            device = seedfs._Device(stream)
+            assert bytes(range(250, 256)) + bytes(range(4)) == device.read(
+                4090, 10
+            )
+            with pytest.raises(SeedFsError):
+                device.read(16380, 8)
@@ -3,6 +3,7 @@
 
 """Tests related to cloudinit.stages module."""
 
+import copy
 import json
 import os
 import stat
@@ -98,6 +99,42 @@ class TestInit:
         self._real_is_new_instance = self.init.is_new_instance
         self.init.is_new_instance = mock.Mock(return_value=True)
 
+    @pytest.mark.parametrize("system_info_changed", [False, True])
+    def test_reload_cfg(self, system_info_changed, mocker):
+        """reload_cfg reads config again, keeping unchanged paths and
+        distro.
+        """
+        distro = self.init.distro
+        paths = self.init.paths
+        reread = copy.deepcopy(self.init._cfg)
+        reread["runcmd"] = ["ls"]
+        if system_info_changed:
+            reread["system_info"]["distro"] = "debian"
+        m_read = mocker.patch.object(
+            self.init, "_read_cfg", return_value=reread
+        )
+        self.init.reload_cfg(["/extra.cfg"])
+        m_read.assert_called_once_with(["/extra.cfg"])
+        assert ["ls"] == self.init.cfg["runcmd"]
+        assert (distro is self.init.distro) is not system_info_changed
+        assert (paths is self.init.paths) is not system_info_changed
+        assert self.init.paths is self.init.datasource.paths
+        assert self.init.paths is self.init.distro._paths
+        assert ["ls"] == self.init.datasource.sys_cfg["runcmd"]
+
+    def test_reload_cfg_forgets_preinstalled_packages(self, mocker):
+        """The next stage does not skip packages preinstalled before it."""
+        distro = self.init.distro
+        mocker.patch.object(distro, "install_packages")
+        mocker.patch.object(
+            self.init, "_read_cfg", return_value=copy.deepcopy(self.init._cfg)
+        )
+        distro.preinstall_packages(["htop"])
+        assert [] == distro._without_preinstalled(["htop"])
+        self.init.reload_cfg()
+        assert distro is self.init.distro
+        assert ["htop"] == distro._without_preinstalled(["htop"])
+
     def test_wb__find_networking_config_disabled(self):
         """find_networking_config returns no config when disabled."""
         disable_file = os.path.join(
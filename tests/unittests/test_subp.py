@@ -6,12 +6,15 @@ import json
 import logging
 import os
 import stat
+import subprocess
 import sys
+import threading
+import time
 from unittest import mock
 
 import pytest
 
-from cloudinit import subp, util
+from cloudinit import performance, subp, util
 from tests.helpers import get_top_level_dir
 
 SH = "sh"
@@ -300,3 +303,79 @@ class TestSubp:
             decode=False,
         )
         assert self.utf8_valid == out
+
+    def test_timeout_kills_command(self, tmp_path):
+        """A command still running at its timeout is killed."""
+        marker = tmp_path / "marker"
+        with pytest.raises(subprocess.TimeoutExpired):
+            subp.subp(
+                [SH, "-c", 'sleep 0.5; touch "$1"', "--", str(marker)],
+                timeout=0.1,
+            )
+        time.sleep(0.6)
+        assert not marker.exists()
+
+    def test_timeout_does_not_wait_for_grandchildren(self):
+        """A forked child holding the output open does not block subp."""
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            subp.subp([SH, "-c", "sleep 2 & sleep 2"], timeout=0.1)
+        assert time.monotonic() - start < 1
+
+    def test_trace_records_exit_code_and_output_size(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        performance.start_trace("init")
+        subp.subp(self.printf_cmd("hello"))
+        with pytest.raises(subp.ProcessExecutionError):
+            subp.subp([SH, "-c", "echo oops >&2; exit 3"])
+        performance.flush_trace(str(trace_file))
+
+        attrs = [
+            json.loads(line).get("attrs")
+            for line in trace_file.read_text().splitlines()
+        ]
+        assert [
+            None,
+            {"exit_code": 0, "stdout_bytes": 5, "stderr_bytes": 0},
+            {"exit_code": 3, "stdout_bytes": 0, "stderr_bytes": 5},
+        ] == attrs
+
+
+@pytest.mark.allow_all_subp
+class TestRunMany:
+    def test_results_in_command_order(self):
+        futures = subp.run_many(
+            [["echo", str(i)] for i in range(5)], max_workers=3
+        )
+        assert [f"{i}\n" for i in range(5)] == [
+            future.result().stdout for future in futures
+        ]
+
+    def test_commands_run_concurrently(self):
+        """Commands that each wait for the other can only both complete
+        when run at the same time."""
+        with mock.patch.object(
+            subp, "subp", side_effect=_wait_for_each_other()
+        ):
+            futures = subp.run_many([["a"], ["b"]])
+            assert ["a", "b"] == [future.result() for future in futures]
+
+    def test_failures_raised_by_their_future(self):
+        futures = subp.run_many([["true"], [SH, "-c", "exit 2"]])
+        assert ("", "") == futures[0].result()
+        with pytest.raises(subp.ProcessExecutionError) as e:
+            futures[1].result()
+        assert 2 == e.value.exit_code
+
+    def test_no_commands(self):
+        assert [] == subp.run_many([])
+
+
+def _wait_for_each_other():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_subp(cmd, **kwargs):
+        barrier.wait()
+        return cmd[0]
+
+    return fake_subp
@@ -5,11 +5,13 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import textwrap
+from unittest import mock
 
 import pytest
 from jinja2.exceptions import SecurityError
+from jinja2.sandbox import SandboxedEnvironment
 
-from cloudinit import templater
+from cloudinit import helpers, templater, util
 from cloudinit.templater import JinjaSyntaxParsingException
 from cloudinit.util import load_binary_file, write_file
 
@@ -154,6 +156,88 @@ class TestTemplates:
         with pytest.raises(SecurityError):
             templater.render_string(template, {})
 
+    def test_jinja_template_variables(self):
+        assert {"v1", "userdata"} == templater.jinja_template_variables(
+            "{{ v1.cloud_name }} {% set x = 1 %}{{ x }}"
+            "{% for line in userdata.splitlines() %}{{ line }}{% endfor %}"
+        )
+
+
+@pytest.mark.allow_jinja_bytecode_cache
+class TestJinjaTemplateCache:
+    TEMPLATE = "## template: jinja\nHello {{name}}{% if x %}!{% endif %}\n"
+
+    @pytest.fixture(autouse=True)
+    def clear_caches(self):
+        templater._get_jinja_template.cache_clear()
+        templater._get_jinja_env.cache_clear()
+        yield
+        templater._get_jinja_template.cache_clear()
+        templater._get_jinja_env.cache_clear()
+
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        return tmp_path / "jinja2"
+
+    def test_compiles_once_per_process(self):
+        with mock.patch.object(
+            SandboxedEnvironment,
+            "compile",
+            autospec=True,
+            side_effect=SandboxedEnvironment.compile,
+        ) as m_compile:
+            for name in ("bob", "alice"):
+                assert f"Hello {name}\n" == templater.render_string(
+                    self.TEMPLATE, {"name": name}
+                )
+        assert 1 == m_compile.call_count
+
+    def test_bytecode_reused_across_processes(self, cache_dir):
+        assert "Hello bob!\n" == templater.render_string(
+            self.TEMPLATE, {"name": "bob", "x": True}, str(cache_dir)
+        )
+        assert 1 == len(list(cache_dir.iterdir()))
+        assert 0o700 == cache_dir.stat().st_mode & 0o777
+        # A new process starts with empty in-memory caches
+        templater._get_jinja_template.cache_clear()
+        templater._get_jinja_env.cache_clear()
+
+        with mock.patch.object(SandboxedEnvironment, "compile") as m_compile:
+            assert "Hello alice\n" == templater.render_string(
+                self.TEMPLATE, {"name": "alice"}, str(cache_dir)
+            )
+        m_compile.assert_not_called()
+
+    def test_templates_cached_by_content(self, cache_dir):
+        templater.render_string(self.TEMPLATE, {"name": "bob"}, str(cache_dir))
+        templater.render_string(
+            self.TEMPLATE + "Bye\n", {"name": "bob"}, str(cache_dir)
+        )
+        assert 2 == len(list(cache_dir.iterdir()))
+
+    def test_no_cache_without_data_dir(self, tmp_path):
+        cache_dir = tmp_path / "missing" / "jinja2"
+        assert "Hello bob\n" == templater.render_string(
+            self.TEMPLATE, {"name": "bob"}, str(cache_dir)
+        )
+        assert not cache_dir.parent.exists()
+
+    def test_no_cache_dir(self):
+        """Templates are only compiled in memory without a cache_dir."""
+        with mock.patch.object(
+            templater, "FileSystemBytecodeCache"
+        ) as m_cache:
+            templater.render_string(self.TEMPLATE, {"name": "bob"})
+        m_cache.assert_not_called()
+
+    def test_cache_dir_from_paths(self, tmp_path):
+        paths = helpers.Paths({"cloud_dir": str(tmp_path)})
+        util.ensure_dir(paths.get_cpath("data"))
+        templater.render_string(
+            self.TEMPLATE, {"name": "bob"}, paths.get_cpath("jinja_cache")
+        )
+        assert 1 == len(list((tmp_path / "data" / "jinja2").iterdir()))
+
 
 class TestJinjaSyntaxParsingException:
     def test_jinja_syntax_parsing_exception_message(self):
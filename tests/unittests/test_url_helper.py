@@ -1004,6 +1004,41 @@ class TestWaitForUrl:
         raise UrlError("test")
 
 
+class TestCancelRequestsOn:
+    @responses.activate
+    def test_readurl_makes_no_request_once_cancelled(self):
+        responses.add(responses.GET, "http://hostname/path", body="data")
+        event = Event()
+        with url_helper.cancel_requests_on(event):
+            assert b"data" == readurl("http://hostname/path").contents
+            event.set()
+            with pytest.raises(UrlError, match="Request cancelled"):
+                readurl("http://hostname/path")
+        assert 1 == len(responses.calls)
+
+    @responses.activate
+    def test_wait_for_url_stops_once_cancelled(self):
+        responses.add(
+            responses.GET, "http://hostname/path", body=requests.Timeout()
+        )
+        event = Event()
+        event.set()
+        with url_helper.cancel_requests_on(event):
+            with mock.patch(M_PATH + "time.sleep") as m_sleep:
+                assert (False, None) == wait_for_url(
+                    ["http://hostname/path"], max_wait=60, sleep_time=10
+                )
+        assert 0 == len(responses.calls)
+        m_sleep.assert_not_called()
+
+    def test_requests_not_cancelled_outside_context(self):
+        event = Event()
+        event.set()
+        with url_helper.cancel_requests_on(event):
+            assert url_helper._requests_cancelled()
+        assert not url_helper._requests_cancelled()
+
+
 class TestHandleError:
     def test_handle_error_no_cb(self):
         """Test no callback."""
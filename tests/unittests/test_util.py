@@ -4,12 +4,16 @@
 
 import base64
 import errno
+import gzip
 import json
 import logging
 import os
 import platform
 import re
+import socket
 import stat
+import threading
+import time
 from collections import deque
 from contextlib import nullcontext as does_not_raise
 from pathlib import Path
@@ -36,6 +40,7 @@ from cloudinit.sources import DataSourceHostname
 from cloudinit.subp import SubpResult
 from tests.unittests import helpers
 from tests.unittests.helpers import random_string
+from tests.unittests.test_seedfs import iso_image
 
 LOG = logging.getLogger(__name__)
 M_PATH = "cloudinit.util."
@@ -1581,6 +1586,30 @@ class TestMountCb:
             mock.call(mock.ANY, mock.sentinel.data)
         ] == callback.call_args_list
 
+    @mock.patch(M_PATH + "subp.subp")
+    def test_seed_media_read_without_mounting(self, m_subp, tmp_path):
+        image = iso_image(
+            tmp_path / "seed.iso", {"meta-data": b"md"}, rock_ridge=True
+        )
+
+        def callback(mountpoint):
+            return util.load_binary_file(mountpoint + "meta-data")
+
+        assert b"md" == util.mount_cb(str(image), callback, mtype="iso9660")
+        assert 0 == m_subp.call_count
+
+    @mock.patch(M_PATH + "subp.subp")
+    def test_mounts_unreadable_media(self, m_subp, tmp_path):
+        image = tmp_path / "seed.img"
+        image.write_bytes(bytes(64 * 1024))
+        util.mount_cb(str(image), mock.Mock(), mtype="vfat")
+        assert [
+            mock.call(
+                ["mount", "-o", "ro", "-t", "vfat", str(image), mock.ANY],
+                update_env=None,
+            ),
+        ] == m_subp.call_args_list[:1]
+
     @pytest.mark.parametrize("log_error", [True, False])
     @mock.patch(M_PATH + "subp.subp")
     def test_mount_cb_log(self, m_subp, log_error, caplog):
@@ -1894,6 +1923,99 @@ class TestWriteFile:
         mockobj.assert_called_once_with("selinux")
 
 
+class TestWriteFileOwned:
+    def test_basic_usage(self, tmp_path):
+        """Content is written and the requested mode applied."""
+        path = str(tmp_path / "NewFile.txt")
+
+        util.write_file_owned(path, "Hey there", 0o640)
+
+        assert "Hey there" == util.load_text_file(path)
+        assert 0o640 == util.get_permissions(path)
+
+    def test_append(self, tmp_path):
+        """Existing content is kept when appending."""
+        path = str(tmp_path / "NewFile.txt")
+        util.write_file(path, "LINE1\n")
+
+        util.write_file_owned(path, b"LINE2\n", 0o600, append=True)
+
+        assert "LINE1\nLINE2\n" == util.load_text_file(path)
+        assert 0o600 == util.get_permissions(path)
+
+    def test_mode_applied_after_chown(self, tmp_path):
+        """Setuid bits survive the ownership change."""
+        path = str(tmp_path / "NewFile.txt")
+        calls = []
+
+        with mock.patch.object(
+            util.os, "fchown", side_effect=lambda *a: calls.append("chown")
+        ), mock.patch.object(
+            util.os,
+            "fchmod",
+            side_effect=lambda *a: calls.append("chmod"),
+        ):
+            util.write_file_owned(path, "", 0o4755, uid=0, gid=0)
+
+        assert ["chown", "chmod"] == calls
+
+    def test_no_chown_without_ids(self, tmp_path):
+        """Ownership is left alone when no uid or gid is given."""
+        path = str(tmp_path / "NewFile.txt")
+
+        with mock.patch.object(util.os, "fchown") as m_fchown:
+            util.write_file_owned(path, "Hey there")
+
+        assert 0 == m_fchown.call_count
+
+
+class TestRestoreconPaths:
+    def test_selinux_queried_once_for_all_paths(self, tmp_path):
+        """The selinux module is loaded once and each path relabelled."""
+        paths = [str(tmp_path / "a"), str(tmp_path / "b")]
+        for path in paths:
+            util.write_file(path, "")
+        fake_se = mock.Mock()
+        fake_se.is_selinux_enabled.return_value = True
+
+        with mock.patch.object(
+            importer, "import_module", return_value=fake_se
+        ) as mockobj:
+            util.restorecon_paths(paths + [str(tmp_path / "missing")])
+
+        mockobj.assert_called_once_with("selinux")
+        assert 1 == fake_se.is_selinux_enabled.call_count
+        assert [
+            mock.call(path, recursive=False) for path in paths
+        ] == fake_se.restorecon.call_args_list
+
+    def test_no_selinux(self, tmp_path):
+        """Nothing happens when the selinux module is unavailable."""
+        with mock.patch.object(
+            importer, "import_module", side_effect=ImportError
+        ):
+            util.restorecon_paths([str(tmp_path)])
+
+
+class TestDecompGzip:
+    def test_decompresses(self):
+        assert "hi" == util.decomp_gzip(gzip.compress(b"hi"))
+        assert b"hi" == util.decomp_gzip(gzip.compress(b"hi"), decode=False)
+
+    @pytest.mark.parametrize(
+        "data", [b"plain", "plain", b""], ids=["bytes", "str", "empty"]
+    )
+    def test_plain_data_returned_without_decompressing(self, data):
+        """Data without the gzip magic is not handed to GzipFile."""
+        with mock.patch.object(util.gzip, "GzipFile") as m_gzip:
+            assert data == util.decomp_gzip(data)
+        assert 0 == m_gzip.call_count
+
+    def test_not_quiet_raises(self):
+        with pytest.raises(util.DecompressionError):
+            util.decomp_gzip(b"plain", quiet=False)
+
+
 class TestDeleteDirContents:
     def assertDirEmpty(self, dirname):
         assert [] == os.listdir(dirname)
@@ -2108,6 +2230,122 @@ class TestLoadYaml:
             (b, util.load_yaml(blob=b, default=mdef)) for b in blobs
         ]
 
+    @pytest.mark.skipif(
+        util._CSafeLoader is None, reason="PyYAML built without libyaml"
+    )
+    def test_uses_libyaml(self, mocker):
+        m_load = mocker.spy(yaml, "load")
+        assert {"a": [1, 2]} == util.load_yaml("a: [1, 2]")
+        assert m_load.call_args[1] == {"Loader": util._CSafeLoader}
+
+    def test_pure_python_without_libyaml(self, mocker):
+        mocker.patch(M_PATH + "_CSafeLoader", None)
+        m_safe_load = mocker.spy(yaml, "safe_load")
+        assert {"a": [1, 2]} == util.load_yaml("a: [1, 2]")
+        m_safe_load.assert_called_once_with("a: [1, 2]")
+
+    def test_errors_come_from_pure_python_loader(self, mocker, caplog):
+        """Errors are reported as yaml.safe_load reports them."""
+        m_safe_load = mocker.spy(yaml, "safe_load")
+        assert self.mydefault == util.load_yaml(
+            blob="1\n 2:", default=self.mydefault
+        )
+        m_safe_load.assert_called_once_with("1\n 2:")
+        assert "Invalid format at line 2 column 3" in caplog.text
+
+
+class TestReadConfWithConfdCache:
+    @pytest.fixture
+    def cloud_cfg(self, tmp_path):
+        cfg = tmp_path / "cloud.cfg"
+        cfg.write_text("a: 1\nb: 1\n")
+        (tmp_path / "cloud.cfg.d").mkdir()
+        (tmp_path / "cloud.cfg.d" / "90.cfg").write_text("b: 2\n")
+        return cfg
+
+    @pytest.fixture
+    def read(self, cloud_cfg, tmp_path, mocker):
+        mocker.patch("os.geteuid", return_value=os.stat(tmp_path).st_uid)
+        m_read_conf = mocker.spy(util, "read_conf")
+
+        def _read(**kwargs):
+            m_read_conf.reset_mock()
+            cfg = util.read_conf_with_confd(
+                cloud_cfg, cache_file=str(tmp_path / "cache.pkl"), **kwargs
+            )
+            return cfg, m_read_conf.call_count
+
+        return _read
+
+    def test_unchanged_config_is_not_parsed_again(self, read, tmp_path):
+        assert ({"a": 1, "b": 2}, 2) == read()
+        assert 0o600 == stat.S_IMODE(os.stat(tmp_path / "cache.pkl").st_mode)
+        assert ({"a": 1, "b": 2}, 0) == read()
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            pytest.param(
+                lambda d: (d / "cloud.cfg").write_text("a: 3\n"),
+                id="cloud_cfg_changed",
+            ),
+            pytest.param(
+                lambda d: (d / "cloud.cfg.d" / "91.cfg").write_text("a: 3\n"),
+                id="confd_file_added",
+            ),
+            pytest.param(
+                lambda d: (d / "cloud.cfg.d" / "90.cfg").unlink(),
+                id="confd_file_removed",
+            ),
+        ],
+    )
+    def test_changed_config_is_parsed_again(self, change, read, tmp_path):
+        cfg, _ = read()
+        change(tmp_path)
+        changed, parsed = read()
+        assert parsed and changed != cfg
+        assert (changed, 0) == read()
+
+    def test_changed_instance_data_is_parsed_again(
+        self, cloud_cfg, read, tmp_path
+    ):
+        cloud_cfg.write_text("## template: jinja\na: {{ v }}\n")
+        instance_data = tmp_path / "instance-data.json"
+        instance_data.write_text('{"v": 1}')
+        assert ({"a": 1, "b": 2}, 2) == read(instance_data_file=instance_data)
+        assert ({"a": 1, "b": 2}, 0) == read(instance_data_file=instance_data)
+        instance_data.write_text('{"v": 3}')
+        assert ({"a": 3, "b": 2}, 2) == read(instance_data_file=instance_data)
+
+    def test_custom_conf_d_is_cached_from_second_read(
+        self, cloud_cfg, read, tmp_path
+    ):
+        (tmp_path / "other.d").mkdir()
+        (tmp_path / "other.d" / "10.cfg").write_text("c: 1\n")
+        cloud_cfg.write_text(f"conf_d: {tmp_path / 'other.d'}\n")
+        cfg = {"c": 1, "conf_d": str(tmp_path / "other.d")}
+        assert (cfg, 2) == read()
+        assert (cfg, 2) == read()
+        assert (cfg, 0) == read()
+
+    def test_corrupt_cache_is_ignored(self, read, tmp_path):
+        (tmp_path / "cache.pkl").write_bytes(b"garbage")
+        assert ({"a": 1, "b": 2}, 2) == read()
+        assert ({"a": 1, "b": 2}, 0) == read()
+
+    def test_cache_owned_by_another_user_is_ignored(
+        self, read, tmp_path, mocker
+    ):
+        read()
+        uid = os.stat(tmp_path).st_uid + 1
+        mocker.patch("os.geteuid", return_value=uid)
+        assert ({"a": 1, "b": 2}, 2) == read()
+
+    def test_only_root_writes_cache(self, read, tmp_path, mocker):
+        mocker.patch("os.geteuid", return_value=1000)
+        read()
+        assert not (tmp_path / "cache.pkl").exists()
+
 
 class TestFstabEscaping:
     @pytest.mark.parametrize(
@@ -3246,6 +3484,113 @@ class TestResolvable:
                 badname in called_hosts
             ), f"Expected badname {badname} to be checked"
 
+    @mock.patch.object(util.socket, "getaddrinfo")
+    def test_redirect_probes_resolve_concurrently(self, m_getaddr):
+        """The three redirection probes wait out one timeout, not three."""
+        probes = threading.Barrier(3, timeout=5)
+
+        def mock_getaddrinfo(host, port, *args, **kwargs):
+            if args:
+                probes.wait()
+                raise socket.gaierror("not found")
+            return [(None, None, None, "example.com", ("10.2.3.4", 0))]
+
+        m_getaddr.side_effect = mock_getaddrinfo
+
+        assert util.is_resolvable("http://example.com/") is True
+
+    @mock.patch.object(util.socket, "getaddrinfo")
+    def test_successful_lookups_are_cached(self, m_getaddr):
+        """Names that resolved are resolved once, others every time."""
+        util._DNS_REDIRECT_IP = set()
+
+        def mock_getaddrinfo(host, port, *args, **kwargs):
+            if host == "missing.example.com":
+                raise socket.gaierror("not found")
+            return [(None, None, None, host, ("10.2.3.4", 0))]
+
+        m_getaddr.side_effect = mock_getaddrinfo
+
+        for _ in range(3):
+            assert util.is_resolvable("http://example.com/ubuntu") is True
+            assert util.is_resolvable("http://missing.example.com/") is False
+        assert [
+            mock.call("example.com", None),
+            mock.call("missing.example.com", None),
+            mock.call("missing.example.com", None),
+            mock.call("missing.example.com", None),
+        ] == m_getaddr.call_args_list
+
+
+class TestSearchForMirror:
+    @pytest.mark.parametrize("candidates", [None, []])
+    def test_no_candidates(self, candidates):
+        assert util.search_for_mirror(candidates) is None
+
+    @mock.patch.object(util, "is_resolvable")
+    def test_first_resolvable_in_list_order(self, m_resolvable):
+        """A later candidate resolving first does not win over an earlier."""
+
+        def resolvable(url):
+            if url == "http://first/ubuntu":
+                time.sleep(0.1)
+            return url != "http://broken/ubuntu"
+
+        m_resolvable.side_effect = resolvable
+        candidates = [
+            "http://broken/ubuntu",
+            "http://first/ubuntu",
+            "http://second/ubuntu",
+        ]
+
+        assert "http://first/ubuntu" == util.search_for_mirror(candidates)
+
+    @mock.patch.object(util, "is_resolvable")
+    def test_candidates_resolve_concurrently(self, m_resolvable):
+        candidates = ["http://a/ubuntu", "http://b/ubuntu", "http://c/ubuntu"]
+        lookups = threading.Barrier(len(candidates), timeout=5)
+
+        def resolvable(url):
+            lookups.wait()
+            return url == "http://c/ubuntu"
+
+        m_resolvable.side_effect = resolvable
+
+        assert "http://c/ubuntu" == util.search_for_mirror(candidates)
+
+    @mock.patch.object(util, "is_resolvable", side_effect=RuntimeError)
+    def test_lookup_errors_are_not_mirrors(self, m_resolvable):
+        assert util.search_for_mirror(["http://a/ubuntu"]) is None
+
+    @mock.patch.object(util, "_mirror_connect_time")
+    @mock.patch.object(util, "is_resolvable")
+    def test_select_fastest(self, m_resolvable, m_connect_time):
+        m_resolvable.side_effect = lambda url: url != "http://d/ubuntu"
+        latencies = {
+            "http://a/ubuntu": 0.3,
+            "http://b/ubuntu": None,
+            "http://c/ubuntu": 0.1,
+        }
+        m_connect_time.side_effect = latencies.get
+        candidates = [*latencies, "http://d/ubuntu"]
+
+        mirror = util.search_for_mirror(candidates, select_fastest=True)
+
+        assert "http://c/ubuntu" == mirror
+        assert sorted(latencies) == sorted(
+            call[0][0] for call in m_connect_time.call_args_list
+        )
+
+    @mock.patch.object(util, "_mirror_connect_time", return_value=None)
+    @mock.patch.object(util, "is_resolvable", return_value=True)
+    def test_select_fastest_unreachable(self, m_resolvable, m_connect_time):
+        """Without any connection the first resolvable candidate is used."""
+        candidates = ["http://a/ubuntu", "http://b/ubuntu"]
+
+        mirror = util.search_for_mirror(candidates, select_fastest=True)
+
+        assert "http://a/ubuntu" == mirror
+
 
 class TestMaybeB64Decode:
     """Test the maybe_b64decode helper function."""